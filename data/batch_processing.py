@@ -0,0 +1,257 @@
+import asyncio
+import glob
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, List, Any, Optional, Callable, Iterable, Iterator
+
+# File types the batch mode knows how to read
+SUPPORTED_EXTENSIONS = ('.md', '.txt', '.pdf')
+
+
+class RateLimiter:
+    """Thread-safe token bucket allowing `rate` calls per second with bursts of up to `burst`"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def set_rate(self, rate: float, burst: int = 1) -> None:
+        """Change the allowed rate; tokens already accumulated are kept up to the new burst"""
+        with self._lock:
+            self.rate = rate
+            self.burst = max(1, burst)
+            self._tokens = min(self._tokens, float(self.burst))
+
+    def acquire(self) -> float:
+        """Block until a call is allowed; returns the time spent waiting"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+# One limiter per provider, shared by every generator in the process
+_provider_limiters: Dict[str, RateLimiter] = {}
+_provider_limiters_lock = threading.Lock()
+
+
+def get_provider_rate_limiter(provider: str, requests_per_second: float, burst: int = 1) -> RateLimiter:
+    """Return the process-wide rate limiter for a provider, creating it on first use
+
+    A later call with a different rate changes the shared limiter, since all callers draw on the same quota.
+    """
+    with _provider_limiters_lock:
+        limiter = _provider_limiters.get(provider)
+        if limiter is None:
+            limiter = RateLimiter(requests_per_second, burst)
+            _provider_limiters[provider] = limiter
+        elif limiter.rate != requests_per_second or limiter.burst != max(1, burst):
+            print(f"⚠️ Rate limit for {provider} changed from {limiter.rate:g} to {requests_per_second:g} requests/s")
+            limiter.set_rate(requests_per_second, burst)
+        return limiter
+
+
+class RateLimitedAdapter:
+    """Wraps an AI adapter so every generate_content call first acquires a rate limiter"""
+
+    def __init__(self, adapter, limiter: RateLimiter):
+        self.adapter = adapter
+        self.limiter = limiter
+
+    def generate_content(self, prompt: str, *args, **kwargs) -> str:
+        self.limiter.acquire()
+        return self.adapter.generate_content(prompt, *args, **kwargs)
+
+    def generate_content_stream(self, prompt: str, *args, **kwargs) -> Iterator[str]:
+        self.limiter.acquire()
+        stream = getattr(self.adapter, 'generate_content_stream', None)
+        if stream is None:
+            yield self.adapter.generate_content(prompt, *args, **kwargs)
+        else:
+            yield from stream(prompt, *args, **kwargs)
+
+    def get_provider_info(self) -> Dict[str, Any]:
+        return self.adapter.get_provider_info()
+
+    def __getattr__(self, name):
+        return getattr(self.adapter, name)
+
+
+@contextmanager
+def _rate_limited(generator, requests_per_second: Optional[float]) -> Iterator[None]:
+    """Rate-limit the generator's provider calls for the duration of the block
+
+    The limiter goes under the response cache and the retry layer, so cache hits never wait
+    for a token while every attempt actually sent to the provider does; the adapter chain is
+    restored afterwards.
+    """
+    if not requests_per_second:
+        yield
+        return
+    from response_cache import CachedAIAdapter
+    from resilient_adapter import ResilientAdapter
+
+    parent, adapter = None, generator.ai
+    while isinstance(adapter, (CachedAIAdapter, ResilientAdapter)):
+        parent, adapter = adapter, adapter.adapter
+    if isinstance(adapter, RateLimitedAdapter):
+        yield
+        return
+    provider = adapter.get_provider_info().get('provider', 'default')
+    limited = RateLimitedAdapter(adapter, get_provider_rate_limiter(provider, requests_per_second))
+    if parent is None:
+        generator.ai = limited
+    else:
+        parent.adapter = limited
+    try:
+        yield
+    finally:
+        if parent is None:
+            generator.ai = adapter
+        else:
+            parent.adapter = adapter
+
+
+def collect_documents(sources: Iterable[str]) -> List[str]:
+    """Expand directories and glob patterns into a sorted, de-duplicated list of document paths"""
+    if isinstance(sources, str):
+        sources = [sources]
+
+    documents = []
+    for source in sources:
+        if os.path.isdir(source):
+            candidates = [os.path.join(source, name) for name in os.listdir(source)]
+        else:
+            candidates = glob.glob(source, recursive=True)
+        for path in candidates:
+            if os.path.isfile(path) and path.lower().endswith(SUPPORTED_EXTENSIONS):
+                documents.append(os.path.normpath(path))
+
+    return sorted(set(documents))
+
+
+def unique_output_name(path: str, used_names: set) -> str:
+    """HTML file name for a document, numbered when another document already uses its name"""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    name = f"{stem}_knowledge_graph.html"
+    suffix = 2
+    while name in used_names:
+        name = f"{stem}_{suffix}_knowledge_graph.html"
+        suffix += 1
+    used_names.add(name)
+    return name
+
+
+def output_paths(documents: List[str], output_dir: str) -> Dict[str, str]:
+    """Map each document to an HTML output path, keeping names unique across directories"""
+    used_names = set()
+    return {path: os.path.join(output_dir, unique_output_name(path, used_names)) for path in documents}
+
+
+def process_document(generator, path: str, output_file: str, incremental: bool = False) -> Dict[str, Any]:
+    """Run the single-document pipeline for one file and describe the outcome
+
+    With incremental, text documents only re-extract the sections changed since the last run.
+    A failed extraction is reported as "failed" and leaves the document's existing outputs alone
+    instead of replacing them with the placeholder graph.
+    """
+    from knowledge_graph_generator import output_sidecar
+
+    started = time.perf_counter()
+    result = {"document": path, "html": output_file, "data": output_sidecar(output_file, '_data.json')}
+    try:
+        if path.lower().endswith('.pdf'):
+            html_file = generator.process_pdf_to_knowledge_graph(path, output_file, save_fallback=False)
+        else:
+            with open(path, 'r', encoding='utf-8') as f:
+                text = f.read()
+            if incremental:
+                html_file = generator.process_text_incrementally(text, output_file, save_fallback=False)
+            else:
+                html_file = generator.process_text_to_knowledge_graph(text, output_file, save_fallback=False)
+        result["status"] = "ok" if html_file else "failed"
+        if not html_file:
+            result["error"] = "extraction failed, existing outputs kept"
+    except Exception as e:
+        result["status"] = "failed"
+        result["error"] = str(e)
+    result["seconds"] = round(time.perf_counter() - started, 3)
+    return result
+
+
+async def process_documents_async(generator, sources: Iterable[str], output_dir: str = "knowledge_graphs",
+                                  concurrency: int = 4, requests_per_second: Optional[float] = None,
+                                  on_result: Optional[Callable[[Dict[str, Any]], None]] = None) -> List[Dict[str, Any]]:
+    """
+    Extract knowledge graphs for many documents concurrently
+
+    Args:
+        generator: KnowledgeGraphGenerator shared by all documents
+        sources: Directories, files or glob patterns (e.g. "data/*-Lore.md")
+        output_dir: Directory receiving one HTML + _data.json pair per document
+        concurrency: Maximum number of documents processed at the same time
+        requests_per_second: Model call limit for the generator's provider; None disables limiting
+        on_result: Called with each document's result as soon as it finishes
+
+    Returns:
+        One result dict per document, in completion order
+    """
+    documents = collect_documents(sources)
+    if not documents:
+        print("⚠️ No documents found for batch processing")
+        return []
+
+    os.makedirs(output_dir, exist_ok=True)
+    outputs = output_paths(documents, output_dir)
+
+    print(f"📚 Processing {len(documents)} documents with concurrency {concurrency}")
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+    manifest_file = os.path.join(output_dir, "batch_results.jsonl")
+    batch_started = time.perf_counter()
+    results = []
+
+    with _rate_limited(generator, requests_per_second), ThreadPoolExecutor(max_workers=concurrency) as executor:
+        async def run_one(path: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await loop.run_in_executor(executor, process_document, generator, path, outputs[path])
+
+        with open(manifest_file, 'a', encoding='utf-8') as manifest:
+            for finished in asyncio.as_completed([run_one(path) for path in documents]):
+                result = await finished
+                results.append(result)
+                # Record each document as soon as it is done so partial runs still leave a trail
+                manifest.write(json.dumps(result, ensure_ascii=False) + "\n")
+                manifest.flush()
+                status_icon = "✅" if result["status"] == "ok" else "❌"
+                print(f"{status_icon} [{len(results)}/{len(documents)}] {result['document']} ({result['seconds']}s)")
+                if on_result:
+                    on_result(result)
+    # Documents only update the similarity index in memory; it is written once for the whole batch
+    generator.flush_similarity_index()
+
+    print(f"📚 Batch finished in {time.perf_counter() - batch_started:.2f}s, results logged to {manifest_file}")
+    return results
+
+
+def process_documents(generator, sources: Iterable[str], output_dir: str = "knowledge_graphs",
+                      concurrency: int = 4, requests_per_second: Optional[float] = None,
+                      on_result: Optional[Callable[[Dict[str, Any]], None]] = None) -> List[Dict[str, Any]]:
+    """Synchronous entry point for process_documents_async"""
+    return asyncio.run(process_documents_async(generator, sources, output_dir, concurrency,
+                                               requests_per_second, on_result))
@@ -0,0 +1,84 @@
+"""Micro-benchmark: per-entity cost of keyword type guessing on large graphs
+
+Compares the compiled EntityTypeClassifier with the original chain of
+any(word in name ...) scans and checks that both give the same answers.
+
+    python benchmarks/bench_entity_classifier.py --entities 10000 50000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from entity_classifier import get_entity_classifier
+
+
+def legacy_guess_entity_type(entity):
+    """The pattern matching KnowledgeGraphGenerator._guess_entity_type used before the compiled classifier"""
+    name = entity.get('name', '').lower()
+    description = entity.get('description', '').lower()
+
+    if any(word in name for word in ['university', 'college', 'school', 'company', 'corp', 'inc', 'organization']):
+        return 'workplace'
+    elif any(word in name for word in ['degree', 'bachelor', 'master', 'phd', 'certification', 'license', 'certified']):
+        return 'qualification'
+    elif any(word in name for word in ['manager', 'director', 'analyst', 'engineer', 'developer', 'specialist', 'coordinator']):
+        return 'role'
+    elif any(word in name for word in ['software', 'system', 'platform', 'tool', 'application', 'database']):
+        return 'tool'
+    elif any(word in description for word in ['knowledge', 'expertise', 'understanding', 'domain', 'field']):
+        return 'knowledge'
+    elif any(word in description for word in ['method', 'approach', 'process', 'methodology', 'framework']):
+        return 'methodology'
+    else:
+        return 'skill'
+
+
+WORDS = ("council", "dawnlight", "ledger", "trade", "route", "senior", "data", "engineer", "capital",
+         "university", "master", "vote", "system", "alliance", "python", "tech", "corp", "faction",
+         "treasury", "principle", "harbor", "process", "domain", "network", "broker", "license")
+
+
+def make_entities(count, seed=7):
+    rng = random.Random(seed)
+    entities = []
+    for index in range(count):
+        name = " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 4)))
+        description = " ".join(rng.choice(WORDS) for _ in range(rng.randint(4, 16)))
+        entities.append({"id": f"e{index}", "name": name.title(), "description": description})
+    return entities
+
+
+def time_per_entity(guess, entities, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for entity in entities:
+            guess(entity)
+        best = min(best, time.perf_counter() - started)
+    return best / len(entities)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--entities', type=int, nargs='+', default=[10000, 50000])
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    classifier = get_entity_classifier()
+    print(f"classifier build: {(time.perf_counter() - started) * 1000:.2f} ms (once per process)")
+
+    for count in args.entities:
+        entities = make_entities(count)
+        mismatches = sum(1 for e in entities if classifier.guess(e) != legacy_guess_entity_type(e))
+        legacy = time_per_entity(legacy_guess_entity_type, entities)
+        compiled = time_per_entity(classifier.guess, entities)
+        print(f"{count:>7} entities | legacy {legacy * 1e6:6.2f} us/entity | compiled {compiled * 1e6:6.2f} us/entity "
+              f"| graph total {compiled * count * 1000:8.1f} ms | mismatches {mismatches}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+"""Benchmark: speed and merge accuracy of cross-document entity resolution
+
+Builds a synthetic corpus in which every true entity appears in several documents
+under noisy variants of its name (case, punctuation, articles, version suffixes,
+typos, swapped word order), then compares the blocking/LSH resolver with an
+all-pairs comparison using the same verification rule. Accuracy is pairwise
+precision/recall against the known clusters.
+
+    python benchmarks/bench_entity_resolution.py --entities 500 2000 10000
+"""
+import argparse
+import itertools
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from entity_resolution import (
+    JACCARD_THRESHOLD, _EntityRecord, _compatible, _jaccard, find_duplicate_clusters, resolve_knowledge_graphs
+)
+
+SYLLABLES = ("dawn", "light", "iron", "law", "ember", "star", "trace", "chain", "break", "gray", "line",
+             "echo", "zero", "vic", "tor", "al", "bert", "cas", "sian", "mi", "ra", "kno", "sol", "ven")
+WORDS = ("council", "ledger", "guild", "harbor", "alliance", "python", "treasury", "archive", "network",
+         "accord", "academy", "vault", "order", "senate", "market", "signal", "citadel", "forge")
+TYPES = ("person", "organization", "skill", "tool", "concept", "location")
+
+
+def _true_name(rng):
+    words = ["".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3))) for _ in range(rng.randint(1, 2))]
+    words += [rng.choice(WORDS) for _ in range(rng.randint(0, 2))]
+    return " ".join(words).title()
+
+
+def _variant(name, rng):
+    kind = rng.random()
+    if kind < 0.25:
+        return name.upper() if rng.random() < 0.5 else name.lower()
+    if kind < 0.4:
+        return f"The {name}"
+    if kind < 0.5:
+        return f"{name} 2.0"
+    if kind < 0.65:
+        index = rng.randrange(len(name))
+        return name[:index] + rng.choice("aeiou") + name[index + 1:]
+    if kind < 0.75:
+        return " ".join(reversed(name.split()))
+    if kind < 0.85:
+        return name.replace(" ", "-")
+    return name
+
+
+def make_corpus(entity_count, mentions=3, documents=20, seed=11):
+    """Graphs plus, for every entity occurrence in encounter order, the id of the true entity"""
+    rng = random.Random(seed)
+    names = set()
+    while len(names) < entity_count:
+        names.add(_true_name(rng))
+    truth = [(name, rng.choice(TYPES)) for name in sorted(names)]
+
+    graphs = [{"entities": [], "relationships": [], "summary": f"document {d}"} for d in range(documents)]
+    for true_id, (name, entity_type) in enumerate(truth):
+        for document in rng.sample(range(documents), min(mentions, documents)):
+            graph = graphs[document]
+            local_id = f"e{len(graph['entities'])}"
+            graph["entities"].append({"id": local_id, "name": _variant(name, rng), "type": entity_type,
+                                      "importance": rng.randint(1, 10), "true_id": true_id})
+            if len(graph["entities"]) > 1:
+                other = rng.randrange(len(graph["entities"]) - 1)
+                graph["relationships"].append({"source": local_id, "target": f"e{other}",
+                                               "type": "related_to", "strength": 5})
+    labels = [entity["true_id"] for graph in graphs for entity in graph["entities"]]
+    return graphs, labels
+
+
+def all_pairs_clusters(entities):
+    """Reference: the same match rules applied to every pair of distinct names"""
+    records = [_EntityRecord(position, entity) for position, entity in enumerate(entities)]
+    parent = list(range(len(records)))
+
+    def find(item):
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    for a, b in itertools.combinations(records, 2):
+        compatible = _compatible(a.type, a.numbers, b.type, b.numbers)
+        same = a.name == b.name or (compatible and a.tokens and a.tokens == b.tokens) or \
+            (compatible and _jaccard(a.ngrams, b.ngrams) >= JACCARD_THRESHOLD)
+        if same:
+            parent[find(a.position)] = find(b.position)
+    clusters = {}
+    for record in records:
+        clusters.setdefault(find(record.position), []).append(record.position)
+    return [members for members in clusters.values() if len(members) > 1]
+
+
+def pairwise_scores(clusters, labels):
+    predicted = {pair for members in clusters for pair in itertools.combinations(sorted(members), 2)}
+    by_label = {}
+    for position, label in enumerate(labels):
+        by_label.setdefault(label, []).append(position)
+    actual = {pair for members in by_label.values() for pair in itertools.combinations(members, 2)}
+    true_positives = len(predicted & actual)
+    precision = true_positives / len(predicted) if predicted else 1.0
+    recall = true_positives / len(actual) if actual else 1.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return precision, recall, f1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--entities', type=int, nargs='+', default=[500, 2000, 10000],
+                        help="number of true entities (each mentioned in --mentions documents)")
+    parser.add_argument('--mentions', type=int, default=3)
+    parser.add_argument('--all-pairs-limit', type=int, default=3000,
+                        help="skip the quadratic reference above this many entity occurrences")
+    args = parser.parse_args()
+
+    for count in args.entities:
+        graphs, labels = make_corpus(count, args.mentions)
+        entities = [entity for graph in graphs for entity in graph["entities"]]
+
+        stats = {}
+        started = time.perf_counter()
+        clusters = find_duplicate_clusters(entities, stats=stats)
+        blocked_seconds = time.perf_counter() - started
+        precision, recall, f1 = pairwise_scores(clusters, labels)
+
+        started = time.perf_counter()
+        merged = resolve_knowledge_graphs(graphs)
+        merge_seconds = time.perf_counter() - started
+
+        line = (f"{len(entities):>6} occurrences | blocking {blocked_seconds:6.2f}s "
+                f"({stats['candidate_pairs']} LSH candidates) | full merge {merge_seconds:6.2f}s "
+                f"-> {len(merged['entities'])} entities (true {count}) | "
+                f"P {precision:.3f} R {recall:.3f} F1 {f1:.3f}")
+        if len(entities) <= args.all_pairs_limit:
+            started = time.perf_counter()
+            reference = all_pairs_clusters(entities)
+            reference_seconds = time.perf_counter() - started
+            _, _, reference_f1 = pairwise_scores(reference, labels)
+            line += f" | all-pairs {reference_seconds:6.2f}s F1 {reference_f1:.3f}"
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
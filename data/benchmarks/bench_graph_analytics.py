@@ -0,0 +1,82 @@
+"""Benchmark: speed of the graph analytics and accuracy of the sampled betweenness
+
+Builds synthetic graphs with community structure (dense groups, a few hubs and
+sparse links between groups), times every metric, and compares the sampled
+betweenness estimate with the exact value (all nodes as pivots) on the smaller sizes.
+
+    python benchmarks/bench_graph_analytics.py --edges 1000 10000 100000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from graph_analytics import BETWEENNESS_SAMPLES, apply_graph_analytics, betweenness, build_adjacency, degrees, \
+    label_propagation, pagerank
+
+
+def make_graph(edges: int, seed: int = 0) -> dict:
+    rng = np.random.default_rng(seed)
+    nodes = max(10, edges // 4)
+    group_size = 25
+    groups = rng.integers(0, nodes // group_size, size=nodes)
+    members = [np.flatnonzero(groups == group) for group in range(nodes // group_size)]
+
+    sources = rng.integers(0, nodes, size=edges)
+    targets = np.empty(edges, dtype=np.int64)
+    for index, source in enumerate(sources):
+        roll = rng.random()
+        if roll < 0.85 and len(members[groups[source]]) > 1:
+            targets[index] = rng.choice(members[groups[source]])
+        elif roll < 0.9:
+            targets[index] = rng.integers(0, min(nodes, 20))  # hubs
+        else:
+            targets[index] = rng.integers(0, nodes)
+    return {
+        "entities": [{"id": f"n{index}", "name": f"Node {index}", "importance": 5.0} for index in range(nodes)],
+        "relationships": [{"source": f"n{s}", "target": f"n{t}", "strength": float(rng.integers(1, 11))}
+                          for s, t in zip(sources, targets)],
+        "groups": groups
+    }
+
+
+def _timed(function, *args):
+    started = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--edges', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--exact-limit', type=int, default=5000,
+                        help="skip the exact betweenness reference above this many nodes")
+    args = parser.parse_args()
+
+    for edges in args.edges:
+        graph_data = make_graph(edges)
+        (ids, graph), build_seconds = _timed(build_adjacency, graph_data["entities"], graph_data["relationships"])
+        _, pagerank_seconds = _timed(pagerank, graph)
+        _, degree_seconds = _timed(degrees, graph)
+        sampled, betweenness_seconds = _timed(betweenness, graph)
+        communities, communities_seconds = _timed(label_propagation, graph)
+        _, total_seconds = _timed(apply_graph_analytics, graph_data)
+
+        line = (f"{edges:>7} edges {len(ids):>6} nodes | build {build_seconds:5.2f}s | pagerank {pagerank_seconds:5.2f}s "
+                f"| degree {degree_seconds:5.2f}s | betweenness ({BETWEENNESS_SAMPLES} pivots) {betweenness_seconds:5.2f}s "
+                f"| communities {communities_seconds:5.2f}s -> {communities.max() + 1} | total {total_seconds:5.2f}s")
+        if len(ids) <= args.exact_limit:
+            exact, exact_seconds = _timed(betweenness, graph, None)
+            correlation = np.corrcoef(sampled, exact)[0, 1]
+            top = max(1, len(ids) // 100)
+            overlap = len(set(np.argsort(-sampled)[:top]) & set(np.argsort(-exact)[:top])) / top
+            line += f" | exact betweenness {exact_seconds:6.2f}s, corr {correlation:.3f}, top-1% overlap {overlap:.2f}"
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
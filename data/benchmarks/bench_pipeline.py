@@ -0,0 +1,224 @@
+"""Offline pipeline benchmark suite on the deterministic LocalFakeAdapter
+
+Measures extraction (model answer parsing plus type cleaning), cleaning alone,
+visualization generation and batch runs at several graph sizes without any network
+access, plus the startup cost of a fresh interpreter: importing knowledge_graph_generator
+and a complete `main.py render` run. Results are written to benchmarks/results/pipeline_<commit>.json so runs on
+different commits can be compared:
+
+    python benchmarks/bench_pipeline.py
+    python benchmarks/bench_pipeline.py --sizes 10 100 --latency 0.2 --compare benchmarks/results/pipeline_abc1234.json
+"""
+import argparse
+import copy
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+PACKAGE_DIR = os.path.dirname(BENCHMARK_DIR)
+sys.path.insert(0, PACKAGE_DIR)
+
+from knowledge_graph_generator import KnowledgeGraphGenerator
+from local_adapter import LocalFakeAdapter
+from batch_processing import process_documents
+
+SCENARIOS = ("extraction", "cleaning", "visualization", "batch")
+BATCH_DOCUMENTS = 10
+SAMPLE_TEXT = ("Knox Ironlaw leads the Iron Council in the Harbor District. He studied Maritime Law at the "
+               "Dawnlight Academy and keeps the Treasury Ledger with Mira Dawnlight.\n\n") * 4
+
+
+def _git_commit() -> tuple:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=BENCHMARK_DIR, check=True).stdout.strip()
+        dirty = bool(subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], capture_output=True,
+                                    text=True, cwd=BENCHMARK_DIR).stdout.strip())
+        return commit, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown", False
+
+
+def _timed(prepare, repeat: int) -> list:
+    """Time `repeat` runs; prepare() does the untimed setup and returns the callable to time"""
+    timings = []
+    for _ in range(repeat):
+        run = prepare()
+        started = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def run_scenario(scenario: str, entities: int, repeat: int, latency: float, failure_rate: float,
+                 work_dir: str) -> dict:
+    adapter = LocalFakeAdapter(latency_seconds=latency, failure_rate=failure_rate, entities_per_call=entities)
+    # Large chunk size: one model call per document, so the size of the answer is what varies
+    generator = KnowledgeGraphGenerator(ai_provider=adapter, chunk_size_chars=10 ** 9)
+    raw_graph = generator._parse_knowledge_graph_response(adapter._extract(SAMPLE_TEXT))
+
+    if scenario == "extraction":
+        def prepare():
+            adapter._attempts.clear()
+            return lambda: generator.extract_knowledge_graph_from_text(SAMPLE_TEXT, chunked=False)
+    elif scenario == "cleaning":
+        def prepare():
+            graph = copy.deepcopy(raw_graph)
+            return lambda: generator._validate_and_clean_entities(graph)
+    elif scenario == "visualization":
+        cleaned = generator._validate_and_clean_entities(copy.deepcopy(raw_graph))
+        output_file = os.path.join(work_dir, f"viz_{entities}.html")
+
+        def prepare():
+            return lambda: generator.generate_interactive_visualization(cleaned, output_file)
+    elif scenario == "batch":
+        # The same total number of entities, spread over several documents
+        adapter.entities_per_call = max(1, entities // BATCH_DOCUMENTS)
+        source_dir = os.path.join(work_dir, f"batch_{entities}")
+        os.makedirs(source_dir, exist_ok=True)
+        for index in range(BATCH_DOCUMENTS):
+            with open(os.path.join(source_dir, f"doc_{index}.md"), 'w', encoding='utf-8') as f:
+                f.write(f"# Document {index}\n\n{SAMPLE_TEXT}")
+
+        def prepare():
+            adapter._attempts.clear()
+            output_dir = tempfile.mkdtemp(dir=work_dir)
+            return lambda: process_documents(generator, [source_dir], output_dir, concurrency=4)
+    else:
+        raise ValueError(f"Unknown scenario: {scenario}")
+
+    generator.metrics.reset()
+    timings = _timed(prepare, repeat)
+    report = generator.get_run_report()
+    return {
+        "scenario": scenario,
+        "entities": entities,
+        "runs": repeat,
+        "seconds_median": round(statistics.median(timings), 5),
+        "seconds_min": round(min(timings), 5),
+        "entities_per_second": round(entities / statistics.median(timings), 1) if min(timings) > 0 else None,
+        "model_calls": report["totals"]["model_calls"] // repeat,
+        "model_errors": report["totals"]["errors"] // repeat,
+        "fallbacks": report["counters"].get("extraction.fallbacks", 0)
+    }
+
+
+def check_extracted(result: dict) -> None:
+    """Exit when an extracting scenario only measured the default-graph fallback"""
+    if result["scenario"] not in ("extraction", "batch"):
+        return
+    if result["model_calls"] == 0 or result["fallbacks"]:
+        print(f"❌ {result['scenario']} at {result['entities']} entities did not extract: "
+              f"{result['model_calls']} model calls, {result['fallbacks']} fallbacks to the default graph")
+        sys.exit(1)
+
+
+def _subprocess_seconds(command: list, repeat: int) -> list:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        subprocess.run(command, cwd=PACKAGE_DIR, check=True, stdout=subprocess.DEVNULL)
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def measure_startup(repeat: int, work_dir: str) -> dict:
+    """Fresh-interpreter costs in milliseconds: the module import alone, and a whole render-only CLI run
+
+    The render run is reported net of a bare `python -c pass`, i.e. what the CLI adds to interpreter startup.
+    """
+    import_script = ("import time; started = time.perf_counter(); import knowledge_graph_generator; "
+                     "print(time.perf_counter() - started)")
+    import_seconds = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', import_script], cwd=PACKAGE_DIR, check=True,
+                                capture_output=True, text=True).stdout
+        import_seconds.append(float(output.strip().splitlines()[-1]))
+
+    adapter = LocalFakeAdapter()
+    graph = KnowledgeGraphGenerator(ai_provider=adapter)._parse_knowledge_graph_response(adapter._extract(SAMPLE_TEXT))
+    data_file = os.path.join(work_dir, "startup_data.json")
+    with open(data_file, 'w', encoding='utf-8') as f:
+        json.dump(graph, f)
+
+    bare = statistics.median(_subprocess_seconds([sys.executable, '-c', 'pass'], repeat))
+    render = _subprocess_seconds([sys.executable, 'main.py', 'render', data_file, '--no-layout', '-q'], repeat)
+    return {
+        "import_ms_median": round(1000 * statistics.median(import_seconds), 1),
+        "render_cli_ms_median": round(1000 * (statistics.median(render) - bare), 1),
+        "interpreter_ms_median": round(1000 * bare, 1)
+    }
+
+
+def compare(results: list, baseline_file: str, startup: dict = None) -> None:
+    with open(baseline_file, 'r', encoding='utf-8') as f:
+        baseline_run = json.load(f)
+    baseline = {(r["scenario"], r["entities"]): r for r in baseline_run["results"]}
+    print(f"\nCompared with {baseline_file}:")
+    previous_startup = baseline_run.get("startup") or {}
+    for key, value in (startup or {}).items():
+        if previous_startup.get(key):
+            print(f"  {key:<22}: {previous_startup[key]:.1f} -> {value:.1f} ({value / previous_startup[key]:.2f}x)")
+    for result in results:
+        previous = baseline.get((result["scenario"], result["entities"]))
+        if previous and previous["seconds_median"] > 0:
+            ratio = result["seconds_median"] / previous["seconds_median"]
+            print(f"  {result['scenario']:<13} {result['entities']:>6} entities: "
+                  f"{previous['seconds_median']:.4f}s -> {result['seconds_median']:.4f}s ({ratio:.2f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 10000])
+    parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--latency', type=float, default=0.0, help="simulated seconds per model call")
+    parser.add_argument('--failure-rate', type=float, default=0.0, help="share of model calls that fail")
+    parser.add_argument('--output', help="result file (default: benchmarks/results/pipeline_<commit>.json)")
+    parser.add_argument('--compare', help="earlier result file to compare against")
+    parser.add_argument('--no-startup', action='store_true', help="skip the fresh-interpreter startup measurements")
+    args = parser.parse_args()
+
+    commit, dirty = _git_commit()
+    results = []
+    startup = None
+    with tempfile.TemporaryDirectory() as work_dir:
+        if not args.no_startup:
+            startup = measure_startup(max(args.repeat, 5), work_dir)
+            print(f"startup       import {startup['import_ms_median']:.1f}ms | render CLI "
+                  f"{startup['render_cli_ms_median']:.1f}ms over a {startup['interpreter_ms_median']:.1f}ms interpreter")
+        for scenario in args.scenarios:
+            for entities in args.sizes:
+                result = run_scenario(scenario, entities, args.repeat, args.latency, args.failure_rate, work_dir)
+                results.append(result)
+                print(f"{scenario:<13} {entities:>6} entities | median {result['seconds_median']:8.4f}s "
+                      f"| min {result['seconds_min']:8.4f}s | {result['model_calls']} model calls")
+                check_extracted(result)
+
+    output_file = args.output or os.path.join(BENCHMARK_DIR, "results", f"pipeline_{commit}{'-dirty' if dirty else ''}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output_file)), exist_ok=True)
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump({
+            "commit": commit,
+            "dirty": dirty,
+            "timestamp": time.strftime('%Y-%m-%dT%H:%M:%S'),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "config": {"repeat": args.repeat, "latency": args.latency, "failure_rate": args.failure_rate},
+            "startup": startup,
+            "results": results
+        }, f, indent=2)
+    print(f"Results saved to {output_file}")
+
+    if args.compare:
+        compare(results, args.compare, startup)
+
+
+if __name__ == '__main__':
+    main()
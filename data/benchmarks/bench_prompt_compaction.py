@@ -0,0 +1,72 @@
+"""Benchmark: prompt tokens and extraction latency with and without input compaction
+
+Extracts every document twice on the LocalFakeAdapter, once as is and once cleaned (and,
+with --token-budget, compacted), and reports the estimated input tokens, the tokens the
+model calls actually received and the extraction wall time. The adapter's prompt
+processing speed stands in for a model's prefill time, so shorter prompts answer sooner:
+
+    python benchmarks/bench_prompt_compaction.py
+    python benchmarks/bench_prompt_compaction.py --token-budget 600 --prompt-tokens-per-second 1000
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from knowledge_graph_generator import KnowledgeGraphGenerator
+from local_adapter import LocalFakeAdapter
+
+
+def run(text: str, compact: bool, args) -> tuple:
+    adapter = LocalFakeAdapter(latency_seconds=args.latency, prompt_tokens_per_second=args.prompt_tokens_per_second)
+    generator = KnowledgeGraphGenerator(ai_provider=adapter, verbose=False, compact_input=compact,
+                                        token_budget=args.token_budget if compact else None)
+    started = time.perf_counter()
+    graph = generator.extract_knowledge_graph_from_text(text)
+    seconds = time.perf_counter() - started
+    report = generator.get_run_report()
+    if report["totals"]["model_calls"] == 0 or report["counters"].get("extraction.fallbacks"):
+        # Latencies of the default-graph fallback say nothing about compaction
+        print(f"❌ Extraction {'with' if compact else 'without'} compaction did not reach the model: "
+              f"{report['totals']['model_calls']} model calls, "
+              f"{report['counters'].get('extraction.fallbacks', 0)} fallbacks to the default graph")
+        sys.exit(1)
+    prompt_tokens = report["totals"]["prompt_tokens"]
+    return seconds, prompt_tokens, len(graph["entities"]) if graph else 0, generator.last_compaction
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('documents', nargs='*', help="documents to extract (default: the bundled *.md files)")
+    parser.add_argument('--token-budget', type=int, help="compact documents over this many estimated tokens")
+    parser.add_argument('--latency', type=float, default=0.05, help="simulated seconds to first token")
+    parser.add_argument('--prompt-tokens-per-second', type=float, default=2000.0,
+                        help="simulated prompt processing speed")
+    args = parser.parse_args()
+
+    documents = args.documents or sorted(glob.glob(os.path.join(os.path.dirname(os.path.dirname(
+        os.path.abspath(__file__))), "*.md")))
+    totals = [0.0, 0.0, 0, 0]
+    for path in documents:
+        with open(path, 'r', encoding='utf-8') as f:
+            text = f.read()
+        raw_seconds, raw_prompt, raw_entities, _ = run(text, False, args)
+        seconds, prompt, entities, stats = run(text, True, args)
+        totals[0] += raw_seconds
+        totals[1] += seconds
+        totals[2] += raw_prompt
+        totals[3] += prompt
+        print(f"{os.path.basename(path)[:28]:<28} | input {stats['tokens_before']:>6} -> {stats['tokens_after']:>6} "
+              f"tokens{' (budget)' if stats['compacted'] else '         '} | prompts {raw_prompt:>6} -> {prompt:>6} "
+              f"| {raw_seconds:6.3f}s -> {seconds:6.3f}s ({seconds / max(raw_seconds, 1e-9) - 1:+.0%}) "
+              f"| entities {raw_entities} -> {entities}")
+    if len(documents) > 1:
+        print(f"{'total':<28} | prompts {totals[2]} -> {totals[3]} ({totals[3] / max(1, totals[2]) - 1:+.0%}) "
+              f"| {totals[0]:.3f}s -> {totals[1]:.3f}s ({totals[1] / totals[0] - 1:+.0%})")
+
+
+if __name__ == '__main__':
+    main()
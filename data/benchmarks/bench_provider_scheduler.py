@@ -0,0 +1,108 @@
+"""Benchmark: aggregate throughput of the provider scheduler against each provider's quota
+
+Simulates three providers on the LocalFakeAdapter, each enforcing its own requests per
+minute quota by answering "429 Too Many Requests" when it is exceeded. Concurrent callers
+send prompts for a fixed time through a single provider and through the scheduler over
+all three, and the completed calls per second are compared with the sum of the quotas.
+The third provider is configured with twice its real quota, so the scheduler only learns
+its limit from the 429s and has to shift the work away from it:
+
+    python benchmarks/bench_provider_scheduler.py --seconds 10 --callers 16
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from local_adapter import LocalFakeAdapter
+from provider_scheduler import AllProvidersBusyError, ProviderBackend, ProviderScheduler, TokenBucket
+
+# (name, real requests per minute, latency seconds, requests per minute given to the scheduler)
+PROVIDERS = (("fast", 600, 0.05, 600), ("slow", 300, 0.2, 300), ("misconfigured", 240, 0.1, 480))
+PROMPT = "Classify this entity: Maritime Law (knowledge) mentioned in the Harbor District records."
+
+
+class QuotaError(RuntimeError):
+    """What a provider raises over its quota"""
+
+
+class QuotaEnforcingAdapter:
+    """A provider that rejects calls beyond its real quota, like a hosted API"""
+
+    def __init__(self, adapter, requests_per_minute: float):
+        self.adapter = adapter
+        self.bucket = TokenBucket(requests_per_minute, burst_seconds=1.0)
+        self.lock = threading.Lock()
+
+    def generate_content(self, prompt: str, *args, **kwargs) -> str:
+        with self.lock:
+            now = time.monotonic()
+            if self.bucket.wait_seconds(1, now) > 0:
+                raise QuotaError("429 Too Many Requests: rate limit exceeded")
+            self.bucket.take(1, now)
+        return self.adapter.generate_content(prompt, *args, **kwargs)
+
+    def get_provider_info(self):
+        return self.adapter.get_provider_info()
+
+
+def run(adapter, seconds: float, callers: int) -> tuple:
+    deadline = time.monotonic() + seconds
+    counts = {"ok": 0, "failed": 0}
+    lock = threading.Lock()
+
+    def caller(index: int):
+        sequence = 0
+        while time.monotonic() < deadline:
+            sequence += 1
+            try:
+                adapter.generate_content(f"{PROMPT} [{index}.{sequence}]")
+                outcome = "ok"
+            except (QuotaError, AllProvidersBusyError):
+                outcome = "failed"
+            with lock:
+                counts[outcome] += 1
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=callers) as executor:
+        list(executor.map(caller, range(callers)))
+    return counts["ok"] / (time.monotonic() - started), counts["failed"]
+
+
+def make_providers() -> list:
+    return [(name, QuotaEnforcingAdapter(LocalFakeAdapter(latency_seconds=latency), real_rpm), configured_rpm)
+            for name, real_rpm, latency, configured_rpm in PROVIDERS]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=10.0)
+    parser.add_argument('--callers', type=int, default=16)
+    args = parser.parse_args()
+
+    quota_total = sum(real_rpm for _, real_rpm, _, _ in PROVIDERS) / 60
+    for name, adapter, configured_rpm in make_providers():
+        # A single provider behind its own correctly configured bucket
+        real_rpm = adapter.bucket.rate * 60
+        scheduler = ProviderScheduler([ProviderBackend(adapter, name, min(real_rpm, configured_rpm), burst_seconds=1.0)])
+        per_second, failed = run(scheduler, args.seconds, args.callers)
+        print(f"{name:<14} alone | {per_second:6.1f} calls/s of {real_rpm / 60:5.1f} quota | {failed} failed")
+
+    backends = [ProviderBackend(adapter, name, configured_rpm, burst_seconds=1.0)
+                for name, adapter, configured_rpm in make_providers()]
+    scheduler = ProviderScheduler(backends, cooldown_seconds=1.0, cooldown_max=8.0)
+    per_second, failed = run(scheduler, args.seconds, args.callers)
+    print(f"{'scheduler':<14} all   | {per_second:6.1f} calls/s of {quota_total:5.1f} quota "
+          f"({per_second / quota_total:.0%}) | {failed} failed")
+    total_calls = sum(stats["calls"] - stats["errors"] for stats in scheduler.stats().values())
+    for name, stats in scheduler.stats().items():
+        print(f"   {name:<14} {100 * (stats['calls'] - stats['errors']) / max(1, total_calls):5.1f}% of calls | "
+              f"{stats['throttled']} throttled | latency {stats['latency_seconds']}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""Benchmark: peak memory of writing a visualization page, whole string vs. streamed
+
+Renders synthetic graphs of increasing size three ways and reports the tracemalloc peak
+(Python allocations on top of the graph itself), the wall time and the file size:
+
+- string: render_inline_page builds the whole page in memory, then it is written
+- stream: write_inline_page serializes the graph to the file a chunk at a time
+- stream+gzip: the same into a gzip stream
+
+    python benchmarks/bench_render_memory.py --entities 1000 10000 100000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from visualization_template import open_output, render_inline_page, write_inline_page
+
+TYPES = ['person', 'skill', 'tool', 'knowledge', 'qualification', 'role', 'workplace', 'methodology']
+WORDS = "data pipeline model graph service team platform design analysis research cloud quality".split()
+
+
+def make_graph(entity_count: int, seed: int = 0) -> dict:
+    rng = random.Random(seed)
+    entities = [{
+        "id": f"entity_{index}",
+        "name": " ".join(rng.choice(WORDS).title() for _ in range(2)) + f" {index}",
+        "type": rng.choice(TYPES),
+        "importance": rng.randint(1, 10),
+        "description": " ".join(rng.choice(WORDS) for _ in range(20)),
+        "attributes": {"level": rng.choice(["junior", "senior", "expert"])}
+    } for index in range(entity_count)]
+    relationships = [{
+        "source": f"entity_{rng.randrange(entity_count)}",
+        "target": f"entity_{rng.randrange(entity_count)}",
+        "type": "related_to",
+        "strength": rng.randint(1, 10),
+        "description": " ".join(rng.choice(WORDS) for _ in range(8))
+    } for _ in range(entity_count * 3)]
+    layout = {entity["id"]: [rng.uniform(-1000, 1000), rng.uniform(-1000, 1000)] for entity in entities}
+    return {"entities": entities, "relationships": relationships, "summary": "Synthetic graph", "layout": layout}
+
+
+def write_string(path: str, graph: dict) -> None:
+    page = render_inline_page(graph["entities"], graph["relationships"], graph["summary"], graph["layout"])
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(page)
+
+
+def write_stream(path: str, graph: dict, compress: bool = False) -> None:
+    with open_output(path, compress) as f:
+        write_inline_page(f, graph["entities"], graph["relationships"], graph["summary"], graph["layout"])
+
+
+def measure(function, *args) -> tuple:
+    tracemalloc.start()
+    started = time.perf_counter()
+    function(*args)
+    seconds = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak, seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--entities', type=int, nargs='+', default=[1000, 10000, 100000])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        for entity_count in args.entities:
+            graph = make_graph(entity_count)
+            line = f"{entity_count:>7} entities"
+            for label, function, extra, name in (("string", write_string, (), "page.html"),
+                                                 ("stream", write_stream, (), "page.html"),
+                                                 ("stream+gzip", write_stream, (True,), "page.html.gz")):
+                path = os.path.join(work_dir, name)
+                peak, seconds = measure(function, path, graph, *extra)
+                line += (f" | {label}: peak {peak / 2 ** 20:7.1f} MB, {seconds:5.2f}s, "
+                         f"file {os.path.getsize(path) / 2 ** 20:6.1f} MB")
+            print(line)
+
+
+if __name__ == '__main__':
+    main()
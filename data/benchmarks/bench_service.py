@@ -0,0 +1,93 @@
+"""Benchmark: HTTP service latency, throughput and backpressure on the LocalFakeAdapter
+
+Starts the service on a free port with a simulated model latency, then lets several
+keep-alive clients post the same document at once and reports requests per second,
+median / p95 latency of the accepted requests and how many were turned away with 503:
+
+    python benchmarks/bench_service.py --clients 1 4 16 64 --workers 2 --queue-size 8
+"""
+import argparse
+import asyncio
+import http.client
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from graph_service import GraphService
+from knowledge_graph_generator import KnowledgeGraphGenerator
+from local_adapter import LocalFakeAdapter
+
+SAMPLE_TEXT = ("Knox Ironlaw leads the Iron Council in the Harbor District. He studied Maritime Law at the "
+               "Dawnlight Academy and keeps the Treasury Ledger with Mira Dawnlight.\n\n") * 4
+
+
+def start_service(args) -> tuple:
+    generator = KnowledgeGraphGenerator(ai_provider=LocalFakeAdapter(latency_seconds=args.latency), verbose=False)
+    service = GraphService(generator, port=0, workers=args.workers, queue_size=args.queue_size)
+    loop = asyncio.new_event_loop()
+    ready = threading.Event()
+
+    async def run():
+        await service.start()
+        ready.set()
+        await asyncio.Event().wait()
+
+    thread = threading.Thread(target=loop.run_until_complete, args=(run(),), daemon=True)
+    thread.start()
+    ready.wait()
+    return service, loop
+
+
+def client(port: int, requests: int) -> list:
+    connection = http.client.HTTPConnection("127.0.0.1", port)
+    outcomes = []
+    body = SAMPLE_TEXT.encode('utf-8')
+    for _ in range(requests):
+        started = time.perf_counter()
+        connection.request("POST", "/extract", body, {"Content-Type": "text/plain"})
+        response = connection.getresponse()
+        response.read()
+        outcomes.append((response.status, time.perf_counter() - started))
+        if response.status != 200:
+            connection.close()  # the connection is reopened on the next request
+    connection.close()
+    return outcomes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', type=int, nargs='+', default=[1, 4, 16, 64])
+    parser.add_argument('--requests', type=int, default=8, help="requests per client")
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--queue-size', type=int, default=8)
+    parser.add_argument('--latency', type=float, default=0.1, help="simulated seconds per model call")
+    args = parser.parse_args()
+
+    service, loop = start_service(args)
+    for clients in args.clients:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=clients) as executor:
+            outcomes = [outcome for result in executor.map(client, [service.port] * clients,
+                                                           [args.requests] * clients) for outcome in result]
+        seconds = time.perf_counter() - started
+        accepted = sorted(latency for status, latency in outcomes if status == 200)
+        rejected = sum(1 for status, _ in outcomes if status == 503)
+        failed = len(outcomes) - len(accepted) - rejected
+        p95 = accepted[int(0.95 * (len(accepted) - 1))] if accepted else 0.0
+        print(f"{clients:>4} clients | {len(accepted) / seconds:6.1f} graphs/s | "
+              f"median {statistics.median(accepted) if accepted else 0.0:6.3f}s p95 {p95:6.3f}s | "
+              f"{rejected:>4} rejected (503) of {len(outcomes)}")
+        if failed:
+            # Failed extractions finish early and would inflate the throughput
+            print(f"❌ {failed} requests failed with another status")
+            sys.exit(1)
+    asyncio.run_coroutine_threadsafe(service.stop(), loop).result()
+
+
+if __name__ == '__main__':
+    main()
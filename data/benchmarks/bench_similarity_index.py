@@ -0,0 +1,79 @@
+"""Benchmark: similarity index build time, query latency and recall of the LSH search
+
+Indexes synthetic entities whose names are variations of a shared vocabulary (the way
+the same skill or tool reappears across documents), then compares exhaustive and LSH
+queries: median / p95 latency and recall@k of LSH against the exact top k.
+
+    python benchmarks/bench_similarity_index.py --entities 10000 100000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from similarity_index import SimilarityIndex
+
+TYPES = ['person', 'skill', 'tool', 'knowledge', 'qualification', 'role', 'workplace', 'methodology']
+STEMS = ("python data cloud kubernetes react security finance design research marketing analytics "
+         "leadership devops testing java rust graph network quantum sales support hiring legal").split()
+SUFFIXES = ["", " 3", " engineering", " platform", " development", " framework", " certification", " team",
+            " strategy", " architecture", " basics", " advanced"]
+
+
+def make_entities(count: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    entities = []
+    for index in range(count):
+        stem = " ".join(rng.sample(STEMS, rng.choice((1, 2)))).title()
+        entities.append({
+            "id": f"entity_{index}",
+            "name": f"{stem}{rng.choice(SUFFIXES)} {rng.randrange(count // 10 + 1)}",
+            "type": rng.choice(TYPES),
+            "description": " ".join(rng.choice(STEMS) for _ in range(12))
+        })
+    return entities
+
+
+def _latency_ms(index: SimilarityIndex, queries: list, k: int, exact: bool) -> tuple:
+    results, latencies = [], []
+    for entity in queries:
+        started = time.perf_counter()
+        results.append(index.query(entity, k, exact=exact))
+        latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+    return results, statistics.median(latencies), latencies[int(0.95 * (len(latencies) - 1))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--entities', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('-k', type=int, default=10)
+    args = parser.parse_args()
+
+    for count in args.entities:
+        entities = make_entities(count)
+        index = SimilarityIndex()
+        started = time.perf_counter()
+        for start in range(0, count, 1000):
+            index.add_entities(entities[start:start + 1000], graph=f"graph_{start // 1000}")
+        build_seconds = time.perf_counter() - started
+        index.query(entities[0], args.k, exact=False)  # sorts the LSH tables once
+
+        queries = random.Random(1).sample(entities, min(args.queries, count))
+        exact, exact_median, exact_p95 = _latency_ms(index, queries, args.k, True)
+        approximate, ann_median, ann_p95 = _latency_ms(index, queries, args.k, False)
+        recall = statistics.mean(
+            len({hit["id"] for hit in found} & {hit["id"] for hit in truth}) / max(1, len(truth))
+            for found, truth in zip(approximate, exact))
+        print(f"{count:>7} entities | build {build_seconds:5.2f}s | exact median {exact_median:6.2f} ms "
+              f"p95 {exact_p95:6.2f} ms | lsh median {ann_median:6.2f} ms p95 {ann_p95:6.2f} ms | "
+              f"recall@{args.k} {recall:.3f}")
+
+
+if __name__ == '__main__':
+    main()
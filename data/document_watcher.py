@@ -0,0 +1,240 @@
+"""Watch mode: keep one warm generator and regenerate graphs as source documents change
+
+DocumentWatcher keeps a (mtime, size) signature of every document matched by the
+sources (directories, files or glob patterns, re-expanded on every scan so new files
+are picked up). A changed signature marks the document pending; once it has been quiet
+for the debounce interval (editors often write a file in several steps) and its content
+hash differs from the last processed version, it is queued for extraction and rendering.
+Text documents go through the incremental pipeline, so an edit only re-extracts the
+sections it touched, and every output is written to a temporary file and renamed.
+
+With the optional watchdog package, file system events (inotify, FSEvents, ...) wake the
+scanner as soon as something is written, with a slow safety rescan in between; without
+it the sources are polled. The adapter is created before the first scan, so the first
+edit does not pay for the provider start-up.
+"""
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional, Iterable, Tuple
+
+from batch_processing import collect_documents, output_paths, unique_output_name, process_document
+from knowledge_graph_generator import output_sidecar
+
+# Seconds between full rescans when file system events are delivered by watchdog
+EVENT_RESCAN_SECONDS = 30.0
+
+
+def _file_signature(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _content_hash(path: str) -> Optional[str]:
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return None
+
+
+def _watched_directories(sources: Iterable[str]) -> Dict[str, bool]:
+    """Directories to subscribe to for each source, mapped to whether to watch them recursively"""
+    directories = {}
+    for source in sources:
+        if os.path.isdir(source):
+            directory, recursive = source, False
+        else:
+            parts = source.replace('\\', '/').split('/')
+            fixed = []
+            for part in parts[:-1]:
+                if any(char in part for char in '*?['):
+                    break
+                fixed.append(part)
+            directory = '/'.join(fixed) or '.'
+            recursive = len(fixed) < len(parts) - 1
+        directory = os.path.normpath(directory)
+        if os.path.isdir(directory):
+            directories[directory] = directories.get(directory, False) or recursive
+    return directories
+
+
+class DocumentWatcher:
+    """Regenerates the knowledge graph of every watched document whose content changes"""
+
+    def __init__(self, generator, sources: Iterable[str], output_dir: str = "knowledge_graphs",
+                 debounce_seconds: float = 0.5, poll_interval: float = 1.0, concurrency: int = 2,
+                 incremental: bool = True):
+        """
+        Args:
+            generator: KnowledgeGraphGenerator kept warm for the lifetime of the watcher
+            sources: Directories, files or glob patterns (e.g. "data/*-Lore.md")
+            output_dir: Directory receiving one HTML + _data.json pair per document, named like batch mode
+            debounce_seconds: Quiet time after the last change before a document is processed
+            poll_interval: Seconds between scans when watchdog is not installed
+            concurrency: Documents processed at the same time
+            incremental: Re-extract only changed sections of text documents
+        """
+        self.generator = generator
+        self.sources = [sources] if isinstance(sources, str) else list(sources)
+        self.output_dir = output_dir
+        self.debounce_seconds = debounce_seconds
+        self.poll_interval = poll_interval
+        self.concurrency = max(1, concurrency)
+        self.incremental = incremental
+        self.outputs: Dict[str, str] = {}
+        self.processed = 0
+        self._used_names = set()
+        self._signatures: Dict[str, Tuple[int, int]] = {}
+        self._hashes: Dict[str, str] = {}
+        self._pending: Dict[str, float] = {}
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._observer = None
+
+    def _output_file(self, path: str) -> str:
+        if path not in self.outputs:
+            self.outputs[path] = os.path.join(self.output_dir, unique_output_name(path, self._used_names))
+        return self.outputs[path]
+
+    def _start_observer(self) -> bool:
+        try:
+            from watchdog.events import FileSystemEventHandler
+            from watchdog.observers import Observer
+        except ImportError:
+            return False
+        wake = self._wake
+
+        class WakeHandler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                if not event.is_directory:
+                    wake.set()
+
+        observer = Observer()
+        handler = WakeHandler()
+        for directory, recursive in _watched_directories(self.sources).items():
+            observer.schedule(handler, directory, recursive=recursive)
+        observer.daemon = True
+        observer.start()
+        self._observer = observer
+        return True
+
+    def prepare(self) -> List[str]:
+        """Warm the adapter, record the current documents and return those whose outputs are missing or stale"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.generator.ai  # creates the adapter now rather than on the first edit
+        documents = collect_documents(self.sources)
+        self.outputs = output_paths(documents, self.output_dir)
+        self._used_names = {os.path.basename(path) for path in self.outputs.values()}
+        stale = []
+        for path in documents:
+            self._signatures[path] = _file_signature(path)
+            self._hashes[path] = _content_hash(path)
+            data_file = output_sidecar(self.outputs[path], '_data.json')
+            if not os.path.exists(data_file) or os.path.getmtime(data_file) < os.path.getmtime(path):
+                stale.append(path)
+        return stale
+
+    def scan(self) -> List[str]:
+        """Mark changed documents pending and return those quiet for the debounce interval"""
+        now = time.monotonic()
+        documents = set(collect_documents(self.sources))
+        for path in list(self._signatures):
+            if path not in documents:
+                del self._signatures[path]
+                self._hashes.pop(path, None)
+                self._pending.pop(path, None)
+                print(f"🗑️ {path} is gone; its graph files are kept")
+        for path in documents:
+            signature = _file_signature(path)
+            if signature is not None and signature != self._signatures.get(path):
+                self._signatures[path] = signature
+                self._pending[path] = now
+        ready = [path for path, changed in self._pending.items() if now - changed >= self.debounce_seconds]
+        for path in ready:
+            del self._pending[path]
+        # Saving without edits, or touching a file, changes its signature but not its content
+        return [path for path in sorted(ready) if _content_hash(path) != self._hashes.get(path)]
+
+    def process(self, paths: List[str], executor: ThreadPoolExecutor, edited: bool = True) -> List[Dict[str, Any]]:
+        """Regenerate the graphs of the given documents and report each result
+
+        Args:
+            edited: The documents were changed while watching, so the time since the edit is reported
+        """
+        for path in paths:
+            self.generator._log(f"🔄 {path} {'changed' if edited else 'has no up-to-date graph'}")
+        results = list(executor.map(
+            lambda path: (path, _content_hash(path),
+                          process_document(self.generator, path, self._output_file(path), self.incremental)),
+            paths))
+        reports = []
+        for path, content_hash, result in results:
+            signature = self._signatures.get(path)
+            if result["status"] == "ok":
+                # Another edit while this one was processed has a new signature and is picked up by the next scan
+                self._hashes[path] = content_hash
+                self.processed += 1
+                since_edit = ""
+                if edited and signature:
+                    since_edit = f" ({time.time() - signature[0] / 1e9:.2f}s after the edit)"
+                print(f"✅ {result['html']} updated in {result['seconds']:.2f}s{since_edit}")
+            else:
+                print(f"❌ {path}: {result.get('error', 'extraction failed')}")
+            reports.append(result)
+        self.generator.flush_similarity_index()
+        return reports
+
+    def run(self) -> int:
+        """Watch until stop() is called (or KeyboardInterrupt); returns the number of graphs regenerated"""
+        self._stop.clear()
+        stale = self.prepare()
+        events = self._start_observer()
+        print(f"👀 Watching {len(self._signatures)} documents "
+              f"({'file system events' if events else f'polling every {self.poll_interval}s'}), "
+              f"writing to {self.output_dir}")
+        try:
+            with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+                if stale:
+                    self.process(stale, executor, edited=False)
+                while not self._stop.is_set():
+                    ready = self.scan()
+                    if ready:
+                        self.process(ready, executor)
+                        continue
+                    timeout = EVENT_RESCAN_SECONDS if events else self.poll_interval
+                    if self._pending:
+                        oldest = min(self._pending.values())
+                        timeout = min(timeout, max(0.01, self.debounce_seconds - (time.monotonic() - oldest)))
+                    # Returns early on a file system event or stop()
+                    self._wake.wait(timeout)
+                    self._wake.clear()
+        finally:
+            if self._observer is not None:
+                self._observer.stop()
+                self._observer.join()
+                self._observer = None
+        return self.processed
+
+    def stop(self) -> None:
+        """Make run() return after the documents being processed are done (safe from any thread)"""
+        self._stop.set()
+        self._wake.set()
+
+
+def watch_documents(generator, sources: Iterable[str], output_dir: str = "knowledge_graphs",
+                    debounce_seconds: float = 0.5, poll_interval: float = 1.0, concurrency: int = 2,
+                    incremental: bool = True) -> int:
+    """Watch documents and regenerate their graphs until interrupted (see DocumentWatcher)"""
+    watcher = DocumentWatcher(generator, sources, output_dir, debounce_seconds, poll_interval, concurrency,
+                              incremental)
+    try:
+        return watcher.run()
+    except KeyboardInterrupt:
+        print(f"👋 Stopped watching after {watcher.processed} updates")
+        return watcher.processed
@@ -0,0 +1,129 @@
+import json
+import os
+import re
+from functools import lru_cache
+from typing import Dict, List, Any, Optional, Tuple
+
+# Lexicon shipped next to this module; extra lexicon files are merged on top of it
+DEFAULT_LEXICON_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "entity_lexicon.json")
+
+
+class _KeywordMatcher:
+    """Ordered keyword rules compiled into regexes once
+
+    A single alternation over every keyword acts as a gate, so text without any
+    keyword (the common case) costs one C-level scan. Otherwise the per-rule patterns
+    are tried in priority order, which gives exactly the answer of the original
+    rule-by-rule substring checks.
+    """
+
+    def __init__(self, rules: List[Tuple[str, List[str]]]):
+        self.rules = []
+        all_keywords = []
+        for entity_type, keywords in rules:
+            # Longer keywords first so the alternation never stops at a shorter prefix
+            keywords = sorted(set(k.lower() for k in keywords if k), key=len, reverse=True)
+            if keywords:
+                self.rules.append((entity_type, re.compile('|'.join(map(re.escape, keywords)))))
+                all_keywords.extend(keywords)
+        self.gate = re.compile('|'.join(map(re.escape, sorted(set(all_keywords), key=len, reverse=True)))) if all_keywords else None
+
+    def match(self, text: str) -> Optional[str]:
+        """Type of the highest-priority rule with a keyword occurring in text"""
+        if self.gate is None or not text or not self.gate.search(text):
+            return None
+        for entity_type, pattern in self.rules:
+            if pattern.search(text):
+                return entity_type
+        return None
+
+
+class EntityTypeClassifier:
+    """Entity type normalization and keyword-based type guessing driven by a JSON lexicon"""
+
+    def __init__(self, lexicon: Dict[str, Any]):
+        self.lexicon = lexicon
+        self.valid_types = frozenset(lexicon.get('valid_types', []))
+        self.type_descriptions = dict(lexicon.get('type_descriptions', {}))
+        self.type_mappings = {k.lower(): v for k, v in lexicon.get('type_mappings', {}).items()}
+        self.default_type = lexicon.get('default_type', 'skill')
+        self._name_matcher = _KeywordMatcher(lexicon.get('name_keywords', []))
+        # Entity names repeat a lot across documents of one corpus, descriptions rarely do
+        self._match_name = lru_cache(maxsize=65536)(self._name_matcher.match)
+        self._description_matcher = _KeywordMatcher(lexicon.get('description_keywords', []))
+
+    @classmethod
+    def from_files(cls, *lexicon_files: str) -> "EntityTypeClassifier":
+        """Build a classifier from the default lexicon extended by each given file in turn"""
+        lexicon = _load_lexicon(DEFAULT_LEXICON_FILE)
+        for lexicon_file in lexicon_files:
+            lexicon = merge_lexicons(lexicon, _load_lexicon(lexicon_file))
+        return cls(lexicon)
+
+    def type_list(self, indent: str = "") -> str:
+        """The valid types as "- type: description" lines for classification prompts, in lexicon order"""
+        lines = []
+        for entity_type in dict.fromkeys(self.lexicon.get('valid_types', [])):
+            description = self.type_descriptions.get(entity_type)
+            lines.append(f"{indent}- {entity_type}: {description}" if description else f"{indent}- {entity_type}")
+        return "\n".join(lines)
+
+    def map_type(self, raw_type: str) -> Tuple[str, bool]:
+        """Normalize a raw type; returns (type, resolved) where resolved is False for unknown types"""
+        normalized = str(raw_type).lower().strip()
+        mapped = self.type_mappings.get(normalized)
+        if mapped is not None:
+            return mapped, True
+        return normalized, normalized in self.valid_types
+
+    def guess(self, entity: Dict[str, Any]) -> str:
+        """Educated guess of an entity's type from keywords in its name, then its description"""
+        name = str(entity.get('name', '')).lower()
+        guessed = self._match_name(name)
+        if guessed is None:
+            guessed = self._description_matcher.match(str(entity.get('description', '')).lower())
+        return guessed or self.default_type
+
+
+def _load_lexicon(path: str) -> Dict[str, Any]:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def merge_lexicons(base: Dict[str, Any], extension: Dict[str, Any]) -> Dict[str, Any]:
+    """Extend a lexicon: types and mappings are added, keywords are appended to existing rules
+
+    Rules for types that are new to the base lexicon go after the existing ones, so
+    built-in priorities are preserved.
+    """
+    merged = dict(base)
+    merged['valid_types'] = list(dict.fromkeys(list(base.get('valid_types', [])) + list(extension.get('valid_types', []))))
+    merged['type_mappings'] = {**base.get('type_mappings', {}), **extension.get('type_mappings', {})}
+    merged['type_descriptions'] = {**base.get('type_descriptions', {}), **extension.get('type_descriptions', {})}
+    if 'default_type' in extension:
+        merged['default_type'] = extension['default_type']
+
+    for section in ('name_keywords', 'description_keywords'):
+        rules = [(entity_type, list(keywords)) for entity_type, keywords in base.get(section, [])]
+        for entity_type, keywords in extension.get(section, []):
+            for existing_type, existing_keywords in rules:
+                if existing_type == entity_type:
+                    existing_keywords.extend(keywords)
+                    break
+            else:
+                rules.append((entity_type, list(keywords)))
+        merged[section] = rules
+    return merged
+
+
+_classifiers: Dict[Tuple[str, ...], EntityTypeClassifier] = {}
+
+
+def get_entity_classifier(*lexicon_files: str) -> EntityTypeClassifier:
+    """Process-wide classifier for the default lexicon plus optional extension files, built once"""
+    key = tuple(os.path.abspath(path) for path in lexicon_files)
+    classifier = _classifiers.get(key)
+    if classifier is None:
+        classifier = EntityTypeClassifier.from_files(*lexicon_files)
+        _classifiers[key] = classifier
+    return classifier
@@ -0,0 +1,208 @@
+"""Cross-document entity resolution
+
+Separately extracted graphs name the same thing differently ("Python" / "python 3",
+"The Dawnlight Council" / "Dawnlight Council"). Instead of comparing every pair of
+entities, candidates are proposed by a blocking index:
+
+* exact normalized names, which always denote the same entity;
+* a token key (normalized tokens without stop words and numbers, sorted);
+* MinHash signatures over character n-grams, bucketed with LSH bands.
+
+Candidates are verified (compatible types, no conflicting numbers, n-gram Jaccard for
+LSH candidates), clustered with union-find and merged into canonical entities with
+merge_knowledge_graphs, which also rewrites the relationships.
+"""
+import re
+import zlib
+from typing import Dict, List, Any, Optional, Tuple, Set
+
+import numpy as np
+
+from graph_merge import normalize_entity_name, merge_knowledge_graphs, _to_float, _UnionFind
+
+NGRAM_SIZE = 3
+NUM_PERMUTATIONS = 64
+LSH_BANDS = 16
+JACCARD_THRESHOLD = 0.6
+# Buckets this large are dominated by boilerplate n-grams and would make pairing quadratic
+MAX_BUCKET_SIZE = 64
+
+_STOP_WORDS = frozenset({"the", "a", "an", "of", "and", "for", "de", "la", "le"})
+_NUMBER_PATTERN = re.compile(r'^\d+(\.\d+)*$')
+# Types that say nothing about the entity, so they are compatible with any other type
+_UNSPECIFIC_TYPES = frozenset({"", "other", "unknown"})
+
+_MERSENNE_PRIME = (1 << 31) - 1
+_rng = np.random.default_rng(20240521)
+_HASH_A = _rng.integers(1, _MERSENNE_PRIME, size=NUM_PERMUTATIONS, dtype=np.uint64)
+_HASH_B = _rng.integers(0, _MERSENNE_PRIME, size=NUM_PERMUTATIONS, dtype=np.uint64)
+
+
+def character_ngrams(normalized_name: str, size: int = NGRAM_SIZE) -> Set[str]:
+    """Character n-grams of a normalized name, padded so short names still produce grams"""
+    padded = f" {normalized_name} "
+    if len(padded) <= size:
+        return {padded}
+    return {padded[i:i + size] for i in range(len(padded) - size + 1)}
+
+
+def minhash_signature(ngrams: Set[str]) -> np.ndarray:
+    """MinHash signature of an n-gram set under NUM_PERMUTATIONS universal hash functions"""
+    hashes = np.fromiter((zlib.crc32(gram.encode('utf-8')) for gram in ngrams), dtype=np.uint64, count=len(ngrams))
+    return ((_HASH_A[:, None] * hashes[None, :] + _HASH_B[:, None]) % _MERSENNE_PRIME).min(axis=1)
+
+
+def _jaccard(a: Set[str], b: Set[str]) -> float:
+    union = len(a | b)
+    return len(a & b) / union if union else 0.0
+
+
+class _EntityRecord:
+    __slots__ = ('position', 'name', 'type', 'tokens', 'numbers', 'ngrams')
+
+    def __init__(self, position: int, entity: Dict[str, Any]):
+        self.position = position
+        self.name = normalize_entity_name(entity.get('name') or entity.get('id'))
+        self.type = str(entity.get('type') or '').lower()
+        tokens = self.name.split()
+        self.numbers = frozenset(t for t in tokens if _NUMBER_PATTERN.match(t))
+        self.tokens = tuple(sorted({t for t in tokens if t not in _STOP_WORDS and t not in self.numbers}))
+        self.ngrams = character_ngrams(self.name)
+
+
+def _compatible(type_a: str, numbers_a: frozenset, type_b: str, numbers_b: frozenset) -> bool:
+    if type_a != type_b and type_a not in _UNSPECIFIC_TYPES and type_b not in _UNSPECIFIC_TYPES:
+        return False
+    # "Python 2" and "Python 3" are different things; "Python" and "Python 3" are not
+    return not (numbers_a and numbers_b and numbers_a != numbers_b)
+
+
+def find_duplicate_clusters(entities: List[Dict[str, Any]], threshold: float = JACCARD_THRESHOLD,
+                            stats: Optional[Dict[str, int]] = None) -> List[List[int]]:
+    """
+    Group entities that refer to the same thing
+
+    Args:
+        entities: Entities from any number of graphs
+        threshold: Minimum character n-gram Jaccard similarity for LSH candidates
+        stats: Optional dict receiving candidate and match counts
+
+    Returns:
+        Clusters of entity positions (only clusters with more than one member)
+    """
+    records = [_EntityRecord(position, entity) for position, entity in enumerate(entities)]
+    union_find = _UnionFind()
+    counts = {"entities": len(records), "candidate_pairs": 0, "matched_pairs": 0}
+
+    # Exact normalized names and identical token keys form blocks directly
+    by_name: Dict[str, List[_EntityRecord]] = {}
+    by_tokens: Dict[Tuple[str, ...], List[_EntityRecord]] = {}
+    for record in records:
+        if record.name:
+            by_name.setdefault(record.name, []).append(record)
+        if record.tokens:
+            by_tokens.setdefault(record.tokens, []).append(record)
+    for block in by_name.values():
+        for record in block[1:]:
+            union_find.union(block[0].position, record.position)
+
+    # Type and numbers of every cluster, so chains of pairwise matches cannot join
+    # "Python 2" and "Python 3" through a plain "Python"
+    cluster_info: Dict[int, Tuple[str, frozenset]] = {}
+    for record in records:
+        root = union_find.find(record.position)
+        cluster_type, numbers = cluster_info.get(root, (record.type, record.numbers))
+        if cluster_type in _UNSPECIFIC_TYPES:
+            cluster_type = record.type
+        cluster_info[root] = (cluster_type, numbers)
+
+    def link(a: _EntityRecord, b: _EntityRecord) -> None:
+        root_a, root_b = union_find.find(a.position), union_find.find(b.position)
+        if root_a == root_b:
+            return
+        type_a, numbers_a = cluster_info[root_a]
+        type_b, numbers_b = cluster_info[root_b]
+        if not _compatible(type_a, numbers_a, type_b, numbers_b):
+            return
+        union_find.union(root_a, root_b)
+        cluster_info[union_find.find(root_a)] = (type_b if type_a in _UNSPECIFIC_TYPES else type_a,
+                                                 numbers_a or numbers_b)
+        counts["matched_pairs"] += 1
+
+    for block in by_tokens.values():
+        if 1 < len(block) <= MAX_BUCKET_SIZE:
+            for i, a in enumerate(block):
+                for b in block[i + 1:]:
+                    link(a, b)
+
+    # MinHash/LSH over one representative per distinct name
+    representatives = [block[0] for block in by_name.values()]
+    candidates: Set[Tuple[int, int]] = set()
+    if len(representatives) > 1:
+        signatures = np.stack([minhash_signature(record.ngrams) for record in representatives])
+        rows = NUM_PERMUTATIONS // LSH_BANDS
+        for band in range(LSH_BANDS):
+            buckets: Dict[bytes, List[int]] = {}
+            band_keys = np.ascontiguousarray(signatures[:, band * rows:(band + 1) * rows])
+            for index, key in enumerate(band_keys):
+                buckets.setdefault(key.tobytes(), []).append(index)
+            for members in buckets.values():
+                if 1 < len(members) <= MAX_BUCKET_SIZE:
+                    for i, first in enumerate(members):
+                        for second in members[i + 1:]:
+                            candidates.add((first, second))
+
+    counts["candidate_pairs"] = len(candidates)
+    for first, second in sorted(candidates):
+        a, b = representatives[first], representatives[second]
+        if _jaccard(a.ngrams, b.ngrams) >= threshold:
+            link(a, b)
+
+    clusters: Dict[int, List[int]] = {}
+    for record in records:
+        clusters.setdefault(union_find.find(record.position), []).append(record.position)
+    result = [members for members in clusters.values() if len(members) > 1]
+    counts["clusters"] = len(result)
+    if stats is not None:
+        stats.update(counts)
+    return result
+
+
+def resolve_knowledge_graphs(graphs: List[Dict[str, Any]], summary: Optional[str] = None,
+                             threshold: float = JACCARD_THRESHOLD,
+                             stats: Optional[Dict[str, int]] = None) -> Dict[str, Any]:
+    """
+    Merge graphs into one, resolving duplicate entities across (and within) them
+
+    Every cluster is renamed to its canonical name - the name of its most important
+    member - and handed to merge_knowledge_graphs, which folds the members together
+    and rewrites relationship endpoints. Other names of a merged entity are kept in
+    its "aliases" list.
+    """
+    occurrences = [(graph_index, entity) for graph_index, graph in enumerate(graphs)
+                   for entity in graph.get('entities', [])]
+    clusters = find_duplicate_clusters([entity for _, entity in occurrences], threshold, stats)
+
+    renamed_graphs = [dict(graph, entities=list(graph.get('entities', []))) for graph in graphs]
+    entity_slots = [(graph_index, slot) for graph_index, graph in enumerate(graphs)
+                    for slot in range(len(graph.get('entities', [])))]
+    aliases_by_name: Dict[str, List[str]] = {}
+    for members in clusters:
+        canonical = max(members, key=lambda p: (_to_float(occurrences[p][1].get('importance')),
+                                                len(str(occurrences[p][1].get('name') or '')), -p))
+        canonical_name = occurrences[canonical][1].get('name')
+        names = []
+        for position in members:
+            graph_index, slot = entity_slots[position]
+            entity = occurrences[position][1]
+            if entity.get('name') and entity['name'] not in names:
+                names.append(entity['name'])
+            renamed_graphs[graph_index]['entities'][slot] = dict(entity, name=canonical_name)
+        aliases_by_name[normalize_entity_name(canonical_name)] = [n for n in names if n != canonical_name]
+
+    merged = merge_knowledge_graphs(renamed_graphs, summary)
+    for entity in merged['entities']:
+        aliases = aliases_by_name.get(normalize_entity_name(entity.get('name')))
+        if aliases:
+            entity['aliases'] = sorted(set(aliases) | set(entity.get('aliases') or []))
+    return merged
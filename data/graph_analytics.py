@@ -0,0 +1,288 @@
+"""Structural analytics for knowledge graphs: PageRank, degree, betweenness and communities
+
+Everything runs on a compressed sparse row (CSR) adjacency built with NumPy from the
+graph's relationships, with every per-iteration step expressed as bincount /
+gather operations over the edge arrays, so graphs with 100k+ edges are analyzed in
+seconds without SciPy:
+
+- PageRank by power iteration (undirected by default, edge weights from "strength"),
+- degree and strength-weighted degree,
+- betweenness estimated with Brandes' algorithm from a sample of pivot sources,
+  one level-synchronous BFS per pivot,
+- communities by semi-synchronous label propagation.
+
+apply_graph_analytics writes the results into each entity's attributes and, by
+default, replaces the model-assigned importance with a 1-10 score ranked by PageRank
+(the model's value is kept as attributes["model_importance"]).
+"""
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+
+from graph_merge import _to_float
+
+PAGERANK_DAMPING = 0.85
+PAGERANK_TOLERANCE = 1e-9
+PAGERANK_MAX_ITERATIONS = 100
+BETWEENNESS_SAMPLES = 64
+LABEL_PROPAGATION_ROUNDS = 30
+
+
+class CSRGraph:
+    """Undirected adjacency in CSR form: neighbors of node i are indices[indptr[i]:indptr[i + 1]]"""
+
+    def __init__(self, node_count: int, sources: np.ndarray, targets: np.ndarray, weights: np.ndarray):
+        self.node_count = node_count
+        # Directed edge list as given, kept for directed PageRank
+        self.sources = sources
+        self.targets = targets
+        self.edge_weights = weights
+
+        # Parallel relationships (in either direction) become one undirected edge with their summed weight
+        low = np.minimum(sources, targets)
+        high = np.maximum(sources, targets)
+        pairs, inverse = np.unique(low * node_count + high, return_inverse=True)
+        pair_weights = np.bincount(inverse, weights=weights, minlength=pairs.size)
+        low, high = pairs // node_count, pairs % node_count
+
+        both_sources = np.concatenate([low, high])
+        both_targets = np.concatenate([high, low])
+        order = np.argsort(both_sources, kind='stable')
+        self.indices = both_targets[order]
+        self.weights = np.concatenate([pair_weights, pair_weights])[order]
+        self.indptr = np.zeros(node_count + 1, dtype=np.int64)
+        np.cumsum(np.bincount(both_sources, minlength=node_count), out=self.indptr[1:])
+
+    @property
+    def row_of_entry(self) -> np.ndarray:
+        """Source node of every CSR entry"""
+        return np.repeat(np.arange(self.node_count), np.diff(self.indptr))
+
+    def neighbor_entries(self, nodes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """(owner node, CSR entry index) for all neighbor entries of `nodes`, without a Python loop"""
+        starts = self.indptr[nodes]
+        counts = self.indptr[nodes + 1] - starts
+        total = int(counts.sum())
+        owners = np.repeat(nodes, counts)
+        offsets = np.repeat(starts - np.cumsum(counts) + counts, counts)
+        return owners, offsets + np.arange(total)
+
+
+def build_adjacency(entities: List[Dict[str, Any]],
+                    relationships: List[Dict[str, Any]]) -> Tuple[List[str], CSRGraph]:
+    """Entity ids and the adjacency of the relationships between them
+
+    Relationships to unknown ids and self-loops are skipped; a relationship weighs its
+    strength (default 5, at least 0.1) and parallel relationships add up.
+    """
+    ids = [str(entity.get('id')) for entity in entities]
+    index_of = {entity_id: index for index, entity_id in enumerate(ids)}
+    sources, targets, weights = [], [], []
+    for relationship in relationships:
+        source = index_of.get(str(relationship.get('source')))
+        target = index_of.get(str(relationship.get('target')))
+        if source is None or target is None or source == target:
+            continue
+        sources.append(source)
+        targets.append(target)
+        weights.append(max(0.1, _to_float(relationship.get('strength'), 5.0)))
+    return ids, CSRGraph(len(ids), np.array(sources, dtype=np.int64), np.array(targets, dtype=np.int64),
+                         np.array(weights, dtype=np.float64))
+
+
+def pagerank(graph: CSRGraph, damping: float = PAGERANK_DAMPING, directed: bool = False,
+             weighted: bool = True) -> np.ndarray:
+    """PageRank scores summing to 1; nodes without outgoing edges spread their rank uniformly"""
+    count = graph.node_count
+    if count == 0:
+        return np.zeros(0)
+    if directed:
+        sources, targets = graph.sources, graph.targets
+        weights = graph.edge_weights if weighted else np.ones(len(sources))
+    else:
+        sources, targets = graph.row_of_entry, graph.indices
+        weights = graph.weights if weighted else np.ones(len(sources))
+
+    out_weight = np.bincount(sources, weights=weights, minlength=count)
+    dangling = out_weight == 0
+    # Share of a node's rank that travels along each of its edges
+    edge_share = weights / np.where(out_weight > 0, out_weight, 1.0)[sources]
+
+    rank = np.full(count, 1.0 / count)
+    for _ in range(PAGERANK_MAX_ITERATIONS):
+        spread = np.bincount(targets, weights=rank[sources] * edge_share, minlength=count)
+        updated = damping * (spread + rank[dangling].sum() / count) + (1 - damping) / count
+        converged = np.abs(updated - rank).sum() < PAGERANK_TOLERANCE
+        rank = updated
+        if converged:
+            break
+    return rank / rank.sum()
+
+
+def degrees(graph: CSRGraph) -> Tuple[np.ndarray, np.ndarray]:
+    """(number of distinct neighbors, summed relationship strength) per node, counting both directions"""
+    degree = np.diff(graph.indptr)
+    weighted = np.bincount(graph.row_of_entry, weights=graph.weights, minlength=graph.node_count)
+    return degree, weighted
+
+
+def betweenness(graph: CSRGraph, samples: Optional[int] = BETWEENNESS_SAMPLES, seed: int = 0) -> np.ndarray:
+    """Normalized shortest-path betweenness (unweighted, undirected), estimated from `samples` pivots
+
+    With samples=None or >= the node count every node is a source and the result is exact.
+    """
+    count = graph.node_count
+    centrality = np.zeros(count)
+    if count < 3:
+        return centrality
+
+    if samples is None or samples >= count:
+        pivots = np.arange(count)
+    else:
+        pivots = np.random.default_rng(seed).choice(count, size=samples, replace=False)
+
+    for pivot in pivots:
+        distance = np.full(count, -1, dtype=np.int64)
+        sigma = np.zeros(count)
+        distance[pivot] = 0
+        sigma[pivot] = 1.0
+        frontier = np.array([pivot], dtype=np.int64)
+        level_edges = []
+        level = 0
+        # Forward phase: shortest-path counts, one BFS level at a time
+        while frontier.size:
+            owners, entries = graph.neighbor_entries(frontier)
+            neighbors = graph.indices[entries]
+            unseen = neighbors[distance[neighbors] < 0]
+            distance[unseen] = level + 1
+            on_path = distance[neighbors] == level + 1
+            owners, neighbors = owners[on_path], neighbors[on_path]
+            sigma += np.bincount(neighbors, weights=sigma[owners], minlength=count)
+            level_edges.append((owners, neighbors))
+            frontier = np.flatnonzero(distance == level + 1)
+            level += 1
+
+        # Backward phase: accumulate dependencies from the deepest level up
+        delta = np.zeros(count)
+        for owners, neighbors in reversed(level_edges):
+            delta += np.bincount(owners, weights=sigma[owners] / sigma[neighbors] * (1 + delta[neighbors]),
+                                 minlength=count)
+        delta[pivot] = 0.0
+        centrality += delta
+
+    # Scale the sample up to all sources; undirected pairs are counted from both ends
+    centrality *= count / len(pivots) / 2
+    return centrality * 2 / ((count - 1) * (count - 2))
+
+
+def label_propagation(graph: CSRGraph, rounds: int = LABEL_PROPAGATION_ROUNDS, weighted: bool = False,
+                      seed: int = 0) -> np.ndarray:
+    """Community label per node, numbered 0.. by decreasing community size
+
+    Each round a random half of the nodes adopts the label most common among its
+    neighbors, ties broken at random; updating only half of them avoids the oscillation
+    of fully synchronous propagation on bipartite structures. Votes are unweighted by
+    default: model-assigned strengths are noisy enough to split real communities apart.
+    """
+    count = graph.node_count
+    labels = np.arange(count, dtype=np.int64)
+    if count == 0 or graph.indices.size == 0:
+        return labels
+
+    rows = graph.row_of_entry
+    edge_votes = graph.weights if weighted else np.ones(graph.indices.size)
+    rng = np.random.default_rng(seed)
+    for _ in range(rounds):
+        keys = rows * count + labels[graph.indices]
+        unique_keys, inverse = np.unique(keys, return_inverse=True)
+        nodes = unique_keys // count
+        candidates = unique_keys % count
+        votes = np.bincount(inverse, weights=edge_votes)
+        # Random tie-breaking, below any real difference in votes
+        votes += 1e-6 * rng.random(votes.size)
+        # Best candidate per node: sort by node, then by descending vote
+        order = np.lexsort((-votes, nodes))
+        first = np.ones(order.size, dtype=bool)
+        first[1:] = nodes[order][1:] != nodes[order][:-1]
+        best_nodes = nodes[order][first]
+        best_labels = candidates[order][first]
+
+        update = rng.random(best_nodes.size) < 0.5
+        if not (best_labels[update] != labels[best_nodes[update]]).any() and \
+                np.array_equal(best_labels, labels[best_nodes]):
+            break
+        labels[best_nodes[update]] = best_labels[update]
+
+    _, compact, sizes = np.unique(labels, return_inverse=True, return_counts=True)
+    by_size = np.argsort(-sizes, kind='stable')
+    rank_of = np.empty_like(by_size)
+    rank_of[by_size] = np.arange(by_size.size)
+    return rank_of[compact]
+
+
+def analyze_graph(entities: List[Dict[str, Any]], relationships: List[Dict[str, Any]],
+                  betweenness_samples: Optional[int] = BETWEENNESS_SAMPLES, seed: int = 0) -> Dict[str, Any]:
+    """All metrics for a graph as arrays aligned with `entities`, plus the entity ids"""
+    ids, graph = build_adjacency(entities, relationships)
+    degree, weighted_degree = degrees(graph)
+    return {
+        "ids": ids,
+        "pagerank": pagerank(graph),
+        "degree": degree,
+        "weighted_degree": weighted_degree,
+        "betweenness": betweenness(graph, betweenness_samples, seed),
+        "community": label_propagation(graph, seed=seed)
+    }
+
+
+def _rank_scores(values: np.ndarray) -> np.ndarray:
+    """Map values to 1-10 by rank (ties share their average rank), so scores spread evenly"""
+    if values.size == 1:
+        return np.array([10.0])
+    order = np.argsort(values, kind='stable')
+    ranks = np.empty(values.size)
+    ranks[order] = np.arange(values.size)
+    # Average the ranks of tied values
+    _, inverse = np.unique(values, return_inverse=True)
+    ranks = (np.bincount(inverse, weights=ranks) / np.bincount(inverse))[inverse]
+    return 1 + 9 * ranks / (values.size - 1)
+
+
+def apply_graph_analytics(knowledge_graph: Dict[str, Any], update_importance: bool = True,
+                          betweenness_samples: Optional[int] = BETWEENNESS_SAMPLES, seed: int = 0) -> Dict[str, Any]:
+    """
+    Write structural metrics into the entities of a knowledge graph (in place)
+
+    Args:
+        knowledge_graph: Graph with "entities" and "relationships"
+        update_importance: Replace each entity's importance with its PageRank-ranked 1-10 score;
+            the previous value is kept once as attributes["model_importance"]
+        betweenness_samples: Pivot sources for the betweenness estimate; None computes it exactly
+        seed: Seed of the pivot sample and of the label propagation order
+
+    Returns:
+        Summary: number of communities and the ids of the top entities by PageRank
+    """
+    entities = knowledge_graph.get('entities', [])
+    if not entities:
+        return {"communities": 0, "top_entities": []}
+    metrics = analyze_graph(entities, knowledge_graph.get('relationships', []), betweenness_samples, seed)
+    scores = _rank_scores(metrics["pagerank"])
+
+    for index, entity in enumerate(entities):
+        attributes = entity.get('attributes')
+        if not isinstance(attributes, dict):
+            attributes = entity['attributes'] = {}
+        attributes['pagerank'] = round(float(metrics["pagerank"][index]), 6)
+        attributes['degree'] = int(metrics["degree"][index])
+        attributes['weighted_degree'] = round(float(metrics["weighted_degree"][index]), 2)
+        attributes['betweenness'] = round(float(metrics["betweenness"][index]), 6)
+        attributes['community'] = int(metrics["community"][index])
+        if update_importance:
+            if 'importance' in entity:
+                attributes.setdefault('model_importance', entity['importance'])
+            entity['importance'] = round(float(scores[index]), 1)
+
+    top = np.argsort(-metrics["pagerank"], kind='stable')[:10]
+    return {"communities": int(metrics["community"].max()) + 1,
+            "top_entities": [metrics["ids"][index] for index in top]}
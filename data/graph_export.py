@@ -0,0 +1,414 @@
+"""Columnar and GraphML export of knowledge graphs for analysis outside the viewer
+
+Graphs are flattened into two tables, one row per entity and one per relationship,
+with a `graph` column so that any number of graphs can share one pair of tables:
+
+- entities: graph, id, name, type, importance, description, the graph_analytics metrics
+  (NaN where a graph was not analyzed) and the remaining attributes as JSON text
+- relationships: graph, source, target, source_row / target_row (row of the endpoint in
+  the entities table, -1 if it is not there), type, strength, description
+
+With pyarrow installed the tables are written as Parquet (compressed, for storage and
+exchange) or Arrow IPC files (uncompressed, memory-mappable for zero-copy reads). The
+fallback is one NumPy .npz archive: numbers are plain arrays, the low-cardinality graph
+and type columns are dictionary-encoded (int32 codes plus their distinct values) and
+every string column is a single UTF-8 buffer with int64 offsets, the Arrow layout, so
+loading needs neither JSON parsing nor pickle. load_npz_tables reads it back.
+
+GraphML files (one per graph) carry the same columns for tools such as Gephi or yEd.
+"""
+import glob
+import json
+import math
+import os
+from typing import Dict, List, Any, Optional, Iterable, Iterator, Tuple
+from xml.sax.saxutils import escape, quoteattr
+
+from graph_merge import _to_float
+from visualization_template import create_temp_file
+
+# Bump when columns are added, removed or change meaning
+EXPORT_VERSION = 1
+
+EXPORT_FORMATS = ("auto", "parquet", "arrow", "npz", "graphml")
+
+# Written by graph_analytics.apply_graph_analytics into entity attributes
+ANALYTICS_COLUMNS = ("pagerank", "degree", "weighted_degree", "betweenness", "community")
+
+# Column kinds: "dictionary" (repetitive strings), "string", or a NumPy / Arrow numeric type name
+TABLE_SCHEMAS = {
+    "entities": {
+        "graph": "dictionary",
+        "id": "string",
+        "name": "string",
+        "type": "dictionary",
+        "importance": "float64",
+        "description": "string",
+        **{column: "float64" for column in ANALYTICS_COLUMNS},
+        "attributes": "string"
+    },
+    "relationships": {
+        "graph": "dictionary",
+        "source": "string",
+        "target": "string",
+        "source_row": "int64",
+        "target_row": "int64",
+        "type": "dictionary",
+        "strength": "float64",
+        "description": "string"
+    }
+}
+
+
+def build_tables(graphs: Iterable[Tuple[str, Dict[str, Any]]]) -> Dict[str, Dict[str, list]]:
+    """
+    Flatten (name, knowledge graph) pairs into column lists following TABLE_SCHEMAS
+
+    Args:
+        graphs: Graph name and graph; the graphs are only read once, so a generator
+            loading them one at a time keeps just the columns in memory
+    """
+    tables = {table: {column: [] for column in schema} for table, schema in TABLE_SCHEMAS.items()}
+    entities, relationships = tables["entities"], tables["relationships"]
+
+    for name, knowledge_graph in graphs:
+        rows = {}
+        for entity in knowledge_graph.get('entities', []):
+            entity_id = str(entity.get('id', ''))
+            attributes = dict(entity.get('attributes') or {})
+            rows.setdefault(entity_id, len(entities["id"]))
+            entities["graph"].append(name)
+            entities["id"].append(entity_id)
+            entities["name"].append(str(entity.get('name', entity_id)))
+            entities["type"].append(str(entity.get('type', 'other')))
+            entities["importance"].append(_to_float(entity.get('importance'), 0.0))
+            entities["description"].append(str(entity.get('description') or ''))
+            for column in ANALYTICS_COLUMNS:
+                entities[column].append(_to_float(attributes.pop(column, None), math.nan))
+            entities["attributes"].append(json.dumps(attributes, ensure_ascii=False, default=str) if attributes else "")
+
+        for relationship in knowledge_graph.get('relationships', []):
+            source, target = str(relationship.get('source', '')), str(relationship.get('target', ''))
+            relationships["graph"].append(name)
+            relationships["source"].append(source)
+            relationships["target"].append(target)
+            relationships["source_row"].append(rows.get(source, -1))
+            relationships["target_row"].append(rows.get(target, -1))
+            relationships["type"].append(str(relationship.get('type', 'related_to')))
+            relationships["strength"].append(_to_float(relationship.get('strength'), 0.0))
+            relationships["description"].append(str(relationship.get('description') or ''))
+
+    return tables
+
+
+def _has_pyarrow() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def resolve_format(export_format: str) -> str:
+    """"auto" becomes Parquet when pyarrow is installed, the NumPy archive otherwise"""
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {export_format}")
+    if export_format == "auto":
+        return "parquet" if _has_pyarrow() else "npz"
+    if export_format in ("parquet", "arrow") and not _has_pyarrow():
+        raise RuntimeError(f"Exporting {export_format} files needs pyarrow; use the npz format without it")
+    return export_format
+
+
+def _replace_when_done(path: str, write) -> str:
+    # A unique temporary name per call, so concurrent exports of the same graph never share one
+    fd, tmp_path = create_temp_file(path)
+    os.close(fd)
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return path
+
+
+def _arrow_table(columns: Dict[str, list], schema: Dict[str, str]):
+    import pyarrow as pa
+    arrays = {}
+    for column, kind in schema.items():
+        if kind == "dictionary":
+            arrays[column] = pa.array(columns[column], type=pa.string()).dictionary_encode()
+        else:
+            arrays[column] = pa.array(columns[column], type=getattr(pa, kind)())
+    return pa.table(arrays).replace_schema_metadata({"kg_export_version": str(EXPORT_VERSION)})
+
+
+def _write_arrow_tables(tables: Dict[str, Dict[str, list]], output_base: str, export_format: str) -> List[str]:
+    import pyarrow.feather as feather
+    import pyarrow.parquet as parquet
+    files = []
+    for table, columns in tables.items():
+        arrow_table = _arrow_table(columns, TABLE_SCHEMAS[table])
+        if export_format == "parquet":
+            path = f"{output_base}.{table}.parquet"
+            files.append(_replace_when_done(path, lambda tmp_path: parquet.write_table(arrow_table, tmp_path)))
+        else:
+            path = f"{output_base}.{table}.arrow"
+            files.append(_replace_when_done(path, lambda tmp_path: feather.write_feather(
+                arrow_table, tmp_path, compression='uncompressed')))
+    return files
+
+
+def _utf8_buffers(key: str, strings: List[str]) -> Dict[str, Any]:
+    import numpy as np
+    encoded = [value.encode('utf-8') for value in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum(np.fromiter((len(value) for value in encoded), dtype=np.int64, count=len(encoded)), out=offsets[1:])
+    return {f"{key}.data": np.frombuffer(b"".join(encoded), dtype=np.uint8), f"{key}.offsets": offsets}
+
+
+def _write_npz_tables(tables: Dict[str, Dict[str, list]], output_base: str) -> List[str]:
+    import numpy as np
+    arrays = {"export_version": np.array(EXPORT_VERSION)}
+    for table, columns in tables.items():
+        for column, kind in TABLE_SCHEMAS[table].items():
+            key = f"{table}.{column}"
+            values = columns[column]
+            if kind == "dictionary":
+                codes = {}
+                arrays[f"{key}.codes"] = np.fromiter((codes.setdefault(value, len(codes)) for value in values),
+                                                     dtype=np.int32, count=len(values))
+                arrays.update(_utf8_buffers(f"{key}.values", list(codes)))
+            elif kind == "string":
+                arrays.update(_utf8_buffers(key, values))
+            else:
+                arrays[key] = np.asarray(values, dtype=kind)
+
+    def write(tmp_path: str) -> None:
+        # Uncompressed, so every array is one contiguous member that np.load reads in a single pass
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **arrays)
+
+    return [_replace_when_done(f"{output_base}.npz", write)]
+
+
+def _decode_utf8(data, offsets):
+    import numpy as np
+    buffer = data.tobytes()
+    bounds = offsets.tolist()
+    return np.array([buffer[start:end].decode('utf-8') for start, end in zip(bounds, bounds[1:])], dtype=object)
+
+
+def load_npz_tables(path: str, columns: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Read an .npz export back into NumPy columns per table
+
+    Numeric columns come back as they were written; string columns as object arrays.
+    Dictionary-encoded columns are expanded, their int32 codes are kept as <column>_codes.
+
+    Args:
+        path: .npz file written by write_columnar
+        columns: Only read these columns (e.g. {"graph", "type", "pagerank"}); decoding the
+            free-text string columns is the expensive part, numeric columns are read as is
+    """
+    import numpy as np
+    wanted = set(columns) if columns is not None else None
+    with np.load(path) as archive:
+        version = int(archive["export_version"])
+        if version != EXPORT_VERSION:
+            raise ValueError(f"{path} was written with export version {version}, expected {EXPORT_VERSION}")
+        arrays = {key: archive[key] for key in archive.files
+                  if wanted is None or key.partition('.')[2].split('.')[0] in wanted}
+
+    tables = {}
+    for table, schema in TABLE_SCHEMAS.items():
+        columns = {}
+        for column, kind in schema.items():
+            if wanted is not None and column not in wanted:
+                continue
+            key = f"{table}.{column}"
+            if kind == "dictionary":
+                codes = arrays[f"{key}.codes"]
+                columns[column] = _decode_utf8(arrays[f"{key}.values.data"], arrays[f"{key}.values.offsets"])[codes]
+                columns[f"{column}_codes"] = codes
+            elif kind == "string":
+                columns[column] = _decode_utf8(arrays[f"{key}.data"], arrays[f"{key}.offsets"])
+            else:
+                columns[column] = arrays[key]
+        tables[table] = columns
+    return tables
+
+
+def write_columnar(tables: Dict[str, Dict[str, list]], output_base: str, export_format: str = "auto") -> List[str]:
+    """
+    Write tables from build_tables and return the created files
+
+    Args:
+        tables: Column lists per table
+        output_base: Path without extension; the table name and format suffix are appended
+        export_format: "auto", "parquet", "arrow" or "npz"
+    """
+    export_format = resolve_format(export_format)
+    if export_format == "npz":
+        return _write_npz_tables(tables, output_base)
+    return _write_arrow_tables(tables, output_base, export_format)
+
+
+def _graphml_value(value: Any, kind: str) -> str:
+    if kind == "double":
+        value = _to_float(value, math.nan)
+        return "" if math.isnan(value) else repr(value)
+    return escape(str(value))
+
+
+def _iter_graphml(knowledge_graph: Dict[str, Any]) -> Iterator[str]:
+    entities = knowledge_graph.get('entities', [])
+    node_keys = [("name", "string"), ("type", "string"), ("importance", "double"), ("description", "string")]
+    node_keys += [(column, "double") for column in ANALYTICS_COLUMNS
+                  if any(column in (entity.get('attributes') or {}) for entity in entities)]
+    edge_keys = [("type", "string"), ("strength", "double"), ("description", "string")]
+
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+    yield '<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n'
+    for domain, keys in (("node", node_keys), ("edge", edge_keys)):
+        for name, kind in keys:
+            yield f'  <key id="{domain}_{name}" for="{domain}" attr.name="{name}" attr.type="{kind}"/>\n'
+    yield '  <graph id="G" edgedefault="directed">\n'
+
+    ids = set()
+    for entity in entities:
+        entity_id = str(entity.get('id', ''))
+        if entity_id in ids:
+            continue
+        ids.add(entity_id)
+        attributes = entity.get('attributes') or {}
+        yield f'    <node id={quoteattr(entity_id)}>'
+        for name, kind in node_keys:
+            value = entity.get(name, attributes.get(name))
+            if value is not None and value != "":
+                text = _graphml_value(value, kind)
+                if text:
+                    yield f'<data key="node_{name}">{text}</data>'
+        yield '</node>\n'
+
+    for relationship in knowledge_graph.get('relationships', []):
+        source, target = str(relationship.get('source', '')), str(relationship.get('target', ''))
+        # GraphML needs both endpoints declared; dangling relationships are left out
+        if source not in ids or target not in ids:
+            continue
+        yield f'    <edge source={quoteattr(source)} target={quoteattr(target)}>'
+        for name, kind in edge_keys:
+            value = relationship.get(name)
+            if value is not None and value != "":
+                text = _graphml_value(value, kind)
+                if text:
+                    yield f'<data key="edge_{name}">{text}</data>'
+        yield '</edge>\n'
+    yield '  </graph>\n</graphml>\n'
+
+
+def write_graphml(knowledge_graph: Dict[str, Any], path: str) -> str:
+    """Stream one knowledge graph to a GraphML file"""
+    def write(tmp_path: str) -> None:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for piece in _iter_graphml(knowledge_graph):
+                f.write(piece)
+
+    return _replace_when_done(path, write)
+
+
+def export_graph(knowledge_graph: Dict[str, Any], output_base: str, formats: Iterable[str] = ("auto",),
+                 name: str = None) -> List[str]:
+    """
+    Export a single knowledge graph; returns the created files
+
+    Args:
+        knowledge_graph: Graph to export
+        output_base: Path without extension
+        formats: Any of EXPORT_FORMATS; "graphml" adds <output_base>.graphml
+        name: Value of the graph column (default: the base name of output_base)
+    """
+    files = []
+    name = name or os.path.basename(output_base)
+    for export_format in dict.fromkeys(formats):
+        if export_format == "graphml":
+            files.append(write_graphml(knowledge_graph, f"{output_base}.graphml"))
+        else:
+            files.extend(write_columnar(build_tables([(name, knowledge_graph)]), output_base, export_format))
+    return files
+
+
+def collect_graph_files(sources: Iterable[str]) -> List[str]:
+    """Expand directories (their *_data.json files) and glob patterns into a sorted list of graph files"""
+    if isinstance(sources, str):
+        sources = [sources]
+    paths = []
+    for source in sources:
+        if os.path.isdir(source):
+            candidates = glob.glob(os.path.join(source, "*_data.json"))
+        else:
+            candidates = glob.glob(source, recursive=True)
+        paths.extend(os.path.normpath(path) for path in candidates if os.path.isfile(path))
+    return sorted(set(paths))
+
+
+def graph_names(paths: List[str]) -> Dict[str, str]:
+    """Graph name per file (its base name without _data.json), kept unique across directories"""
+    names = {}
+    used = set()
+    for path in paths:
+        stem = os.path.basename(path)
+        for suffix in ("_data.json", ".json"):
+            if stem.endswith(suffix):
+                stem = stem[:-len(suffix)]
+                break
+        name = stem
+        suffix = 2
+        while name in used:
+            name = f"{stem}_{suffix}"
+            suffix += 1
+        used.add(name)
+        names[path] = name
+    return names
+
+
+def export_graphs(sources: Iterable[str], output_dir: str = "graph_exports", formats: Iterable[str] = ("auto",),
+                  table_name: str = "knowledge_graphs") -> Dict[str, Any]:
+    """
+    Bulk export: all graphs into one pair of tables, plus one GraphML file per graph if requested
+
+    Args:
+        sources: _data.json files, directories holding them, or glob patterns
+        output_dir: Directory for the exported files
+        formats: Any of EXPORT_FORMATS
+        table_name: Base name of the shared tables inside output_dir
+    """
+    paths = collect_graph_files(sources)
+    names = graph_names(paths)
+    if not paths:
+        raise FileNotFoundError(f"No knowledge graph files found in: {', '.join(sources)}")
+    os.makedirs(output_dir, exist_ok=True)
+    formats = list(dict.fromkeys(formats))
+    # Resolved before anything is loaded, so a missing backend fails fast
+    columnar = [resolve_format(export_format) for export_format in formats if export_format != "graphml"]
+    files = []
+
+    def load_graphs() -> Iterator[Tuple[str, Dict[str, Any]]]:
+        for path in paths:
+            with open(path, 'r', encoding='utf-8') as f:
+                knowledge_graph = json.load(f)
+            if "graphml" in formats:
+                files.append(write_graphml(knowledge_graph, os.path.join(output_dir, f"{names[path]}.graphml")))
+            yield names[path], knowledge_graph
+
+    tables = build_tables(load_graphs())
+    for export_format in columnar:
+        files.extend(write_columnar(tables, os.path.join(output_dir, table_name), export_format))
+    return {
+        "graphs": len(paths),
+        "entities": len(tables["entities"]["id"]),
+        "relationships": len(tables["relationships"]["source"]),
+        "files": files
+    }
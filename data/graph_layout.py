@@ -0,0 +1,218 @@
+"""Server-side force layout for knowledge graph visualizations
+
+Reproduces the force model of the d3 simulation in the generated HTML (many-body
+charge, link springs, x/y centering and collision) with NumPy, so the page can start
+from settled positions instead of running the simulation from scratch in the browser.
+Small graphs use exact pairwise forces; larger ones use a grid approximation in the
+spirit of Barnes-Hut: far-away nodes are aggregated into cell centers of mass and only
+nodes sharing a cell interact exactly.
+"""
+import math
+from typing import Dict, List, Any, Tuple, Optional
+
+import numpy as np
+
+# Force parameters mirrored from the d3 simulation in generate_interactive_visualization
+CHARGE_STRENGTH = -300.0
+CENTER_STRENGTH = 0.15
+VELOCITY_DECAY = 0.4
+ALPHA_MIN = 0.001
+
+# Above this many nodes the many-body force switches from exact to the grid approximation
+EXACT_NODE_LIMIT = 400
+# Large graphs cool down faster; the browser simulation is not restarted for them anyway
+LARGE_GRAPH_ITERATIONS = 120
+
+
+def _to_float_array(values: List[Any], default: float) -> np.ndarray:
+    result = np.empty(len(values), dtype=np.float64)
+    for index, value in enumerate(values):
+        try:
+            result[index] = float(value)
+        except (TypeError, ValueError):
+            result[index] = default
+    return result
+
+
+def _group_forces(x: np.ndarray, y: np.ndarray, radii: np.ndarray, valid: Optional[np.ndarray],
+                  alpha: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Exact many-body and collision velocity changes within groups of nodes
+
+    Arrays have shape (groups, members); members flagged False in valid (padding)
+    exert no force and their own results are meaningless. A single group holding
+    every node, with valid=None, gives the exact all-pairs force.
+    """
+    dx = x[:, None, :] - x[:, :, None]  # dx[g, i, j] = x_j - x_i
+    dy = y[:, None, :] - y[:, :, None]
+    dist_sq = dx * dx
+    dist_sq += dy * dy
+    np.maximum(dist_sq, 1.0, out=dist_sq)
+
+    # A node's pull on itself vanishes on its own because dx = dy = 0
+    weight = np.divide(CHARGE_STRENGTH * alpha, dist_sq)
+    if valid is not None:
+        weight *= valid[:, None, :]
+    velocity_x = np.einsum('gij,gij->gi', dx, weight)
+    velocity_y = np.einsum('gij,gij->gi', dy, weight)
+
+    # Collision: overlapping pairs are pushed apart, the smaller node moving more.
+    # Overlaps are rare, so candidates are found with the largest possible reach first.
+    max_reach = 2 * float(radii.max())
+    members = x.shape[1]
+    flat_pairs = np.flatnonzero(dist_sq < max_reach * max_reach)
+    group, pair = np.divmod(flat_pairs, members * members)
+    i, j = np.divmod(pair, members)
+    keep = i != j
+    if valid is not None:
+        keep &= valid[group, i] & valid[group, j]
+    group, i, j = group[keep], i[keep], j[keep]
+    reach = radii[group, i] + radii[group, j]
+    distance = np.sqrt(dist_sq[group, i, j])
+    overlapping = distance < reach
+    if overlapping.any():
+        group, i, j = group[overlapping], i[overlapping], j[overlapping]
+        distance, reach = distance[overlapping], reach[overlapping]
+        radius_i_sq = radii[group, i] ** 2
+        radius_j_sq = radii[group, j] ** 2
+        push = (reach - distance) / distance * radius_j_sq / (radius_i_sq + radius_j_sq)
+        flat = group * members + i
+        velocity_x -= np.bincount(flat, weights=dx[group, i, j] * push, minlength=x.size).reshape(x.shape)
+        velocity_y -= np.bincount(flat, weights=dy[group, i, j] * push, minlength=x.size).reshape(x.shape)
+    return velocity_x, velocity_y
+
+
+def _exact_forces(positions: np.ndarray, radii: np.ndarray, alpha: float) -> np.ndarray:
+    velocity_x, velocity_y = _group_forces(positions[None, :, 0], positions[None, :, 1], radii[None, :], None, alpha)
+    return np.stack([velocity_x[0], velocity_y[0]], axis=1)
+
+
+def _grid_forces(positions: np.ndarray, radii: np.ndarray, alpha: float) -> np.ndarray:
+    """Approximate many-body force: exact inside each cell, cell centers of mass across cells
+
+    Cells hold about sqrt(n) nodes, which balances the near-field (n * sqrt(n) pairs)
+    and far-field (n * n / sqrt(n) node-cell pairs) costs.
+    """
+    count = len(positions)
+    cells_per_side = max(2, int(round(1.4 * count ** 0.25)))
+    cell_total = cells_per_side * cells_per_side
+
+    # Equal-count cells (columns by x rank, then rows by y rank within each column) rather
+    # than a uniform grid: hub-heavy graphs pile hundreds of nodes into the center cells,
+    # and the near-field cost grows with the square of the fullest cell
+    column = np.empty(count, dtype=np.int64)
+    column[np.argsort(positions[:, 0], kind='stable')] = np.arange(count) * cells_per_side // count
+    order = np.lexsort((positions[:, 1], column))
+    column_sizes = np.bincount(column, minlength=cells_per_side)
+    column_starts = np.concatenate([[0], np.cumsum(column_sizes)[:-1]])
+    sorted_columns = column[order]
+    rank_in_column = np.arange(count) - column_starts[sorted_columns]
+    cell_ids = np.empty(count, dtype=np.int64)
+    cell_ids[order] = sorted_columns * cells_per_side + rank_in_column * cells_per_side // column_sizes[sorted_columns]
+
+    mass = np.bincount(cell_ids, minlength=cell_total).astype(np.float64)
+    occupied = np.nonzero(mass)[0]
+    occupied_mass = mass[occupied]
+    center_x = np.bincount(cell_ids, weights=positions[:, 0], minlength=cell_total)[occupied] / occupied_mass
+    center_y = np.bincount(cell_ids, weights=positions[:, 1], minlength=cell_total)[occupied] / occupied_mass
+
+    # Far field: every node against every occupied cell except its own
+    dx = center_x[None, :] - positions[:, 0, None]
+    dy = center_y[None, :] - positions[:, 1, None]
+    weight = CHARGE_STRENGTH * alpha * occupied_mass[None, :] / np.maximum(dx * dx + dy * dy, 1.0)
+    own_cell = np.searchsorted(occupied, cell_ids)
+    weight[np.arange(count), own_cell] = 0.0
+    velocities = np.stack([(dx * weight).sum(axis=1), (dy * weight).sum(axis=1)], axis=1)
+
+    # Near field: exact interactions among the nodes of each cell, padded into one array
+    order = np.argsort(own_cell, kind='stable')
+    sorted_cells = own_cell[order]
+    starts = np.searchsorted(sorted_cells, np.arange(len(occupied)))
+    slot = np.arange(count) - starts[sorted_cells]
+    width = int(slot.max()) + 1
+    shape = (len(occupied), width)
+    padded_x = np.zeros(shape)
+    padded_y = np.zeros(shape)
+    padded_radii = np.zeros(shape)
+    valid = np.zeros(shape, dtype=bool)
+    padded_x[sorted_cells, slot] = positions[order, 0]
+    padded_y[sorted_cells, slot] = positions[order, 1]
+    padded_radii[sorted_cells, slot] = radii[order]
+    valid[sorted_cells, slot] = True
+
+    near_x, near_y = _group_forces(padded_x, padded_y, padded_radii, valid, alpha)
+    velocities[order, 0] += near_x[sorted_cells, slot]
+    velocities[order, 1] += near_y[sorted_cells, slot]
+    return velocities
+
+
+def compute_layout(entities: List[Dict[str, Any]], relationships: List[Dict[str, Any]],
+                   iterations: Optional[int] = None) -> Dict[str, List[float]]:
+    """
+    Compute settled node positions for a knowledge graph
+
+    Args:
+        entities: Graph entities (need "id"; "importance" sets the collision radius)
+        relationships: Graph relationships ("source"/"target" ids, "strength" sets link length)
+        iterations: Number of simulation ticks over which alpha cools down; defaults to
+            d3's 300 for small graphs and LARGE_GRAPH_ITERATIONS for approximated ones
+
+    Returns:
+        Mapping from entity id to [x, y], centered on the origin, in d3 pixel units
+    """
+    ids = [str(entity.get('id')) for entity in entities]
+    index_of = {entity_id: index for index, entity_id in enumerate(ids)}
+    count = len(ids)
+    if count == 0:
+        return {}
+
+    importance = np.clip(_to_float_array([e.get('importance') for e in entities], 5.0), 0.0, None)
+    radii = np.sqrt(importance) * 4 + 15
+
+    edges = [(index_of.get(str(r.get('source'))), index_of.get(str(r.get('target'))), r.get('strength'))
+             for r in relationships]
+    edges = [(s, t, strength) for s, t, strength in edges if s is not None and t is not None and s != t]
+    sources = np.array([e[0] for e in edges], dtype=np.int64)
+    targets = np.array([e[1] for e in edges], dtype=np.int64)
+    link_distance = 80 + (10 - _to_float_array([e[2] for e in edges], 5.0)) * 15
+    degree = np.bincount(np.concatenate([sources, targets]), minlength=count).astype(np.float64)
+    if len(edges):
+        link_strength = 1.0 / np.minimum(degree[sources], degree[targets])
+        bias = degree[sources] / (degree[sources] + degree[targets])
+
+    # d3's default phyllotaxis arrangement as the deterministic starting point
+    order = np.arange(count, dtype=np.float64)
+    radius = 10 * np.sqrt(0.5 + order)
+    angle = order * math.pi * (3 - math.sqrt(5))
+    positions = np.stack([radius * np.cos(angle), radius * np.sin(angle)], axis=1)
+    velocities = np.zeros_like(positions)
+
+    if iterations is None:
+        iterations = 300 if count <= EXACT_NODE_LIMIT else LARGE_GRAPH_ITERATIONS
+    alpha = 1.0
+    alpha_decay = 1 - ALPHA_MIN ** (1 / iterations)
+    for _ in range(iterations):
+        alpha += (0.0 - alpha) * alpha_decay
+
+        # Link springs use positions advanced by the current velocity, as d3 does
+        if len(edges):
+            projected = positions + velocities
+            delta = projected[targets] - projected[sources]
+            length = np.maximum(np.sqrt((delta * delta).sum(axis=1)), 1e-6)
+            shift = delta * ((length - link_distance) / length * alpha * link_strength)[:, None]
+            velocities[:, 0] -= np.bincount(targets, weights=shift[:, 0] * bias, minlength=count)
+            velocities[:, 1] -= np.bincount(targets, weights=shift[:, 1] * bias, minlength=count)
+            velocities[:, 0] += np.bincount(sources, weights=shift[:, 0] * (1 - bias), minlength=count)
+            velocities[:, 1] += np.bincount(sources, weights=shift[:, 1] * (1 - bias), minlength=count)
+
+        if count <= EXACT_NODE_LIMIT:
+            velocities += _exact_forces(positions, radii, alpha)
+        else:
+            velocities += _grid_forces(positions, radii, alpha)
+        velocities -= positions * (CENTER_STRENGTH * alpha)
+
+        velocities *= 1 - VELOCITY_DECAY
+        positions += velocities
+        # forceCenter keeps the mean position on the origin
+        positions -= positions.mean(axis=0)
+
+    return {entity_id: [round(float(x), 1), round(float(y), 1)] for entity_id, (x, y) in zip(ids, positions)}
@@ -0,0 +1,155 @@
+import re
+import unicodedata
+from typing import Dict, List, Any, Optional
+
+_NON_WORD_PATTERN = re.compile(r'[\W_]+', re.UNICODE)
+
+
+def normalize_entity_name(name: str) -> str:
+    """Case-, accent- and punctuation-insensitive form of an entity name"""
+    name = unicodedata.normalize('NFKC', str(name or '')).lower()
+    return _NON_WORD_PATTERN.sub(' ', name).strip()
+
+
+def _to_float(value: Any, default: float = 0.0) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _id_key(value: Any) -> str:
+    """Case-insensitive form of an entity id, used both to merge entities and to resolve relationship endpoints"""
+    return '' if value is None else str(value).strip().lower()
+
+
+class _UnionFind:
+    def __init__(self):
+        self.parent = {}
+
+    def find(self, item):
+        self.parent.setdefault(item, item)
+        root = item
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[item] != root:
+            self.parent[item], item = root, self.parent[item]
+        return root
+
+    def union(self, a, b):
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a != root_b:
+            # Keep the earliest-seen entity as the representative
+            if root_b < root_a:
+                root_a, root_b = root_b, root_a
+            self.parent[root_b] = root_a
+
+
+def merge_entity_into(target: Dict[str, Any], entity: Dict[str, Any]) -> None:
+    """Fold one entity into another: maximum importance, longest description, union of attributes"""
+    target['importance'] = max(_to_float(target.get('importance')), _to_float(entity.get('importance')))
+    if len(str(entity.get('description') or '')) > len(str(target.get('description') or '')):
+        target['description'] = entity['description']
+    if target.get('type') in (None, '', 'other') and entity.get('type'):
+        target['type'] = entity['type']
+    attributes = dict(entity.get('attributes') or {})
+    attributes.update(target.get('attributes') or {})
+    if attributes:
+        target['attributes'] = attributes
+
+
+def merge_knowledge_graphs(graphs: List[Dict[str, Any]], summary: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Merge separately extracted knowledge graphs into one
+
+    Entities are combined when their normalized names match, or when they share an id
+    within the same input graph (ids are graph-local: "e12" in one graph says nothing
+    about "e12" in another, so callers like entity resolution decide cross-graph
+    identity through the names alone). The merged entity keeps the first id seen, the maximum importance
+    and the longest description; relationship endpoints are remapped to the merged ids,
+    and duplicate relationships keep their maximum strength.
+    """
+    union_find = _UnionFind()
+    occurrences = []  # (graph_index, entity) in encounter order
+    first_by_name = {}
+    first_by_id = {}
+
+    for graph_index, graph in enumerate(graphs):
+        for entity in graph.get('entities', []):
+            position = len(occurrences)
+            occurrences.append((graph_index, entity))
+            union_find.find(position)
+
+            name_key = normalize_entity_name(entity.get('name') or entity.get('id'))
+            if name_key:
+                if name_key in first_by_name:
+                    union_find.union(first_by_name[name_key], position)
+                else:
+                    first_by_name[name_key] = position
+
+            entity_id = _id_key(entity.get('id'))
+            if entity_id:
+                id_key = (graph_index, entity_id)
+                if id_key in first_by_id:
+                    union_find.union(first_by_id[id_key], position)
+                else:
+                    first_by_id[id_key] = position
+
+    merged_by_root = {}
+    id_maps = [{} for _ in graphs]
+    used_ids = set()
+    entities = []
+
+    for position, (graph_index, entity) in enumerate(occurrences):
+        root = union_find.find(position)
+        merged = merged_by_root.get(root)
+        if merged is None:
+            merged = dict(entity)
+            if entity.get('attributes'):
+                merged['attributes'] = dict(entity['attributes'])
+            merged['importance'] = _to_float(entity.get('importance'))
+            # Generic ids from different graphs can collide, so keep merged ids unique
+            base_id = str(entity.get('id') or normalize_entity_name(entity.get('name')).replace(' ', '_') or 'entity')
+            merged_id = base_id
+            suffix = 2
+            while merged_id in used_ids:
+                merged_id = f"{base_id}_{suffix}"
+                suffix += 1
+            used_ids.add(merged_id)
+            merged['id'] = merged_id
+            merged_by_root[root] = merged
+            entities.append(merged)
+        else:
+            merge_entity_into(merged, entity)
+
+        if _id_key(entity.get('id')):
+            id_maps[graph_index].setdefault(_id_key(entity['id']), merged['id'])
+
+    relationships = []
+    relationship_index = {}
+    for graph_index, graph in enumerate(graphs):
+        id_map = id_maps[graph_index]
+        for relationship in graph.get('relationships', []):
+            source = id_map.get(_id_key(relationship.get('source')))
+            target = id_map.get(_id_key(relationship.get('target')))
+            if not source or not target or source == target:
+                continue
+            key = (source, target, str(relationship.get('type', '')).lower())
+            existing = relationship_index.get(key)
+            if existing is None:
+                merged_relationship = dict(relationship)
+                merged_relationship['source'] = source
+                merged_relationship['target'] = target
+                merged_relationship['strength'] = _to_float(relationship.get('strength'))
+                relationship_index[key] = merged_relationship
+                relationships.append(merged_relationship)
+            else:
+                existing['strength'] = max(existing['strength'], _to_float(relationship.get('strength')))
+                if len(str(relationship.get('description') or '')) > len(str(existing.get('description') or '')):
+                    existing['description'] = relationship['description']
+
+    if summary is None:
+        summaries = [str(graph.get('summary') or '') for graph in graphs]
+        summary = max(summaries, key=len) if summaries else ''
+
+    return {"entities": entities, "relationships": relationships, "summary": summary}
@@ -0,0 +1,452 @@
+"""Local HTTP service: one warm generator behind a bounded job queue
+
+    POST /extract              text/plain or text/markdown body, application/json {"text": ...},
+                               application/pdf body, or a multipart/form-data upload
+         ?format=json|html     graph JSON (default) or the rendered, self-contained page
+    GET  /health               queue depth, in-flight jobs and worker count
+    GET  /metrics              Prometheus text: service latency histograms, queue depth and
+                               the generator's run report (?format=json for JSON)
+
+The service is plain asyncio (asyncio.start_server with a small HTTP/1.1 reader, keep-alive
+included), so it needs nothing beyond the standard library. Requests are parsed on the event
+loop and put on an asyncio.Queue of bounded size; a fixed number of worker tasks hand the
+jobs to a thread pool running the shared generator. When the queue is full the request is
+rejected right away with 503 and Retry-After instead of piling up, so a caller can back off
+or go to another instance. A document the model gives no usable answer for is answered with
+502, never with the generator's placeholder fallback graph.
+
+The generator and its adapter are created once, before the first request, so the provider
+client (and the connection pool it keeps) is reused by every request. Timings come back in
+a Server-Timing header (queue wait, processing and the input compaction of that request)
+and feed the /metrics histograms.
+"""
+import asyncio
+import email.parser
+import email.policy
+import json
+import os
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from typing import Dict, List, Any, Optional, Tuple
+from urllib.parse import urlsplit, parse_qs
+
+from pipeline_metrics import PipelineMetrics
+from visualization_template import render_inline_page
+
+# Upper bounds (seconds) of the latency histogram buckets exposed on /metrics
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+# Time allowed for a client to send the request line, headers and body
+READ_TIMEOUT_SECONDS = 30.0
+MAX_HEADERS = 100
+# Latencies kept for the percentiles reported by /metrics?format=json
+LATENCY_WINDOW = 1024
+
+
+class ServiceError(Exception):
+    """A request that is answered with an HTTP error status"""
+
+    def __init__(self, status: int, message: str, headers: Optional[Dict[str, str]] = None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+
+class ServiceMetrics:
+    """Request counters and latency histograms of the service (event loop only, so no locking)"""
+
+    def __init__(self):
+        self.requests: Dict[Tuple[str, int], int] = {}
+        self.histograms = {name: {"buckets": [0] * len(LATENCY_BUCKETS), "count": 0, "sum": 0.0}
+                           for name in ("request", "queue_wait", "processing")}
+        self.recent = {name: deque(maxlen=LATENCY_WINDOW) for name in self.histograms}
+        self.rejected = 0
+
+    def observe(self, name: str, seconds: float) -> None:
+        histogram = self.histograms[name]
+        for index, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                histogram["buckets"][index] += 1
+        histogram["count"] += 1
+        histogram["sum"] += seconds
+        self.recent[name].append(seconds)
+
+    def count_request(self, path: str, status: int) -> None:
+        key = (path, status)
+        self.requests[key] = self.requests.get(key, 0) + 1
+
+    def percentiles(self, name: str) -> Dict[str, float]:
+        values = sorted(self.recent[name])
+        if not values:
+            return {}
+        return {f"p{int(q * 100)}": round(values[min(len(values) - 1, int(q * len(values)))], 4)
+                for q in (0.5, 0.95, 0.99)}
+
+    def to_prometheus(self, gauges: Dict[str, int], prefix: str = "kg_service") -> str:
+        lines = []
+        lines.append(f"# HELP {prefix}_requests_total HTTP requests by path and status")
+        lines.append(f"# TYPE {prefix}_requests_total counter")
+        for (path, status), value in sorted(self.requests.items()):
+            lines.append(f'{prefix}_requests_total{{path="{path}",status="{status}"}} {value}')
+        lines.append(f"# HELP {prefix}_rejected_total Extraction requests rejected because the queue was full")
+        lines.append(f"# TYPE {prefix}_rejected_total counter")
+        lines.append(f"{prefix}_rejected_total {self.rejected}")
+        for name, help_text in (("request", "End-to-end latency of extraction requests"),
+                                ("queue_wait", "Time extraction jobs waited in the queue"),
+                                ("processing", "Time spent extracting and rendering a job")):
+            histogram = self.histograms[name]
+            metric = f"{prefix}_{name}_seconds"
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} histogram")
+            for bound, value in zip(LATENCY_BUCKETS, histogram["buckets"]):
+                lines.append(f'{metric}_bucket{{le="{bound}"}} {value}')
+            lines.append(f'{metric}_bucket{{le="+Inf"}} {histogram["count"]}')
+            lines.append(f"{metric}_sum {round(histogram['sum'], 4)}")
+            lines.append(f"{metric}_count {histogram['count']}")
+        for name, value in gauges.items():
+            lines.append(f"# TYPE {prefix}_{name} gauge")
+            lines.append(f"{prefix}_{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+class _Job:
+    __slots__ = ("kind", "payload", "output", "future", "queued_at", "queue_seconds", "seconds", "compaction")
+
+    def __init__(self, kind: str, payload: Any, output: str, future: asyncio.Future):
+        self.kind = kind
+        self.payload = payload
+        self.output = output
+        self.future = future
+        self.queued_at = time.perf_counter()
+        self.queue_seconds = 0.0
+        self.seconds = 0.0
+        self.compaction = {}
+
+
+def _parse_upload(content_type: str, body: bytes) -> Tuple[str, Any]:
+    """("text", str) or ("pdf", bytes) from a request body"""
+    media_type = content_type.split(';')[0].strip().lower()
+    if media_type == 'multipart/form-data':
+        message = email.parser.BytesParser(policy=email.policy.default).parsebytes(
+            f"Content-Type: {content_type}\r\n\r\n".encode('latin-1') + body)
+        for part in message.iter_parts():
+            if part.get_param('name', header='content-disposition') in ('file', 'text', 'document') \
+                    or part.get_filename():
+                return _parse_upload(part.get_content_type(), part.get_payload(decode=True) or b"")
+        raise ServiceError(400, "multipart upload without a file, text or document field")
+    if media_type == 'application/pdf' or body.startswith(b'%PDF-'):
+        return "pdf", body
+    try:
+        text = body.decode('utf-8')
+    except UnicodeDecodeError:
+        raise ServiceError(415, "request body is neither UTF-8 text nor a PDF")
+    if media_type == 'application/json':
+        try:
+            text = json.loads(text)["text"]
+        except (ValueError, KeyError, TypeError):
+            raise ServiceError(400, 'JSON body must be an object with a "text" field')
+        if not isinstance(text, str):
+            raise ServiceError(400, '"text" must be a string')
+    if not text.strip():
+        raise ServiceError(400, "empty document")
+    return "text", text
+
+
+class GraphService:
+    """asyncio HTTP front end sharing one warm KnowledgeGraphGenerator between all requests"""
+
+    def __init__(self, generator, host: str = "127.0.0.1", port: int = 8765, workers: int = 2,
+                 queue_size: int = 16, max_upload_bytes: int = 20 * 2 ** 20):
+        """
+        Args:
+            generator: KnowledgeGraphGenerator used by every request
+            host: Interface to listen on
+            port: TCP port; 0 picks a free one (see self.port after start())
+            workers: Jobs processed at the same time
+            queue_size: Jobs waiting beyond those being processed; further requests get 503
+            max_upload_bytes: Largest accepted request body
+        """
+        self.generator = generator
+        self.host = host
+        self.port = port
+        self.workers = max(1, workers)
+        self.queue_size = max(1, queue_size)
+        self.max_upload_bytes = max_upload_bytes
+        self.metrics = ServiceMetrics()
+        self.in_flight = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._worker_tasks: List[asyncio.Task] = []
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def start(self) -> None:
+        """Warm the adapter, start the workers and listen"""
+        loop = asyncio.get_running_loop()
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="kg-service")
+        # Creating the adapter up front keeps provider start-up out of the first request
+        await loop.run_in_executor(self._executor, lambda: self.generator.ai)
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._worker_tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        print(f"🛰️ Knowledge graph service on http://{self.host}:{self.port} "
+              f"({self.workers} workers, queue of {self.queue_size})")
+
+    async def stop(self) -> None:
+        """Stop accepting connections, cancel the workers and release the thread pool"""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self.generator.flush_similarity_index()
+
+    async def serve_forever(self) -> None:
+        await self.start()
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.stop()
+
+    # Jobs
+
+    async def _worker(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await self._queue.get()
+            try:
+                if job.future.done():
+                    continue  # the client went away while the job was queued
+                job.queue_seconds = time.perf_counter() - job.queued_at
+                self.in_flight += 1
+                started = time.perf_counter()
+                try:
+                    result = await loop.run_in_executor(self._executor, self._run_job, job)
+                except Exception as e:
+                    if not job.future.done():
+                        job.future.set_exception(e)
+                else:
+                    if not job.future.done():
+                        job.future.set_result(result)
+                finally:
+                    self.in_flight -= 1
+                    job.seconds = time.perf_counter() - started
+                    self.metrics.observe("queue_wait", job.queue_seconds)
+                    self.metrics.observe("processing", job.seconds)
+            finally:
+                self._queue.task_done()
+
+    def _run_job(self, job: _Job) -> Tuple[bytes, str]:
+        """Extract (and render) one document; runs on the thread pool"""
+        generator = self.generator
+        # The generator is shared by the workers; its compaction stats are per thread, so read them here
+        generator.last_compaction = {}
+        if job.kind == "pdf":
+            fd, pdf_path = tempfile.mkstemp(suffix='.pdf')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(job.payload)
+                knowledge_graph = generator.extract_knowledge_graph_from_pdf(pdf_path)
+            finally:
+                os.remove(pdf_path)
+        else:
+            knowledge_graph = generator.extract_knowledge_graph_from_text(job.payload)
+        job.compaction = generator.last_compaction
+        if knowledge_graph.get('fallback'):
+            # The generator logged why; the placeholder graph is not an answer to this document
+            raise ServiceError(502, "extraction failed: the model gave no usable answer")
+        if generator.graph_analytics:
+            generator.analyze_knowledge_graph(knowledge_graph)
+
+        if job.output == "html":
+            entities = knowledge_graph.get('entities', [])
+            relationships = knowledge_graph.get('relationships', [])
+            layout = generator._compute_layout(entities, relationships) if generator.precompute_layout else {}
+            page = render_inline_page(entities, relationships,
+                                      knowledge_graph.get('summary', 'Professional Knowledge Graph'), layout)
+            return page.encode('utf-8'), "text/html; charset=utf-8"
+        return json.dumps(knowledge_graph, ensure_ascii=False).encode('utf-8'), "application/json"
+
+    async def _extract(self, query: Dict[str, List[str]], headers: Dict[str, str],
+                       body: bytes) -> Tuple[int, bytes, str, Dict[str, str]]:
+        started = time.perf_counter()
+        output = (query.get('format') or [""])[0].lower()
+        if not output:
+            output = "html" if "text/html" in headers.get('accept', '') else "json"
+        if output not in ("json", "html"):
+            raise ServiceError(400, 'format must be "json" or "html"')
+        kind, payload = _parse_upload(headers.get('content-type', 'text/plain'), body)
+
+        job = _Job(kind, payload, output, asyncio.get_running_loop().create_future())
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self.metrics.rejected += 1
+            # A rough guess of when a slot frees up: the recent median processing time
+            retry_after = max(1, round(self.metrics.percentiles("processing").get("p50", 1.0)))
+            raise ServiceError(503, f"queue is full ({self.queue_size} jobs waiting)",
+                               {"Retry-After": str(retry_after)})
+        try:
+            content, content_type = await job.future
+        except asyncio.CancelledError:
+            job.future.cancel()
+            raise
+        except ServiceError:
+            raise
+        except Exception as e:
+            raise ServiceError(500, f"extraction failed: {e}")
+        seconds = time.perf_counter() - started
+        self.metrics.observe("request", seconds)
+        timing = (f"queue;dur={job.queue_seconds * 1000:.1f}, process;dur={job.seconds * 1000:.1f}, "
+                  f"total;dur={seconds * 1000:.1f}")
+        if job.compaction:
+            timing += (f", compaction;dur={job.compaction['seconds'] * 1000:.1f};"
+                       f"desc=\"{job.compaction['tokens_before']} to {job.compaction['tokens_after']} tokens\"")
+        return 200, content, content_type, {"Server-Timing": timing}
+
+    # HTTP
+
+    def _health(self) -> Dict[str, Any]:
+        return {"status": "ok", "queue_depth": self.queue_depth, "queue_size": self.queue_size,
+                "in_flight": self.in_flight, "workers": self.workers,
+                "provider": self.generator.ai.get_provider_info().get('provider')}
+
+    def _metrics(self, query: Dict[str, List[str]]) -> Tuple[int, bytes, str, Dict[str, str]]:
+        report = self.generator.get_run_report()
+        if (query.get('format') or [""])[0] == "json":
+            report["service"] = dict(self._health(), rejected=self.metrics.rejected,
+                                     latency={name: self.metrics.percentiles(name) for name in self.metrics.recent},
+                                     requests={f"{path} {status}": value
+                                               for (path, status), value in sorted(self.metrics.requests.items())})
+            return 200, json.dumps(report).encode('utf-8'), "application/json", {}
+        text = self.metrics.to_prometheus({"queue_depth": self.queue_depth, "in_flight": self.in_flight,
+                                           "queue_size": self.queue_size, "workers": self.workers})
+        text += PipelineMetrics.to_prometheus(report)
+        return 200, text.encode('utf-8'), "text/plain; version=0.0.4", {}
+
+    async def _route(self, method: str, target: str, headers: Dict[str, str],
+                     body: bytes) -> Tuple[int, bytes, str, Dict[str, str]]:
+        url = urlsplit(target)
+        query = parse_qs(url.query)
+        routes = {"/extract": ("POST",), "/health": ("GET", "HEAD"), "/metrics": ("GET", "HEAD")}
+        if url.path not in routes:
+            raise ServiceError(404, f"no such endpoint: {url.path}")
+        if method not in routes[url.path]:
+            raise ServiceError(405, f"{method} is not allowed on {url.path}",
+                               {"Allow": ", ".join(routes[url.path])})
+        if url.path == "/extract":
+            return await self._extract(query, headers, body)
+        if url.path == "/health":
+            return 200, json.dumps(self._health()).encode('utf-8'), "application/json", {}
+        return self._metrics(query)
+
+    @staticmethod
+    async def _read_line(reader: asyncio.StreamReader, status: int, what: str) -> bytes:
+        try:
+            return await reader.readline()
+        except (ValueError, asyncio.LimitOverrunError):
+            # Longer than the reader's buffer limit (64 KiB)
+            raise ServiceError(status, f"{what} too large")
+
+    async def _read_request(self, reader: asyncio.StreamReader,
+                            writer: asyncio.StreamWriter) -> Optional[Tuple[str, str, str, Dict[str, str], bytes]]:
+        request_line = await self._read_line(reader, 414, "request line")
+        if not request_line.strip():
+            return None
+        try:
+            method, target, version = request_line.decode('latin-1').split()
+        except ValueError:
+            raise ServiceError(400, "malformed request line")
+        headers = {}
+        while True:
+            line = await self._read_line(reader, 431, "header line")
+            if line in (b"\r\n", b"\n", b""):
+                break
+            if len(headers) >= MAX_HEADERS:
+                raise ServiceError(431, "too many headers")
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        if 'chunked' in headers.get('transfer-encoding', '').lower():
+            raise ServiceError(411, "chunked request bodies are not supported, send Content-Length")
+        try:
+            length = int(headers.get('content-length') or 0)
+        except ValueError:
+            raise ServiceError(400, "invalid Content-Length")
+        if length < 0:
+            raise ServiceError(400, "invalid Content-Length")
+        if length > self.max_upload_bytes:
+            raise ServiceError(413, f"upload larger than {self.max_upload_bytes} bytes")
+        if length and headers.get('expect', '').lower() == '100-continue':
+            writer.write(b"HTTP/1.1 100 Continue\r\n\r\n")
+            await writer.drain()
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), target, version, headers, body
+
+    @staticmethod
+    def _response(status: int, content: bytes, content_type: str, headers: Dict[str, str],
+                  keep_alive: bool, head: bool = False) -> bytes:
+        lines = [f"HTTP/1.1 {status} {HTTPStatus(status).phrase}",
+                 f"Content-Type: {content_type}",
+                 f"Content-Length: {len(content)}",
+                 f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+        lines.extend(f"{name}: {value}" for name, value in headers.items())
+        return ("\r\n".join(lines) + "\r\n\r\n").encode('latin-1') + (b"" if head else content)
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                path = "-"
+                # Stays False when the request could not be read completely, so the connection is closed
+                keep_alive = False
+                method = ""
+                try:
+                    request = await asyncio.wait_for(self._read_request(reader, writer), READ_TIMEOUT_SECONDS)
+                    if request is None:
+                        break
+                    method, target, version, headers, body = request
+                    path = urlsplit(target).path
+                    connection = headers.get('connection', '').lower()
+                    keep_alive = connection == 'keep-alive' if version == "HTTP/1.0" else connection != 'close'
+                    status, content, content_type, extra_headers = await self._route(method, target, headers, body)
+                except ServiceError as e:
+                    status, content_type, extra_headers = e.status, "application/json", e.headers
+                    content = json.dumps({"error": str(e)}).encode('utf-8')
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError):
+                    break
+                if path in ("/extract", "/health", "/metrics"):
+                    self.metrics.count_request(path, status)
+                writer.write(self._response(status, content, content_type, extra_headers, keep_alive,
+                                            head=method == "HEAD"))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (ConnectionError, asyncio.CancelledError):
+                pass
+
+
+def serve(generator, host: str = "127.0.0.1", port: int = 8765, workers: int = 2, queue_size: int = 16,
+          max_upload_bytes: int = 20 * 2 ** 20) -> None:
+    """Run the service until interrupted (see GraphService)"""
+    service = GraphService(generator, host, port, workers, queue_size, max_upload_bytes)
+    try:
+        asyncio.run(service.serve_forever())
+    except KeyboardInterrupt:
+        print(f"👋 Service stopped after {sum(service.metrics.requests.values())} requests")
@@ -0,0 +1,322 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Any, Optional, Iterable
+
+from graph_merge import normalize_entity_name, _to_float
+
+# Bump when the schema changes; databases written with another version are rebuilt from scratch
+SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    summary TEXT,
+    entity_count INTEGER NOT NULL DEFAULT 0,
+    relationship_count INTEGER NOT NULL DEFAULT 0,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS entities (
+    document_id INTEGER NOT NULL REFERENCES documents(id) ON DELETE CASCADE,
+    entity_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    normalized_name TEXT NOT NULL,
+    type TEXT NOT NULL,
+    description TEXT,
+    importance REAL NOT NULL DEFAULT 0,
+    extra TEXT,
+    PRIMARY KEY (document_id, entity_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS relationships (
+    document_id INTEGER NOT NULL REFERENCES documents(id) ON DELETE CASCADE,
+    source TEXT NOT NULL,
+    target TEXT NOT NULL,
+    type TEXT NOT NULL,
+    description TEXT,
+    strength REAL NOT NULL DEFAULT 0,
+    extra TEXT,
+    PRIMARY KEY (document_id, source, target, type)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_entities_type_importance ON entities(type, importance DESC);
+CREATE INDEX IF NOT EXISTS idx_entities_normalized_name ON entities(normalized_name);
+CREATE INDEX IF NOT EXISTS idx_entities_importance ON entities(importance DESC);
+CREATE INDEX IF NOT EXISTS idx_relationships_target ON relationships(document_id, target);
+CREATE INDEX IF NOT EXISTS idx_relationships_type ON relationships(type);
+"""
+
+_ENTITY_COLUMNS = ('id', 'name', 'type', 'description', 'importance')
+_RELATIONSHIP_COLUMNS = ('source', 'target', 'type', 'description', 'strength')
+
+
+def _entity_select(alias: str = "e") -> str:
+    return ", ".join(["d.name"] + [f"{alias}.{column}" for column in
+                                    ("entity_id", "name", "type", "description", "importance", "extra")])
+
+
+def _extra_json(item: Dict[str, Any], known: tuple) -> Optional[str]:
+    extra = {key: value for key, value in item.items() if key not in known}
+    return json.dumps(extra, ensure_ascii=False, default=str) if extra else None
+
+
+def _entity_from_row(row: tuple) -> Dict[str, Any]:
+    document, entity_id, name, entity_type, description, importance, extra = row
+    entity = json.loads(extra) if extra else {}
+    entity.update({
+        "id": entity_id,
+        "name": name,
+        "type": entity_type,
+        "description": description or "",
+        "importance": importance,
+        "document": document
+    })
+    return entity
+
+
+class KnowledgeGraphStore:
+    """Persistent SQLite store holding the knowledge graphs of many documents
+
+    Every document owns its entities and relationships (entity ids are only unique per
+    document). Entities are indexed by type, normalized name and importance and
+    relationships by both endpoints, so cross-document questions such as "who else has
+    the skill Python" are index lookups instead of scans over every _data.json file.
+    """
+
+    def __init__(self, db_path: str = "knowledge_graph.db"):
+        """
+        Open (and create if needed) a graph store
+
+        Args:
+            db_path: SQLite database file; ":memory:" keeps the store in memory
+        """
+        self.db_path = db_path
+        if db_path != ":memory:" and os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        # One connection shared by all threads of a batch run, serialized by a lock
+        self._connection = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.RLock()
+        with self._lock:
+            self._connection.execute("PRAGMA foreign_keys = ON")
+            self._connection.execute("PRAGMA journal_mode = WAL")
+            self._connection.execute("PRAGMA synchronous = NORMAL")
+            version = self._connection.execute("PRAGMA user_version").fetchone()[0]
+            if version not in (0, SCHEMA_VERSION):
+                self._connection.executescript(
+                    "DROP TABLE IF EXISTS relationships; DROP TABLE IF EXISTS entities; DROP TABLE IF EXISTS documents;")
+            self._connection.executescript(_SCHEMA)
+            self._connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            self._connection.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _query(self, sql: str, params: Iterable[Any] = ()) -> List[tuple]:
+        with self._lock:
+            return self._connection.execute(sql, tuple(params)).fetchall()
+
+    # ------------------------------------------------------------------ writes
+
+    def upsert_graph(self, document: str, knowledge_graph: Dict[str, Any]) -> int:
+        """
+        Insert or replace the graph of one document in a single transaction
+
+        Args:
+            document: Unique document name (e.g. the output file stem)
+            knowledge_graph: Graph with "entities", "relationships" and "summary"
+
+        Returns:
+            The document's row id
+        """
+        entities = knowledge_graph.get('entities', [])
+        relationships = knowledge_graph.get('relationships', [])
+
+        entity_rows = {}
+        for entity in entities:
+            entity_id = str(entity.get('id', ''))
+            if not entity_id:
+                continue
+            name = str(entity.get('name') or entity_id)
+            entity_rows[entity_id] = (
+                entity_id, name, normalize_entity_name(name), str(entity.get('type') or 'other'),
+                entity.get('description') or '', _to_float(entity.get('importance'), 5.0),
+                _extra_json(entity, _ENTITY_COLUMNS)
+            )
+        relationship_rows = {}
+        for relationship in relationships:
+            source, target = str(relationship.get('source', '')), str(relationship.get('target', ''))
+            if not source or not target:
+                continue
+            relationship_type = str(relationship.get('type') or 'related_to')
+            relationship_rows[(source, target, relationship_type)] = (
+                source, target, relationship_type, relationship.get('description') or '',
+                _to_float(relationship.get('strength'), 5.0), _extra_json(relationship, _RELATIONSHIP_COLUMNS)
+            )
+
+        with self._lock, self._connection:
+            document_id = self._connection.execute(
+                """INSERT INTO documents (name, summary, entity_count, relationship_count, updated_at)
+                   VALUES (?, ?, ?, ?, ?)
+                   ON CONFLICT(name) DO UPDATE SET summary = excluded.summary,
+                       entity_count = excluded.entity_count, relationship_count = excluded.relationship_count,
+                       updated_at = excluded.updated_at
+                   RETURNING id""",
+                (document, knowledge_graph.get('summary', ''), len(entity_rows), len(relationship_rows), time.time())
+            ).fetchone()[0]
+            # Re-extraction replaces the whole document graph; stale rows must not linger
+            self._connection.execute("DELETE FROM relationships WHERE document_id = ?", (document_id,))
+            self._connection.execute("DELETE FROM entities WHERE document_id = ?", (document_id,))
+            self._connection.executemany(
+                "INSERT INTO entities VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(document_id,) + row for row in entity_rows.values()])
+            self._connection.executemany(
+                "INSERT INTO relationships VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(document_id,) + row for row in relationship_rows.values()])
+        return document_id
+
+    def upsert_graphs(self, graphs: Dict[str, Dict[str, Any]]) -> int:
+        """Bulk variant of upsert_graph for a mapping of document name to graph"""
+        for document, knowledge_graph in graphs.items():
+            self.upsert_graph(document, knowledge_graph)
+        return len(graphs)
+
+    def import_json_files(self, paths: Iterable[str]) -> int:
+        """Load existing *_data.json files; the document name is the file stem without '_data'"""
+        imported = 0
+        for path in paths:
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    knowledge_graph = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Skipping {path}: {e}")
+                continue
+            stem = os.path.splitext(os.path.basename(path))[0]
+            self.upsert_graph(stem[:-len('_data')] if stem.endswith('_data') else stem, knowledge_graph)
+            imported += 1
+        return imported
+
+    def delete_document(self, document: str) -> bool:
+        with self._lock, self._connection:
+            return self._connection.execute("DELETE FROM documents WHERE name = ?", (document,)).rowcount > 0
+
+    # ----------------------------------------------------------------- queries
+
+    def documents(self) -> List[Dict[str, Any]]:
+        rows = self._query("SELECT name, summary, entity_count, relationship_count, updated_at FROM documents ORDER BY name")
+        return [{"name": name, "summary": summary, "entities": entity_count,
+                 "relationships": relationship_count, "updated_at": updated_at}
+                for name, summary, entity_count, relationship_count, updated_at in rows]
+
+    def load_graph(self, document: str) -> Optional[Dict[str, Any]]:
+        """Rebuild the stored graph of one document in the generator's dict format"""
+        found = self._query("SELECT id, summary FROM documents WHERE name = ?", (document,))
+        if not found:
+            return None
+        document_id, summary = found[0]
+
+        entities = []
+        for row in self._query(f"SELECT {_entity_select()} FROM entities e JOIN documents d ON d.id = e.document_id "
+                               "WHERE e.document_id = ?", (document_id,)):
+            entity = _entity_from_row(row)
+            del entity['document']
+            entities.append(entity)
+
+        relationships = []
+        for source, target, relationship_type, description, strength, extra in self._query(
+                "SELECT source, target, type, description, strength, extra FROM relationships WHERE document_id = ?",
+                (document_id,)):
+            relationship = json.loads(extra) if extra else {}
+            relationship.update({"source": source, "target": target, "type": relationship_type,
+                                 "description": description or "", "strength": strength})
+            relationships.append(relationship)
+
+        return {"entities": entities, "relationships": relationships, "summary": summary or ""}
+
+    def find_entities(self, name: str, document: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Entities whose normalized name matches, across all documents unless one is given"""
+        sql = (f"SELECT {_entity_select()} FROM entities e JOIN documents d ON d.id = e.document_id "
+               "WHERE e.normalized_name = ?")
+        params = [normalize_entity_name(name)]
+        if document is not None:
+            sql += " AND d.name = ?"
+            params.append(document)
+        return [_entity_from_row(row) for row in self._query(sql + " ORDER BY e.importance DESC", params)]
+
+    def entities_by_type(self, entity_type: str, document: Optional[str] = None,
+                         limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Entities of one type, most important first"""
+        return self.top_entities(limit, entity_type, document)
+
+    def top_entities(self, k: Optional[int] = 10, entity_type: Optional[str] = None,
+                     document: Optional[str] = None) -> List[Dict[str, Any]]:
+        """The k most important entities, optionally restricted to a type and/or a document (k=None for all)"""
+        sql = f"SELECT {_entity_select()} FROM entities e JOIN documents d ON d.id = e.document_id"
+        conditions, params = [], []
+        if entity_type is not None:
+            conditions.append("e.type = ?")
+            params.append(entity_type)
+        if document is not None:
+            conditions.append("d.name = ?")
+            params.append(document)
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY e.importance DESC, e.name"
+        if k is not None:
+            sql += " LIMIT ?"
+            params.append(int(k))
+        return [_entity_from_row(row) for row in self._query(sql, params)]
+
+    def neighbors(self, name: str, document: Optional[str] = None, relationship_type: Optional[str] = None,
+                  neighbor_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Entities directly connected to every entity named `name`
+
+        Args:
+            name: Entity name, matched on its normalized form
+            document: Restrict to one document; by default all documents are searched
+            relationship_type: Only follow relationships of this type
+            neighbor_type: Only return neighbors of this entity type
+
+        Returns:
+            One dict per edge: the neighbor entity plus "relationship" (type, strength,
+            description) and "direction" ("out" when the named entity is the source)
+        """
+        results = []
+        for direction, near, far in (("out", "source", "target"), ("in", "target", "source")):
+            sql = (f"SELECT {_entity_select('n')}, r.type, r.strength, r.description "
+                   "FROM entities e "
+                   f"JOIN relationships r ON r.document_id = e.document_id AND r.{near} = e.entity_id "
+                   f"JOIN entities n ON n.document_id = r.document_id AND n.entity_id = r.{far} "
+                   "JOIN documents d ON d.id = e.document_id "
+                   "WHERE e.normalized_name = ?")
+            params = [normalize_entity_name(name)]
+            if document is not None:
+                sql += " AND d.name = ?"
+                params.append(document)
+            if relationship_type is not None:
+                sql += " AND r.type = ?"
+                params.append(relationship_type)
+            if neighbor_type is not None:
+                sql += " AND n.type = ?"
+                params.append(neighbor_type)
+            for row in self._query(sql, params):
+                neighbor = _entity_from_row(row[:7])
+                neighbor["relationship"] = {"type": row[7], "strength": row[8], "description": row[9] or ""}
+                neighbor["direction"] = direction
+                results.append(neighbor)
+
+        results.sort(key=lambda item: -item["relationship"]["strength"])
+        return results
+
+    def stats(self) -> Dict[str, int]:
+        counts = self._query("SELECT (SELECT COUNT(*) FROM documents), (SELECT COUNT(*) FROM entities), "
+                             "(SELECT COUNT(*) FROM relationships)")[0]
+        return {"documents": counts[0], "entities": counts[1], "relationships": counts[2]}
@@ -0,0 +1,127 @@
+import hashlib
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional, Tuple
+
+from graph_merge import merge_knowledge_graphs
+from text_chunking import split_into_sections, split_text_into_chunks
+from visualization_template import open_output
+
+# Bump when the section state layout or the way sections are fingerprinted changes
+STATE_VERSION = 1
+
+_WHITESPACE_PATTERN = re.compile(r'\s+')
+_WORD_PATTERN = re.compile(r'\w', re.UNICODE)
+
+
+def section_state_file(output_file: str) -> str:
+    """Path of the per-section state kept next to a generated graph"""
+    from knowledge_graph_generator import output_sidecar
+    return output_sidecar(output_file, '_sections.json')
+
+
+def document_sections(text: str, max_chars: int) -> Tuple[str, List[str]]:
+    """Return the document title and its stable sections (oversized sections are chunked deterministically)"""
+    title = ""
+    for line in text.splitlines():
+        if line.strip():
+            title = line.strip().lstrip('#').strip()
+            break
+
+    sections = []
+    for section in split_into_sections(text):
+        # Separator-only sections such as "---" carry nothing to extract
+        if not _WORD_PATTERN.search(section.replace('---', '')):
+            continue
+        sections.extend(split_text_into_chunks(section, max_chars) if len(section) > max_chars else [section])
+    return title, sections
+
+
+def fingerprint_section(title: str, section: str) -> str:
+    """Whitespace-insensitive content hash of a section together with its document title"""
+    normalized = _WHITESPACE_PATTERN.sub(' ', f"{title}\n{section}").strip()
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+
+def load_section_state(state_file: str) -> Dict[str, Dict[str, Any]]:
+    """Previously extracted section graphs keyed by fingerprint; empty if missing or outdated"""
+    try:
+        with open(state_file, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if state.get('version') != STATE_VERSION:
+        return {}
+    return {section['fingerprint']: section for section in state.get('sections', [])}
+
+
+def save_section_state(state_file: str, sections: List[Dict[str, Any]]) -> None:
+    """Write the section state atomically"""
+    with open_output(state_file) as f:
+        json.dump({"version": STATE_VERSION, "sections": sections}, f, ensure_ascii=False, indent=1)
+
+
+def update_knowledge_graph_incrementally(generator, text: str, state_file: str,
+                                         max_workers: Optional[int] = None) -> Tuple[Dict[str, Any], Dict[str, int]]:
+    """
+    Re-extract only the sections of text that are new or changed since the last run
+
+    Each section is extracted on its own (prefixed with the document title for context),
+    cleaned, and stored in state_file under its fingerprint. The document graph is the
+    merge of the current sections' graphs, so removed sections stop contributing.
+
+    Returns:
+        The merged knowledge graph and counts of reused, extracted and dropped sections
+    """
+    title, sections = document_sections(text, generator.chunk_size_chars)
+    previous = load_section_state(state_file)
+
+    ordered = []
+    pending = []
+    seen = {}
+    for section in sections:
+        fingerprint = fingerprint_section(title, section)
+        # Identical sections inside one document get distinct keys
+        seen[fingerprint] = seen.get(fingerprint, 0) + 1
+        if seen[fingerprint] > 1:
+            fingerprint = f"{fingerprint}#{seen[fingerprint]}"
+        entry = previous.get(fingerprint)
+        if entry is None:
+            entry = {"fingerprint": fingerprint, "heading": section.splitlines()[0][:120], "graph": None}
+            pending.append((entry, section))
+        ordered.append(entry)
+
+    def extract_section(item: Tuple[Dict[str, Any], str]) -> None:
+        entry, section = item
+        prompt_text = section if section.lstrip('# ').startswith(title) else f"{title}\n\n{section}"
+        if generator.compact_input:
+            # Fingerprints hash the raw section, so cleaning only what is sent keeps them stable
+            prompt_text, _ = generator._compact(prompt_text)
+        try:
+            graph = generator._extract_raw_knowledge_graph(prompt_text)
+        except Exception as e:
+            print(f"⚠️ Section extraction failed ({entry['heading']}): {e}")
+            graph = None
+        if graph:
+            entry['graph'] = generator._validate_and_clean_entities(graph)
+
+    if pending:
+        workers = max(1, min(max_workers or generator.max_parallel_chunks, len(pending)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(extract_section, pending))
+
+    # Failed sections are not persisted, so the next run retries them
+    current = [entry for entry in ordered if entry['graph']]
+    current_keys = {entry['fingerprint'] for entry in ordered}
+    stats = {
+        "sections": len(ordered),
+        "reused": len(ordered) - len(pending),
+        "extracted": sum(1 for entry, _ in pending if entry['graph']),
+        "failed": sum(1 for entry, _ in pending if not entry['graph']),
+        "dropped": sum(1 for key in previous if key not in current_keys)
+    }
+
+    save_section_state(state_file, current)
+    knowledge_graph = merge_knowledge_graphs([entry['graph'] for entry in current])
+    return knowledge_graph, stats
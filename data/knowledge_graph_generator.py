@@ -1,47 +1,238 @@
+import atexit
 import json
 import os
-from typing import Dict, List, Any
-from ai_adapter import create_ai_adapter, AIAdapter
-from utils import extract_text_from_pdf
-from prompt_templates import PromptTemplates
+import threading
+import time
+from typing import Dict, List, Any, Optional, Iterator, Iterable, Tuple, Callable
+from pipeline_metrics import PipelineMetrics, InstrumentedAdapter, timed_stage
+
+# Everything else (the adapters, cache, compaction, chunking, merge, stream parser, viewer templates,
+# batch, PDF, store and incremental modules) is imported where it is first needed, so that `--help`
+# and work which never calls a model (re-rendering a saved graph) start fast
+
+
+def output_sidecar(output_file: str, suffix: str) -> str:
+    """Path of a file kept next to a generated page, e.g. output_sidecar("cv.html.gz", "_data.json") -> "cv_data.json"
+    
+    The page's .gz and .html extensions are dropped first, so the sidecar never carries
+    a misleading .gz and never coincides with the page itself.
+    """
+    base = output_file[:-3] if output_file.endswith('.gz') else output_file
+    return os.path.splitext(base)[0] + suffix
+
 
 class KnowledgeGraphGenerator:
-    def __init__(self, ai_provider: str = "auto"):
+    # Upper bound on the prompt size of a single batched classification request
+    CLASSIFICATION_BATCH_MAX_CHARS = 12000
+    # A changed similarity index is written at most this often while documents are saved;
+    # flush_similarity_index (called at the end of a batch and at exit) writes the rest
+    SIMILARITY_INDEX_FLUSH_SECONDS = 30.0
+
+    def __init__(self, ai_provider: Any = "auto", classification_batch_size: int = 40,
+                 cache_dir: Optional[str] = None, chunk_size_chars: int = 6000,
+                 max_parallel_chunks: int = 4, lexicon_file: Optional[str] = None,
+                 precompute_layout: bool = True, visualization_mode: str = "inline",
+                 compress_graph_data: bool = False, graph_store: Optional[str] = None,
+                 pdf_processes: Optional[int] = None, verbose: bool = False, run_report: bool = False,
+                 call_timeout: Optional[float] = 120.0, max_retries: int = 2,
+                 hedge_percentile: Optional[float] = None, circuit_failure_threshold: int = 5,
+                 circuit_reset_seconds: float = 30.0, graph_analytics: bool = True,
+                 export_formats: Iterable[str] = (), similarity_index: Optional[str] = None,
+                 compact_input: bool = True, token_budget: Optional[int] = None):
         """
         Initialize Knowledge Graph Generator with AI provider support
         
+        The adapter is created on first use of self.ai, i.e. on the first model call.
+        
         Args:
-            ai_provider: "gemini", "openai", or "auto" for automatic detection
+            ai_provider: "gemini", "openai", "auto" for automatic detection, "local" for the offline
+                LocalFakeAdapter, or an adapter instance (anything with generate_content/get_provider_info).
+                Several providers, comma-separated ("gemini:rpm=15,openai:rpm=500:tpm=200000") or as
+                a list (see provider_scheduler.build_backends), share the calls by quota, latency and errors
+            classification_batch_size: Max entities per batched AI type classification
+                request; 1 or less classifies unknown types one entity at a time
+            cache_dir: Directory for the persistent AI response cache; None disables caching
+            chunk_size_chars: Texts longer than this are split into chunks of at most this size
+            max_parallel_chunks: Number of chunks extracted concurrently
+            lexicon_file: JSON lexicon extending the built-in entity types, mappings and keywords
+            precompute_layout: Compute node positions at generation time (needs NumPy)
+            visualization_mode: "inline" for self-contained HTML pages, "split" for a compact data
+                file per graph plus shared viewer assets (split pages must be served over HTTP)
+            compress_graph_data: Gzip split-mode data files
+            graph_store: SQLite file that every saved graph is also upserted into (see graph_store)
+            pdf_processes: Size of the process pool extracting PDF pages; defaults to the CPU count
+            verbose: Print progress messages (warnings and errors are always printed)
+            run_report: Write a <output>_report.json run report (stage timings, model calls,
+                tokens, cache and entity type counters) next to every saved graph
+            call_timeout: Seconds before a model call attempt is abandoned; None waits forever
+            max_retries: Retries of a failed or timed-out model call, with jittered exponential backoff
+            hedge_percentile: Send a duplicate request when a call is slower than this percentile of
+                recent calls (e.g. 0.95); None disables hedging
+            circuit_failure_threshold: Consecutive failed calls after which model calls fail fast and
+                the heuristic fallbacks are used
+            circuit_reset_seconds: Time before a trial call checks whether the provider recovered
+            graph_analytics: Before saving, compute PageRank, degree, betweenness and communities
+                locally (see graph_analytics), store them as entity attributes and rank importance by
+                PageRank instead of the model's scores (needs NumPy)
+            export_formats: Also export every saved graph as columnar tables and/or GraphML next to
+                the _data.json file; any of "auto", "parquet", "arrow", "npz", "graphml" (see graph_export)
+            similarity_index: .npz file of an entity similarity index (see similarity_index); every
+                saved graph is added to it, and unknown entity types that its nearest labeled
+                neighbors agree on are resolved without a model call (needs NumPy); the file is
+                rewritten at most every SIMILARITY_INDEX_FLUSH_SECONDS and by flush_similarity_index
+            compact_input: Strip whitespace, Markdown markup noise and repeated lines from input
+                text before prompts are built (see text_compaction)
+            token_budget: Estimated input tokens per document above which only the most
+                entity-dense sentences are kept; None never drops content
         """
+        self.classification_batch_size = classification_batch_size
+        self.chunk_size_chars = chunk_size_chars
+        self.max_parallel_chunks = max_parallel_chunks
+        self.last_extraction_timings = {}
+        # Per-thread, so concurrent documents (batch, service) each see their own compaction stats
+        self._thread_state = threading.local()
+        self.compact_input = compact_input
+        self.token_budget = token_budget
+        self.precompute_layout = precompute_layout
+        self.graph_analytics = graph_analytics
+        self.export_formats = tuple(export_formats)
+        self.similarity_index_path = similarity_index
+        self._similarity_index = None
+        self._index_saved_at = 0.0
+        self._index_lock = threading.RLock()
+        self.visualization_mode = visualization_mode
+        self.compress_graph_data = compress_graph_data
+        if graph_store:
+            from graph_store import KnowledgeGraphStore
+            self.graph_store = KnowledgeGraphStore(graph_store)
+        else:
+            self.graph_store = None
+        self.pdf_processes = pdf_processes
+        self.verbose = verbose
+        self.run_report = run_report
+        from entity_classifier import get_entity_classifier
+        from resilient_adapter import CircuitBreaker
+        
+        self.metrics = PipelineMetrics()
+        self.entity_classifier = get_entity_classifier(*([lexicon_file] if lexicon_file else []))
+        if cache_dir:
+            from response_cache import ResponseCache
+            self.response_cache = ResponseCache(cache_dir)
+        else:
+            self.response_cache = None
+        self.ai_provider = ai_provider
+        self.call_timeout = call_timeout
+        self.max_retries = max_retries
+        self.hedge_percentile = hedge_percentile
+        self.circuit_breaker = CircuitBreaker(circuit_failure_threshold, circuit_reset_seconds)
+        self._ai = None
+        self._ai_lock = threading.Lock()
+        self._prompt_templates = None
+        self.scheduler = None
+    
+    @property
+    def ai(self):
+        """The (instrumented, cached) AI adapter, created on first access"""
+        if self._ai is None:
+            with self._ai_lock:
+                if self._ai is None:
+                    self._ai = self._build_adapter()
+        return self._ai
+    
+    @ai.setter
+    def ai(self, adapter) -> None:
+        self._ai = adapter
+    
+    @property
+    def last_compaction(self) -> Dict[str, Any]:
+        """Compaction stats of the last document this thread prepared (empty if none)"""
+        return getattr(self._thread_state, 'compaction', {})
+    
+    @last_compaction.setter
+    def last_compaction(self, stats: Dict[str, Any]) -> None:
+        self._thread_state.compaction = stats
+    
+    def _build_adapter(self):
+        from resilient_adapter import ResilientAdapter
+        
         try:
-            self.ai = create_ai_adapter(ai_provider)
-            provider_info = self.ai.get_provider_info()
-            print(f"🧠 Knowledge Graph Generator initialized with {provider_info['provider']} (Content: {provider_info['content_model']}, Search: {provider_info['search_model']})")
+            adapter = self._create_adapter(self.ai_provider)
+            if hasattr(adapter, 'backends'):
+                # A ProviderScheduler: its per-backend counters and stats join the run report
+                self.scheduler = adapter
+                adapter.metrics = adapter.metrics or self.metrics
+            adapter = InstrumentedAdapter(adapter, self.metrics)
+            provider_info = adapter.get_provider_info()
+            adapter = ResilientAdapter(adapter, self.metrics, self.call_timeout, self.max_retries,
+                                       hedge_percentile=self.hedge_percentile, breaker=self.circuit_breaker)
+            if self.response_cache:
+                from response_cache import CachedAIAdapter
+                adapter = CachedAIAdapter(adapter, self.response_cache)
+            self._log(f"🧠 Knowledge Graph Generator initialized with {provider_info['provider']} (Content: {provider_info['content_model']}, Search: {provider_info['search_model']})")
+            return adapter
         except Exception as e:
             print(f"❌ Failed to initialize AI provider: {e}")
             raise
     
-    def extract_knowledge_graph_from_text(self, text: str) -> Dict[str, Any]:
-        """Extract entities and relationships from text using centralized AI prompts"""
+    @staticmethod
+    def _create_adapter(ai_provider: Any):
+        """Resolve the ai_provider argument to an adapter instance"""
+        if isinstance(ai_provider, str) and ',' in ai_provider:
+            ai_provider = [spec for spec in ai_provider.split(',') if spec.strip()]
+        if isinstance(ai_provider, str) and ':' in ai_provider:
+            ai_provider = [ai_provider]
+        if isinstance(ai_provider, (list, tuple)):
+            from provider_scheduler import ProviderScheduler, build_backends
+            return ProviderScheduler(build_backends(ai_provider, KnowledgeGraphGenerator._create_adapter))
+        if not isinstance(ai_provider, str):
+            return ai_provider
+        if ai_provider == "local":
+            from local_adapter import LocalFakeAdapter
+            return LocalFakeAdapter()
+        from ai_adapter import create_ai_adapter
+        return create_ai_adapter(ai_provider)
+    
+    def _log(self, message: str) -> None:
+        if self.verbose:
+            print(message)
+    
+    def get_run_report(self) -> Dict[str, Any]:
+        """Structured report of everything measured since the generator was created (or metrics.reset())"""
+        extra = {"circuit": self.circuit_breaker.stats()}
+        if self.last_compaction:
+            extra["input"] = self.last_compaction
+        if self.scheduler is not None:
+            extra["scheduler"] = self.scheduler.stats()
+        if self.response_cache:
+            extra["cache"] = self.response_cache.stats()
+        return self.metrics.report(extra)
+    
+    def write_run_report(self, path: str) -> str:
+        """Write the run report as JSON, or in Prometheus text format when path ends with .prom"""
+        return PipelineMetrics.write_report(self.get_run_report(), path)
+    
+    @timed_stage("extraction")
+    def extract_knowledge_graph_from_text(self, text: str, chunked: Optional[bool] = None) -> Dict[str, Any]:
+        """Extract entities and relationships from text using centralized AI prompts
         
-        # Use centralized prompt template with knowledge graph context
-        prompt = PromptTemplates.get_resume_analysis_prompt(text, context="knowledge_graph")
+        Args:
+            text: Source text
+            chunked: Force (True) or disable (False) chunked map-reduce extraction; by default
+                texts longer than chunk_size_chars are extracted in chunks
+        """
+        text = self._prepare_input(text)
+        if chunked is None:
+            chunked = len(text) > self.chunk_size_chars
+        if chunked:
+            return self.extract_knowledge_graph_chunked(text)
         
         try:
-            response_text = self.ai.generate_content(prompt)
-            
-            # Extract JSON from response
-            start_idx = response_text.find('{')
-            end_idx = response_text.rfind('}') + 1
-            
-            if start_idx != -1 and end_idx > start_idx:
-                json_str = response_text[start_idx:end_idx]
-                knowledge_graph = json.loads(json_str)
-                
+            knowledge_graph = self._extract_raw_knowledge_graph(text)
+            if knowledge_graph is not None:
                 # Validate and clean entity types to reduce "other" classifications
                 knowledge_graph = self._validate_and_clean_entities(knowledge_graph)
                 
-                print(f"✅ Extracted {len(knowledge_graph.get('entities', []))} entities and {len(knowledge_graph.get('relationships', []))} relationships")
+                self._log(f"✅ Extracted {len(knowledge_graph.get('entities', []))} entities and {len(knowledge_graph.get('relationships', []))} relationships")
                 return knowledge_graph
             else:
                 print("❌ Could not extract JSON from AI response")
@@ -51,87 +242,411 @@ class KnowledgeGraphGenerator:
             print(f"❌ Error extracting knowledge graph: {e}")
             return self.get_default_knowledge_graph()
     
-    def _validate_and_clean_entities(self, knowledge_graph: Dict[str, Any]) -> Dict[str, Any]:
-        """Validate and clean entity types to reduce 'other' classifications"""
+    def _compact(self, text: str, token_budget: Optional[int] = None,
+                 seen_lines: Optional[set] = None) -> Tuple[str, Dict[str, Any]]:
+        """compact_text with the tokens before and after counted in the metrics"""
+        from text_compaction import compact_text
+        
+        with self.metrics.stage("compaction"):
+            text, stats = compact_text(text, token_budget, seen_lines)
+        self.metrics.increment("input.tokens_raw", stats["tokens_before"])
+        self.metrics.increment("input.tokens_sent", stats["tokens_after"])
+        return text, stats
+    
+    def _prepare_input(self, text: str) -> str:
+        """Clean a document's text and, over the token budget, compact it before any prompt is built"""
+        if not self.compact_input:
+            return text
+        started = time.perf_counter()
+        text, stats = self._compact(text, self.token_budget)
+        stats["seconds"] = round(time.perf_counter() - started, 4)
+        self.last_compaction = stats
+        if stats["tokens_saved"] > 0:
+            share = 100 * stats["tokens_saved"] / stats["tokens_before"]
+            self._log(f"🗜️ Input: {stats['tokens_before']} → {stats['tokens_after']} estimated tokens "
+                      f"(-{stats['tokens_saved']}, {share:.0f}%{', compacted to the budget' if stats['compacted'] else ''}) "
+                      f"in {stats['seconds'] * 1000:.1f} ms")
+        return text
+    
+    def extract_knowledge_graph_chunked(self, text: str, max_chunk_chars: Optional[int] = None) -> Dict[str, Any]:
+        """Extract a knowledge graph from long text by extracting chunks in parallel and merging them in code"""
+        from text_chunking import split_text_into_chunks
         
-        # Define valid entity types
-        valid_types = {
-            'person', 'skill', 'knowledge', 'tool', 'qualification', 
-            'role', 'workplace', 'methodology'
-        }
+        chunks = split_text_into_chunks(text, max_chunk_chars or self.chunk_size_chars)
+        self._log(f"✂️ Split {len(text)} characters into {len(chunks)} chunks")
+        return self._extract_and_merge_chunks(chunks)
+    
+    def _extract_and_merge_chunks(self, chunks: Iterable[str]) -> Dict[str, Any]:
+        """Extract chunks on a thread pool as the iterable produces them, then merge the chunk graphs"""
+        from concurrent.futures import ThreadPoolExecutor
+        from graph_merge import merge_knowledge_graphs
+        
+        def extract_chunk(chunk: str) -> Optional[Dict[str, Any]]:
+            try:
+                return self._extract_raw_knowledge_graph(chunk)
+            except Exception as e:
+                print(f"⚠️ Chunk extraction failed: {e}")
+                return None
+            finally:
+                submit_slots.release()
+        
+        # Chunks may come from a producer such as streamed PDF pages; don't let it run far ahead
+        submit_slots = threading.BoundedSemaphore(2 * max(1, self.max_parallel_chunks))
+        futures = []
+        with ThreadPoolExecutor(max_workers=max(1, self.max_parallel_chunks)) as executor:
+            for chunk in chunks:
+                submit_slots.acquire()
+                futures.append(executor.submit(extract_chunk, chunk))
+            chunk_graphs = [graph for graph in (future.result() for future in futures) if graph]
+        
+        if not chunk_graphs:
+            print("❌ Could not extract JSON from any chunk")
+            return self.get_default_knowledge_graph()
+        
+        with self.metrics.stage("extraction.merge"):
+            knowledge_graph = merge_knowledge_graphs(chunk_graphs)
+        knowledge_graph = self._validate_and_clean_entities(knowledge_graph)
+        
+        self._log(f"✅ Extracted {len(knowledge_graph['entities'])} entities and {len(knowledge_graph['relationships'])} relationships from {len(chunk_graphs)}/{len(futures)} chunks")
+        return knowledge_graph
+    
+    def _extraction_prompt(self, text: str) -> str:
+        if self._prompt_templates is None:
+            self._prompt_templates = self._load_prompt_templates()
+        if self._prompt_templates:
+            # Use centralized prompt template with knowledge graph context
+            return self._prompt_templates.get_resume_analysis_prompt(text, context="knowledge_graph")
+        return self._builtin_extraction_prompt(text)
+    
+    def _load_prompt_templates(self):
+        """PromptTemplates for real providers; False selects the built-in prompt"""
+        if self.ai_provider == "local" or getattr(self.ai_provider, 'offline', False):
+            # The offline adapter answers any prompt, so it never depends on prompt_templates
+            return False
+        try:
+            from prompt_templates import PromptTemplates
+        except ImportError:
+            print("⚠️ prompt_templates is not available, using the built-in extraction prompt")
+            return False
+        return PromptTemplates
+    
+    @staticmethod
+    def _builtin_extraction_prompt(text: str) -> str:
+        """Self-contained extraction prompt, used by the offline adapter and when prompt_templates is missing"""
+        return f"""
+            Extract a professional knowledge graph from the source text below.
+            
+            Entity types: person, skill, knowledge, tool, qualification, role, workplace, methodology.
+            Return only JSON of this form:
+            {{
+                "entities": [{{"id": "short_snake_case_id", "name": "...", "type": "...", "importance": 1-10,
+                              "description": "...", "attributes": {{}}}}],
+                "relationships": [{{"source": "entity id", "target": "entity id", "type": "...",
+                                   "strength": 1-10, "description": "..."}}],
+                "summary": "one or two sentences"
+            }}
+            
+            Source text:
+{text}"""
+    
+    def _extract_raw_knowledge_graph(self, text: str) -> Optional[Dict[str, Any]]:
+        """Run the extraction prompt for text and parse the model's JSON, without cleaning entity types"""
+        prompt = self._extraction_prompt(text)
+        with self.metrics.stage("extraction.model"):
+            response_text = self.ai.generate_content(prompt)
+        with self.metrics.stage("extraction.parse"):
+            return self._parse_knowledge_graph_response(response_text)
+    
+    @staticmethod
+    def _parse_knowledge_graph_response(response_text: str) -> Optional[Dict[str, Any]]:
+        """Extract the JSON object from a model response; None if there is none"""
+        start_idx = response_text.find('{')
+        end_idx = response_text.rfind('}') + 1
+        
+        if start_idx != -1 and end_idx > start_idx:
+            json_str = response_text[start_idx:end_idx]
+            return json.loads(json_str)
+        return None
+    
+    def stream_knowledge_graph_from_text(self, text: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Yield ("entity" | "relationship", item) events as the model streams its JSON answer
+        
+        Uses the adapter's generate_content_stream when it has one; otherwise the full
+        response is parsed in one go, so the events still arrive but only at the end.
+        A final ("graph", knowledge_graph) event carries the complete parsed response.
+        """
+        from stream_parser import IncrementalGraphParser
+        
+        prompt = self._extraction_prompt(text)
+        parser = IncrementalGraphParser()
+        
+        stream = getattr(self.ai, 'generate_content_stream', None)
+        pieces = stream(prompt) if stream else [self.ai.generate_content(prompt)]
+        for piece in pieces:
+            for event in parser.feed(piece):
+                yield event
+        
+        yield 'graph', parser.result()
+    
+    @timed_stage("extraction")
+    def extract_knowledge_graph_streaming(self, text: str,
+                                          on_entity: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """Extract a knowledge graph while the model is still generating
+        
+        Each entity is type-mapped and passed to on_entity as soon as it is complete;
+        entities with unknown types are classified together once the stream ends (their
+        dicts are updated in place). Time-to-first-entity and total time are reported.
+        """
+        text = self._prepare_input(text)
+        started = time.perf_counter()
+        first_entity_seconds = None
+        entities = []
+        relationships = []
+        unresolved_entities = []
+        parsed_graph = None
+        
+        try:
+            for kind, item in self.stream_knowledge_graph_from_text(text):
+                if kind == 'entity':
+                    if first_entity_seconds is None:
+                        first_entity_seconds = time.perf_counter() - started
+                    if not self._map_entity_type(item):
+                        unresolved_entities.append(item)
+                    entities.append(item)
+                    self._log(f"🧩 Entity {len(entities)}: {item.get('name', item.get('id', '?'))}")
+                    if on_entity:
+                        on_entity(item)
+                elif kind == 'relationship':
+                    relationships.append(item)
+                else:
+                    parsed_graph = item
+        except Exception as e:
+            print(f"❌ Error extracting knowledge graph: {e}")
+            if not entities:
+                return self.get_default_knowledge_graph()
+        
+        if not entities:
+            print("❌ Could not extract JSON from AI response")
+            return self.get_default_knowledge_graph()
+        
+        if unresolved_entities:
+            self._resolve_unknown_entity_types(unresolved_entities)
         
-        # Type mapping for common variations
-        type_mappings = {
-            'technology': 'tool',
-            'software': 'tool', 
-            'platform': 'tool',
-            'framework': 'tool',
-            'programming_language': 'skill',
-            'language': 'skill',
-            'certification': 'qualification',
-            'degree': 'qualification',
-            'education': 'qualification',
-            'company': 'workplace',
-            'organization': 'workplace',
-            'institution': 'workplace',
-            'university': 'workplace',
-            'school': 'workplace',
-            'position': 'role',
-            'job': 'role',
-            'title': 'role',
-            'method': 'methodology',
-            'approach': 'methodology',
-            'process': 'methodology',
-            'expertise': 'knowledge',
-            'domain': 'knowledge',
-            'field': 'knowledge',
-            'specialization': 'knowledge',
-            'specialty': 'knowledge',
-            'ability': 'skill',
-            'competency': 'skill',
-            'proficiency': 'skill'
+        knowledge_graph = dict(parsed_graph or {})
+        knowledge_graph['entities'] = entities
+        knowledge_graph['relationships'] = relationships
+        knowledge_graph.setdefault('summary', 'Professional Knowledge Graph')
+        
+        total_seconds = time.perf_counter() - started
+        self.last_extraction_timings = {
+            "time_to_first_entity": round(first_entity_seconds, 3),
+            "total": round(total_seconds, 3)
         }
+        self._log(f"✅ Extracted {len(entities)} entities and {len(relationships)} relationships "
+              f"(first entity after {first_entity_seconds:.2f}s, total {total_seconds:.2f}s)")
+        return knowledge_graph
+    
+    def _validate_and_clean_entities(self, knowledge_graph: Dict[str, Any]) -> Dict[str, Any]:
+        """Validate and clean entity types to reduce 'other' classifications"""
         
         if 'entities' in knowledge_graph:
             cleaned_entities = []
+            unresolved_entities = []
             for entity in knowledge_graph['entities']:
-                if 'type' in entity:
-                    original_type = entity['type'].lower().strip()
-                    
-                    # Map to valid type if possible
-                    if original_type in type_mappings:
-                        entity['type'] = type_mappings[original_type]
-                        print(f"🔄 Mapped entity type '{original_type}' → '{entity['type']}'")
-                    elif original_type not in valid_types:
-                        # Use AI to intelligently classify unknown types
-                        new_type = self._classify_entity_with_ai(entity)
-                        if new_type and new_type in valid_types:
-                            entity['type'] = new_type
-                            print(f"🤖 AI classified '{original_type}' → '{new_type}'")
-                        else:
-                            # Fallback: make educated guess based on name/description
-                            entity['type'] = self._guess_entity_type(entity)
-                            print(f"🔍 Guessed entity type '{original_type}' → '{entity['type']}'")
+                if not self._map_entity_type(entity):
+                    # Unknown types are classified together once the whole graph is scanned
+                    unresolved_entities.append(entity)
                 
                 cleaned_entities.append(entity)
             
+            if unresolved_entities:
+                self._resolve_unknown_entity_types(unresolved_entities)
+            
             knowledge_graph['entities'] = cleaned_entities
         
         return knowledge_graph
     
+    def _map_entity_type(self, entity: Dict[str, Any]) -> bool:
+        """Normalize an entity's type via the static mappings; False if it still needs classification"""
+        if 'type' not in entity:
+            return True
+        
+        original_type = entity['type'].lower().strip()
+        
+        # Map to valid type if possible
+        mapped_type, resolved = self.entity_classifier.map_type(original_type)
+        if resolved:
+            self.metrics.increment("entity_types.mapped")
+        if resolved and mapped_type != original_type:
+            entity['type'] = mapped_type
+            self._log(f"🔄 Mapped entity type '{original_type}' → '{entity['type']}'")
+        return resolved
+    
+    def _get_similarity_index(self):
+        """The entity similarity index, loaded on first use; None when not configured or NumPy is missing"""
+        if self.similarity_index_path and self._similarity_index is None:
+            with self._index_lock:
+                if self._similarity_index is None:
+                    try:
+                        from similarity_index import SimilarityIndex
+                    except ImportError:
+                        print("⚠️ NumPy is not installed, the similarity index is disabled")
+                        self.similarity_index_path = None
+                        return None
+                    self._similarity_index = SimilarityIndex.open(self.similarity_index_path)
+                    self._index_saved_at = time.monotonic()
+                    # Whatever the periodic flushes have not written yet is saved when the process ends
+                    atexit.register(self.flush_similarity_index)
+        return self._similarity_index
+    
+    def flush_similarity_index(self, max_age_seconds: float = 0.0) -> bool:
+        """Write the similarity index if it has unsaved changes older than max_age_seconds; True if written"""
+        index = self._similarity_index
+        if index is None:
+            return False
+        with self._index_lock:
+            if not index.dirty or time.monotonic() - self._index_saved_at < max_age_seconds:
+                return False
+            with self.metrics.stage("save"):
+                index.save(self.similarity_index_path)
+            self._index_saved_at = time.monotonic()
+        self._log(f"🧭 Similarity index: {len(index)} entities saved to {self.similarity_index_path}")
+        return True
+    
+    def _type_entities_from_neighbors(self, entities: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Type entities whose most similar indexed entities agree on a type; returns the ones still unknown"""
+        index = self._get_similarity_index()
+        if index is None:
+            return entities
+        
+        remaining = []
+        with self._index_lock:
+            for entity in entities:
+                original_type = entity['type'].lower().strip()
+                neighbor_type = index.vote_type(entity, self.entity_classifier.valid_types) if len(index) else None
+                if neighbor_type:
+                    entity['type'] = neighbor_type
+                    self.metrics.increment("entity_types.neighbors")
+                    self._log(f"🧭 Similar entities typed '{original_type}' → '{neighbor_type}'")
+                else:
+                    remaining.append(entity)
+        return remaining
+    
+    @timed_stage("classification")
+    def _resolve_unknown_entity_types(self, entities: List[Dict[str, Any]]) -> None:
+        """Assign a valid type to every entity whose type is unknown: similar indexed entities, then AI, guessing as fallback"""
+        entities = self._type_entities_from_neighbors(entities)
+        classified_types = {}
+        if self.classification_batch_size > 1:
+            for batch in self._chunk_entities_for_classification(entities):
+                if self.circuit_breaker.state == "open":
+                    break  # Provider unhealthy: the rest is guessed instead of failing call by call
+                classified_types.update(self._classify_entities_with_ai_batch(batch))
+        else:
+            for index, entity in enumerate(entities):
+                if self.circuit_breaker.state == "open":
+                    break
+                classified_types[index] = self._classify_entity_with_ai(entity)
+        
+        for index, entity in enumerate(entities):
+            original_type = entity['type'].lower().strip()
+            new_type = classified_types.get(index)
+            if new_type and new_type in self.entity_classifier.valid_types:
+                entity['type'] = new_type
+                self.metrics.increment("entity_types.ai")
+                self._log(f"🤖 AI classified '{original_type}' → '{new_type}'")
+            else:
+                # Fallback: make educated guess based on name/description
+                entity['type'] = self._guess_entity_type(entity)
+                self.metrics.increment("entity_types.guessed")
+                self._log(f"🔍 Guessed entity type '{original_type}' → '{entity['type']}'")
+    
+    def _chunk_entities_for_classification(self, entities: List[Dict[str, Any]]) -> List[List[tuple]]:
+        """Split (index, entity) pairs into batches bounded by entity count and prompt size"""
+        batches = []
+        current_batch = []
+        current_chars = 0
+        for index, entity in enumerate(entities):
+            entity_chars = len(json.dumps(self._entity_classification_payload(str(index), entity), ensure_ascii=False))
+            if current_batch and (len(current_batch) >= self.classification_batch_size or
+                                  current_chars + entity_chars > self.CLASSIFICATION_BATCH_MAX_CHARS):
+                batches.append(current_batch)
+                current_batch = []
+                current_chars = 0
+            current_batch.append((index, entity))
+            current_chars += entity_chars
+        
+        if current_batch:
+            batches.append(current_batch)
+        return batches
+    
+    @staticmethod
+    def _entity_classification_payload(key: str, entity: Dict[str, Any]) -> Dict[str, str]:
+        """Compact representation of an entity sent to the model for classification"""
+        return {
+            "id": key,
+            "name": str(entity.get('name', '')),
+            "current_type": str(entity.get('type', '')),
+            "description": str(entity.get('description', ''))[:300]
+        }
+    
+    def _classify_entities_with_ai_batch(self, batch: List[tuple]) -> Dict[int, str]:
+        """Classify a batch of (index, entity) pairs with a single AI request
+        
+        Returns a mapping from entity index to classified type. Entities missing from the
+        answer (or the whole batch, if the request fails) are left for the caller to guess.
+        """
+        # Key each entity by its own id, falling back to its position when ids are missing or repeated
+        keyed_entities = {}
+        for index, entity in batch:
+            key = str(entity.get('id') or f"entity_{index}")
+            if key in keyed_entities:
+                key = f"{key}#{index}"
+            keyed_entities[key] = (index, entity)
+        
+        payload = [self._entity_classification_payload(key, entity) for key, (_, entity) in keyed_entities.items()]
+        
+        # Built from the lexicon, so types added by a lexicon file can be answered too
+        type_list = self.entity_classifier.type_list(indent="            ")
+        try:
+            prompt = f"""
+            Classify each entity below into one of these specific types:
+{type_list}
+            
+            Entities to classify (JSON):
+            {json.dumps(payload, ensure_ascii=False, indent=1)}
+            
+            Respond with only a JSON object mapping each entity "id" to its type from the list above,
+            for example {{"entity_id": "skill"}}.
+            """
+            
+            response_text = self.ai.generate_content(prompt)
+            start_idx = response_text.find('{')
+            end_idx = response_text.rfind('}') + 1
+            if start_idx == -1 or end_idx <= start_idx:
+                raise ValueError("no JSON object in response")
+            
+            answers = json.loads(response_text[start_idx:end_idx])
+            if not isinstance(answers, dict):
+                raise ValueError("response is not a JSON object")
+            
+            classified_types = {}
+            for key, classified_type in answers.items():
+                if key in keyed_entities and isinstance(classified_type, str):
+                    classified_types[keyed_entities[key][0]] = classified_type.strip().lower()
+            return classified_types
+            
+        except Exception as e:
+            print(f"⚠️ Batch AI classification failed for {len(batch)} entities: {e}")
+            return {}
+    
     def _classify_entity_with_ai(self, entity: Dict[str, Any]) -> str:
         """Use AI to classify entities that don't match standard types"""
+        type_list = self.entity_classifier.type_list(indent="            ")
         try:
             prompt = f"""
             Classify this entity into one of these specific types:
-            - person: The individual
-            - skill: Technical and professional skills
-            - knowledge: Domain expertise and specialized knowledge areas  
-            - tool: Software, platforms, frameworks, databases, instruments
-            - qualification: Degrees, certifications, licenses
-            - role: Job titles and professional positions
-            - workplace: Companies, organizations, institutions
-            - methodology: Processes, methodologies, approaches
+{type_list}
             
             Entity to classify:
             Name: {entity.get('name', '')}
@@ -144,8 +659,7 @@ class KnowledgeGraphGenerator:
             response = self.ai.generate_content(prompt)
             classified_type = response.strip().lower()
             
-            valid_types = {'person', 'skill', 'knowledge', 'tool', 'qualification', 'role', 'workplace', 'methodology'}
-            return classified_type if classified_type in valid_types else None
+            return classified_type if classified_type in self.entity_classifier.valid_types else None
             
         except Exception as e:
             print(f"⚠️ AI classification failed for entity {entity.get('name', 'unknown')}: {e}")
@@ -153,27 +667,15 @@ class KnowledgeGraphGenerator:
     
     def _guess_entity_type(self, entity: Dict[str, Any]) -> str:
         """Make an educated guess about entity type based on patterns"""
-        name = entity.get('name', '').lower()
-        description = entity.get('description', '').lower()
-        
-        # Pattern-based classification
-        if any(word in name for word in ['university', 'college', 'school', 'company', 'corp', 'inc', 'organization']):
-            return 'workplace'
-        elif any(word in name for word in ['degree', 'bachelor', 'master', 'phd', 'certification', 'license', 'certified']):
-            return 'qualification'
-        elif any(word in name for word in ['manager', 'director', 'analyst', 'engineer', 'developer', 'specialist', 'coordinator']):
-            return 'role'
-        elif any(word in name for word in ['software', 'system', 'platform', 'tool', 'application', 'database']):
-            return 'tool'
-        elif any(word in description for word in ['knowledge', 'expertise', 'understanding', 'domain', 'field']):
-            return 'knowledge'
-        elif any(word in description for word in ['method', 'approach', 'process', 'methodology', 'framework']):
-            return 'methodology'
-        else:
-            return 'skill'  # Default fallback
+        return self.entity_classifier.guess(entity)
     
     def get_default_knowledge_graph(self) -> Dict[str, Any]:
-        """Return a generic default knowledge graph for fallback"""
+        """Return a generic default knowledge graph for fallback, marked with "fallback": True
+        
+        Extraction falls back to this graph instead of raising, so callers that must not pass the
+        placeholder on as a result (such as the HTTP service) check the marker.
+        """
+        self.metrics.increment("extraction.fallbacks")
         return {
             "entities": [
                 {
@@ -223,1041 +725,259 @@ class KnowledgeGraphGenerator:
                 {"source": "candidate", "target": "teamwork", "type": "has_skill", "strength": 8.0, "description": "Collaborates effectively with colleagues and stakeholders"},
                 {"source": "candidate", "target": "organization", "type": "has_skill", "strength": 7.5, "description": "Manages tasks and priorities efficiently"}
             ],
-            "summary": "Multi-skilled professional with strong foundational skills applicable across various industries and roles"
+            "summary": "Multi-skilled professional with strong foundational skills applicable across various industries and roles",
+            "fallback": True
         }
     
-    def generate_interactive_visualization(self, knowledge_graph: Dict[str, Any], output_file: str = "knowledge_graph.html") -> str:
-        """Generate an interactive HTML visualization of the knowledge graph with LinkedIn styling"""
+    @timed_stage("layout")
+    def _compute_layout(self, entities: List[Dict[str, Any]], relationships: List[Dict[str, Any]]) -> Dict[str, List[float]]:
+        """Precompute node positions; empty (browser layout) when NumPy is unavailable"""
+        try:
+            from graph_layout import compute_layout
+        except ImportError:
+            print("⚠️ NumPy is not installed, the layout will be computed in the browser")
+            return {}
+        
+        started = time.perf_counter()
+        layout = compute_layout(entities, relationships)
+        self._log(f"📐 Precomputed layout for {len(layout)} nodes in {time.perf_counter() - started:.2f}s")
+        return layout
+    
+    @timed_stage("analytics")
+    def analyze_knowledge_graph(self, knowledge_graph: Dict[str, Any]) -> Dict[str, Any]:
+        """Write structural metrics into the graph's entities and rank importance by PageRank (in place)"""
+        try:
+            from graph_analytics import apply_graph_analytics
+        except ImportError:
+            print("⚠️ NumPy is not installed, entity importance is left as assigned by the model")
+            return knowledge_graph
+        
+        started = time.perf_counter()
+        summary = apply_graph_analytics(knowledge_graph)
+        self._log(f"📈 Ranked {len(knowledge_graph.get('entities', []))} entities and found {summary['communities']} "
+              f"communities in {time.perf_counter() - started:.2f}s")
+        return knowledge_graph
+    
+    @timed_stage("visualization")
+    def generate_interactive_visualization(self, knowledge_graph: Dict[str, Any], output_file: str = "knowledge_graph.html",
+                                           output_mode: Optional[str] = None, compress: Optional[bool] = None) -> str:
+        """Generate an interactive HTML visualization of the knowledge graph with LinkedIn styling
+        
+        Args:
+            knowledge_graph: Graph to render
+            output_file: HTML file to write; a name ending in .gz gets a gzipped page
+            output_mode: "inline" embeds the data and viewer in one self-contained page; "split"
+                writes the data to <name>.graph.json next to shared, versioned viewer assets;
+                browsers only load it when the page is served over HTTP (defaults to the generator's visualization_mode)
+            compress: Gzip the split-mode data file (defaults to the generator's setting)
+        """
+        from visualization_template import (
+            VIEWER_JS_FILE, VIEWER_LARGE_JS_FILE, write_inline_page, render_split_page, encode_graph_payload,
+            write_viewer_assets, write_graph_payload, uses_large_viewer, open_output
+        )
         
         entities = knowledge_graph.get('entities', [])
         relationships = knowledge_graph.get('relationships', [])
         summary = knowledge_graph.get('summary', 'Professional Knowledge Graph')
-        
-        # Define valid entity types (updated to match prompt_templates.py)
-        valid_types = {'person', 'skill', 'knowledge', 'tool', 'qualification', 'role', 'workplace', 'methodology'}
+        output_mode = output_mode or self.visualization_mode
+        compress = self.compress_graph_data if compress is None else compress
         
         # No longer force entities to 'other' - trust the AI classification from updated prompts
         # The AI should now properly classify entities using the improved prompts
         
-        # Updated LinkedIn-style color mapping (matching HTML and prompt_templates.py)
-        color_map = {
-            'person': '#0A66C2',      # LinkedIn Blue
-            'skill': '#057642',       # Green for skills
-            'knowledge': '#FF8C00',   # Orange for knowledge domains
-            'tool': '#6441A4',        # Purple for tools and software
-            'qualification': '#1B6EC8',# Blue for qualifications and education
-            'role': '#8B5A3C',       # Brown for roles
-            'workplace': '#2D3748',   # Dark gray for workplaces and companies
-            'methodology': '#9B59B6', # Purple for methodologies
-            'other': '#5A6C7D',       # Gray for any remaining unclassified (should be rare now)
-            'default': '#5A6C7D'      # Default gray for unknown types
-        }
-        
-        html_content = f"""
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Professional Knowledge Graph</title>
-    <script src="https://d3js.org/d3.v7.min.js"></script>
-    <style>
-        * {{
-            margin: 0;
-            padding: 0;
-            box-sizing: border-box;
-        }}
-        
-        body {{
-            font-family: 'Segoe UI', 'Helvetica Neue', Arial, sans-serif;
-            background: #F4F2EE;
-            color: #000000;
-            line-height: 1.6;
-            overflow-x: auto;
-        }}
-        
-        .linkedin-header {{
-            background: #FFFFFF;
-            border-bottom: 1px solid #E6E6E6;
-            padding: 15px 0;
-            box-shadow: 0 2px 4px rgba(0,0,0,0.08);
-        }}
-        
-        .container {{
-            max-width: 1600px; /* Increased from 1200px to 1600px */
-            margin: 0 auto;
-            padding: 0 20px;
-        }}
-        
-        .header-content {{
-            display: flex;
-            align-items: center;
-            justify-content: space-between;
-        }}
-        
-        .logo-section {{
-            display: flex;
-            align-items: center;
-            gap: 15px;
-        }}
-        
-        .linkedin-logo {{
-            width: 40px;
-            height: 40px;
-            background: #0A66C2;
-            border-radius: 8px;
-            display: flex;
-            align-items: center;
-            justify-content: center;
-            color: white;
-            font-weight: bold;
-            font-size: 18px;
-        }}
-        
-        .title {{
-            font-size: 24px;
-            font-weight: 600;
-            color: #000000;
-        }}
-        
-        .subtitle {{
-            color: #666666;
-            font-size: 14px;
-            margin-top: 4px;
-        }}
-        
-        .main-content {{
-            background: #FFFFFF;
-            margin: 20px auto;
-            border-radius: 12px;
-            box-shadow: 0 2px 8px rgba(0,0,0,0.1);
-            overflow: hidden;
-        }}
-        
-        .content-header {{
-            padding: 16px 24px; /* Reduced vertical padding from 24px to 16px */
-            border-bottom: 1px solid #E6E6E6;
-            background: #FAFAFA;
-        }}
-        
-        .summary {{
-            font-size: 16px;
-            color: #333333;
-            margin-bottom: 20px;
-        }}
-        
-        .controls {{
-            display: flex;
-            gap: 12px;
-            flex-wrap: wrap;
-        }}
-        
-                 .linkedin-btn {{
-             background: #0A66C2;
-             color: white;
-             border: none;
-             padding: 8px 16px;
-             border-radius: 4px;
-             font-size: 14px;
-             font-weight: 500;
-             cursor: pointer;
-             transition: all 0.2s ease;
-             text-transform: none;
-             letter-spacing: 0;
-         }}
-        
-        .linkedin-btn:hover {{
-            background: #084A8A;
-            transform: translateY(-1px);
-        }}
-        
-        .linkedin-btn.secondary {{
-            background: #FFFFFF;
-            color: #0A66C2;
-            border: 1px solid #0A66C2;
-        }}
-        
-        .linkedin-btn.secondary:hover {{
-            background: #F1F5F9;
-        }}
-        
-        .legend {{
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(140px, 1fr));
-            gap: 12px;
-            margin-top: 20px;
-        }}
-        
-                 .legend-item {{
-             display: flex;
-             align-items: center;
-             gap: 8px;
-             padding: 8px 12px;
-             background: #FFFFFF;
-             border: 1px solid #E6E6E6;
-             border-radius: 6px;
-             font-size: 13px;
-             font-weight: 500;
-             cursor: pointer;
-             transition: all 0.2s ease;
-             user-select: none;
-         }}
-         
-         .legend-item:hover {{
-             background: #F8F9FA;
-             border-color: #0A66C2;
-             transform: translateY(-1px);
-         }}
-         
-         .legend-item.active {{
-             background: #E7F3FF;
-             border-color: #0A66C2;
-             color: #0A66C2;
-             font-weight: 600;
-         }}
-         
-         .legend-item.inactive {{
-             background: #F5F5F5;
-             border-color: #CCCCCC;
-             color: #999999;
-             opacity: 0.6;
-         }}
-        
-        .legend-color {{
-            width: 12px;
-            height: 12px;
-            border-radius: 50%;
-            flex-shrink: 0;
-        }}
-        
-                          .graph-container {{
-             position: relative;
-             padding: 10px; /* Reduced from 20px to 10px */
-             display: flex;
-             justify-content: center;
-             align-items: center;
-             min-height: 850px; /* Added minimum height */
-             width: 100%;
-             overflow: hidden;
-         }}
-         
-         #graph {{
-             background: #FFFFFF;
-             display: block;
-             border: 1px solid #E6E6E6;
-             border-radius: 8px;
-             margin: 0 auto;
-         }}
-        
-        .info-panel {{
-            position: fixed;
-            top: 50%;
-            right: 20px;
-            transform: translateY(-50%);
-            background: #FFFFFF;
-            border: 1px solid #E6E6E6;
-            border-radius: 12px;
-            padding: 20px;
-            max-width: 320px;
-            min-width: 280px;
-            box-shadow: 0 8px 24px rgba(0,0,0,0.15);
-            display: none;
-            z-index: 1000;
-            max-height: 70vh;
-            overflow-y: auto;
-        }}
-        
-        .info-panel h3 {{
-            color: #0A66C2;
-            font-size: 18px;
-            font-weight: 600;
-            margin-bottom: 12px;
-            padding-bottom: 8px;
-            border-bottom: 2px solid #E6E6E6;
-        }}
-        
-        .info-item {{
-            margin-bottom: 12px;
-        }}
-        
-        .info-label {{
-            font-weight: 600;
-            color: #333333;
-            font-size: 13px;
-            text-transform: uppercase;
-            letter-spacing: 0.5px;
-            margin-bottom: 4px;
-        }}
-        
-        .info-value {{
-            color: #666666;
-            font-size: 14px;
-            line-height: 1.4;
-        }}
-        
-        .close-btn {{
-            position: absolute;
-            top: 12px;
-            right: 12px;
-            background: none;
-            border: none;
-            font-size: 20px;
-            cursor: pointer;
-            color: #666666;
-            width: 24px;
-            height: 24px;
-            display: flex;
-            align-items: center;
-            justify-content: center;
-            border-radius: 50%;
-        }}
-        
-        .close-btn:hover {{
-            background: #F1F5F9;
-            color: #333333;
-        }}
-        
-        .node-tooltip {{
-            position: absolute;
-            background: #333333;
-            color: white;
-            padding: 8px 12px;
-            border-radius: 6px;
-            font-size: 12px;
-            pointer-events: none;
-            z-index: 1000;
-            max-width: 200px;
-            word-wrap: break-word;
-        }}
-        
-        .stats-panel {{
-            padding: 12px 24px; /* Reduced vertical padding from 16px to 12px */
-            background: #F8F9FA;
-            border-bottom: 1px solid #E6E6E6;
-            display: flex;
-            justify-content: space-around;
-            text-align: center;
-        }}
-        
-        .stat-item {{
-            flex: 1;
-        }}
-        
-        .stat-number {{
-            font-size: 24px;
-            font-weight: 700;
-            color: #0A66C2;
-            display: block;
-        }}
-        
-                 .stat-label {{
-             font-size: 12px;
-             color: #666666;
-             font-weight: 500;
-             text-transform: uppercase;
-             letter-spacing: 0.5px;
-         }}
-         
-         kbd {{
-             background: #F1F5F9;
-             border: 1px solid #C4CDD5;
-             border-radius: 3px;
-             padding: 2px 6px;
-             font-size: 12px;
-             font-family: monospace;
-             color: #333333;
-         }}
+        # Settle the layout once here instead of in every browser that opens the page
+        layout = self._compute_layout(entities, relationships) if self.precompute_layout else {}
+        large_graph = uses_large_viewer(len(entities))
+        gzip_page = output_file.endswith('.gz')
+        if large_graph:
+            self._log(f"🔭 {len(entities)} entities: using the clustered canvas viewer")
+        
+        if output_mode == "split":
+            output_dir = os.path.dirname(os.path.abspath(output_file))
+            data_file = output_sidecar(output_file, ".graph.json.gz" if compress else ".graph.json")
+            write_viewer_assets(output_dir)
+            write_graph_payload(data_file, encode_graph_payload(entities, relationships, summary, layout), compress)
+            with open_output(output_file, gzip_page) as f:
+                f.write(render_split_page(os.path.basename(data_file), len(entities), len(relationships), summary))
+            self._log(f"📦 Graph data saved to: {data_file} (viewer {VIEWER_LARGE_JS_FILE if large_graph else VIEWER_JS_FILE})")
+        elif output_mode == "inline":
+            # Streamed: the page is never held in memory as a whole
+            with open_output(output_file, gzip_page) as f:
+                write_inline_page(f, entities, relationships, summary, layout)
+        else:
+            raise ValueError(f"Unknown visualization output mode: {output_mode}")
         
-        @media (max-width: 768px) {{
-            .header-content {{
-                flex-direction: column;
-                align-items: flex-start;
-                gap: 15px;
-            }}
-            
-            .controls {{
-                width: 100%;
-            }}
-            
-            .legend {{
-                grid-template-columns: repeat(auto-fit, minmax(120px, 1fr));
-            }}
-            
-            .info-panel {{
-                position: fixed;
-                top: 20px;
-                left: 20px;
-                right: 20px;
-                transform: none;
-                max-width: none;
-                max-height: 60vh;
-            }}
-        }}
-    </style>
-</head>
-<body>
-    <div class="linkedin-header">
-        <div class="container">
-            <div class="header-content">
-                <div class="logo-section">
-                    <div class="linkedin-logo">in</div>
-                    <div>
-                        <div class="title">Professional Knowledge Graph</div>
-                        <div class="subtitle">Skills & Competencies Visualization</div>
-                    </div>
-                </div>
-            </div>
-        </div>
-    </div>
-
-    <div class="container">
-        <div class="main-content">
-            <div class="stats-panel">
-                <div class="stat-item">
-                    <span class="stat-number" id="nodeCount">{len(entities)}</span>
-                    <span class="stat-label">Skills & Entities</span>
-                </div>
-                <div class="stat-item">
-                    <span class="stat-number" id="linkCount">{len(relationships)}</span>
-                    <span class="stat-label">Connections</span>
-                </div>
-                <div class="stat-item">
-                    <span class="stat-number" id="skillCount">-</span>
-                    <span class="stat-label">Core Skills</span>
-                </div>
-            </div>
-            
-                         <div class="content-header">
-                 <div class="summary">{summary}</div>
-                 
-                 <div style="background: #E7F3FF; padding: 12px; border-radius: 8px; margin: 15px 0; font-size: 14px; color: #0A66C2;">
-                     <strong>Interactive Controls:</strong> Click category badges below to filter by type. Hold <kbd>Ctrl</kbd> (or <kbd>Cmd</kbd> on Mac) for multi-select. Use mouse wheel to zoom in/out and drag to pan.
-                 </div>
-                 
-                                  <div class="controls">
-                     <button class="linkedin-btn" onclick="restartSimulation()">
-                         Reset Layout
-                     </button>
-                     <button class="linkedin-btn secondary" onclick="centerGraph()">
-                         Center View
-                     </button>
-                     <button class="linkedin-btn secondary" onclick="zoomIn()">
-                         Zoom In
-                     </button>
-                     <button class="linkedin-btn secondary" onclick="zoomOut()">
-                         Zoom Out
-                     </button>
-                     <button class="linkedin-btn secondary" onclick="resetZoom()">
-                         Reset Zoom
-                     </button>
-                     <button class="linkedin-btn secondary" onclick="toggleLabels()">
-                         Toggle Labels
-                     </button>
-                     <button class="linkedin-btn secondary" onclick="showAllTypes()">
-                         Show All
-                     </button>
-                     <button class="linkedin-btn secondary" onclick="exportGraph()">
-                         Export Data
-                     </button>
-                 </div>
-                
-                                 <div class="legend">
-                     <div class="legend-item active" data-type="person" onclick="toggleFilter('person', event)">
-                         <div class="legend-color" style="background-color: {color_map['person']};"></div>
-                         <span>Person</span>
-                     </div>
-                     <div class="legend-item active" data-type="skill" onclick="toggleFilter('skill', event)">
-                         <div class="legend-color" style="background-color: {color_map['skill']};"></div>
-                         <span>Skills</span>
-                     </div>
-                     <div class="legend-item active" data-type="tool" onclick="toggleFilter('tool', event)">
-                         <div class="legend-color" style="background-color: {color_map['tool']};"></div>
-                         <span>Tools</span>
-                     </div>
-                     <div class="legend-item active" data-type="knowledge" onclick="toggleFilter('knowledge', event)">
-                         <div class="legend-color" style="background-color: {color_map['knowledge']};"></div>
-                         <span>Knowledge</span>
-                     </div>
-                     <div class="legend-item active" data-type="qualification" onclick="toggleFilter('qualification', event)">
-                         <div class="legend-color" style="background-color: {color_map['qualification']};"></div>
-                         <span>Qualifications</span>
-                     </div>
-                     <div class="legend-item active" data-type="role" onclick="toggleFilter('role', event)">
-                         <div class="legend-color" style="background-color: {color_map['role']};"></div>
-                         <span>Roles</span>
-                     </div>
-                     <div class="legend-item active" data-type="workplace" onclick="toggleFilter('workplace', event)">
-                         <div class="legend-color" style="background-color: {color_map['workplace']};"></div>
-                         <span>Workplace</span>
-                     </div>
-                     <div class="legend-item active" data-type="methodology" onclick="toggleFilter('methodology', event)">
-                         <div class="legend-color" style="background-color: {color_map['methodology']};"></div>
-                         <span>Methodology</span>
-                     </div>
-                     <div class="legend-item active" data-type="other" onclick="toggleFilter('other', event)">
-                         <div class="legend-color" style="background-color: {color_map['other']};"></div>
-                         <span>Other</span>
-                     </div>
-                 </div>
-            </div>
-            
-            <div class="graph-container">
-                <svg id="graph"></svg>
-            </div>
-        </div>
-    </div>
-    
-    <div class="info-panel" id="infoPanel">
-        <button class="close-btn" onclick="closeInfoPanel()">×</button>
-        <h3 id="infoTitle">Node Information</h3>
-        <div id="nodeDetails"></div>
-    </div>
+        self._log(f"✅ Interactive LinkedIn-style visualization saved to: {output_file}")
+        return output_file
     
-    <div class="node-tooltip" id="tooltip"></div>
-
-    <script>
-        // Data from Python
-        const entities = {json.dumps(entities, indent=2)};
-        const relationships = {json.dumps(relationships, indent=2)};
-        const colorMap = {json.dumps(color_map, indent=2)};
-        
-        // Filter state management
-        let activeFilters = new Set(['person', 'skill', 'tool', 'knowledge', 'qualification', 'role', 'workplace', 'methodology', 'other']);
-        let isMultiSelect = false;
-        
-        // Graph setup
-        const containerWidth = document.querySelector('.graph-container').offsetWidth;
-        const width = Math.min(containerWidth * 0.98, 1400); // Increased from 1100 to 1400
-        const height = 800; // Increased from 600 to 800
-        
-        const svg = d3.select("#graph")
-            .attr("width", width)
-            .attr("height", height)
-            .attr("viewBox", `0 0 ${{width}} ${{height}}`)
-            .style("max-width", "100%")
-            .style("height", "auto");
-        
-        // Add zoom behavior
-        const zoom = d3.zoom()
-            .scaleExtent([0.3, 3]) // Allow zoom from 30% to 300%
-            .on("zoom", (event) => {{
-                const {{transform}} = event;
-                g.attr("transform", transform);
-            }});
-        
-        svg.call(zoom);
-        
-        // Create a group for all graph elements (this will be transformed by zoom)
-        const g = svg.append("g");
-        
-        // Create graph data structure
-        const centerX = width / 2;
-        const centerY = height / 2;
-        
-        const nodes = entities.map(e => ({{
-            id: e.id,
-            name: e.name,
-            type: e.type,
-            importance: e.importance,
-            description: e.description,
-            attributes: e.attributes || {{}},
-            x: centerX + (Math.random() - 0.5) * 150,
-            y: centerY + (Math.random() - 0.5) * 150
-        }}));
-        
-        const links = relationships.map(r => ({{
-            source: r.source,
-            target: r.target,
-            type: r.type,
-            strength: r.strength,
-            description: r.description
-        }}));
-        
-        // Update skill count
-        const skillCount = nodes.filter(n => n.type === 'skill').length;
-        document.getElementById('skillCount').textContent = skillCount;
-        
-        // Create simulation
-        const simulation = d3.forceSimulation(nodes)
-            .force("link", d3.forceLink(links).id(d => d.id).distance(d => 80 + (10 - d.strength) * 15))
-            .force("charge", d3.forceManyBody().strength(-300))
-            .force("center", d3.forceCenter(centerX, centerY))
-            .force("collision", d3.forceCollide().radius(d => Math.sqrt(d.importance) * 4 + 15)) // Original collision radius
-            .force("x", d3.forceX(centerX).strength(0.15))
-            .force("y", d3.forceY(centerY).strength(0.15));
-        
-        // Create link elements
-        const link = g.append("g")
-            .selectAll("line")
-            .data(links)
-            .enter().append("line")
-            .attr("stroke", "#C4CDD5")
-            .attr("stroke-opacity", d => 0.3 + (d.strength / 10) * 0.7)
-            .attr("stroke-width", d => 1 + Math.sqrt(d.strength))
-            .on("mouseover", function(event, d) {{
-                showTooltip(event, `${{d.type}}: ${{d.description}}<br>Strength: ${{d.strength}}/10`);
-            }})
-            .on("mouseout", hideTooltip);
-        
-        // Create node elements
-        const node = g.append("g")
-            .selectAll("circle")
-            .data(nodes)
-            .enter().append("circle")
-            .attr("r", d => Math.sqrt(d.importance) * 4 + 10) // Original node radius
-            .attr("fill", d => colorMap[d.type] || colorMap.default)
-            .attr("stroke", "#FFFFFF")
-            .attr("stroke-width", 2)
-            .style("cursor", "pointer")
-            .style("filter", "drop-shadow(0 2px 4px rgba(0,0,0,0.15))")
-            .on("mouseover", function(event, d) {{
-                d3.select(this).transition().duration(200)
-                    .attr("r", Math.sqrt(d.importance) * 5 + 14)
-                    .style("filter", "drop-shadow(0 4px 12px rgba(0,0,0,0.25))");
-                showTooltip(event, `<strong>${{d.name}}</strong><br>${{d.type}} • Importance: ${{d.importance}}/10`);
-            }})
-            .on("mouseout", function(event, d) {{
-                d3.select(this).transition().duration(200)
-                    .attr("r", Math.sqrt(d.importance) * 4 + 10)
-                    .style("filter", "drop-shadow(0 2px 4px rgba(0,0,0,0.15))");
-                hideTooltip();
-            }})
-            .on("click", function(event, d) {{
-                showNodeDetails(d);
-            }})
-            .call(d3.drag()
-                .on("start", dragstarted)
-                .on("drag", dragged)
-                .on("end", dragended));
+    def process_text_to_knowledge_graph(self, text: str, output_file: str = "knowledge_graph.html",
+                                        save_fallback: bool = True) -> str:
+        """Main function to process text and generate knowledge graph
         
-        // Create labels
-        const labels = g.append("g")
-            .selectAll("text")
-            .data(nodes)
-            .enter().append("text")
-            .text(d => d.name.length > 15 ? d.name.substring(0, 15) + '...' : d.name)
-            .attr("font-size", d => Math.max(10, Math.sqrt(d.importance) * 1.5 + 8))
-            .attr("fill", "#333333")
-            .attr("text-anchor", "middle")
-            .attr("dominant-baseline", "central")
-            .attr("dy", "0")
-            .style("font-weight", "500")
-            .style("pointer-events", "none")
-            .style("text-shadow", "1px 1px 2px rgba(255,255,255,0.8)")
-            .style("user-select", "none");
-        
-        // Update positions on simulation tick
-        simulation.on("tick", () => {{
-            link
-                .attr("x1", d => d.source.x)
-                .attr("y1", d => d.source.y)
-                .attr("x2", d => d.target.x)
-                .attr("y2", d => d.target.y);
-            
-            node
-                .attr("cx", d => d.x)
-                .attr("cy", d => d.y);
-            
-            labels
-                .attr("x", d => d.x)
-                .attr("y", d => d.y);
-        }});
-        
-        // Filter toggle function
-        function toggleFilter(type, event) {{
-            isMultiSelect = event.ctrlKey || event.metaKey;
-            
-            if (!isMultiSelect) {{
-                // Single select mode - clear all filters and select only this type
-                activeFilters.clear();
-                activeFilters.add(type);
-                
-                // Update legend visual state
-                document.querySelectorAll('.legend-item').forEach(item => {{
-                    if (item.dataset.type === type) {{
-                        item.classList.add('active');
-                        item.classList.remove('inactive');
-                    }} else {{
-                        item.classList.remove('active');
-                        item.classList.add('inactive');
-                    }}
-                }});
-            }} else {{
-                // Multi-select mode - toggle this type
-                const legendItem = document.querySelector(`.legend-item[data-type="${{type}}"]`);
-                
-                if (activeFilters.has(type)) {{
-                    activeFilters.delete(type);
-                    legendItem.classList.remove('active');
-                    legendItem.classList.add('inactive');
-                }} else {{
-                    activeFilters.add(type);
-                    legendItem.classList.add('active');
-                    legendItem.classList.remove('inactive');
-                }}
-                
-                // If no filters are active, activate all
-                if (activeFilters.size === 0) {{
-                    activeFilters = new Set(['person', 'skill', 'tool', 'knowledge', 'qualification', 'role', 'workplace', 'methodology', 'other']);
-                    document.querySelectorAll('.legend-item').forEach(item => {{
-                        item.classList.add('active');
-                        item.classList.remove('inactive');
-                    }});
-                }}
-            }}
-            
-            updateGraph();
-        }}
-        
-        // Update graph based on active filters
-        function updateGraph() {{
-            // Filter nodes
-            node.style("opacity", d => activeFilters.has(d.type) ? 1 : 0.1)
-                .style("pointer-events", d => activeFilters.has(d.type) ? "all" : "none");
-            
-            // Filter labels
-            labels.style("opacity", d => activeFilters.has(d.type) ? 1 : 0.1);
-            
-            // Filter links - show only if both source and target are visible
-            link.style("opacity", d => {{
-                const sourceNode = nodes.find(n => n.id === d.source.id || n.id === d.source);
-                const targetNode = nodes.find(n => n.id === d.target.id || n.id === d.target);
-                return (activeFilters.has(sourceNode.type) && activeFilters.has(targetNode.type)) ? 
-                    (0.3 + (d.strength / 10) * 0.7) : 0.05;
-            }})
-            .style("pointer-events", d => {{
-                const sourceNode = nodes.find(n => n.id === d.source.id || n.id === d.source);
-                const targetNode = nodes.find(n => n.id === d.target.id || n.id === d.target);
-                return (activeFilters.has(sourceNode.type) && activeFilters.has(targetNode.type)) ? "all" : "none";
-            }});
-            
-            // Update statistics
-            const visibleNodes = nodes.filter(n => activeFilters.has(n.type));
-            const visibleSkills = visibleNodes.filter(n => n.type === 'skill');
-            const visibleLinks = relationships.filter(r => {{
-                const sourceNode = nodes.find(n => n.id === r.source);
-                const targetNode = nodes.find(n => n.id === r.target);
-                return activeFilters.has(sourceNode.type) && activeFilters.has(targetNode.type);
-            }});
-            
-            document.getElementById('nodeCount').textContent = visibleNodes.length;
-            document.getElementById('linkCount').textContent = visibleLinks.length;
-            document.getElementById('skillCount').textContent = visibleSkills.length;
-        }}
-        
-        // Show node details in side panel
-        function showNodeDetails(node) {{
-            const panel = document.getElementById('infoPanel');
-            const title = document.getElementById('infoTitle');
-            const details = document.getElementById('nodeDetails');
-            
-            title.textContent = node.name;
-            
-            let detailsHTML = `
-                <div class="info-item">
-                    <div class="info-label">Type</div>
-                    <div class="info-value">${{node.type.charAt(0).toUpperCase() + node.type.slice(1)}}</div>
-                </div>
-                <div class="info-item">
-                    <div class="info-label">Importance</div>
-                    <div class="info-value">${{node.importance}}/10</div>
-                </div>
-                <div class="info-item">
-                    <div class="info-label">Description</div>
-                    <div class="info-value">${{node.description}}</div>
-                </div>
-            `;
-            
-            // Add attributes if they exist
-            if (node.attributes && Object.keys(node.attributes).length > 0) {{
-                Object.entries(node.attributes).forEach(([key, value]) => {{
-                    detailsHTML += `
-                        <div class="info-item">
-                            <div class="info-label">${{key.replace(/_/g, ' ').replace(/\\b\\w/g, l => l.toUpperCase())}}</div>
-                            <div class="info-value">${{value}}</div>
-                        </div>
-                    `;
-                }});
-            }}
-            
-            // Add related connections
-            const relatedConnections = relationships.filter(r => r.source === node.id || r.target === node.id);
-            if (relatedConnections.length > 0) {{
-                detailsHTML += `
-                    <div class="info-item">
-                        <div class="info-label">Connections</div>
-                        <div class="info-value">
-                `;
-                relatedConnections.forEach(conn => {{
-                    const connectedNode = conn.source === node.id ? 
-                        entities.find(e => e.id === conn.target) : 
-                        entities.find(e => e.id === conn.source);
-                    if (connectedNode) {{
-                        detailsHTML += `• ${{connectedNode.name}} (${{conn.type}})<br>`;
-                    }}
-                }});
-                detailsHTML += `</div></div>`;
-            }}
-            
-            details.innerHTML = detailsHTML;
-            panel.style.display = 'block';
-        }}
-        
-        function closeInfoPanel() {{
-            document.getElementById('infoPanel').style.display = 'none';
-        }}
-        
-        // Tooltip functions
-        function showTooltip(event, content) {{
-            const tooltip = document.getElementById("tooltip");
-            tooltip.innerHTML = content;
-            tooltip.style.display = "block";
-            tooltip.style.left = (event.pageX + 10) + "px";
-            tooltip.style.top = (event.pageY + 10) + "px";
-        }}
-        
-        function hideTooltip() {{
-            document.getElementById("tooltip").style.display = "none";
-        }}
-        
-        // Control functions
-        function restartSimulation() {{
-            // Only restart the physics simulation without affecting filters
-            simulation.alpha(1).restart();
-            
-            // Ensure the current filter state is maintained
-            setTimeout(() => {{
-                updateGraph();
-            }}, 100);
-        }}
-        
-        function centerGraph() {{
-            // Reset any fixed positions
-            nodes.forEach(node => {{
-                node.fx = null;
-                node.fy = null;
-            }});
-            
-            // Temporarily fix nodes near center
-            nodes.forEach(node => {{
-                node.fx = centerX + (Math.random() - 0.5) * 150;
-                node.fy = centerY + (Math.random() - 0.5) * 150;
-            }});
-            
-            // Restart simulation with higher alpha for faster convergence
-            simulation.alpha(0.8).alphaTarget(0).restart();
-            
-            // Release fixed positions after animation
-            setTimeout(() => {{
-                nodes.forEach(node => {{
-                    node.fx = null;
-                    node.fy = null;
-                }});
-                simulation.alphaTarget(0);
-                
-                // Maintain current filter state after centering
-                updateGraph();
-            }}, 1000);
-        }}
-        
-        let labelsVisible = true;
-        function toggleLabels() {{
-            labelsVisible = !labelsVisible;
-            if (labelsVisible) {{
-                labels.style("opacity", d => activeFilters.has(d.type) ? 1 : 0.1);
-            }} else {{
-                labels.style("opacity", 0);
-            }}
-        }}
-        
-        function showAllTypes() {{
-            // Reset all filters to active
-            activeFilters = new Set(['person', 'skill', 'tool', 'knowledge', 'qualification', 'role', 'workplace', 'methodology', 'other']);
-            
-            // Update legend visual state
-            document.querySelectorAll('.legend-item').forEach(item => {{
-                item.classList.add('active');
-                item.classList.remove('inactive');
-            }});
-            
-            // Update graph
-            updateGraph();
-        }}
-        
-        // Zoom control functions
-        function zoomIn() {{
-            svg.transition().duration(300).call(
-                zoom.scaleBy, 1.5
-            );
-        }}
-        
-        function zoomOut() {{
-            svg.transition().duration(300).call(
-                zoom.scaleBy, 1 / 1.5
-            );
-        }}
-        
-        function resetZoom() {{
-            svg.transition().duration(500).call(
-                zoom.transform,
-                d3.zoomIdentity
-            );
-        }}
-        
-        function exportGraph() {{
-            const graphData = {{
-                nodes: nodes,
-                links: links,
-                metadata: {{
-                    summary: "{summary}",
-                    exportTime: new Date().toISOString(),
-                    nodeCount: nodes.length,
-                    linkCount: links.length,
-                    skillCount: skillCount
-                }}
-            }};
-            
-            const dataStr = "data:text/json;charset=utf-8," + encodeURIComponent(JSON.stringify(graphData, null, 2));
-            const downloadElement = document.createElement('a');
-            downloadElement.setAttribute("href", dataStr);
-            downloadElement.setAttribute("download", "professional_knowledge_graph.json");
-            downloadElement.click();
-        }}
-        
-        // Drag functions
-        function dragstarted(event, d) {{
-            if (!event.active) simulation.alphaTarget(0.3).restart();
-            d.fx = d.x;
-            d.fy = d.y;
-        }}
-        
-        function dragged(event, d) {{
-            d.fx = event.x;
-            d.fy = event.y;
-        }}
-        
-        function dragended(event, d) {{
-            if (!event.active) simulation.alphaTarget(0);
-            d.fx = null;
-            d.fy = null;
-        }}
-        
-        // Close info panel when clicking outside
-        document.addEventListener('click', function(event) {{
-            const panel = document.getElementById('infoPanel');
-            const isClickInsidePanel = panel.contains(event.target);
-            const isClickOnNode = event.target.tagName === 'circle';
-            
-            if (!isClickInsidePanel && !isClickOnNode && panel.style.display === 'block') {{
-                closeInfoPanel();
-            }}
-        }});
-        
-        // Handle window resize
-        function handleResize() {{
-            const newContainerWidth = document.querySelector('.graph-container').offsetWidth;
-            const newWidth = Math.min(newContainerWidth * 0.98, 1400); // Updated to match initial settings
-            
-            if (Math.abs(newWidth - width) > 50) {{
-                // Update SVG dimensions
-                svg.attr("width", newWidth)
-                   .attr("viewBox", `0 0 ${{newWidth}} ${{height}}`);
-                
-                // Update center coordinates
-                const newCenterX = newWidth / 2;
-                
-                // Update forces
-                simulation.force("center", d3.forceCenter(newCenterX, centerY))
-                         .force("x", d3.forceX(newCenterX).strength(0.15))
-                         .alpha(0.3).restart();
-            }}
-        }}
+        With save_fallback=False a failed extraction writes nothing (existing outputs are kept) and returns "".
+        """
+        self._log("🧠 Starting Professional Knowledge Graph Generation")
+        self._log("=" * 50)
         
-        // Add resize listener
-        window.addEventListener('resize', handleResize);
+        self._log("🔍 Extracting skills and competencies from text...")
+        knowledge_graph = self.extract_knowledge_graph_from_text(text)
         
-        // Initial center after a short delay to ensure proper layout
-        setTimeout(() => {{
-            // Only center the graph without affecting the initial filter state
-            const centerX_temp = width / 2;
-            const centerY_temp = height / 2;
-            
-            nodes.forEach(node => {{
-                node.fx = centerX_temp + (Math.random() - 0.5) * 150;
-                node.fy = centerY_temp + (Math.random() - 0.5) * 150;
-            }});
-            
-            simulation.alpha(0.5).restart();
-            
-            setTimeout(() => {{
-                nodes.forEach(node => {{
-                    node.fx = null;
-                    node.fy = null;
-                }});
-            }}, 800);
-        }}, 500);
+        return self._save_knowledge_graph(knowledge_graph, output_file, save_fallback)
+    
+    def process_text_incrementally(self, text: str, output_file: str = "knowledge_graph.html",
+                                   save_fallback: bool = True) -> str:
+        """Regenerate a knowledge graph re-extracting only sections changed since the previous run
         
-        console.log("Professional Knowledge Graph loaded successfully!");
-        console.log(`Nodes: ${{nodes.length}}, Links: ${{links.length}}, Skills: ${{skillCount}}`);
-        console.log("Filter Features:");
-        console.log("  • Click category badges to filter by type");
-        console.log("  • Hold Ctrl/Cmd for multi-select");
-        console.log("  • Use 'Show All' to reset filters");
-    </script>
-</body>
-</html>
+        Per-section results are kept in <output>_sections.json next to the _data.json file.
+        save_fallback works as in process_text_to_knowledge_graph.
         """
+        from incremental_extraction import update_knowledge_graph_incrementally, section_state_file
         
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(html_content)
+        self._log("🧠 Starting Incremental Knowledge Graph Update")
+        self._log("=" * 50)
         
-        print(f"✅ Interactive LinkedIn-style visualization saved to: {output_file}")
-        return output_file
+        knowledge_graph, stats = update_knowledge_graph_incrementally(self, text, section_state_file(output_file))
+        self._log(f"🧩 Sections: {stats['sections']} total, {stats['reused']} reused, {stats['extracted']} extracted, "
+              f"{stats['failed']} failed, {stats['dropped']} dropped")
+        if not knowledge_graph['entities']:
+            print("❌ No section could be extracted")
+            knowledge_graph = self.get_default_knowledge_graph()
+        
+        return self._save_knowledge_graph(knowledge_graph, output_file, save_fallback)
     
-    def process_text_to_knowledge_graph(self, text: str, output_file: str = "knowledge_graph.html") -> str:
-        """Main function to process text and generate knowledge graph"""
-        print("🧠 Starting Professional Knowledge Graph Generation")
-        print("=" * 50)
+    def _save_knowledge_graph(self, knowledge_graph: Dict[str, Any], output_file: str,
+                              save_fallback: bool = True) -> str:
+        """Write the HTML visualization and the _data.json file for a knowledge graph
         
-        print("🔍 Extracting skills and competencies from text...")
-        knowledge_graph = self.extract_knowledge_graph_from_text(text)
+        A fallback graph (see get_default_knowledge_graph) is only written with save_fallback; otherwise "" is returned.
+        """
+        if knowledge_graph.get('fallback') and not save_fallback:
+            print(f"❌ Extraction failed, {output_file} was not written")
+            return ""
+        if self.graph_analytics:
+            self.analyze_knowledge_graph(knowledge_graph)
         
-        print("🎨 Generating LinkedIn-style interactive visualization...")
+        self._log("🎨 Generating LinkedIn-style interactive visualization...")
         html_file = self.generate_interactive_visualization(knowledge_graph, output_file)
         
         # Save knowledge graph data as JSON
-        json_file = output_file.replace('.html', '_data.json')
-        with open(json_file, 'w', encoding='utf-8') as f:
+        json_file = output_sidecar(output_file, '_data.json')
+        # Written beside and then renamed, so readers (and watch mode) never see a half-written file
+        from visualization_template import open_output
+        with self.metrics.stage("save"), open_output(json_file) as f:
             json.dump(knowledge_graph, f, indent=2, ensure_ascii=False)
         
-        print(f"📊 Knowledge graph data saved to: {json_file}")
-        print(f"🌐 Open {html_file} in your browser to view the professional graph!")
+        self._log(f"📊 Knowledge graph data saved to: {json_file}")
+        document = os.path.splitext(os.path.basename(output_file))[0]
+        if self.graph_store:
+            with self.metrics.stage("save"):
+                self.graph_store.upsert_graph(document, knowledge_graph)
+            self._log(f"🗄️ Knowledge graph stored as '{document}' in {self.graph_store.db_path}")
+        similarity_index = self._get_similarity_index()
+        if similarity_index is not None:
+            with self.metrics.stage("save"), self._index_lock:
+                similarity_index.add_graph(knowledge_graph, document)
+            self._log(f"🧭 Similarity index: {len(similarity_index)} entities")
+            self.flush_similarity_index(self.SIMILARITY_INDEX_FLUSH_SECONDS)
+        if self.export_formats:
+            from graph_export import export_graph
+            try:
+                with self.metrics.stage("save"):
+                    exported = export_graph(knowledge_graph, json_file[:-len('.json')], self.export_formats,
+                                            name=document)
+                self._log(f"🧮 Exported: {', '.join(exported)}")
+            except (ImportError, RuntimeError) as e:
+                print(f"⚠️ Export skipped: {e}")
+        if self.response_cache:
+            cache_stats = self.response_cache.stats()
+            self._log(f"💾 Response cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses")
+        if self.run_report:
+            report_file = self.write_run_report(output_sidecar(output_file, '_report.json'))
+            self._log(f"⏱️ Run report saved to: {report_file}")
+        self._log(f"🌐 Open {html_file} in your browser to view the professional graph!")
         
         return html_file
     
-    def process_pdf_to_knowledge_graph(self, pdf_path: str, output_file: str = "knowledge_graph.html") -> str:
-        """Process PDF resume to knowledge graph"""
-        print("📄 Extracting text from PDF...")
+    def process_pdf_to_knowledge_graph(self, pdf_path: str, output_file: str = "knowledge_graph.html",
+                                       save_fallback: bool = True) -> str:
+        """Process PDF resume to knowledge graph (save_fallback as in process_text_to_knowledge_graph)"""
+        self._log("📄 Extracting text from PDF...")
         
         try:
-            with open(pdf_path, 'rb') as file:
-                pdf_content = file.read()
-            
-            text = extract_text_from_pdf(pdf_content)
-            print(f"✅ Extracted {len(text)} characters from PDF")
-            
-            return self.process_text_to_knowledge_graph(text, output_file)
+            knowledge_graph = self.extract_knowledge_graph_from_pdf(pdf_path)
+            return self._save_knowledge_graph(knowledge_graph, output_file, save_fallback)
             
         except Exception as e:
             print(f"❌ Error processing PDF: {e}")
             return ""
+    
+    @timed_stage("extraction")
+    def extract_knowledge_graph_from_pdf(self, pdf_path: str) -> Dict[str, Any]:
+        """Extract a knowledge graph from a PDF, streaming page text from the PDF process pool into chunk extraction"""
+        from pdf_ingestion import iter_pdf_text_chunks
+        
+        started = time.perf_counter()
+        extracted_chars = 0
+        tokens = {"tokens_before": 0, "tokens_after": 0}
+        # Shared across chunks, so page headers and footers repeated on every page are dropped
+        seen_lines = set()
+        
+        def chunks() -> Iterator[str]:
+            nonlocal extracted_chars
+            for chunk in iter_pdf_text_chunks(pdf_path, self.chunk_size_chars, self.pdf_processes):
+                extracted_chars += len(chunk)
+                if self.compact_input:
+                    # Pages are extracted while they stream in, so only cleaning applies, not the token budget
+                    chunk, stats = self._compact(chunk, seen_lines=seen_lines)
+                    tokens["tokens_before"] += stats["tokens_before"]
+                    tokens["tokens_after"] += stats["tokens_after"]
+                yield chunk
+        
+        knowledge_graph = self._extract_and_merge_chunks(chunks())
+        self._log(f"✅ Extracted {extracted_chars} characters from PDF, graph ready in {time.perf_counter() - started:.2f}s")
+        if tokens["tokens_before"] > tokens["tokens_after"]:
+            self._log(f"🗜️ Input: {tokens['tokens_before']} → {tokens['tokens_after']} estimated tokens after cleaning")
+        return knowledge_graph
+    
+    def process_documents_to_knowledge_graphs(self, sources: List[str], output_dir: str = "knowledge_graphs",
+                                              concurrency: int = 4, requests_per_second: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Process a directory or glob of text/Markdown/PDF documents concurrently (see batch_processing)"""
+        from batch_processing import process_documents
+        return process_documents(self, sources, output_dir, concurrency, requests_per_second)
+    
+    @timed_stage("entity_resolution")
+    def combine_knowledge_graphs(self, graphs: List[Dict[str, Any]], output_file: Optional[str] = None,
+                                 summary: Optional[str] = None) -> Dict[str, Any]:
+        """Merge graphs of several documents into one, resolving duplicate entities across them (see entity_resolution)
+        
+        Args:
+            graphs: Knowledge graphs, e.g. loaded from *_data.json files
+            output_file: When given, the combined graph is saved like a single-document graph
+            summary: Summary of the combined graph; defaults to the longest input summary
+        """
+        try:
+            from entity_resolution import resolve_knowledge_graphs
+        except ImportError:
+            from graph_merge import merge_knowledge_graphs
+            print("⚠️ NumPy is not installed, entities are only merged on identical names")
+            combined = merge_knowledge_graphs(graphs, summary)
+        else:
+            started = time.perf_counter()
+            stats = {}
+            combined = resolve_knowledge_graphs(graphs, summary, stats=stats)
+            self._log(f"🔗 Resolved {stats['entities']} entities into {len(combined['entities'])} "
+                  f"({stats['candidate_pairs']} candidate pairs) in {time.perf_counter() - started:.2f}s")
+        
+        if output_file:
+            self._save_knowledge_graph(combined, output_file)
+        return combined
 
 
 def main():
     """Main function to run professional knowledge graph generation"""
     # 您可以在这里选择具体的AI提供商：
     # generator = KnowledgeGraphGenerator("gemini")  # 使用Gemini AI
-    generator = KnowledgeGraphGenerator("openai")  # 使用OpenAI
+    generator = KnowledgeGraphGenerator("openai", verbose=True)  # 使用OpenAI
     # generator = KnowledgeGraphGenerator("auto")  # 自动检测最佳AI提供商
     
     # Check if PDF exists
@@ -0,0 +1,195 @@
+"""Deterministic offline stand-in for the AI adapters returned by create_ai_adapter
+
+LocalFakeAdapter answers the generator's prompts without any network access:
+extraction prompts get knowledge-graph JSON synthesized from the capitalized phrases
+in the prompt (optionally padded to a fixed entity count), classification prompts get
+type answers. Latency and failures are configurable and, like the answers, derived
+from a hash of the prompt, so runs are repeatable regardless of thread scheduling.
+
+    generator = KnowledgeGraphGenerator(ai_provider="local")
+    generator = KnowledgeGraphGenerator(ai_provider=LocalFakeAdapter(latency_seconds=0.8, failure_rate=0.05))
+"""
+import hashlib
+import json
+import re
+import threading
+import time
+from typing import Dict, List, Any, Optional, Iterator
+
+from entity_classifier import get_entity_classifier
+from pipeline_metrics import estimate_tokens
+
+# Mix of valid types, types the static mappings resolve and types only the model can resolve,
+# so the cleaning stage sees a realistic spread of work
+_SYNTHETIC_TYPES = ("person", "skill", "tool", "knowledge", "framework", "organization", "skill", "role",
+                    "faction", "methodology", "programming_language", "artifact", "workplace", "ideology")
+_RELATIONSHIP_TYPES = ("has_skill", "uses", "works_at", "related_to", "member_of", "knows")
+# Names never span lines, so a heading is not glued to the first name of the next paragraph
+_NAME_PATTERN = re.compile(r"\b[A-Z][\w'’-]+(?:[ \t]+(?:of[ \t]+|the[ \t]+)?[A-Z][\w'’-]+){0,3}")
+_CLASSIFY_BATCH_MARKER = "Entities to classify (JSON):"
+_CLASSIFY_SINGLE_MARKER = "Entity to classify:"
+# Ends the instructions of the generator's built-in extraction prompt; names are only taken from what follows
+_SOURCE_TEXT_MARKER = "Source text:"
+
+
+class LocalAdapterError(RuntimeError):
+    """Injected failure of the fake provider"""
+
+
+class LocalFakeAdapter:
+    """Offline AI adapter with synthesized answers, simulated latency and injected failures"""
+
+    # Tells the generator to use its built-in prompts instead of prompt_templates
+    offline = True
+
+    def __init__(self, latency_seconds: float = 0.0, latency_jitter: float = 0.0,
+                 tokens_per_second: Optional[float] = None, prompt_tokens_per_second: Optional[float] = None,
+                 failure_rate: float = 0.0,
+                 entities_per_call: Optional[int] = None, max_entities: int = 60,
+                 classification_accuracy: float = 1.0, stream_chunk_chars: int = 48, seed: int = 0):
+        """
+        Initialize the fake provider
+
+        Args:
+            latency_seconds: Time to first token of every call
+            latency_jitter: Up to this many extra seconds, chosen per prompt
+            tokens_per_second: Generation speed for the answer; None returns it instantly
+            prompt_tokens_per_second: Prompt processing speed, added to the time to first token
+                (so longer prompts answer later); None ignores the prompt length
+            failure_rate: Probability that a call raises LocalAdapterError (decided per prompt and attempt,
+                so a retried prompt can succeed)
+            entities_per_call: Exact number of entities per extraction answer; by default one per
+                distinct capitalized phrase in the prompt, up to max_entities
+            max_entities: Cap on phrase-derived entities
+            classification_accuracy: Share of classification answers that are valid types
+            stream_chunk_chars: Size of the pieces yielded by generate_content_stream
+            seed: Changes every synthesized answer, latency and failure decision
+        """
+        self.latency_seconds = latency_seconds
+        self.latency_jitter = latency_jitter
+        self.tokens_per_second = tokens_per_second
+        self.prompt_tokens_per_second = prompt_tokens_per_second
+        self.failure_rate = failure_rate
+        self.entities_per_call = entities_per_call
+        self.max_entities = max_entities
+        self.classification_accuracy = classification_accuracy
+        self.stream_chunk_chars = max(1, stream_chunk_chars)
+        self.seed = seed
+        self.classifier = get_entity_classifier()
+        self.calls = 0
+        self.failures = 0
+        self._attempts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get_provider_info(self) -> Dict[str, Any]:
+        return {"provider": "local", "content_model": "local-fake", "search_model": "local-fake"}
+
+    def _unit(self, *parts: Any) -> float:
+        """Deterministic number in [0, 1) for the given parts"""
+        digest = hashlib.sha256(repr((self.seed,) + parts).encode('utf-8')).digest()
+        return int.from_bytes(digest[:8], 'big') / 2 ** 64
+
+    def _begin_call(self, prompt: str) -> None:
+        key = hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+        with self._lock:
+            self.calls += 1
+            attempt = self._attempts.get(key, 0)
+            self._attempts[key] = attempt + 1
+
+        delay = self.latency_seconds + self.latency_jitter * self._unit('latency', key, attempt)
+        if self.prompt_tokens_per_second:
+            delay += estimate_tokens(prompt) / self.prompt_tokens_per_second
+        if delay > 0:
+            time.sleep(delay)
+        if self.failure_rate and self._unit('failure', key, attempt) < self.failure_rate:
+            with self._lock:
+                self.failures += 1
+            raise LocalAdapterError(f"Injected failure (attempt {attempt + 1})")
+
+    def generate_content(self, prompt: str, *args, **kwargs) -> str:
+        self._begin_call(prompt)
+        response = self._answer(prompt)
+        if self.tokens_per_second:
+            time.sleep(estimate_tokens(response) / self.tokens_per_second)
+        return response
+
+    def generate_content_stream(self, prompt: str, *args, **kwargs) -> Iterator[str]:
+        self._begin_call(prompt)
+        response = self._answer(prompt)
+        for start in range(0, len(response), self.stream_chunk_chars):
+            piece = response[start:start + self.stream_chunk_chars]
+            if self.tokens_per_second:
+                time.sleep(estimate_tokens(piece) / self.tokens_per_second)
+            yield piece
+
+    # ------------------------------------------------------------------ answers
+
+    def _answer(self, prompt: str) -> str:
+        if _CLASSIFY_BATCH_MARKER in prompt:
+            return self._classify_batch(prompt)
+        if _CLASSIFY_SINGLE_MARKER in prompt:
+            match = re.search(r'Name:\s*(.*)', prompt)
+            name = match.group(1).strip() if match else ""
+            description = re.search(r'Description:\s*(.*)', prompt)
+            return self._classify({"name": name, "description": description.group(1) if description else ""})
+        return self._extract(prompt)
+
+    def _classify(self, entity: Dict[str, Any]) -> str:
+        if self._unit('classify', entity.get('name', '')) >= self.classification_accuracy:
+            return "unknown"
+        return self.classifier.guess(entity)
+
+    def _classify_batch(self, prompt: str) -> str:
+        payload_text = prompt.split(_CLASSIFY_BATCH_MARKER, 1)[1]
+        start, end = payload_text.find('['), payload_text.rfind(']') + 1
+        try:
+            payload = json.loads(payload_text[start:end])
+        except ValueError:
+            payload = []
+        answers = {str(item.get('id')): self._classify(item) for item in payload if isinstance(item, dict)}
+        return "```json\n" + json.dumps(answers, ensure_ascii=False) + "\n```"
+
+    def _entity_names(self, prompt: str) -> List[str]:
+        names = []
+        seen = set()
+        for match in _NAME_PATTERN.finditer(prompt):
+            name = match.group(0).strip()
+            if name.lower() not in seen:
+                seen.add(name.lower())
+                names.append(name)
+
+        count = self.entities_per_call if self.entities_per_call is not None else min(len(names), self.max_entities)
+        names = names[:count]
+        while len(names) < count:
+            names.append(f"Synthetic Entity {len(names) + 1}")
+        return names
+
+    def _extract(self, prompt: str) -> str:
+        names = self._entity_names(prompt.rsplit(_SOURCE_TEXT_MARKER, 1)[-1])
+        entities = []
+        for index, name in enumerate(names):
+            entity_type = "person" if index == 0 else _SYNTHETIC_TYPES[int(self._unit('type', name) * len(_SYNTHETIC_TYPES))]
+            entities.append({
+                "id": f"e{index + 1}",
+                "name": name,
+                "type": entity_type,
+                "importance": round(3 + 7 * self._unit('importance', name), 1) if index else 10.0,
+                "description": f"{name} as mentioned in the source text",
+                "attributes": {"mentions": 1 + int(4 * self._unit('mentions', name))}
+            })
+
+        relationships = []
+        for index in range(1, len(entities)):
+            # Mostly a hub around the first entity, plus links between neighbours
+            target = 0 if self._unit('hub', index) < 0.6 else index - 1
+            relationships.append({
+                "source": entities[target]["id"],
+                "target": entities[index]["id"],
+                "type": _RELATIONSHIP_TYPES[int(self._unit('relation', index) * len(_RELATIONSHIP_TYPES))],
+                "strength": round(1 + 9 * self._unit('strength', index), 1),
+                "description": f"{entities[target]['name']} and {entities[index]['name']}"
+            })
+
+        graph = {"entities": entities, "relationships": relationships,
+                 "summary": f"Synthesized knowledge graph with {len(entities)} entities"}
+        return "Here is the knowledge graph:\n```json\n" + json.dumps(graph, ensure_ascii=False, indent=1) + "\n```"
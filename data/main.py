@@ -1,6 +1,264 @@
-def main():
-    print("Hello from data!")
+"""Command-line entry point for the knowledge graph pipeline
+
+    python main.py extract resume.pdf -o resume_graph.html
+    python main.py extract notes.md --incremental --provider gemini --cache-dir .kg_cache
+    python main.py render resume_graph_data.json --mode split
+    python main.py batch "*-Lore.md" -o knowledge_graphs --concurrency 4
+    python main.py watch "*-Lore.md" -o knowledge_graphs --provider gemini
+    python main.py serve --provider gemini --port 8765 --workers 4
+    python main.py export knowledge_graphs -o graph_exports --format npz --format graphml
+    python main.py similar --index entities.npz --add knowledge_graphs
+    python main.py similar "Kubernetes" --index entities.npz -k 5 --type tool
+
+Only argparse is imported up front; the generator (and through it the AI adapter and
+prompt modules) is loaded by the subcommand that needs it, and the adapter itself is
+only created on the first model call, so `render` never touches a provider.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+# Kept in sync with graph_export.EXPORT_FORMATS, which is only imported by the commands that export
+EXPORT_FORMATS = ("auto", "parquet", "arrow", "npz", "graphml")
+
+
+def _output_file(path: str, output: str = None) -> str:
+    if output:
+        return output
+    base = os.path.splitext(path)[0]
+    if base.endswith('_data'):
+        base = base[:-len('_data')]
+    return base + ".html"
+
+
+def _generator(args, **kwargs):
+    from knowledge_graph_generator import KnowledgeGraphGenerator
+    if hasattr(args, 'provider'):
+        kwargs.update(call_timeout=args.timeout, max_retries=args.retries, hedge_percentile=args.hedge_percentile,
+                      graph_analytics=not args.no_analytics, export_formats=args.export or (),
+                      similarity_index=args.similarity_index, compact_input=not args.no_compaction,
+                      token_budget=args.token_budget)
+    return KnowledgeGraphGenerator(
+        ai_provider=getattr(args, 'provider', "auto"),
+        cache_dir=getattr(args, 'cache_dir', None),
+        graph_store=getattr(args, 'store', None),
+        precompute_layout=not args.no_layout,
+        visualization_mode=args.mode,
+        compress_graph_data=args.gzip,
+        verbose=not args.quiet,
+        run_report=getattr(args, 'report', False),
+        **kwargs
+    )
+
+
+def cmd_extract(args) -> int:
+    generator = _generator(args, chunk_size_chars=args.chunk_size)
+    output_file = _output_file(args.input, args.output)
+    if args.input.lower().endswith('.pdf'):
+        html_file = generator.process_pdf_to_knowledge_graph(args.input, output_file)
+    else:
+        with open(args.input, 'r', encoding='utf-8') as f:
+            text = f.read()
+        if args.incremental:
+            html_file = generator.process_text_incrementally(text, output_file)
+        else:
+            html_file = generator.process_text_to_knowledge_graph(text, output_file)
+    return 0 if html_file else 1
+
+
+def cmd_render(args) -> int:
+    with open(args.input, 'r', encoding='utf-8') as f:
+        knowledge_graph = json.load(f)
+    generator = _generator(args)
+    generator.generate_interactive_visualization(knowledge_graph, _output_file(args.input, args.output))
+    return 0
+
+
+def cmd_batch(args) -> int:
+    generator = _generator(args, chunk_size_chars=args.chunk_size)
+    results = generator.process_documents_to_knowledge_graphs(args.sources, args.output, args.concurrency,
+                                                              args.requests_per_second)
+    failed = sum(1 for result in results if result["status"] != "ok")
+    if failed:
+        print(f"❌ {failed} of {len(results)} documents failed")
+    return 1 if failed or not results else 0
+
+
+def cmd_watch(args) -> int:
+    from document_watcher import watch_documents
+    generator = _generator(args, chunk_size_chars=args.chunk_size)
+    watch_documents(generator, args.sources, args.output, args.debounce, args.poll_interval, args.concurrency,
+                    incremental=not args.full)
+    return 0
+
+
+def cmd_serve(args) -> int:
+    from graph_service import serve
+    generator = _generator(args, chunk_size_chars=args.chunk_size)
+    serve(generator, args.host, args.port, args.workers, args.queue_size, int(args.max_upload_mb * 2 ** 20))
+    return 0
+
+
+def cmd_export(args) -> int:
+    from graph_export import export_graphs
+    try:
+        result = export_graphs(args.sources, args.output, args.format or ["auto"], args.name)
+    except (ImportError, RuntimeError) as e:
+        print(f"❌ {e}")
+        return 1
+    if not args.quiet:
+        print(f"🧮 Exported {result['graphs']} graphs ({result['entities']} entities, "
+              f"{result['relationships']} relationships):")
+        for path in result["files"]:
+            print(f"   {path}")
+    return 0
+
+
+def cmd_similar(args) -> int:
+    from graph_export import collect_graph_files, graph_names
+    from similarity_index import SimilarityIndex
+    index = SimilarityIndex.open(args.index)
+    if args.add:
+        paths = collect_graph_files(args.add)
+        if not paths:
+            raise FileNotFoundError(f"No knowledge graph files found in: {', '.join(args.add)}")
+        for path, name in graph_names(paths).items():
+            with open(path, 'r', encoding='utf-8') as f:
+                index.add_graph(json.load(f), name)
+        index.save(args.index)
+        if not args.quiet:
+            print(f"🧭 Indexed {len(paths)} graphs, {len(index)} entities in {args.index}")
+    if args.query:
+        started = time.perf_counter()
+        results = index.query(args.query, args.k, types=args.type)
+        milliseconds = (time.perf_counter() - started) * 1000
+        for result in results:
+            print(f"{result['score']:.3f}  {result['name']} ({result['type']})  [{result['graph']}: {result['id']}]")
+        if not args.quiet:
+            print(f"🔎 {len(results)} of {len(index)} entities in {milliseconds:.1f} ms")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Generate interactive knowledge graphs from documents")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    output_options = argparse.ArgumentParser(add_help=False)
+    output_options.add_argument('--mode', choices=("inline", "split"), default="inline",
+                                help="self-contained page, or data file plus shared viewer assets (serve split pages over HTTP)")
+    output_options.add_argument('--gzip', action='store_true', help="gzip split-mode data files")
+    output_options.add_argument('--no-layout', action='store_true',
+                                help="leave the layout to the browser instead of precomputing it")
+    output_options.add_argument('-q', '--quiet', action='store_true', help="only print warnings and errors")
+
+    model_options = argparse.ArgumentParser(add_help=False)
+    model_options.add_argument('--provider', default="auto",
+                               help='"gemini", "openai", "auto" or "local"; several comma-separated providers '
+                                    'with optional quotas ("gemini:rpm=15,openai:rpm=500:tpm=200000") share the calls')
+    model_options.add_argument('--cache-dir', help="persistent AI response cache directory")
+    model_options.add_argument('--chunk-size', type=int, default=6000, help="characters per extraction chunk")
+    model_options.add_argument('--store', help="SQLite graph store to upsert results into")
+    model_options.add_argument('--report', action='store_true', help="write a _report.json run report")
+    model_options.add_argument('--no-analytics', action='store_true',
+                               help="keep the model's importance scores instead of ranking entities by PageRank")
+    model_options.add_argument('--timeout', type=float, default=120.0, help="seconds per model call attempt")
+    model_options.add_argument('--retries', type=int, default=2, help="retries of a failed model call")
+    model_options.add_argument('--hedge-percentile', type=float,
+                               help="duplicate calls slower than this latency percentile, e.g. 0.95")
+    model_options.add_argument('--export', action='append', choices=EXPORT_FORMATS,
+                               help="also export every graph as columnar tables or GraphML (repeatable)")
+    model_options.add_argument('--similarity-index',
+                               help="entity similarity index (.npz) to add graphs to and type entities from")
+    model_options.add_argument('--token-budget', type=int,
+                               help="estimated input tokens per document; longer documents keep only their "
+                                    "most entity-dense sentences")
+    model_options.add_argument('--no-compaction', action='store_true',
+                               help="send the input text as is, without whitespace, markup and duplicate cleanup")
+
+    extract = subparsers.add_parser('extract', parents=[model_options, output_options],
+                                    help="extract a graph from a text, Markdown or PDF file")
+    extract.add_argument('input')
+    extract.add_argument('-o', '--output', help="HTML file (default: <input>.html)")
+    extract.add_argument('--incremental', action='store_true',
+                         help="only re-extract sections changed since the previous run")
+    extract.set_defaults(handler=cmd_extract)
+
+    render = subparsers.add_parser('render', parents=[output_options],
+                                   help="re-render the HTML of a saved _data.json graph without any model call")
+    render.add_argument('input')
+    render.add_argument('-o', '--output', help="HTML file (default: <input without _data>.html)")
+    render.set_defaults(handler=cmd_render)
+
+    batch = subparsers.add_parser('batch', parents=[model_options, output_options],
+                                  help="process directories, files or glob patterns concurrently")
+    batch.add_argument('sources', nargs='+')
+    batch.add_argument('-o', '--output', default="knowledge_graphs", help="output directory")
+    batch.add_argument('--concurrency', type=int, default=4)
+    batch.add_argument('--requests-per-second', type=float, help="model call rate limit")
+    batch.set_defaults(handler=cmd_batch)
+
+    watch = subparsers.add_parser('watch', parents=[model_options, output_options],
+                                  help="regenerate graphs whenever their source documents change")
+    watch.add_argument('sources', nargs='+', help="directories, files or glob patterns to watch")
+    watch.add_argument('-o', '--output', default="knowledge_graphs", help="output directory")
+    watch.add_argument('--debounce', type=float, default=0.5,
+                       help="seconds a document must stay unchanged before it is processed")
+    watch.add_argument('--poll-interval', type=float, default=1.0,
+                       help="seconds between scans when the watchdog package is not installed")
+    watch.add_argument('--concurrency', type=int, default=2, help="documents processed at the same time")
+    watch.add_argument('--full', action='store_true',
+                       help="re-extract whole documents instead of only their changed sections")
+    watch.set_defaults(handler=cmd_watch)
+
+    serve = subparsers.add_parser('serve', parents=[model_options],
+                                  help="run a local HTTP service that extracts graphs from posted documents")
+    serve.add_argument('--host', default="127.0.0.1")
+    serve.add_argument('--port', type=int, default=8765)
+    serve.add_argument('--workers', type=int, default=2, help="documents processed at the same time")
+    serve.add_argument('--queue-size', type=int, default=16,
+                       help="documents allowed to wait; beyond that requests are answered with 503")
+    serve.add_argument('--max-upload-mb', type=float, default=20.0, help="largest accepted upload")
+    serve.add_argument('--no-layout', action='store_true',
+                       help="let the browser lay out returned pages instead of precomputing positions")
+    serve.add_argument('-q', '--quiet', action='store_true', help="only print warnings and errors")
+    serve.set_defaults(handler=cmd_serve, mode="inline", gzip=False)
+
+    export = subparsers.add_parser('export', help="bulk-export saved _data.json graphs as columnar tables and GraphML")
+    export.add_argument('sources', nargs='+', help="_data.json files, directories holding them or glob patterns")
+    export.add_argument('-o', '--output', default="graph_exports", help="output directory")
+    export.add_argument('--format', action='append', choices=EXPORT_FORMATS,
+                        help="auto (Parquet if pyarrow is installed, else npz), parquet, arrow, npz or graphml; "
+                             "repeatable (default: auto)")
+    export.add_argument('--name', default="knowledge_graphs", help="base name of the shared tables")
+    export.add_argument('-q', '--quiet', action='store_true', help="only print warnings and errors")
+    export.set_defaults(handler=cmd_export)
+
+    similar = subparsers.add_parser('similar', help="find the most similar entities across saved graphs")
+    similar.add_argument('query', nargs='?', help="entity name to look up")
+    similar.add_argument('--index', required=True, help="similarity index file (.npz), created if missing")
+    similar.add_argument('--add', nargs='+', metavar='SOURCE',
+                         help="index these _data.json files, directories or glob patterns first")
+    similar.add_argument('-k', type=int, default=10, help="number of results")
+    similar.add_argument('--type', action='append', help="only return entities of this type (repeatable)")
+    similar.add_argument('-q', '--quiet', action='store_true', help="only print results, warnings and errors")
+    similar.set_defaults(handler=cmd_similar)
+    return parser
+
+
+def main(argv=None) -> int:
+    started = time.perf_counter()
+    args = build_parser().parse_args(argv)
+    try:
+        status = args.handler(args)
+    except FileNotFoundError as e:
+        print(f"❌ {e}")
+        return 1
+    if not args.quiet:
+        print(f"⏱️ {args.command} finished in {time.perf_counter() - started:.2f}s")
+    return status
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
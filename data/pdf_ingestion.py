@@ -0,0 +1,162 @@
+"""Page-level PDF text extraction on a process pool
+
+Text extraction is CPU-bound, so pages are handed out in small ranges to a shared
+process pool. Every worker memory-maps the file (both backends parse straight from the
+mapping) and only parses the pages it was given, and at most a fixed window of page ranges is in flight, so peak memory follows
+the window rather than the file size. Pages come back in order as soon as they are
+ready and can be packed into extraction chunks while later pages are still running.
+The pool's workers are started with forkserver (spawn where that is unavailable), never
+by forking: the pool is created from batch and service threads, and a forked child can
+inherit locks held by other threads and deadlock.
+
+PyMuPDF is used when installed, then pypdf (the "pdf" extra); without either the whole
+file goes through utils.extract_text_from_pdf as before.
+"""
+import mmap
+import multiprocessing
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Iterator, Optional, Tuple
+
+from text_chunking import split_text_into_chunks
+
+# Pages per task: large enough to amortize inter-process overhead, small enough to spread work
+PAGES_PER_TASK = 4
+
+
+def _import_pymupdf():
+    try:
+        import pymupdf
+    except ImportError:
+        import fitz as pymupdf  # PyMuPDF before 1.24.3
+    return pymupdf
+
+
+def _pdf_backend() -> Optional[str]:
+    try:
+        _import_pymupdf()
+        return "pymupdf"
+    except ImportError:
+        pass
+    try:
+        import pypdf  # noqa: F401
+        return "pypdf"
+    except ImportError:
+        return None
+
+
+def _open_mapped(path: str) -> mmap.mmap:
+    with open(path, 'rb') as f:
+        # The mapping stays valid after the file object is closed
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def pdf_page_count(path: str) -> int:
+    """Number of pages; only the document's page tree is parsed"""
+    backend = _pdf_backend()
+    if backend is None:
+        raise RuntimeError("No page-level PDF backend installed (PyMuPDF or pypdf)")
+    mapped = _open_mapped(path)
+    try:
+        if backend == "pymupdf":
+            with memoryview(mapped) as view, _import_pymupdf().open(stream=view, filetype="pdf") as document:
+                return document.page_count
+        from pypdf import PdfReader
+        return len(PdfReader(mapped).pages)
+    finally:
+        mapped.close()
+
+
+def _extract_page_range(path: str, start: int, stop: int) -> List[Tuple[int, str]]:
+    """Worker: text of pages [start, stop) of one PDF"""
+    mapped = _open_mapped(path)
+    try:
+        if _pdf_backend() == "pymupdf":
+            # A memoryview stream is parsed in place; bytes would copy the whole file
+            with memoryview(mapped) as view, _import_pymupdf().open(stream=view, filetype="pdf") as document:
+                return [(number, document[number].get_text() or "") for number in range(start, stop)]
+
+        from pypdf import PdfReader
+        reader = PdfReader(mapped)
+        return [(number, reader.pages[number].extract_text() or "") for number in range(start, stop)]
+    finally:
+        mapped.close()
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def get_pdf_process_pool(processes: Optional[int] = None) -> ProcessPoolExecutor:
+    """Process pool shared by every PDF in this process, so concurrent documents share the cores
+
+    The pool is created on first use; later calls reuse it whatever size they ask for.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            _pool = ProcessPoolExecutor(max_workers=processes or os.cpu_count() or 1,
+                                        mp_context=multiprocessing.get_context(start_method))
+        return _pool
+
+
+def iter_pdf_pages(path: str, processes: Optional[int] = None, pages_per_task: int = PAGES_PER_TASK,
+                   max_pending: Optional[int] = None) -> Iterator[Tuple[int, str]]:
+    """
+    Yield (page_number, text) for every page of a PDF, in page order
+
+    Args:
+        path: PDF file
+        processes: Size of the shared process pool; defaults to the number of CPUs
+        pages_per_task: Pages extracted per pool task
+        max_pending: Page ranges in flight at once (bounds memory); defaults to 2 per process
+    """
+    if _pdf_backend() is None:
+        from utils import extract_text_from_pdf
+        with open(path, 'rb') as f:
+            yield 0, extract_text_from_pdf(f.read())
+        return
+
+    page_count = pdf_page_count(path)
+    if page_count == 0:
+        return
+    processes = processes or os.cpu_count() or 1
+    if processes <= 1 or page_count <= pages_per_task:
+        # Not worth the inter-process round trip
+        for start in range(0, page_count, pages_per_task):
+            yield from _extract_page_range(path, start, min(start + pages_per_task, page_count))
+        return
+
+    pool = get_pdf_process_pool(processes)
+    max_pending = max_pending or 2 * processes
+    ranges = iter(range(0, page_count, pages_per_task))
+    pending = deque()
+    for start in ranges:
+        pending.append(pool.submit(_extract_page_range, path, start, min(start + pages_per_task, page_count)))
+        if len(pending) >= max_pending:
+            break
+    while pending:
+        pages = pending.popleft().result()
+        start = next(ranges, None)
+        if start is not None:
+            pending.append(pool.submit(_extract_page_range, path, start, min(start + pages_per_task, page_count)))
+        yield from pages
+
+
+def iter_pdf_text_chunks(path: str, max_chars: int = 6000, processes: Optional[int] = None) -> Iterator[str]:
+    """Pack streamed page text into extraction chunks of at most max_chars, emitting each as soon as it is full"""
+    buffer = ""
+    for _, page_text in iter_pdf_pages(path, processes):
+        if not page_text.strip():
+            continue
+        buffer = f"{buffer}\n\n{page_text}" if buffer else page_text
+        if len(buffer) >= max_chars:
+            chunks = split_text_into_chunks(buffer, max_chars)
+            # The last chunk may still grow with the next page
+            yield from chunks[:-1]
+            buffer = chunks[-1] if chunks else ""
+    if buffer.strip():
+        yield from split_text_into_chunks(buffer, max_chars)
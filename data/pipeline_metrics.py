@@ -0,0 +1,231 @@
+"""Run instrumentation for the knowledge graph pipeline
+
+PipelineMetrics records per-stage wall time, model calls, estimated tokens, retries
+and errors, plus free-form counters (e.g. how entity types were resolved). Stages
+nest per thread: a model call is attributed to the innermost stage open in the
+calling thread. Stage seconds add up over calls, so stages that run on several
+threads at once (chunk extraction) can exceed the run's wall time.
+"""
+import functools
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, Optional, Iterator
+
+# CJK text runs at roughly one token per character, everything else at about four characters per token
+_CJK_PATTERN = re.compile(r'[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]')
+
+UNATTRIBUTED_STAGE = "unattributed"
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap local token estimate, good enough to compare stages and runs"""
+    if not text:
+        return 0
+    cjk_chars = len(_CJK_PATTERN.findall(text))
+    return cjk_chars + (len(text) - cjk_chars + 3) // 4
+
+
+def _new_stage() -> Dict[str, float]:
+    return {"count": 0, "seconds": 0.0, "model_calls": 0, "model_seconds": 0.0,
+            "prompt_tokens": 0, "completion_tokens": 0, "retries": 0, "errors": 0}
+
+
+class PipelineMetrics:
+    """Thread-safe collector behind KnowledgeGraphGenerator's run report"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.started_at = time.time()
+            self._started = time.perf_counter()
+            self.stages: Dict[str, Dict[str, float]] = {}
+            self.counters: Dict[str, int] = {}
+
+    def _stage_stats(self, name: str) -> Dict[str, float]:
+        stats = self.stages.get(name)
+        if stats is None:
+            stats = self.stages[name] = _new_stage()
+        return stats
+
+    def current_stage(self) -> str:
+        stack = getattr(self._local, 'stack', None)
+        return stack[-1] if stack else UNATTRIBUTED_STAGE
+
+    def attribute_to(self, name: Optional[str]) -> None:
+        """Attribute model calls made on this (helper) thread to stage `name`, without timing anything"""
+        self._local.stack = [name] if name and name != UNATTRIBUTED_STAGE else []
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time a block as one execution of stage `name`"""
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        stack.append(name)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            stack.pop()
+            with self._lock:
+                stats = self._stage_stats(name)
+                stats["count"] += 1
+                stats["seconds"] += elapsed
+
+    def record_model_call(self, seconds: float, prompt_tokens: int = 0, completion_tokens: int = 0,
+                          failed: bool = False, stage: Optional[str] = None) -> None:
+        with self._lock:
+            stats = self._stage_stats(stage or self.current_stage())
+            stats["model_calls"] += 1
+            stats["model_seconds"] += seconds
+            stats["prompt_tokens"] += prompt_tokens
+            stats["completion_tokens"] += completion_tokens
+            if failed:
+                stats["errors"] += 1
+
+    def record_retry(self, stage: Optional[str] = None) -> None:
+        with self._lock:
+            self._stage_stats(stage or self.current_stage())["retries"] += 1
+
+    def increment(self, counter: str, amount: int = 1) -> None:
+        with self._lock:
+            self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    def report(self, extra: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """JSON-serializable snapshot: totals, per-stage figures and counters"""
+        with self._lock:
+            stages = {name: dict(stats, seconds=round(stats["seconds"], 4),
+                                 model_seconds=round(stats["model_seconds"], 4))
+                      for name, stats in sorted(self.stages.items())}
+            counters = dict(sorted(self.counters.items()))
+            wall_seconds = time.perf_counter() - self._started
+        totals = {key: sum(stats[key] for stats in stages.values())
+                  for key in ("model_calls", "prompt_tokens", "completion_tokens", "retries", "errors")}
+        totals["model_seconds"] = round(sum(stats["model_seconds"] for stats in stages.values()), 4)
+        report = {
+            "started_at": self.started_at,
+            "wall_seconds": round(wall_seconds, 4),
+            "totals": totals,
+            "stages": stages,
+            "counters": counters
+        }
+        if extra:
+            report.update(extra)
+        return report
+
+    @staticmethod
+    def to_prometheus(report: Dict[str, Any], prefix: str = "kg") -> str:
+        """Render a report in the Prometheus text exposition format"""
+        lines = []
+
+        def metric(name: str, kind: str, help_text: str, samples: list) -> None:
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+            for labels, value in samples:
+                label_text = ",".join(f'{key}="{str(val)}"' for key, val in labels.items())
+                lines.append(f"{prefix}_{name}{{{label_text}}} {value}" if label_text else f"{prefix}_{name} {value}")
+
+        stages = report.get("stages", {})
+        metric("run_wall_seconds", "gauge", "Wall time of the run", [({}, report.get("wall_seconds", 0))])
+        for key, kind, help_text in (
+                ("seconds", "counter", "Time spent in the stage, summed over calls and threads"),
+                ("count", "counter", "Executions of the stage"),
+                ("model_calls", "counter", "Model calls made in the stage"),
+                ("model_seconds", "counter", "Time spent waiting for the model"),
+                ("prompt_tokens", "counter", "Estimated prompt tokens"),
+                ("completion_tokens", "counter", "Estimated completion tokens"),
+                ("retries", "counter", "Retried model calls"),
+                ("errors", "counter", "Failed model calls")):
+            metric(f"stage_{key}_total", kind, help_text,
+                   [({"stage": name}, stats[key]) for name, stats in stages.items()])
+        counters = report.get("counters", {})
+        if counters:
+            metric("events_total", "counter", "Pipeline event counters",
+                   [({"event": name}, value) for name, value in counters.items()])
+        cache = report.get("cache")
+        if cache:
+            metric("cache_lookups_total", "counter", "Response cache lookups",
+                   [({"result": "hit"}, cache.get("hits", 0)), ({"result": "miss"}, cache.get("misses", 0))])
+        return "\n".join(lines) + "\n"
+
+    @classmethod
+    def write_report(cls, report: Dict[str, Any], path: str) -> str:
+        """Write a report atomically; a .prom extension selects the Prometheus text format"""
+        content = cls.to_prometheus(report) if path.endswith('.prom') else json.dumps(report, indent=2)
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return path
+
+
+def timed_stage(name: str):
+    """Method decorator: run the method inside self.metrics.stage(name)"""
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self.metrics.stage(name):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class InstrumentedAdapter:
+    """Wraps an AI adapter so every real model call is timed and counted in PipelineMetrics"""
+
+    def __init__(self, adapter, metrics: PipelineMetrics):
+        self.adapter = adapter
+        self.metrics = metrics
+
+    def generate_content(self, prompt: str, *args, **kwargs) -> str:
+        started = time.perf_counter()
+        try:
+            response = self.adapter.generate_content(prompt, *args, **kwargs)
+        except Exception:
+            self.metrics.record_model_call(time.perf_counter() - started, estimate_tokens(prompt), failed=True)
+            raise
+        self.metrics.record_model_call(time.perf_counter() - started, estimate_tokens(prompt),
+                                       estimate_tokens(response if isinstance(response, str) else ""))
+        return response
+
+    def generate_content_stream(self, prompt: str, *args, **kwargs) -> Iterator[str]:
+        # Attribute to the stage that opened the stream, even if it is consumed elsewhere; read here
+        # because the body of a generator only runs once the first piece is requested
+        return self._stream(self.metrics.current_stage(), prompt, args, kwargs)
+
+    def _stream(self, stage: str, prompt: str, args: tuple, kwargs: Dict[str, Any]) -> Iterator[str]:
+        started = time.perf_counter()
+        completion_tokens = 0
+        failed = True
+        try:
+            stream = getattr(self.adapter, 'generate_content_stream', None)
+            pieces = stream(prompt, *args, **kwargs) if stream else [self.adapter.generate_content(prompt, *args, **kwargs)]
+            for piece in pieces:
+                completion_tokens += estimate_tokens(piece)
+                yield piece
+            failed = False
+        finally:
+            self.metrics.record_model_call(time.perf_counter() - started, estimate_tokens(prompt),
+                                           completion_tokens, failed, stage)
+
+    def get_provider_info(self) -> Dict[str, Any]:
+        return self.adapter.get_provider_info()
+
+    def __getattr__(self, name):
+        return getattr(self.adapter, name)
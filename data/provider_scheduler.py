@@ -0,0 +1,327 @@
+"""Spread model calls over several providers, each within its own request and token quotas
+
+ProviderScheduler is an adapter (generate_content / generate_content_stream) in front of
+several backend adapters, e.g. a Gemini and an OpenAI adapter, or two accounts of the
+same provider. Every backend has token buckets for requests per minute and tokens per
+minute (prompt tokens are taken when a call starts, the answer's tokens once it is
+back, so a long answer delays the next call instead of overrunning the quota).
+
+Each call goes to the backend that is within its quotas and has the best score:
+
+    weight * success rate / (latency EWMA * (1 + calls in flight))
+
+so fast, healthy backends get most of the work, concurrent calls spread out, and when
+one backend's buckets run dry the calls flow to the others - aggregate throughput
+approaches the sum of the quotas. A call rejected by the provider for rate limiting
+(429, "quota", "resource exhausted", ...) empties that backend's buckets, puts it on an
+exponentially growing cooldown and is sent to another backend right away; other errors
+only lower the backend's success rate and are raised for the retry layer above.
+
+Tokens are the local estimate from pipeline_metrics.estimate_tokens, not the provider's
+count, so quotas should be configured with some headroom.
+"""
+import threading
+import time
+from typing import Dict, List, Any, Optional, Iterable, Iterator, Callable
+
+from pipeline_metrics import PipelineMetrics, estimate_tokens
+
+# Weight of the newest observation in the latency and error rate averages
+EWMA_ALPHA = 0.2
+# Bucket size in seconds of quota: how large a burst an idle backend accepts
+BURST_SECONDS = 10.0
+# Lowest success rate used in the score, so a backend that failed recently is still probed
+MIN_SUCCESS_RATE = 0.05
+THROTTLE_MARKERS = ("429", "rate limit", "ratelimit", "rate_limit", "too many requests", "quota",
+                    "resource exhausted", "resource_exhausted", "overloaded")
+
+
+class AllProvidersBusyError(RuntimeError):
+    """No backend had quota left within the scheduler's max_wait_seconds"""
+
+
+def is_throttling_error(error: BaseException) -> bool:
+    """Whether an exception reports a provider rate limit or exhausted quota"""
+    for attribute in ('status_code', 'status', 'code', 'http_status'):
+        if getattr(error, attribute, None) == 429:
+            return True
+    message = f"{type(error).__name__} {error}".lower()
+    return any(marker in message for marker in THROTTLE_MARKERS)
+
+
+class TokenBucket:
+    """Quota of `per_minute` units refilled continuously; not locked, the scheduler serializes access"""
+
+    def __init__(self, per_minute: float, burst_seconds: float = BURST_SECONDS):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self.level = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_seconds(self, amount: float, now: float) -> float:
+        """Seconds until `amount` units are available (a request larger than the bucket waits for a full one)"""
+        self._refill(now)
+        needed = min(amount, self.capacity)
+        return 0.0 if self.level >= needed else (needed - self.level) / self.rate
+
+    def take(self, amount: float, now: float) -> None:
+        """Consume units; the level may go negative, which delays the following calls"""
+        self._refill(now)
+        self.level -= amount
+
+    def drain(self, now: float) -> None:
+        self._refill(now)
+        self.level = min(self.level, 0.0)
+
+
+class ProviderBackend:
+    """One adapter with its quotas and the scheduler's observations of it"""
+
+    def __init__(self, adapter, name: Optional[str] = None, requests_per_minute: Optional[float] = None,
+                 tokens_per_minute: Optional[float] = None, weight: float = 1.0,
+                 burst_seconds: float = BURST_SECONDS):
+        """
+        Args:
+            adapter: AI adapter (generate_content, optionally generate_content_stream)
+            name: Label in stats and counters; defaults to the adapter's provider name
+            requests_per_minute: Request quota; None for no limit
+            tokens_per_minute: Prompt plus answer token quota (estimated); None for no limit
+            weight: Static preference multiplied into the score, e.g. 0.5 for a costlier backend
+            burst_seconds: Seconds of quota an idle backend may spend at once
+        """
+        self.adapter = adapter
+        self.name = name or adapter.get_provider_info().get('provider', 'backend')
+        self.requests = TokenBucket(requests_per_minute, burst_seconds) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute, burst_seconds) if tokens_per_minute else None
+        self.weight = weight
+        self.latency: Optional[float] = None
+        self.error_rate = 0.0
+        self.in_flight = 0
+        self.calls = 0
+        self.errors = 0
+        self.throttled = 0
+        self.cooldown_until = 0.0
+        self.consecutive_throttles = 0
+
+    def wait_seconds(self, prompt_tokens: int, now: float) -> float:
+        """Seconds until this backend may take a call of prompt_tokens (0 if it may now)"""
+        wait = max(0.0, self.cooldown_until - now)
+        if self.requests:
+            wait = max(wait, self.requests.wait_seconds(1, now))
+        if self.tokens:
+            wait = max(wait, self.tokens.wait_seconds(prompt_tokens, now))
+        return wait
+
+    def score(self, default_latency: float) -> float:
+        latency = self.latency if self.latency is not None else default_latency
+        success_rate = max(MIN_SUCCESS_RATE, 1.0 - self.error_rate)
+        return self.weight * success_rate / (max(latency, 1e-3) * (1 + self.in_flight))
+
+    def stats(self) -> Dict[str, Any]:
+        return {"calls": self.calls, "errors": self.errors, "throttled": self.throttled,
+                "in_flight": self.in_flight,
+                "latency_seconds": round(self.latency, 4) if self.latency is not None else None,
+                "error_rate": round(self.error_rate, 4),
+                "cooling_down": self.cooldown_until > time.monotonic()}
+
+
+def parse_backend_spec(spec: str) -> Dict[str, Any]:
+    """"gemini:rpm=15:tpm=1000000:weight=2" -> {"provider": "gemini", "requests_per_minute": 15.0, ...}"""
+    provider, *options = spec.strip().split(':')
+    keys = {"rpm": "requests_per_minute", "tpm": "tokens_per_minute", "weight": "weight", "name": "name"}
+    config = {"provider": provider}
+    for option in options:
+        key, _, value = option.partition('=')
+        if key not in keys or not value:
+            raise ValueError(f"Unknown provider option '{option}' in '{spec}' (expected rpm=, tpm=, weight= or name=)")
+        config[keys[key]] = value if key == "name" else float(value)
+    return config
+
+
+def build_backends(specs: Iterable[Any], create_adapter: Callable[[Any], Any]) -> List[ProviderBackend]:
+    """
+    Backends from a mixed list of specs
+
+    Args:
+        specs: ProviderBackend instances, adapter instances, provider strings with optional
+            quotas ("openai:rpm=500:tpm=200000") or dicts with "provider" (a name or an
+            adapter) and the ProviderBackend keyword arguments
+        create_adapter: Turns a provider name into an adapter
+    """
+    backends = []
+    for spec in specs:
+        if isinstance(spec, ProviderBackend):
+            backends.append(spec)
+            continue
+        if isinstance(spec, str):
+            spec = parse_backend_spec(spec)
+        if not isinstance(spec, dict):
+            backends.append(ProviderBackend(spec))
+            continue
+        options = dict(spec)
+        adapter = create_adapter(options.pop("provider"))
+        backends.append(ProviderBackend(adapter, **options))
+
+    # Two backends of the same provider need distinct names in stats and counters
+    seen = {}
+    for backend in backends:
+        count = seen[backend.name] = seen.get(backend.name, 0) + 1
+        if count > 1:
+            backend.name = f"{backend.name}_{count}"
+    return backends
+
+
+class ProviderScheduler:
+    """Adapter distributing calls over several backends by quota, latency and error rate"""
+
+    def __init__(self, backends: List[ProviderBackend], metrics: Optional[PipelineMetrics] = None,
+                 max_wait_seconds: float = 120.0, cooldown_seconds: float = 5.0, cooldown_max: float = 120.0):
+        """
+        Args:
+            backends: Backends to spread calls over
+            metrics: Receives counters (scheduler.calls.<name>, scheduler.throttled.<name>,
+                scheduler.failovers, scheduler.waits)
+            max_wait_seconds: Longest a call waits for any backend's quota before AllProvidersBusyError
+            cooldown_seconds: Pause of a backend after its first rate limit error; doubles with every
+                further one in a row
+            cooldown_max: Cap on the cooldown
+        """
+        if not backends:
+            raise ValueError("ProviderScheduler needs at least one backend")
+        self.backends = backends
+        self.metrics = metrics
+        self.max_wait_seconds = max_wait_seconds
+        self.cooldown_seconds = cooldown_seconds
+        self.cooldown_max = cooldown_max
+        self._lock = threading.Lock()
+
+    def _count(self, counter: str) -> None:
+        if self.metrics:
+            self.metrics.increment(counter)
+
+    def _acquire(self, prompt_tokens: int, exclude: Iterable[ProviderBackend] = ()) -> ProviderBackend:
+        """Block until a backend has quota, reserve it and return it"""
+        deadline = time.monotonic() + self.max_wait_seconds
+        waited = False
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                candidates = [backend for backend in self.backends if backend not in exclude] or self.backends
+                waits = {backend: backend.wait_seconds(prompt_tokens, now) for backend in candidates}
+                ready = [backend for backend, wait in waits.items() if wait == 0.0]
+                if ready:
+                    measured = [backend.latency for backend in self.backends if backend.latency is not None]
+                    # Unmeasured backends are assumed as fast as the fastest one, so each gets tried
+                    default_latency = min(measured) if measured else 1.0
+                    backend = max(ready, key=lambda candidate: candidate.score(default_latency))
+                    if backend.requests:
+                        backend.requests.take(1, now)
+                    if backend.tokens:
+                        backend.tokens.take(prompt_tokens, now)
+                    backend.in_flight += 1
+                    return backend
+                delay = min(waits.values())
+            if not waited:
+                waited = True
+                self._count("scheduler.waits")
+            if now + delay > deadline:
+                raise AllProvidersBusyError(f"no provider has quota within {self.max_wait_seconds:g}s "
+                                            f"(next in {delay:.1f}s)")
+            time.sleep(min(delay, 1.0))
+
+    def _finish(self, backend: ProviderBackend, seconds: float, answer: Optional[str],
+                error: Optional[BaseException]) -> bool:
+        """Record the outcome of a call; True when the backend rate-limited it"""
+        with self._lock:
+            now = time.monotonic()
+            backend.in_flight -= 1
+            backend.calls += 1
+            if error is None:
+                backend.latency = seconds if backend.latency is None else \
+                    (1 - EWMA_ALPHA) * backend.latency + EWMA_ALPHA * seconds
+                backend.error_rate *= 1 - EWMA_ALPHA
+                backend.consecutive_throttles = 0
+                if backend.tokens and answer:
+                    backend.tokens.take(estimate_tokens(answer), now)
+                throttled = False
+            else:
+                backend.errors += 1
+                backend.error_rate = (1 - EWMA_ALPHA) * backend.error_rate + EWMA_ALPHA
+                throttled = is_throttling_error(error)
+                if throttled:
+                    backend.throttled += 1
+                    backend.consecutive_throttles += 1
+                    cooldown = min(self.cooldown_max,
+                                   self.cooldown_seconds * 2 ** (backend.consecutive_throttles - 1))
+                    backend.cooldown_until = now + cooldown
+                    for bucket in (backend.requests, backend.tokens):
+                        if bucket:
+                            bucket.drain(now)
+        self._count(f"scheduler.calls.{backend.name}")
+        if throttled:
+            self._count(f"scheduler.throttled.{backend.name}")
+        return throttled
+
+    def generate_content(self, prompt: str, *args, **kwargs) -> str:
+        prompt_tokens = estimate_tokens(prompt)
+        throttled_backends = []
+        while True:
+            backend = self._acquire(prompt_tokens, throttled_backends)
+            started = time.perf_counter()
+            try:
+                answer = backend.adapter.generate_content(prompt, *args, **kwargs)
+            except Exception as e:
+                throttled = self._finish(backend, time.perf_counter() - started, None, e)
+                # A rate-limited call is moved to another backend at once; every backend gets one chance
+                if not throttled or len(throttled_backends) + 1 >= len(self.backends):
+                    raise
+                throttled_backends.append(backend)
+                self._count("scheduler.failovers")
+                continue
+            self._finish(backend, time.perf_counter() - started, answer, None)
+            return answer
+
+    def generate_content_stream(self, prompt: str, *args, **kwargs) -> Iterator[str]:
+        """Streaming variant: fails over on a rate limit only until the first piece has arrived"""
+        prompt_tokens = estimate_tokens(prompt)
+        throttled_backends = []
+        while True:
+            backend = self._acquire(prompt_tokens, throttled_backends)
+            started = time.perf_counter()
+            pieces = []
+            try:
+                stream = getattr(backend.adapter, 'generate_content_stream', None)
+                for piece in (stream(prompt, *args, **kwargs) if stream else
+                              [backend.adapter.generate_content(prompt, *args, **kwargs)]):
+                    pieces.append(piece)
+                    yield piece
+            except Exception as e:
+                throttled = self._finish(backend, time.perf_counter() - started, None, e)
+                if pieces or not throttled or len(throttled_backends) + 1 >= len(self.backends):
+                    raise
+                throttled_backends.append(backend)
+                self._count("scheduler.failovers")
+                continue
+            except BaseException:
+                # GeneratorExit when the caller stops reading: the call is over, not failed
+                self._finish(backend, time.perf_counter() - started, "".join(pieces), None)
+                raise
+            self._finish(backend, time.perf_counter() - started, "".join(pieces), None)
+            return
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {backend.name: backend.stats() for backend in self.backends}
+
+    def get_provider_info(self) -> Dict[str, Any]:
+        infos = [(backend.name, backend.adapter.get_provider_info()) for backend in self.backends]
+        return {
+            "provider": "+".join(name for name, _ in infos),
+            "content_model": ", ".join(f"{name}: {info.get('content_model')}" for name, info in infos),
+            "search_model": ", ".join(f"{name}: {info.get('search_model')}" for name, info in infos),
+            "backends": [dict(info, name=name) for name, info in infos]
+        }
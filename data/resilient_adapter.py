@@ -0,0 +1,292 @@
+"""Tail-latency controls for model calls: timeouts, retries, hedging and a circuit breaker
+
+ResilientAdapter wraps an AI adapter so that a single slow or failing call cannot
+stall a run:
+
+- every attempt runs on a helper thread and is abandoned after `timeout` seconds
+  (the provider SDK call itself cannot be interrupted, its late answer is dropped);
+- failed or timed-out attempts are retried with jittered exponential backoff
+  ("full jitter": a uniform delay between 0 and base * 2**attempt, capped);
+- optionally, when an attempt is still running after the hedge_percentile of recent
+  call latencies, one duplicate request is sent and whichever answers first wins;
+- a CircuitBreaker counts consecutive failed calls (a call has failed once its last
+  retry has; single attempts and hedges are not counted); once open, calls fail immediately
+  with CircuitOpenError, so callers drop to their heuristic fallbacks (default graph,
+  guessed entity types) instead of waiting on an unhealthy provider. After
+  reset_seconds one trial call is let through to probe recovery.
+"""
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, wait, FIRST_COMPLETED
+from queue import Queue, Empty
+from typing import Dict, Any, Optional, Iterator, Callable
+
+from pipeline_metrics import PipelineMetrics
+
+_STREAM_END = object()
+
+
+class CircuitOpenError(RuntimeError):
+    """The provider is considered unhealthy; the call was not attempted"""
+
+
+class ModelCallTimeout(TimeoutError):
+    """A model call attempt took longer than the configured timeout"""
+
+
+class CircuitBreaker:
+    """Thread-safe consecutive-failure circuit breaker (closed → open → half-open → closed)"""
+
+    def __init__(self, failure_threshold: int = 5, reset_seconds: float = 30.0):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.times_opened = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a call may be attempted now; in half-open state only one trial call at a time"""
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self._opened_at >= self.reset_seconds:
+                self.state = "half_open"
+            if self.state == "half_open" and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = "closed"
+            self.consecutive_failures = 0
+            self._trial_running = False
+
+    def record_failure(self) -> bool:
+        """Count a failed call; True if this failure opened the circuit"""
+        with self._lock:
+            self.consecutive_failures += 1
+            self._trial_running = False
+            if self.state == "half_open" or (self.state == "closed" and
+                                             self.consecutive_failures >= self.failure_threshold):
+                self.state = "open"
+                self._opened_at = time.monotonic()
+                self.times_opened += 1
+                return True
+            return False
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"state": self.state, "consecutive_failures": self.consecutive_failures,
+                    "times_opened": self.times_opened}
+
+
+class LatencyTracker:
+    """Sliding window of recent successful call latencies"""
+
+    def __init__(self, window: int = 200):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, fraction: float, min_samples: int = 10) -> Optional[float]:
+        """Latency below which `fraction` of the window falls; None until min_samples are known"""
+        with self._lock:
+            if len(self._samples) < min_samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def _run_in_thread(function: Callable[[], Any], on_thread_start: Callable[[], None]) -> Future:
+    """Run function on a daemon thread, so an attempt that never returns cannot block interpreter exit"""
+    future = Future()
+
+    def run():
+        on_thread_start()
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(function())
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, name="kg-model-call", daemon=True).start()
+    return future
+
+
+class ResilientAdapter:
+    """Wraps an AI adapter with per-call timeouts, jittered exponential backoff, hedging and a circuit breaker"""
+
+    def __init__(self, adapter, metrics: Optional[PipelineMetrics] = None, timeout: Optional[float] = 120.0,
+                 max_retries: int = 2, backoff_base: float = 0.5, backoff_max: float = 8.0,
+                 hedge_percentile: Optional[float] = None, hedge_min_samples: int = 10,
+                 breaker: Optional[CircuitBreaker] = None):
+        """
+        Initialize the call layer
+
+        Args:
+            adapter: Wrapped adapter (generate_content, optionally generate_content_stream)
+            metrics: Receives retries and counters (model_calls.timeouts, .hedged, .hedge_won,
+                .short_circuited, circuit.opened); model calls themselves are recorded by an
+                InstrumentedAdapter below this one
+            timeout: Seconds per attempt (for streams: between two pieces); None waits forever
+            max_retries: Attempts after the first one
+            backoff_base: Upper bound of the first retry delay; doubles with every retry
+            backoff_max: Cap on the retry delay
+            hedge_percentile: Send one duplicate request when an attempt is slower than this
+                percentile (e.g. 0.95) of recent latencies; None disables hedging
+            hedge_min_samples: Latencies needed before hedging starts
+            breaker: Circuit breaker; defaults to one opening after 5 consecutive failed calls
+        """
+        self.adapter = adapter
+        self.metrics = metrics
+        self.timeout = timeout
+        self.max_retries = max(0, max_retries)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.breaker = breaker or CircuitBreaker()
+        self.latencies = LatencyTracker()
+
+    def _count(self, counter: str) -> None:
+        if self.metrics:
+            self.metrics.increment(counter)
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def _record_failure(self) -> None:
+        if self.breaker.record_failure():
+            self._count("circuit.opened")
+            print(f"⚠️ Model provider circuit opened after {self.breaker.consecutive_failures} consecutive failed calls, "
+                  f"using fallbacks for {self.breaker.reset_seconds:g}s")
+
+    def _with_retries(self, attempt_call: Callable[[], Any]) -> Any:
+        stage = self.metrics.current_stage() if self.metrics else None
+        if not self.breaker.allow():
+            self._count("model_calls.short_circuited")
+            raise CircuitOpenError("model provider circuit is open")
+        for attempt in range(self.max_retries + 1):
+            try:
+                result = attempt_call()
+            except Exception:
+                # The breaker counts calls, so it hears about a failure once, after the last attempt;
+                # retrying stops early when other calls have opened the circuit meanwhile
+                if attempt == self.max_retries or self.breaker.state == "open":
+                    self._record_failure()
+                    raise
+            else:
+                self.breaker.record_success()
+                return result
+            if self.metrics:
+                self.metrics.record_retry(stage)
+            time.sleep(self._backoff(attempt))
+
+    def _start_attempt(self, prompt: str, args: tuple, kwargs: Dict[str, Any]) -> Future:
+        stage = self.metrics.current_stage() if self.metrics else None
+
+        def enter_stage():
+            # Keep model calls attributed to the caller's stage although they run on a helper thread
+            if self.metrics:
+                self.metrics.attribute_to(stage)
+
+        return _run_in_thread(lambda: self.adapter.generate_content(prompt, *args, **kwargs), enter_stage)
+
+    def _attempt(self, prompt: str, args: tuple, kwargs: Dict[str, Any]) -> str:
+        """One logical attempt: the primary request plus at most one hedge, bounded by the timeout"""
+        started = time.perf_counter()
+        deadline = started + self.timeout if self.timeout else None
+        futures = [self._start_attempt(prompt, args, kwargs)]
+
+        hedge_after = self.latencies.percentile(self.hedge_percentile, self.hedge_min_samples) \
+            if self.hedge_percentile else None
+        if hedge_after is not None and (deadline is None or started + hedge_after < deadline):
+            done, _ = wait(futures, timeout=hedge_after)
+            if not done:
+                self._count("model_calls.hedged")
+                futures.append(self._start_attempt(prompt, args, kwargs))
+
+        pending = list(futures)
+        error = None
+        while pending:
+            remaining = None if deadline is None else max(0.0, deadline - time.perf_counter())
+            done, _ = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                pending.remove(future)
+                if future.exception() is None:
+                    if future is not futures[0]:
+                        self._count("model_calls.hedge_won")
+                    self.latencies.add(time.perf_counter() - started)
+                    return future.result()
+                error = future.exception()
+
+        if pending:
+            self._count("model_calls.timeouts")
+            raise ModelCallTimeout(f"model call timed out after {self.timeout}s")
+        raise error
+
+    def generate_content(self, prompt: str, *args, **kwargs) -> str:
+        return self._with_retries(lambda: self._attempt(prompt, args, kwargs))
+
+    def generate_content_stream(self, prompt: str, *args, **kwargs) -> Iterator[str]:
+        """Streaming variant: retried only until the first piece arrives, no hedging; the timeout bounds every gap"""
+        stage = self.metrics.current_stage() if self.metrics else None
+
+        def open_stream() -> Queue:
+            pieces = Queue()
+
+            def pump():
+                if self.metrics:
+                    self.metrics.attribute_to(stage)
+                try:
+                    stream = getattr(self.adapter, 'generate_content_stream', None)
+                    for piece in (stream(prompt, *args, **kwargs) if stream else
+                                  [self.adapter.generate_content(prompt, *args, **kwargs)]):
+                        pieces.put(piece)
+                    pieces.put(_STREAM_END)
+                except BaseException as e:
+                    pieces.put(e)
+
+            threading.Thread(target=pump, name="kg-model-stream", daemon=True).start()
+            return pieces
+
+        def next_piece(pieces: Queue) -> Any:
+            try:
+                piece = pieces.get(timeout=self.timeout)
+            except Empty:
+                self._count("model_calls.timeouts")
+                raise ModelCallTimeout(f"no streamed output for {self.timeout}s")
+            if isinstance(piece, BaseException):
+                raise piece
+            return piece
+
+        def first_piece() -> tuple:
+            pieces = open_stream()
+            return pieces, next_piece(pieces)
+
+        pieces, piece = self._with_retries(first_piece)
+        try:
+            while piece is not _STREAM_END:
+                yield piece
+                piece = next_piece(pieces)
+        except Exception:
+            self._record_failure()
+            raise
+
+    def get_provider_info(self) -> Dict[str, Any]:
+        return self.adapter.get_provider_info()
+
+    def __getattr__(self, name):
+        return getattr(self.adapter, name)
@@ -0,0 +1,224 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Dict, Any, Optional, Iterator
+
+
+class ResponseCache:
+    """Content-addressed on-disk cache for AI responses
+
+    Entries are stored one file per key (sharded by the first two hex digits) and
+    written through a temporary file plus os.replace, so several processes can share
+    one cache directory without ever reading a half-written entry.
+    """
+
+    # How many writes happen between full directory scans for size-based eviction
+    EVICTION_SCAN_INTERVAL = 64
+
+    def __init__(self, cache_dir: str = ".kg_cache", max_bytes: int = 256 * 1024 * 1024,
+                 max_age_seconds: float = 30 * 24 * 3600):
+        """
+        Initialize the response cache
+
+        Args:
+            cache_dir: Directory holding the cache entries (created if missing)
+            max_bytes: Total size the cache is trimmed to, least recently used entries first
+            max_age_seconds: Entries older than this are treated as misses and removed
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self._writes_since_scan = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(provider: str, model: str, prompt: str) -> str:
+        """Hash provider, model and the full prompt into a cache key"""
+        digest = hashlib.sha256()
+        for part in (provider, model, prompt):
+            encoded = (part or "").encode('utf-8')
+            # Length-prefix every part so ("ab", "c") and ("a", "bc") never collide
+            digest.update(len(encoded).to_bytes(8, 'big'))
+            digest.update(encoded)
+        return digest.hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for key, or None on a miss"""
+        path = self._entry_path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            if time.time() - entry.get('created_at', 0) > self.max_age_seconds:
+                self._remove(path)
+                raise FileNotFoundError(path)
+            # Refresh the modification time so size-based eviction removes the least recently used entries
+            os.utime(path, None)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return entry.get('response')
+
+    def set(self, key: str, response: str, metadata: Optional[Dict[str, Any]] = None) -> None:
+        """Store a response atomically under key"""
+        path = self._entry_path(key)
+        entry = {"created_at": time.time(), "response": response, "metadata": metadata or {}}
+
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(entry, f, ensure_ascii=False)
+                os.replace(tmp_path, path)
+            except BaseException:
+                self._remove(tmp_path)
+                raise
+        except OSError as e:
+            print(f"⚠️ Could not write response cache entry: {e}")
+            return
+
+        with self._lock:
+            self.writes += 1
+            self._writes_since_scan += 1
+            scan_due = self._writes_since_scan >= self.EVICTION_SCAN_INTERVAL
+            if scan_due:
+                self._writes_since_scan = 0
+
+        if scan_due:
+            self.evict()
+
+    def evict(self) -> int:
+        """Remove expired entries, then the least recently used ones until under max_bytes"""
+        now = time.time()
+        entries = []
+        total_bytes = 0
+        removed = 0
+
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                # Leftover temp files from crashed writers are dropped once they are stale
+                if name.endswith('.tmp'):
+                    if now - stat.st_mtime > 3600:
+                        removed += self._remove(path)
+                    continue
+                # Entries are never modified after creation except for the LRU touch, so an
+                # mtime older than max_age means the entry itself is older than max_age too
+                if now - stat.st_mtime > self.max_age_seconds:
+                    removed += self._remove(path)
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total_bytes += stat.st_size
+
+        if total_bytes > self.max_bytes:
+            entries.sort()
+            for _, size, path in entries:
+                if total_bytes <= self.max_bytes:
+                    break
+                removed += self._remove(path)
+                total_bytes -= size
+
+        with self._lock:
+            self.evictions += removed
+        return removed
+
+    def clear(self) -> None:
+        """Remove every cache entry"""
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                self._remove(os.path.join(root, name))
+
+    @staticmethod
+    def _remove(path: str) -> int:
+        try:
+            os.remove(path)
+            return 1
+        except OSError:
+            return 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for this process"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "writes": self.writes,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+class CachedAIAdapter:
+    """Wraps an AI adapter so identical generate_content calls are served from a ResponseCache"""
+
+    def __init__(self, adapter, cache: ResponseCache):
+        self.adapter = adapter
+        self.cache = cache
+        provider_info = adapter.get_provider_info()
+        self._provider = str(provider_info.get('provider', ''))
+        self._model = str(provider_info.get('content_model', ''))
+
+    def _key(self, prompt: str, args: tuple, kwargs: Dict[str, Any]) -> str:
+        if args or kwargs:
+            # Extra generation options change the answer, so they are part of the key
+            prompt += "\n" + json.dumps([args, kwargs], sort_keys=True, default=str)
+        return self.cache.make_key(self._provider, self._model, prompt)
+
+    def generate_content(self, prompt: str, *args, **kwargs) -> str:
+        """Return the cached response for this provider/model/prompt, calling the adapter on a miss"""
+        key = self._key(prompt, args, kwargs)
+
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        response = self.adapter.generate_content(prompt, *args, **kwargs)
+        if isinstance(response, str) and response.strip():
+            self.cache.set(key, response, {"provider": self._provider, "model": self._model})
+        return response
+
+    def generate_content_stream(self, prompt: str, *args, **kwargs) -> Iterator[str]:
+        """Streaming variant: a hit is replayed as a single piece, a miss is streamed and then cached"""
+        key = self._key(prompt, args, kwargs)
+        cached = self.cache.get(key)
+        if cached is not None:
+            yield cached
+            return
+
+        stream = getattr(self.adapter, 'generate_content_stream', None)
+        pieces = stream(prompt, *args, **kwargs) if stream else [self.adapter.generate_content(prompt, *args, **kwargs)]
+        collected = []
+        for piece in pieces:
+            collected.append(piece)
+            yield piece
+
+        response = "".join(collected)
+        if response.strip():
+            self.cache.set(key, response, {"provider": self._provider, "model": self._model})
+
+    def get_provider_info(self) -> Dict[str, Any]:
+        return self.adapter.get_provider_info()
+
+    def __getattr__(self, name):
+        # Anything not intercepted (search, streaming, ...) goes straight to the wrapped adapter
+        return getattr(self.adapter, name)
@@ -0,0 +1,329 @@
+"""Local nearest-neighbor index over entities of generated knowledge graphs
+
+Every entity becomes a fixed-size vector by signed feature hashing: character n-grams
+and words of its normalized name plus (down-weighted) words of its description are
+hashed into DIMENSIONS buckets with a ±1 sign, and the row is L2-normalized, so the
+dot product of two rows approximates the cosine similarity of their feature sets.
+All vectors live in one float32 matrix (100k entities at 256 dimensions are 100 MB).
+
+Small indexes are searched exactly with one matrix-vector product. From ann_threshold
+entities on, random-hyperplane LSH narrows the search: every table keeps the entities
+sorted by their `bits`-bit hyperplane code, a query looks up its own code and the codes
+one bit away in every table, and only those candidates are scored exactly.
+
+The index is filled from saved graphs (add_graph) and persisted as one .npz file. Rows are
+appended into preallocated arrays whose capacity doubles when full, so adding a graph costs
+time proportional to that graph, not to the whole index; `dirty` tells whether there are
+changes save has not written yet. The generator uses it to type entities from labeled
+neighbors before asking the model.
+"""
+import json
+import os
+import re
+import tempfile
+import zlib
+from typing import Dict, List, Any, Optional, Iterable, Union
+
+import numpy as np
+
+from entity_resolution import character_ngrams
+from graph_merge import normalize_entity_name
+
+DIMENSIONS = 256
+ANN_THRESHOLD = 20000
+LSH_TABLES = 10
+LSH_BITS = 12
+# Feature weights: the name decides what an entity is, the description only nudges
+NAME_NGRAM_WEIGHT = 1.0
+NAME_WORD_WEIGHT = 1.0
+DESCRIPTION_WORD_WEIGHT = 0.3
+DESCRIPTION_WORDS = 40
+# Bump when the features change; indexes written with another version must be rebuilt
+INDEX_VERSION = 1
+
+_WORD_PATTERN = re.compile(r'\w{3,}')
+
+
+def entity_features(name: str, description: str = "") -> Dict[str, float]:
+    """Weighted features of an entity: name n-grams and words, first description words"""
+    normalized = normalize_entity_name(name)
+    features = {f"g:{gram}": NAME_NGRAM_WEIGHT for gram in character_ngrams(normalized)}
+    for word in normalized.split():
+        features[f"w:{word}"] = NAME_WORD_WEIGHT
+    for word in _WORD_PATTERN.findall(str(description or '').lower())[:DESCRIPTION_WORDS]:
+        features.setdefault(f"d:{word}", DESCRIPTION_WORD_WEIGHT)
+    return features
+
+
+def hash_vectors(texts: Iterable[tuple], dimensions: int = DIMENSIONS) -> np.ndarray:
+    """L2-normalized signed feature-hashing vectors for (name, description) pairs"""
+    rows, columns, values = [], [], []
+    count = 0
+    for row, (name, description) in enumerate(texts):
+        count += 1
+        for feature, weight in entity_features(name, description).items():
+            hashed = zlib.crc32(feature.encode('utf-8'))
+            rows.append(row)
+            columns.append(hashed % dimensions)
+            values.append(weight if hashed & 0x80000000 else -weight)
+    cells = np.asarray(rows, dtype=np.int64) * dimensions + np.asarray(columns, dtype=np.int64)
+    vectors = np.bincount(cells, weights=values, minlength=count * dimensions).astype(np.float32)
+    vectors = vectors.reshape(count, dimensions)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def _entity_text(entity: Union[Dict[str, Any], str]) -> tuple:
+    if isinstance(entity, str):
+        return entity, ""
+    return str(entity.get('name') or entity.get('id') or ''), str(entity.get('description') or '')
+
+
+class SimilarityIndex:
+    """Entities of many graphs with top-k cosine similarity queries"""
+
+    def __init__(self, dimensions: int = DIMENSIONS, ann_threshold: int = ANN_THRESHOLD,
+                 tables: int = LSH_TABLES, bits: int = LSH_BITS, seed: int = 0):
+        """
+        Create an empty index
+
+        Args:
+            dimensions: Vector size (feature hashing buckets)
+            ann_threshold: Entity count from which queries go through the LSH tables
+            tables: Number of LSH tables; more tables find more true neighbors, at more candidates
+            bits: Hyperplanes per table; more bits mean smaller buckets
+            seed: Seed of the random hyperplanes
+        """
+        self.dimensions = dimensions
+        self.ann_threshold = ann_threshold
+        self.tables = tables
+        self.bits = bits
+        self.seed = seed
+        self._hyperplanes = np.random.default_rng(seed).standard_normal(
+            (dimensions, tables * bits)).astype(np.float32)
+        self._bit_values = (1 << np.arange(bits, dtype=np.int64))
+        self.ids: List[str] = []
+        self.names: List[str] = []
+        self.graph_names: List[str] = []
+        self.type_names: List[str] = []
+        self._set_rows(np.zeros((0, dimensions), dtype=np.float32), np.zeros((0, tables), dtype=np.int64),
+                       np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int32))
+        self.dirty = False
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    # Views of the filled rows; the arrays behind them have spare capacity
+    @property
+    def vectors(self) -> np.ndarray:
+        return self._vectors[:self._size]
+
+    @property
+    def codes(self) -> np.ndarray:
+        return self._codes[:self._size]
+
+    @property
+    def graph_codes(self) -> np.ndarray:
+        return self._graph_codes[:self._size]
+
+    @property
+    def type_codes(self) -> np.ndarray:
+        return self._type_codes[:self._size]
+
+    def _set_rows(self, vectors: np.ndarray, codes: np.ndarray, graph_codes: np.ndarray,
+                  type_codes: np.ndarray) -> None:
+        self._vectors, self._codes = vectors, codes
+        self._graph_codes, self._type_codes = graph_codes, type_codes
+        self._size = len(vectors)
+        self._sorted = None
+
+    def _reserve(self, rows: int) -> None:
+        """Make room for rows more entities, doubling the capacity so appends are amortized O(1) per row"""
+        needed = self._size + rows
+        if needed <= len(self._vectors):
+            return
+        capacity = max(needed, 2 * len(self._vectors), 1024)
+        arrays = []
+        for array in (self._vectors, self._codes, self._graph_codes, self._type_codes):
+            grown = np.empty((capacity,) + array.shape[1:], dtype=array.dtype)
+            grown[:self._size] = array[:self._size]
+            arrays.append(grown)
+        self._vectors, self._codes, self._graph_codes, self._type_codes = arrays
+
+    def _lsh_codes(self, vectors: np.ndarray) -> np.ndarray:
+        signs = (vectors @ self._hyperplanes > 0).reshape(len(vectors), self.tables, self.bits)
+        return signs.astype(np.int64) @ self._bit_values
+
+    def _code(self, value: str, names: List[str]) -> int:
+        try:
+            return names.index(value)
+        except ValueError:
+            names.append(value)
+            return len(names) - 1
+
+    def add_entities(self, entities: List[Dict[str, Any]], graph: str = "") -> int:
+        """Add entities (name, description, type, id) of one graph; returns the number added"""
+        if not entities:
+            return 0
+        vectors = hash_vectors((_entity_text(entity) for entity in entities), self.dimensions)
+        start, end = self._size, self._size + len(entities)
+        self._reserve(len(entities))
+        self._vectors[start:end] = vectors
+        self._codes[start:end] = self._lsh_codes(vectors)
+        self._graph_codes[start:end] = self._code(graph, self.graph_names)
+        self._type_codes[start:end] = np.fromiter(
+            (self._code(str(entity.get('type') or ''), self.type_names) for entity in entities),
+            dtype=np.int32, count=len(entities))
+        self.ids.extend(str(entity.get('id', '')) for entity in entities)
+        self.names.extend(_entity_text(entity)[0] for entity in entities)
+        self._size = end
+        self._sorted = None
+        self.dirty = True
+        return len(entities)
+
+    def remove_graph(self, graph: str) -> int:
+        """Drop all entities of a graph; returns the number removed"""
+        if graph not in self.graph_names:
+            return 0
+        keep = self.graph_codes != self.graph_names.index(graph)
+        removed = len(keep) - int(keep.sum())
+        if removed:
+            positions = np.flatnonzero(keep)
+            kept = len(positions)
+            # Compacted in place, so the spare capacity survives
+            for array in (self._vectors, self._codes, self._graph_codes, self._type_codes):
+                array[:kept] = array[positions]
+            self.ids = [self.ids[position] for position in positions.tolist()]
+            self.names = [self.names[position] for position in positions.tolist()]
+            self._size = kept
+            self._sorted = None
+            self.dirty = True
+        return removed
+
+    def add_graph(self, knowledge_graph: Dict[str, Any], graph: str) -> int:
+        """Index the entities of a graph, replacing what was indexed under the same name before"""
+        self.remove_graph(graph)
+        return self.add_entities(knowledge_graph.get('entities', []), graph)
+
+    def _lsh_tables(self) -> tuple:
+        if self._sorted is None:
+            order = np.argsort(self.codes, axis=0, kind='stable')
+            self._sorted = (order, np.take_along_axis(self.codes, order, axis=0))
+        return self._sorted
+
+    def _candidates(self, vector: np.ndarray) -> np.ndarray:
+        """Rows sharing an LSH bucket with the query, or one bit away from it, in any table"""
+        order, sorted_codes = self._lsh_tables()
+        code = self._lsh_codes(vector[None, :])[0]
+        probes = code[:, None] ^ np.concatenate([[0], self._bit_values])[None, :]
+        found = []
+        for table in range(self.tables):
+            column = sorted_codes[:, table]
+            starts = np.searchsorted(column, probes[table], side='left')
+            ends = np.searchsorted(column, probes[table], side='right')
+            found.extend(order[start:end, table] for start, end in zip(starts, ends) if end > start)
+        return np.unique(np.concatenate(found)) if found else np.zeros(0, dtype=np.int64)
+
+    def query(self, entity: Union[Dict[str, Any], str], k: int = 10, types: Optional[Iterable[str]] = None,
+              exclude_graph: Optional[str] = None, exact: Optional[bool] = None) -> List[Dict[str, Any]]:
+        """
+        Most similar indexed entities, best first
+
+        Args:
+            entity: Entity dict (name and description are used) or a name
+            k: Number of results
+            types: Only return entities of these types
+            exclude_graph: Skip entities of this graph (e.g. the one being processed)
+            exact: Force (True) or skip (False) the exhaustive search; by default it is used
+                below ann_threshold entities
+        """
+        if not len(self) or k <= 0:
+            return []
+        vector = hash_vectors([_entity_text(entity)], self.dimensions)[0]
+        if exact is None:
+            exact = len(self) < self.ann_threshold
+        rows = np.arange(len(self)) if exact else self._candidates(vector)
+
+        allowed = np.ones(len(rows), dtype=bool)
+        if types is not None:
+            type_codes = [self.type_names.index(t) for t in set(types) if t in self.type_names]
+            allowed &= np.isin(self.type_codes[rows], type_codes)
+        if exclude_graph is not None and exclude_graph in self.graph_names:
+            allowed &= self.graph_codes[rows] != self.graph_names.index(exclude_graph)
+        rows = rows[allowed]
+        if not len(rows):
+            return []
+
+        scores = self.vectors[rows] @ vector
+        top = np.argpartition(-scores, k - 1)[:k] if len(rows) > k else np.arange(len(rows))
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return [{
+            "graph": self.graph_names[self.graph_codes[row]],
+            "id": self.ids[row],
+            "name": self.names[row],
+            "type": self.type_names[self.type_codes[row]],
+            "score": round(float(scores[position]), 4)
+        } for position, row in zip(top.tolist(), rows[top].tolist())]
+
+    def vote_type(self, entity: Dict[str, Any], valid_types: Iterable[str], k: int = 5,
+                  min_similarity: float = 0.75, min_share: float = 0.6) -> Optional[str]:
+        """
+        Type of an entity from its labeled neighbors, or None when they do not agree
+
+        Args:
+            entity: Entity to type
+            valid_types: Types a neighbor must have to vote
+            k: Neighbors considered
+            min_similarity: Neighbors less similar than this do not vote
+            min_share: Similarity-weighted share the winning type needs
+        """
+        neighbors = [neighbor for neighbor in self.query(entity, k, types=valid_types)
+                     if neighbor["score"] >= min_similarity]
+        if not neighbors:
+            return None
+        votes = {}
+        for neighbor in neighbors:
+            votes[neighbor["type"]] = votes.get(neighbor["type"], 0.0) + neighbor["score"]
+        winner = max(votes, key=votes.get)
+        return winner if votes[winner] >= min_share * sum(votes.values()) else None
+
+    def save(self, path: str) -> None:
+        """Write the index to an .npz file (atomically) and clear dirty"""
+        metadata = {"version": INDEX_VERSION, "dimensions": self.dimensions, "ann_threshold": self.ann_threshold,
+                    "tables": self.tables, "bits": self.bits, "seed": self.seed, "ids": self.ids,
+                    "names": self.names, "graphs": self.graph_names, "types": self.type_names}
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, vectors=self.vectors, codes=self.codes, graph_codes=self.graph_codes,
+                         type_codes=self.type_codes,
+                         metadata=np.frombuffer(json.dumps(metadata, ensure_ascii=False).encode('utf-8'),
+                                                dtype=np.uint8))
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self.dirty = False
+
+    @classmethod
+    def load(cls, path: str) -> 'SimilarityIndex':
+        """Read an index written by save"""
+        with np.load(path) as archive:
+            metadata = json.loads(archive["metadata"].tobytes().decode('utf-8'))
+            if metadata.get("version") != INDEX_VERSION:
+                raise ValueError(f"{path} was written with index version {metadata.get('version')}, "
+                                 f"expected {INDEX_VERSION}; rebuild it")
+            index = cls(metadata["dimensions"], metadata["ann_threshold"], metadata["tables"], metadata["bits"],
+                        metadata["seed"])
+            index._set_rows(archive["vectors"], archive["codes"], archive["graph_codes"], archive["type_codes"])
+        index.ids = metadata["ids"]
+        index.names = metadata["names"]
+        index.graph_names = metadata["graphs"]
+        index.type_names = metadata["types"]
+        return index
+
+    @classmethod
+    def open(cls, path: str) -> 'SimilarityIndex':
+        """Load the index at path, or start an empty one if the file does not exist yet"""
+        return cls.load(path) if os.path.exists(path) else cls()
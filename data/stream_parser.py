@@ -0,0 +1,122 @@
+import json
+from typing import Dict, List, Any, Tuple, Optional
+
+
+class IncrementalGraphParser:
+    """
+    Incrementally parse a knowledge-graph JSON response as it is streamed
+
+    Text is fed in arbitrary pieces; every object that completes inside the top-level
+    "entities" or "relationships" arrays is returned from feed() right away, without
+    waiting for the rest of the document. Text before the first "{" (code fences,
+    chatter) is ignored, as is anything after the top-level object closes.
+    """
+
+    TRACKED_ARRAYS = ('entities', 'relationships')
+
+    def __init__(self):
+        # Text of the top-level object, one piece per feed() call (joined only by result())
+        self._pieces: List[str] = []
+        # Unscanned-but-needed tail: the open item or key, starting at absolute offset _window_start
+        self._window = ""
+        self._window_start = 0
+        self._length = 0
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._string_start = -1
+        self._last_key = None
+        self._array_key = None
+        self._object_start = -1
+        self._root_start = -1
+        self._root_end = -1
+
+    def feed(self, text: str) -> List[Tuple[str, Dict[str, Any]]]:
+        """Add streamed text; returns ("entity" | "relationship", object) for each newly completed item
+
+        Only the new text is scanned, and only the item or key still open is carried over to the
+        next call, so a response fed in many small pieces is parsed in linear time.
+        """
+        if self._root_end != -1 or not text:
+            return []
+        events = []
+        fed = self._length
+        window = self._window + text
+        base = self._window_start
+
+        for index in range(fed - base, len(window)):
+            char = window[index]
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == '\\':
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        self._last_key = window[self._string_start - base + 1:index]
+                continue
+
+            if self._root_end != -1:
+                break
+            if self._root_start == -1:
+                if char == '{':
+                    self._root_start = base + index
+                    self._depth = 1
+                continue
+
+            if char == '"':
+                self._in_string = True
+                self._string_start = base + index
+            elif char in '{[':
+                if self._depth == 1 and char == '[' and self._last_key in self.TRACKED_ARRAYS:
+                    self._array_key = self._last_key
+                elif self._depth == 2 and char == '{' and self._array_key:
+                    self._object_start = base + index
+                self._depth += 1
+            elif char in '}]':
+                self._depth -= 1
+                if self._depth == 2 and char == '}' and self._object_start != -1:
+                    event = self._decode_item(window[self._object_start - base:index + 1])
+                    if event:
+                        events.append(event)
+                    self._object_start = -1
+                elif self._depth == 1 and char == ']':
+                    self._array_key = None
+                elif self._depth == 0:
+                    self._root_end = base + index + 1
+
+        self._length = fed + len(text)
+        if self._root_start != -1:
+            end = self._root_end if self._root_end != -1 else self._length
+            self._pieces.append(window[max(self._root_start, fed) - base:end - base])
+
+        # Keep only what a later call still has to slice: the open item, or a key being read
+        keep_from = self._length
+        if self._object_start != -1:
+            keep_from = self._object_start
+        elif self._in_string and self._depth == 1:
+            keep_from = self._string_start
+        self._window = window[keep_from - base:]
+        self._window_start = keep_from
+        return events
+
+    def _decode_item(self, json_str: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        try:
+            item = json.loads(json_str)
+        except ValueError:
+            return None
+        kind = 'entity' if self._array_key == 'entities' else 'relationship'
+        return kind, item
+
+    def result(self) -> Optional[Dict[str, Any]]:
+        """Parse the complete top-level object once the stream has ended"""
+        if self._root_start == -1:
+            return None
+        text = "".join(self._pieces)
+        end = len(text) if self._root_end != -1 else text.rfind('}') + 1
+        try:
+            return json.loads(text[:end])
+        except ValueError:
+            return None
@@ -0,0 +1,64 @@
+"""Batch mode: document collection, the provider rate limiter and the results manifest"""
+import json
+import time
+
+from batch_processing import RateLimiter, _rate_limited, collect_documents, process_documents
+from knowledge_graph_generator import KnowledgeGraphGenerator
+from local_adapter import LocalFakeAdapter
+
+
+def test_collect_documents_expands_directories_and_globs(tmp_path):
+    for name in ("a.md", "b.txt", "c.pdf", "notes.docx"):
+        (tmp_path / name).write_text("x", encoding="utf-8")
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "d-Lore.md").write_text("x", encoding="utf-8")
+
+    documents = collect_documents([str(tmp_path), str(tmp_path / "**" / "*-Lore.md"), str(tmp_path / "a.md")])
+    assert [path[len(str(tmp_path)) + 1:] for path in documents] == ["a.md", "b.txt", "c.pdf", "sub/d-Lore.md"]
+
+
+def test_rate_limiter_spaces_calls():
+    limiter = RateLimiter(rate=20, burst=2)
+    started = time.monotonic()
+    waits = [limiter.acquire() for _ in range(6)]
+    elapsed = time.monotonic() - started
+    assert waits[:2] == [0.0, 0.0]
+    assert 0.15 <= elapsed < 1.0
+
+
+def adapter_chain(generator):
+    chain, adapter = [], generator.ai
+    while adapter is not None:
+        chain.append(type(adapter).__name__)
+        adapter = getattr(adapter, "adapter", None)
+    return chain
+
+
+def test_limiter_goes_under_the_cache_and_is_removed_afterwards(tmp_path):
+    generator = KnowledgeGraphGenerator(ai_provider=LocalFakeAdapter(), cache_dir=str(tmp_path / "cache"),
+                                        verbose=False, max_retries=0)
+    chain = adapter_chain(generator)
+    with _rate_limited(generator, 1000):
+        limited_chain = adapter_chain(generator)
+    assert adapter_chain(generator) == chain
+
+    position = limited_chain.index("RateLimitedAdapter")
+    assert limited_chain[:position] + limited_chain[position + 1:] == chain
+    assert limited_chain.index("CachedAIAdapter") < position
+    assert limited_chain.index("ResilientAdapter") < position
+
+
+def test_manifest_records_every_document(tmp_path):
+    for index in range(5):
+        (tmp_path / f"{index}-Lore.md").write_text(f"# Lore {index}\n\nKnox Ironlaw{index} met Mira Vale.\n",
+                                                   encoding="utf-8")
+    seen = []
+    generator = KnowledgeGraphGenerator(ai_provider=LocalFakeAdapter(latency_seconds=0.01), verbose=False)
+    results = process_documents(generator, str(tmp_path / "*.md"), str(tmp_path / "out"), concurrency=3,
+                                requests_per_second=500, on_result=seen.append)
+
+    assert len(results) == 5 and seen == results
+    with open(tmp_path / "out" / "batch_results.jsonl", encoding="utf-8") as f:
+        manifest = [json.loads(line) for line in f]
+    assert sorted(entry["document"] for entry in manifest) == sorted(result["document"] for result in results)
+    assert all(entry["status"] == "ok" for entry in manifest)
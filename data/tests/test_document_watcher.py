@@ -0,0 +1,75 @@
+"""Batch and watch mode with the offline adapter: outputs, change detection and failed extractions"""
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from batch_processing import output_paths, process_document, process_documents
+from document_watcher import DocumentWatcher
+from knowledge_graph_generator import KnowledgeGraphGenerator, output_sidecar
+from local_adapter import LocalFakeAdapter
+
+DOCUMENT = "Knox Ironlaw leads the Iron Council in the Harbor District and studied Maritime Law."
+
+
+def make_generator(**adapter_options):
+    return KnowledgeGraphGenerator(ai_provider=LocalFakeAdapter(**adapter_options), verbose=False, max_retries=0)
+
+
+@pytest.fixture
+def documents(tmp_path):
+    source = tmp_path / "docs"
+    source.mkdir()
+    (source / "a-Lore.md").write_text(f"# Lore A\n\n{DOCUMENT}\n", encoding="utf-8")
+    (source / "b-Lore.md").write_text("# Lore B\n\nMira Vale founded the Glass Guild in Port Aster.\n", encoding="utf-8")
+    return source
+
+
+def test_output_names_stay_unique(tmp_path):
+    outputs = output_paths([str(tmp_path / "x" / "notes.md"), str(tmp_path / "y" / "notes.md")], str(tmp_path))
+    assert len(set(outputs.values())) == 2
+
+
+def test_batch_writes_one_graph_per_document(tmp_path, documents):
+    results = process_documents(make_generator(), [str(documents)], str(tmp_path / "out"), concurrency=2)
+    assert sorted(result["status"] for result in results) == ["ok", "ok"]
+    for result in results:
+        with open(result["data"], encoding="utf-8") as f:
+            assert json.load(f)["entities"]
+
+
+def test_failed_extraction_keeps_previous_output(tmp_path, documents):
+    path = str(documents / "a-Lore.md")
+    output_file = str(tmp_path / "a.html")
+    assert process_document(make_generator(), path, output_file)["status"] == "ok"
+    with open(output_sidecar(output_file, "_data.json"), "rb") as f:
+        good = f.read()
+
+    result = process_document(make_generator(failure_rate=1.0), path, output_file)
+
+    assert result["status"] == "failed"
+    assert "error" in result
+    with open(output_sidecar(output_file, "_data.json"), "rb") as f:
+        assert f.read() == good
+
+
+def test_watcher_retries_documents_whose_extraction_failed(tmp_path, documents):
+    watcher = DocumentWatcher(make_generator(failure_rate=1.0), [str(documents)],
+                              str(tmp_path / "out"), debounce_seconds=0)
+    path = str(documents / "a-Lore.md")
+    assert path in watcher.prepare()
+    (documents / "a-Lore.md").write_text(f"# Lore A\n\n{DOCUMENT} Edited.\n", encoding="utf-8")
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        [result] = watcher.process([path], executor)
+        assert result["status"] == "failed"
+        assert not os.path.exists(output_sidecar(watcher.outputs[path], "_data.json"))
+        # The failed content is not recorded as processed, so the next scan picks it up again
+        assert path in watcher.scan()
+
+        watcher.generator = make_generator()
+        [result] = watcher.process([path], executor)
+    assert result["status"] == "ok"
+    assert path in watcher._hashes
+    assert watcher.processed == 1
@@ -0,0 +1,100 @@
+"""Lexicon-driven type mapping, keyword guessing and classification prompts"""
+import json
+
+import pytest
+
+from entity_classifier import EntityTypeClassifier, merge_lexicons
+from knowledge_graph_generator import KnowledgeGraphGenerator
+
+EXTENSION = {
+    "valid_types": ["spell"],
+    "type_descriptions": {"spell": "Magic formulas and incantations"},
+    "type_mappings": {"incantation": "spell"},
+    "name_keywords": [["spell", ["hex", "curse"]], ["tool", ["wand"]]],
+}
+
+
+@pytest.fixture
+def lexicon_file(tmp_path):
+    path = tmp_path / "lexicon.json"
+    path.write_text(json.dumps(EXTENSION), encoding="utf-8")
+    return str(path)
+
+
+def test_extension_adds_types_mappings_and_keywords(lexicon_file):
+    classifier = EntityTypeClassifier.from_files(lexicon_file)
+    assert classifier.map_type(" Incantation ") == ("spell", True)
+    assert classifier.map_type("Software") == ("tool", True)
+    assert classifier.map_type("sorcery") == ("sorcery", False)
+    assert classifier.guess({"name": "Ember Hex"}) == "spell"
+    assert classifier.guess({"name": "Oak Wand"}) == "tool"
+
+
+def test_merge_keeps_builtin_rule_priority():
+    base = {"valid_types": ["a"], "name_keywords": [["a", ["x"]], ["b", ["y"]]]}
+    merged = merge_lexicons(base, {"valid_types": ["c", "a"], "name_keywords": [["c", ["z"]], ["b", ["w"]]]})
+    assert merged["valid_types"] == ["a", "c"]
+    assert merged["name_keywords"] == [("a", ["x"]), ("b", ["y", "w"]), ("c", ["z"])]
+
+
+def test_type_list_follows_the_lexicon(lexicon_file):
+    type_list = EntityTypeClassifier.from_files(lexicon_file).type_list().splitlines()
+    assert type_list[0] == "- person: The individual"
+    assert type_list[-1] == "- spell: Magic formulas and incantations"
+    assert len(type_list) == 9
+
+
+class PromptRecordingAdapter:
+    """Answers classification prompts with the last type they offer"""
+
+    def __init__(self):
+        self.prompts = []
+
+    def generate_content(self, prompt, *args, **kwargs):
+        self.prompts.append(prompt)
+        offered = [line.strip()[2:].split(':')[0] for line in prompt.splitlines() if line.strip().startswith('- ')]
+        if "Entities to classify" in prompt:
+            payload = json.loads(prompt[prompt.index('['):prompt.rindex(']') + 1])
+            return json.dumps({item["id"]: offered[-1] for item in payload})
+        return offered[-1]
+
+    def get_provider_info(self):
+        return {"provider": "test", "content_model": "test", "search_model": "test"}
+
+
+@pytest.mark.parametrize("batch_size", [1, 40])
+def test_lexicon_types_can_be_returned_by_the_model(lexicon_file, batch_size):
+    adapter = PromptRecordingAdapter()
+    generator = KnowledgeGraphGenerator(ai_provider=adapter, lexicon_file=lexicon_file, verbose=False,
+                                        classification_batch_size=batch_size, max_retries=0)
+    graph = generator._validate_and_clean_entities(
+        {"entities": [{"id": "e1", "name": "Ember Ward", "type": "sorcery"}], "relationships": []})
+    assert graph["entities"][0]["type"] == "spell"
+    assert "- spell: Magic formulas and incantations" in adapter.prompts[-1]
+
+
+def test_unknown_types_are_classified_in_batches(lexicon_file):
+    adapter = PromptRecordingAdapter()
+    generator = KnowledgeGraphGenerator(ai_provider=adapter, lexicon_file=lexicon_file, verbose=False,
+                                        classification_batch_size=40, max_retries=0)
+    # Repeated ids still get one answer each
+    entities = [{"id": f"e{i % 90}", "name": f"Ward {i}", "type": "sorcery"} for i in range(95)]
+    generator._validate_and_clean_entities({"entities": entities, "relationships": []})
+    assert len(adapter.prompts) == 3
+    assert all(entity["type"] == "spell" for entity in entities)
+
+
+class FailingAdapter(PromptRecordingAdapter):
+    def generate_content(self, prompt, *args, **kwargs):
+        self.prompts.append(prompt)
+        return "not json"
+
+
+def test_unanswered_entities_fall_back_to_keyword_guesses(lexicon_file):
+    generator = KnowledgeGraphGenerator(ai_provider=FailingAdapter(), lexicon_file=lexicon_file, verbose=False,
+                                        max_retries=0)
+    graph = generator._validate_and_clean_entities({"entities": [
+        {"id": "e1", "name": "Ember Hex", "type": "sorcery"},
+        {"id": "e2", "name": "Glass Guild", "type": "Company"},
+    ], "relationships": []})
+    assert [entity["type"] for entity in graph["entities"]] == ["spell", "workplace"]
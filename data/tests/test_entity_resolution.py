@@ -0,0 +1,51 @@
+"""Cross-document entity resolution: blocking, verification and merged graphs"""
+import pytest
+
+pytest.importorskip("numpy")
+
+from entity_resolution import find_duplicate_clusters, resolve_knowledge_graphs  # noqa: E402
+
+
+def names_in_clusters(entities, **options):
+    return sorted(sorted(entities[p]["name"] for p in cluster)
+                  for cluster in find_duplicate_clusters(entities, **options))
+
+
+def test_token_keys_and_near_duplicates_cluster():
+    entities = [{"name": "The Dawnlight Council", "type": "workplace"},
+                {"name": "Dawnlight Council", "type": "workplace"},
+                {"name": "Dawnlight Counsil", "type": "other"},
+                {"name": "Harbor District", "type": "workplace"}]
+    assert names_in_clusters(entities) == [["Dawnlight Council", "Dawnlight Counsil", "The Dawnlight Council"]]
+
+
+def test_conflicting_types_and_numbers_stay_apart():
+    entities = [{"name": "Python 2", "type": "skill"}, {"name": "python 3", "type": "skill"},
+                {"name": "Python", "type": "skill"}, {"name": "Mercury", "type": "person"},
+                {"name": "mercury", "type": "tool"}]
+    clusters = names_in_clusters(entities)
+    # Exact names always merge; numbers never join "Python 2" and "Python 3", even through "Python"
+    assert ["Mercury", "mercury"] in clusters
+    assert not any("Python 2" in cluster and "python 3" in cluster for cluster in clusters)
+
+
+def test_stats_are_reported():
+    stats = {}
+    find_duplicate_clusters([{"name": "Iron Council"}, {"name": "Iron Councils"}], stats=stats)
+    assert stats["entities"] == 2 and stats["clusters"] == 1
+
+
+def test_resolved_graph_keeps_the_canonical_name_and_aliases():
+    graphs = [
+        {"entities": [{"id": "e1", "name": "Dawnlight Council", "type": "workplace", "importance": 9},
+                      {"id": "e2", "name": "Mira", "type": "person", "importance": 8}],
+         "relationships": [{"source": "e2", "target": "e1", "type": "member_of", "strength": 7}]},
+        {"entities": [{"id": "e1", "name": "The Dawnlight Council", "type": "workplace", "importance": 3},
+                      {"id": "e2", "name": "Sophia", "type": "person", "importance": 6}],
+         "relationships": [{"source": "e2", "target": "e1", "type": "member_of", "strength": 5}]},
+    ]
+    merged = resolve_knowledge_graphs(graphs)
+    council = [entity for entity in merged["entities"] if entity["name"] == "Dawnlight Council"]
+    assert len(council) == 1
+    assert council[0]["aliases"] == ["The Dawnlight Council"]
+    assert sorted(r["target"] for r in merged["relationships"]) == [council[0]["id"]] * 2
@@ -0,0 +1,82 @@
+"""Graph analytics against small graphs with known answers"""
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from graph_analytics import (  # noqa: E402
+    apply_graph_analytics, betweenness, build_adjacency, degrees, label_propagation, pagerank
+)
+
+
+def graph(edges, count=None, strength=5):
+    names = sorted({node for edge in edges for node in edge}) if count is None else [str(i) for i in range(count)]
+    entities = [{"id": name, "name": name} for name in names]
+    relationships = [{"source": a, "target": b, "strength": strength} for a, b in edges]
+    return entities, relationships
+
+
+def dense_pagerank(adjacency, damping=0.85):
+    count = len(adjacency)
+    out = adjacency.sum(axis=1)
+    transition = np.where(out[:, None] > 0, adjacency / np.where(out > 0, out, 1)[:, None], 1.0 / count)
+    rank = np.full(count, 1.0 / count)
+    for _ in range(500):
+        rank = damping * rank @ transition + (1 - damping) / count
+    return rank / rank.sum()
+
+
+def test_pagerank_matches_a_dense_reference():
+    entities, relationships = graph([("a", "b"), ("b", "c"), ("c", "a"), ("c", "d"), ("e", "d"), ("b", "b")])
+    relationships.append({"source": "a", "target": "b", "strength": 3})
+    ids, csr = build_adjacency(entities, relationships)
+    adjacency = np.zeros((len(ids), len(ids)))
+    for relationship in relationships:
+        a, b = ids.index(relationship["source"]), ids.index(relationship["target"])
+        if a != b:
+            adjacency[a, b] += relationship["strength"]
+            adjacency[b, a] += relationship["strength"]
+    assert np.allclose(pagerank(csr), dense_pagerank(adjacency), atol=1e-6)
+    assert pagerank(csr, directed=True).sum() == pytest.approx(1.0)
+
+
+def test_degrees_merge_parallel_relationships():
+    entities, relationships = graph([("a", "b"), ("b", "a"), ("b", "c")])
+    _, csr = build_adjacency(entities, relationships)
+    degree, weighted = degrees(csr)
+    assert degree.tolist() == [1, 2, 1]
+    assert weighted.tolist() == [10.0, 15.0, 5.0]
+
+
+def test_exact_betweenness_of_a_path_and_a_star():
+    _, path = build_adjacency(*graph([("a", "b"), ("b", "c"), ("c", "d"), ("d", "e")]))
+    assert np.allclose(betweenness(path, samples=None), [0, 0.5, 2 / 3, 0.5, 0])
+    _, star = build_adjacency(*graph([("hub", leaf) for leaf in "abcde"]))
+    scores = betweenness(star, samples=None)
+    assert scores.max() == pytest.approx(1.0) and np.count_nonzero(scores) == 1
+
+
+def test_label_propagation_finds_two_cliques():
+    left = [(a, b) for a in "abcde" for b in "abcde" if a < b]
+    right = [(a, b) for a in "vwxyz" for b in "vwxyz" if a < b]
+    ids, csr = build_adjacency(*graph(left + right + [("e", "v")]))
+    labels = label_propagation(csr)
+    assert len(set(labels[:5])) == 1 and len(set(labels[5:])) == 1
+    assert labels[0] != labels[-1]
+
+
+def test_apply_graph_analytics_keeps_the_model_importance_once():
+    entities, relationships = graph([("hub", leaf) for leaf in "abcd"])
+    for entity in entities:
+        entity["importance"] = 3
+    knowledge_graph = {"entities": entities, "relationships": relationships}
+    summary = apply_graph_analytics(knowledge_graph)
+    apply_graph_analytics(knowledge_graph)
+
+    hub = next(entity for entity in entities if entity["id"] == "hub")
+    assert summary["top_entities"][0] == "hub"
+    assert hub["importance"] == 10.0
+    # The leaves tie, so they share the average of the lower ranks
+    assert {entity["importance"] for entity in entities if entity is not hub} == {4.4}
+    assert all(entity["attributes"]["model_importance"] == 3 for entity in entities)
+    assert hub["attributes"]["degree"] == 4
+    assert apply_graph_analytics({"entities": []}) == {"communities": 0, "top_entities": []}
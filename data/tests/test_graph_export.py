@@ -0,0 +1,104 @@
+"""Columnar and GraphML exports read back into the graphs they were written from"""
+import json
+import math
+import xml.etree.ElementTree as ElementTree
+
+import pytest
+
+from graph_export import (
+    build_tables, export_graph, export_graphs, graph_names, load_npz_tables, resolve_format, write_graphml
+)
+
+GRAPH = {
+    "entities": [
+        {"id": "a", "name": "Knox \"Iron\" <Law>", "type": "person", "importance": 9,
+         "description": "Leader ünd scholar", "attributes": {"pagerank": 0.4, "community": 1, "mentions": 3}},
+        {"id": "b", "name": "Maritime Law", "type": "knowledge", "importance": "7.5"},
+        {"id": "a", "name": "Duplicate id", "type": "person"}
+    ],
+    "relationships": [
+        {"source": "a", "target": "b", "type": "has_skill", "strength": 8, "description": "studied & taught"},
+        {"source": "a", "target": "missing", "type": "knows"}
+    ]
+}
+
+
+def test_tables_flatten_analytics_and_endpoint_rows():
+    tables = build_tables([("g1", GRAPH), ("g2", GRAPH)])
+    entities, relationships = tables["entities"], tables["relationships"]
+    assert entities["pagerank"][0] == 0.4 and math.isnan(entities["pagerank"][1])
+    assert json.loads(entities["attributes"][0]) == {"mentions": 3}
+    assert entities["importance"][1] == 7.5
+    # Rows point into the shared entities table, the first entity of an id wins
+    assert relationships["source_row"] == [0, 0, 3, 3]
+    assert relationships["target_row"] == [1, -1, 4, -1]
+
+
+def test_npz_round_trip(tmp_path):
+    pytest.importorskip("numpy")
+    files = export_graph(GRAPH, str(tmp_path / "lore"), ["npz"])
+    assert files == [str(tmp_path / "lore.npz")]
+
+    tables = load_npz_tables(files[0])
+    expected = build_tables([("lore", GRAPH)])
+    for table, columns in expected.items():
+        for column, values in columns.items():
+            loaded = tables[table][column].tolist()
+            if column in ("pagerank", "betweenness", "degree", "weighted_degree", "community"):
+                assert [value if not math.isnan(value) else None for value in loaded] == \
+                       [value if not math.isnan(value) else None for value in values]
+            else:
+                assert loaded == values, (table, column)
+    assert tables["entities"]["type_codes"].tolist() == [0, 1, 0]
+
+    subset = load_npz_tables(files[0], columns={"type", "pagerank"})
+    assert set(subset["entities"]) == {"type", "type_codes", "pagerank"}
+
+
+def test_graphml_is_valid_and_skips_dangling_edges(tmp_path):
+    path = write_graphml(GRAPH, str(tmp_path / "lore.graphml"))
+    namespace = {"g": "http://graphml.graphdrawing.org/xmlns"}
+    graph = ElementTree.parse(path).getroot().find("g:graph", namespace)
+    nodes = graph.findall("g:node", namespace)
+    edges = graph.findall("g:edge", namespace)
+    assert [node.get("id") for node in nodes] == ["a", "b"]
+    assert nodes[0].find("g:data[@key='node_name']", namespace).text == "Knox \"Iron\" <Law>"
+    assert nodes[0].find("g:data[@key='node_pagerank']", namespace).text == "0.4"
+    assert [(edge.get("source"), edge.get("target")) for edge in edges] == [("a", "b")]
+    assert edges[0].find("g:data[@key='edge_description']", namespace).text == "studied & taught"
+
+
+def test_bulk_export_names_graphs_uniquely(tmp_path):
+    pytest.importorskip("numpy")
+    for directory in ("x", "y"):
+        (tmp_path / directory).mkdir()
+        (tmp_path / directory / "lore_data.json").write_text(json.dumps(GRAPH), encoding="utf-8")
+    paths = [str(tmp_path / "x" / "lore_data.json"), str(tmp_path / "y" / "lore_data.json")]
+    assert list(graph_names(paths).values()) == ["lore", "lore_2"]
+
+    summary = export_graphs([str(tmp_path / "x"), str(tmp_path / "y")], str(tmp_path / "out"), ["npz", "graphml"])
+    assert (summary["graphs"], summary["entities"], summary["relationships"]) == (2, 6, 4)
+    assert sorted(path.name for path in (tmp_path / "out").iterdir()) == \
+        ["knowledge_graphs.npz", "lore.graphml", "lore_2.graphml"]
+    tables = load_npz_tables(str(tmp_path / "out" / "knowledge_graphs.npz"), columns={"graph"})
+    assert tables["entities"]["graph"].tolist() == ["lore"] * 3 + ["lore_2"] * 3
+
+
+def test_unknown_or_unavailable_formats_fail():
+    with pytest.raises(ValueError):
+        resolve_format("csv")
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        assert resolve_format("auto") == "npz"
+        with pytest.raises(RuntimeError):
+            resolve_format("parquet")
+    else:
+        assert resolve_format("auto") == "parquet"
+
+
+def test_parquet_round_trip(tmp_path):
+    parquet = pytest.importorskip("pyarrow.parquet")
+    files = export_graph(GRAPH, str(tmp_path / "lore"), ["parquet"])
+    entities = parquet.read_table(files[0]).to_pydict()
+    assert entities["name"] == build_tables([("lore", GRAPH)])["entities"]["name"]
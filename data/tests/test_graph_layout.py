@@ -0,0 +1,56 @@
+"""Precomputed force layout: determinism, centering, spacing and linked-node proximity"""
+import math
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from graph_layout import EXACT_NODE_LIMIT, compute_layout  # noqa: E402
+
+
+def star_graph(leaves: int):
+    entities = [{"id": "hub", "importance": 9}] + [{"id": f"n{i}", "importance": "n/a"} for i in range(leaves)]
+    relationships = [{"source": "hub", "target": f"n{i}", "strength": 8} for i in range(leaves)]
+    return entities, relationships
+
+
+def distance(layout, a, b):
+    return math.dist(layout[a], layout[b])
+
+
+def test_empty_graph():
+    assert compute_layout([], []) == {}
+
+
+def test_layout_is_deterministic_and_centered():
+    entities, relationships = star_graph(12)
+    layout = compute_layout(entities, relationships)
+    assert layout == compute_layout(entities, relationships)
+    assert set(layout) == {entity["id"] for entity in entities}
+    center = np.mean(list(layout.values()), axis=0)
+    assert np.allclose(center, 0, atol=1.0)
+
+
+def test_stronger_links_are_shorter():
+    entities = [{"id": name} for name in "abcd"]
+    layout = compute_layout(entities, [{"source": "a", "target": "b", "strength": 10},
+                                       {"source": "c", "target": "d", "strength": 0},
+                                       {"source": "a", "target": "missing"}])
+    # Springs rest at 80 + (10 - strength) * 15 pixels, as in the browser simulation
+    assert distance(layout, "a", "b") == pytest.approx(80, abs=15)
+    assert distance(layout, "c", "d") > 2 * distance(layout, "a", "b")
+
+
+def test_collision_keeps_nodes_apart():
+    layout = compute_layout(*star_graph(30))
+    points = np.array(list(layout.values()))
+    gaps = np.sqrt(((points[:, None] - points[None]) ** 2).sum(-1)) + np.eye(len(points)) * 1e9
+    assert gaps.min() > 20
+
+
+def test_large_graphs_use_the_grid_approximation():
+    entities, relationships = star_graph(EXACT_NODE_LIMIT + 100)
+    layout = compute_layout(entities, relationships)
+    points = np.array(list(layout.values()))
+    assert np.isfinite(points).all()
+    assert len({tuple(point) for point in points.tolist()}) == len(points)
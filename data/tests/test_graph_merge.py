@@ -0,0 +1,51 @@
+"""merge_knowledge_graphs: name and id unions, graph-local ids, relationship remapping"""
+from graph_merge import merge_knowledge_graphs, normalize_entity_name
+
+
+def test_names_are_compared_without_case_and_punctuation():
+    assert normalize_entity_name("  Iron-Council, Inc.") == "iron council inc"
+    merged = merge_knowledge_graphs([
+        {"entities": [{"id": "e1", "name": "Iron Council Inc"}]},
+        {"entities": [{"id": "e1", "name": "iron-council, inc."}]},
+    ])
+    assert [entity["id"] for entity in merged["entities"]] == ["e1"]
+
+
+def test_same_name_entities_merge_keeping_the_strongest_fields():
+    merged = merge_knowledge_graphs([
+        {"entities": [{"id": "e1", "name": "Knox Ironlaw", "type": "other", "importance": 0.4}]},
+        {"entities": [{"id": "e7", "name": "knox ironlaw", "type": "person", "importance": 0.9,
+                       "description": "Leader of the council"}]},
+    ])
+    [entity] = merged["entities"]
+    assert entity == {"id": "e1", "name": "Knox Ironlaw", "type": "person", "importance": 0.9,
+                      "description": "Leader of the council"}
+
+
+def test_ids_are_graph_local():
+    merged = merge_knowledge_graphs([
+        {"entities": [{"id": "e1", "name": "Alpha"}, {"id": "e2", "name": "Beta"}],
+         "relationships": [{"source": "e1", "target": "e2", "type": "knows", "strength": 0.5}]},
+        {"entities": [{"id": "e1", "name": "Gamma"}, {"id": "e2", "name": "Alpha"}],
+         "relationships": [{"source": "e2", "target": "e1", "type": "knows", "strength": 0.7}]},
+    ])
+    ids = {entity["name"]: entity["id"] for entity in merged["entities"]}
+    assert len(ids) == 3 and len(set(ids.values())) == 3
+    assert {(r["source"], r["target"]) for r in merged["relationships"]} == {
+        (ids["Alpha"], ids["Beta"]), (ids["Alpha"], ids["Gamma"])}
+
+
+def test_relationship_endpoints_match_ids_case_insensitively():
+    merged = merge_knowledge_graphs([
+        {"entities": [{"id": "Knox", "name": "Knox Ironlaw"}, {"id": "council", "name": "Iron Council"}],
+         "relationships": [{"source": "knox", "target": "Council", "type": "leads", "strength": 0.8},
+                           {"source": "KNOX", "target": "council", "type": "LEADS", "strength": 0.9}]},
+    ])
+    assert merged["relationships"] == [{"source": "Knox", "target": "council", "type": "leads", "strength": 0.9}]
+
+
+def test_duplicate_ids_differing_in_case_merge_within_a_graph():
+    merged = merge_knowledge_graphs([
+        {"entities": [{"id": "E1", "name": "Harbor District"}, {"id": "e1", "name": "The Harbor"}]},
+    ])
+    assert len(merged["entities"]) == 1
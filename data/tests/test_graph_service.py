@@ -0,0 +1,154 @@
+"""GraphService over real sockets with the offline adapter: results, backpressure, fallbacks, bad requests"""
+import asyncio
+import http.client
+import json
+import re
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from graph_service import GraphService
+from knowledge_graph_generator import KnowledgeGraphGenerator
+from local_adapter import LocalFakeAdapter
+
+DOCUMENT = "Knox Ironlaw leads the Iron Council in the Harbor District and studied Maritime Law."
+
+
+@pytest.fixture
+def start_service():
+    """Start a service on a free port in a background event loop; stopped after the test"""
+    running = []
+
+    def start(adapter=None, **options):
+        generator = KnowledgeGraphGenerator(ai_provider=adapter or LocalFakeAdapter(), verbose=False, max_retries=0)
+        service = GraphService(generator, port=0, **options)
+        loop = asyncio.new_event_loop()
+        ready = threading.Event()
+
+        async def run():
+            await service.start()
+            ready.set()
+            await asyncio.Event().wait()
+
+        threading.Thread(target=loop.run_until_complete, args=(run(),), daemon=True).start()
+        assert ready.wait(10)
+        running.append((service, loop))
+        return service
+
+    yield start
+    for service, loop in running:
+        asyncio.run_coroutine_threadsafe(service.stop(), loop).result(10)
+
+
+def post(port: int, body: bytes = DOCUMENT.encode('utf-8'), path: str = "/extract",
+         content_type: str = "text/plain") -> tuple:
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    try:
+        connection.request("POST", path, body, {"Content-Type": content_type})
+        response = connection.getresponse()
+        return response.status, dict(response.getheaders()), response.read()
+    finally:
+        connection.close()
+
+
+def raw_request(port: int, data: bytes) -> bytes:
+    """Send raw bytes and return everything the server answers before closing"""
+    with socket.create_connection(("127.0.0.1", port), timeout=30) as sock:
+        sock.sendall(data)
+        chunks = []
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                return b"".join(chunks)
+            chunks.append(chunk)
+
+
+def test_extract_returns_graph_of_the_document(start_service):
+    service = start_service()
+    status, headers, body = post(service.port)
+    assert status == 200
+    graph = json.loads(body)
+    names = {entity["name"] for entity in graph["entities"]}
+    assert {"Knox Ironlaw", "Maritime Law"} <= names
+    assert "fallback" not in graph
+    assert "process;dur=" in headers["Server-Timing"]
+
+
+def test_extract_renders_html_page(start_service):
+    service = start_service()
+    status, headers, body = post(service.port, path="/extract?format=html")
+    assert status == 200
+    assert headers["Content-Type"].startswith("text/html")
+    assert b"Knox Ironlaw" in body
+
+
+def test_json_body_and_empty_document(start_service):
+    service = start_service()
+    status, _, _ = post(service.port, json.dumps({"text": DOCUMENT}).encode('utf-8'),
+                        content_type="application/json")
+    assert status == 200
+    status, _, body = post(service.port, b"   ")
+    assert status == 400
+    assert json.loads(body)["error"] == "empty document"
+
+
+def test_full_queue_is_rejected_with_retry_after(start_service):
+    service = start_service(LocalFakeAdapter(latency_seconds=0.3), workers=1, queue_size=1)
+    with ThreadPoolExecutor(max_workers=6) as executor:
+        responses = list(executor.map(lambda index: post(service.port, f"{DOCUMENT} {index}".encode('utf-8')),
+                                      range(6)))
+    statuses = sorted(status for status, _, _ in responses)
+    assert statuses.count(200) >= 1
+    assert statuses.count(503) >= 1
+    assert set(statuses) == {200, 503}
+    rejected = next(headers for status, headers, _ in responses if status == 503)
+    assert int(rejected["Retry-After"]) >= 1
+    assert service.metrics.rejected == statuses.count(503)
+
+
+def test_fallback_graph_is_answered_with_502(start_service):
+    service = start_service(LocalFakeAdapter(failure_rate=1.0))
+    status, _, body = post(service.port)
+    assert status == 502
+    assert "extraction failed" in json.loads(body)["error"]
+
+
+def test_oversized_header_line_is_answered_with_431(start_service):
+    service = start_service()
+    answer = raw_request(service.port, b"GET /health HTTP/1.1\r\nX-Padding: " + b"a" * 70000 + b"\r\n\r\n")
+    assert answer.startswith(b"HTTP/1.1 431 ")
+
+
+def test_negative_content_length_is_answered_with_400(start_service):
+    service = start_service()
+    answer = raw_request(service.port, b"POST /extract HTTP/1.1\r\nContent-Length: -5\r\n\r\n")
+    assert answer.startswith(b"HTTP/1.1 400 ")
+    assert b"invalid Content-Length" in answer
+
+
+def test_malformed_request_line_and_unknown_path(start_service):
+    service = start_service()
+    assert raw_request(service.port, b"NONSENSE\r\n\r\n").startswith(b"HTTP/1.1 400 ")
+    connection = http.client.HTTPConnection("127.0.0.1", service.port, timeout=30)
+    connection.request("GET", "/nowhere")
+    assert connection.getresponse().status == 404
+    connection.close()
+
+
+def _compaction_tokens(server_timing: str) -> int:
+    """Tokens before compaction from the Server-Timing compaction entry"""
+    entry = next(part for part in server_timing.split(", ") if part.startswith("compaction;"))
+    return int(re.search(r'desc="(\d+) to', entry).group(1))
+
+
+def test_compaction_is_reported_per_request(start_service):
+    # Two workers share one generator; each response must carry its own document's compaction
+    service = start_service(LocalFakeAdapter(latency_seconds=0.1), workers=2)
+    short, long = "Knox Ironlaw.", " ".join(f"Mira Dawnlight keeps Treasury Ledger {index}." for index in range(50))
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        (_, short_headers, _), (_, long_headers, _) = executor.map(
+            lambda text: post(service.port, text.encode('utf-8')), [short, long])
+    assert _compaction_tokens(short_headers["Server-Timing"]) < 10
+    assert _compaction_tokens(long_headers["Server-Timing"]) > 100
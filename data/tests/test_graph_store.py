@@ -0,0 +1,83 @@
+"""KnowledgeGraphStore: round trips, replacement on re-upsert and cross-document queries"""
+import json
+
+import pytest
+
+from graph_store import KnowledgeGraphStore
+
+KNOX = {
+    "entities": [
+        {"id": "knox", "name": "Knox Ironlaw", "type": "person", "importance": 9, "attributes": {"age": 41}},
+        {"id": "law", "name": "Maritime Law", "type": "knowledge", "importance": 6, "description": "Sea law"},
+        {"id": "council", "name": "Iron Council", "type": "workplace", "importance": 7},
+    ],
+    "relationships": [
+        {"source": "knox", "target": "law", "type": "has_knowledge", "strength": 8, "evidence": "studied"},
+        {"source": "council", "target": "knox", "type": "employs", "strength": 5},
+    ],
+    "summary": "Knox",
+}
+MIRA = {
+    "entities": [
+        {"id": "e1", "name": "Mira Dawnlight", "type": "person", "importance": 8},
+        {"id": "e2", "name": "maritime-law", "type": "knowledge", "importance": 4},
+    ],
+    "relationships": [{"source": "e1", "target": "e2", "type": "has_knowledge", "strength": 6}],
+    "summary": "Mira",
+}
+
+
+@pytest.fixture
+def store(tmp_path):
+    with KnowledgeGraphStore(str(tmp_path / "graphs.db")) as store:
+        store.upsert_graphs({"knox": KNOX, "mira": MIRA})
+        yield store
+
+
+def test_graphs_round_trip_with_extra_fields(store):
+    graph = store.load_graph("knox")
+    assert graph["summary"] == "Knox"
+    assert {entity["id"]: entity for entity in graph["entities"]}["knox"]["attributes"] == {"age": 41}
+    assert {r["target"]: r for r in graph["relationships"]}["law"]["evidence"] == "studied"
+    assert store.load_graph("missing") is None
+
+
+def test_upsert_replaces_the_previous_graph(store):
+    store.upsert_graph("knox", {"entities": KNOX["entities"][:1], "relationships": [], "summary": "v2"})
+    graph = store.load_graph("knox")
+    assert [entity["id"] for entity in graph["entities"]] == ["knox"]
+    assert graph["relationships"] == []
+    assert store.stats() == {"documents": 2, "entities": 3, "relationships": 1}
+
+
+def test_entities_are_found_by_normalized_name_across_documents(store):
+    found = store.find_entities("MARITIME LAW")
+    assert [(entity["document"], entity["id"]) for entity in found] == [("knox", "law"), ("mira", "e2")]
+    assert [entity["id"] for entity in store.find_entities("maritime law", document="mira")] == ["e2"]
+
+
+def test_top_entities_and_types(store):
+    assert [entity["name"] for entity in store.top_entities(2)] == ["Knox Ironlaw", "Mira Dawnlight"]
+    assert [entity["document"] for entity in store.entities_by_type("knowledge")] == ["knox", "mira"]
+
+
+def test_neighbors_follow_both_directions(store):
+    neighbors = store.neighbors("Knox Ironlaw")
+    assert [(item["name"], item["direction"], item["relationship"]["type"]) for item in neighbors] == [
+        ("Maritime Law", "out", "has_knowledge"), ("Iron Council", "in", "employs")]
+    assert [item["name"] for item in store.neighbors("knox ironlaw", neighbor_type="workplace")] == ["Iron Council"]
+
+
+def test_delete_cascades(store):
+    assert store.delete_document("mira")
+    assert not store.delete_document("mira")
+    assert store.stats() == {"documents": 1, "entities": 3, "relationships": 2}
+
+
+def test_import_json_files_names_documents_after_the_file(tmp_path):
+    path = tmp_path / "resume_graph_data.json"
+    path.write_text(json.dumps(MIRA), encoding="utf-8")
+    (tmp_path / "broken_data.json").write_text("{", encoding="utf-8")
+    with KnowledgeGraphStore(":memory:") as store:
+        assert store.import_json_files([str(path), str(tmp_path / "broken_data.json")]) == 1
+        assert [document["name"] for document in store.documents()] == ["resume_graph"]
@@ -0,0 +1,88 @@
+"""Incremental extraction: section fingerprints, reuse of unchanged sections and retrying failed ones"""
+import json
+
+from incremental_extraction import (
+    document_sections, fingerprint_section, load_section_state, section_state_file,
+    update_knowledge_graph_incrementally
+)
+from knowledge_graph_generator import KnowledgeGraphGenerator
+from local_adapter import LocalFakeAdapter
+
+DOCUMENT = """# Harbor Lore
+
+## Knox Ironlaw
+Knox Ironlaw leads the Iron Council.
+
+---
+
+## Mira Vale
+Mira Vale founded the Glass Guild in Port Aster.
+
+## Old Docks
+Tobin Reed repairs ships at the Old Docks.
+"""
+
+
+class BrokenSectionAdapter(LocalFakeAdapter):
+    """Fails every prompt mentioning the given phrase"""
+
+    def __init__(self, phrase: str):
+        super().__init__()
+        self.phrase = phrase
+
+    def generate_content(self, prompt: str, *args, **kwargs) -> str:
+        if self.phrase in prompt.rsplit("Source text:", 1)[-1]:
+            raise RuntimeError("provider error")
+        return super().generate_content(prompt, *args, **kwargs)
+
+    def generate_content_stream(self, prompt: str, *args, **kwargs):
+        yield self.generate_content(prompt, *args, **kwargs)
+
+
+def make_generator(adapter=None):
+    return KnowledgeGraphGenerator(ai_provider=adapter or LocalFakeAdapter(), verbose=False, max_retries=0)
+
+
+def test_sections_skip_separators_and_fingerprints_ignore_whitespace():
+    title, sections = document_sections(DOCUMENT, max_chars=4000)
+    assert title == "Harbor Lore"
+    assert [section.splitlines()[0] for section in sections] == ["# Harbor Lore", "## Knox Ironlaw", "## Mira Vale",
+                                                                 "## Old Docks"]
+    assert fingerprint_section(title, "A  b\n c") == fingerprint_section(title, "A b c")
+    assert fingerprint_section(title, "A b c") != fingerprint_section("Other", "A b c")
+
+
+def test_only_changed_sections_are_extracted_again(tmp_path):
+    state_file = section_state_file(str(tmp_path / "lore.html"))
+    generator = make_generator()
+
+    graph, stats = update_knowledge_graph_incrementally(generator, DOCUMENT, state_file)
+    assert (stats["extracted"], stats["reused"]) == (4, 0)
+    assert "Mira Vale" in {entity["name"] for entity in graph["entities"]}
+
+    _, stats = update_knowledge_graph_incrementally(generator, DOCUMENT.replace("\n\n", "\n \n"), state_file)
+    assert (stats["extracted"], stats["reused"]) == (0, 4)
+
+    edited = DOCUMENT.replace("Mira Vale founded", "Mira Vale sold").replace("Old Docks", "New Docks")
+    graph, stats = update_knowledge_graph_incrementally(generator, edited, state_file)
+    assert (stats["extracted"], stats["reused"], stats["dropped"]) == (2, 2, 2)
+    assert "Old Docks" not in {entity["name"] for entity in graph["entities"]}
+    assert len(load_section_state(state_file)) == 4
+
+
+def test_failed_sections_are_retried_on_the_next_run(tmp_path):
+    state_file = section_state_file(str(tmp_path / "lore.html"))
+    _, stats = update_knowledge_graph_incrementally(make_generator(BrokenSectionAdapter("Glass Guild")), DOCUMENT,
+                                                    state_file)
+    assert (stats["extracted"], stats["failed"]) == (3, 1)
+    assert len(load_section_state(state_file)) == 3
+
+    _, stats = update_knowledge_graph_incrementally(make_generator(), DOCUMENT, state_file)
+    assert (stats["extracted"], stats["reused"], stats["failed"]) == (1, 3, 0)
+
+
+def test_outdated_state_is_ignored(tmp_path):
+    state_file = tmp_path / "lore_sections.json"
+    state_file.write_text(json.dumps({"version": 0, "sections": [{"fingerprint": "x", "graph": {}}]}))
+    assert load_section_state(str(state_file)) == {}
+    assert load_section_state(str(tmp_path / "missing.json")) == {}
@@ -0,0 +1,52 @@
+"""Choice of the clustered canvas viewer for large graphs and its contract with the page shell"""
+import re
+import shutil
+import subprocess
+
+import pytest
+
+import visualization_template
+from visualization_template import (
+    LARGE_GRAPH_THRESHOLD, VIEWER_JS, VIEWER_JS_FILE, VIEWER_LARGE_JS, VIEWER_LARGE_JS_FILE, render_inline_page,
+    render_split_page, uses_large_viewer, write_viewer_assets
+)
+
+
+def graph(count):
+    entities = [{"id": f"e{index}", "name": f"Entity {index}", "type": "skill"} for index in range(count)]
+    relationships = [{"source": "e0", "target": f"e{index}", "type": "uses"} for index in range(1, count)]
+    return entities, relationships
+
+
+def test_viewer_switches_at_the_threshold():
+    assert not uses_large_viewer(LARGE_GRAPH_THRESHOLD - 1)
+    assert uses_large_viewer(LARGE_GRAPH_THRESHOLD)
+
+    small = render_inline_page(*graph(LARGE_GRAPH_THRESHOLD - 1), "summary", {})
+    large = render_inline_page(*graph(LARGE_GRAPH_THRESHOLD), "summary", {})
+    assert VIEWER_JS in small and VIEWER_LARGE_JS not in small
+    assert VIEWER_LARGE_JS in large and VIEWER_JS not in large
+
+
+def test_split_pages_load_the_matching_asset(tmp_path):
+    assert VIEWER_LARGE_JS_FILE in render_split_page("g.graph.json", LARGE_GRAPH_THRESHOLD, 0, "")
+    assert VIEWER_JS_FILE in render_split_page("g.graph.json", 10, 0, "")
+    write_viewer_assets(str(tmp_path))
+    assert (tmp_path / VIEWER_LARGE_JS_FILE).read_text(encoding="utf-8") == VIEWER_LARGE_JS
+
+
+@pytest.mark.parametrize("viewer", [VIEWER_JS, VIEWER_LARGE_JS], ids=["svg", "canvas"])
+def test_both_viewers_define_the_page_controls(viewer):
+    handlers = set(re.findall(r'on\w+="(\w+)\(', visualization_template._PAGE_HTML))
+    assert {"toggleFilter", "zoomIn", "resetZoom", "exportGraph"} <= handlers
+    for name in handlers:
+        assert re.search(rf"function {name}\b|\b{name}\s*=", viewer), name
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="node is not installed")
+@pytest.mark.parametrize("viewer", [VIEWER_JS, VIEWER_LARGE_JS], ids=["svg", "canvas"])
+def test_viewer_scripts_parse(tmp_path, viewer):
+    script = tmp_path / "viewer.js"
+    script.write_text(viewer, encoding="utf-8")
+    result = subprocess.run(["node", "--check", str(script)], capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
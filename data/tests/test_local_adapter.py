@@ -0,0 +1,86 @@
+"""LocalFakeAdapter: deterministic answers, injected failures and latency, and use by the generator"""
+import json
+import time
+
+import pytest
+
+from knowledge_graph_generator import KnowledgeGraphGenerator
+from local_adapter import LocalAdapterError, LocalFakeAdapter
+
+PROMPT = "Extract a graph.\nSource text:\nKnox Ironlaw leads the Iron Council of Port Aster."
+
+
+def graph_of(answer):
+    return json.loads(answer[answer.index("{"):answer.rindex("}") + 1])
+
+
+def test_answers_are_deterministic_and_use_the_source_text():
+    first = LocalFakeAdapter().generate_content(PROMPT)
+    assert first == LocalFakeAdapter().generate_content(PROMPT)
+    assert first != LocalFakeAdapter(seed=1).generate_content(PROMPT)
+    names = [entity["name"] for entity in graph_of(first)["entities"]]
+    assert names[:2] == ["Knox Ironlaw", "Iron Council of Port Aster"]
+    assert "Extract" not in names
+
+
+def test_entities_per_call_pads_the_answer():
+    graph = graph_of(LocalFakeAdapter(entities_per_call=5).generate_content(PROMPT))
+    assert len(graph["entities"]) == 5
+    assert len(graph["relationships"]) == 4
+
+
+def test_failures_are_decided_per_prompt_and_attempt():
+    adapter = LocalFakeAdapter(failure_rate=0.5)
+    outcomes = []
+    for _ in range(20):
+        try:
+            adapter.generate_content(PROMPT)
+            outcomes.append(True)
+        except LocalAdapterError:
+            outcomes.append(False)
+    assert True in outcomes and False in outcomes
+    assert adapter.failures == outcomes.count(False)
+
+    replay = LocalFakeAdapter(failure_rate=0.5)
+    replayed = []
+    for _ in range(20):
+        try:
+            replay.generate_content(PROMPT)
+            replayed.append(True)
+        except LocalAdapterError:
+            replayed.append(False)
+    assert replayed == outcomes
+
+
+def test_latency_is_simulated():
+    started = time.perf_counter()
+    LocalFakeAdapter(latency_seconds=0.05).generate_content(PROMPT)
+    assert time.perf_counter() - started >= 0.05
+
+
+def test_stream_pieces_add_up_to_the_answer():
+    adapter = LocalFakeAdapter(stream_chunk_chars=10)
+    pieces = list(adapter.generate_content_stream(PROMPT))
+    assert len(pieces) > 1 and all(len(piece) <= 10 for piece in pieces)
+    assert "".join(pieces) == LocalFakeAdapter().generate_content(PROMPT)
+
+
+def test_classification_prompts_get_type_answers():
+    adapter = LocalFakeAdapter()
+    prompt = 'Entities to classify (JSON):\n[{"id": "a", "name": "Python programming"}]\nRespond with JSON'
+    assert set(json.loads(adapter.generate_content(prompt).strip("`json\n"))) == {"a"}
+    assert LocalFakeAdapter(classification_accuracy=0.0).generate_content(
+        "Entity to classify:\nName: Docker\nDescription: containers") == "unknown"
+
+
+@pytest.mark.parametrize("provider", ["local", LocalFakeAdapter()])
+def test_generator_runs_offline(provider):
+    generator = KnowledgeGraphGenerator(ai_provider=provider, verbose=False)
+    graph = generator.extract_knowledge_graph_from_text("Knox Ironlaw leads the Iron Council in the Harbor District.")
+    assert not graph.get("fallback")
+    assert {"Knox Ironlaw", "Iron Council", "Harbor District"} <= {entity["name"] for entity in graph["entities"]}
+
+
+def test_names_do_not_span_lines():
+    answer = LocalFakeAdapter().generate_content("Source text:\n# Notes\n\nKnox Ironlaw arrived.")
+    assert [entity["name"] for entity in graph_of(answer)["entities"]] == ["Notes", "Knox Ironlaw"]
@@ -0,0 +1,52 @@
+"""Command line: lazy imports, render without a provider, offline extraction and export"""
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import main
+
+DATA_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GRAPH = {"entities": [{"id": "a", "name": "Knox Ironlaw", "type": "person", "importance": 9},
+                      {"id": "b", "name": "Maritime Law", "type": "knowledge", "importance": 5}],
+         "relationships": [{"source": "a", "target": "b", "type": "studied", "strength": 7}],
+         "summary": "Knox"}
+
+
+def run_python(code):
+    return subprocess.run([sys.executable, "-c", code], cwd=DATA_DIR, capture_output=True, text=True, check=True)
+
+
+def test_importing_the_cli_loads_no_pipeline_modules():
+    result = run_python("import sys, main; print(sorted(m for m in ('knowledge_graph_generator', 'numpy', "
+                        "'ai_adapter', 'visualization_template') if m in sys.modules))")
+    assert result.stdout.strip() == "[]"
+
+
+def test_render_never_creates_an_adapter(tmp_path):
+    data_file = tmp_path / "knox_data.json"
+    data_file.write_text(json.dumps(GRAPH), encoding="utf-8")
+    result = run_python(f"import sys, main; status = main.main(['render', {str(data_file)!r}, '-q']); "
+                        "print(status, 'ai_adapter' in sys.modules)")
+    assert result.stdout.split() == ["0", "False"]
+    assert (tmp_path / "knox.html").exists()
+
+
+def test_extract_runs_offline(tmp_path):
+    source = tmp_path / "notes.md"
+    source.write_text("# Notes\n\nKnox Ironlaw leads the Iron Council in the Harbor District.\n", encoding="utf-8")
+    assert main.main(["extract", str(source), "--provider", "local", "--no-layout", "-q"]) == 0
+    with open(tmp_path / "notes_data.json", encoding="utf-8") as f:
+        assert "Knox Ironlaw" in {entity["name"] for entity in json.load(f)["entities"]}
+
+
+def test_export_formats_match_graph_export():
+    graph_export = pytest.importorskip("graph_export")
+    assert main.EXPORT_FORMATS == graph_export.EXPORT_FORMATS
+
+
+def test_missing_input_is_reported(tmp_path, capsys):
+    assert main.main(["render", str(tmp_path / "missing_data.json"), "-q"]) == 1
+    assert "❌" in capsys.readouterr().out
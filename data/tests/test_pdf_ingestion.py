@@ -0,0 +1,57 @@
+"""Page-level PDF extraction: page order, the process pool and chunk packing"""
+import pytest
+
+import pdf_ingestion
+from pdf_ingestion import iter_pdf_pages, iter_pdf_text_chunks, pdf_page_count
+
+if pdf_ingestion._pdf_backend() is None:
+    pytest.skip("needs PyMuPDF or pypdf", allow_module_level=True)
+
+
+def write_pdf(path, pages):
+    """Minimal PDF with one line of Helvetica text per page"""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None,
+               "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for text in pages:
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(pages)} >>"
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(output))
+        output += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(output)
+    output += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    output += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode("latin-1")
+    output += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1")
+    path.write_bytes(bytes(output))
+    return str(path)
+
+
+PAGES = [f"Page {number} mentions Knox Ironlaw and the Iron Council" for number in range(11)]
+
+
+def test_page_count(tmp_path):
+    assert pdf_page_count(write_pdf(tmp_path / "doc.pdf", PAGES)) == 11
+
+
+@pytest.mark.parametrize("processes", [1, 2])
+def test_pages_come_back_in_order(tmp_path, processes):
+    path = write_pdf(tmp_path / "doc.pdf", PAGES)
+    pages = list(iter_pdf_pages(path, processes=processes, pages_per_task=2, max_pending=2))
+    assert [number for number, _ in pages] == list(range(11))
+    assert [text.strip() for _, text in pages] == PAGES
+
+
+def test_chunks_hold_every_page_within_the_limit(tmp_path):
+    path = write_pdf(tmp_path / "doc.pdf", PAGES)
+    chunks = list(iter_pdf_text_chunks(path, max_chars=150, processes=1))
+    assert all(len(chunk) <= 150 for chunk in chunks)
+    text = "\n".join(chunks)
+    assert all(page in text for page in PAGES)
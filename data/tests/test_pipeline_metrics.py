@@ -0,0 +1,92 @@
+"""PipelineMetrics stages, model call attribution, reports and the Prometheus format"""
+import json
+import threading
+
+import pytest
+
+from pipeline_metrics import UNATTRIBUTED_STAGE, InstrumentedAdapter, PipelineMetrics, estimate_tokens
+
+
+class EchoAdapter:
+    def generate_content(self, prompt, *args, **kwargs):
+        if prompt == "fail":
+            raise RuntimeError("boom")
+        return "x" * 40
+
+    def get_provider_info(self):
+        return {"provider": "test"}
+
+
+def test_token_estimate():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("abcdefgh") == 2
+    assert estimate_tokens("知识图谱") == 4
+
+
+def test_model_calls_go_to_the_innermost_stage():
+    metrics = PipelineMetrics()
+    adapter = InstrumentedAdapter(EchoAdapter(), metrics)
+    with metrics.stage("extraction"):
+        adapter.generate_content("a" * 400)
+        with metrics.stage("classification"):
+            adapter.generate_content("b")
+            with pytest.raises(RuntimeError):
+                adapter.generate_content("fail")
+    adapter.generate_content("c")
+
+    stages = metrics.report()["stages"]
+    assert stages["extraction"]["model_calls"] == 1
+    assert stages["extraction"]["prompt_tokens"] == 100
+    assert stages["extraction"]["completion_tokens"] == 10
+    assert stages["classification"]["model_calls"] == 2
+    assert stages["classification"]["errors"] == 1
+    assert stages[UNATTRIBUTED_STAGE]["model_calls"] == 1
+
+
+def test_helper_threads_report_to_the_caller_stage():
+    metrics = PipelineMetrics()
+    adapter = InstrumentedAdapter(EchoAdapter(), metrics)
+    with metrics.stage("extraction"):
+        stage = metrics.current_stage()
+
+        def work():
+            metrics.attribute_to(stage)
+            adapter.generate_content("p")
+            metrics.record_retry()
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    report = metrics.report()
+    assert report["stages"]["extraction"]["model_calls"] == 4
+    assert report["totals"]["retries"] == 4
+
+
+def test_streamed_calls_are_counted_once_consumed():
+    metrics = PipelineMetrics()
+    adapter = InstrumentedAdapter(EchoAdapter(), metrics)
+    with metrics.stage("extraction"):
+        stream = adapter.generate_content_stream("p")
+    assert "".join(stream) == "x" * 40
+    assert metrics.report()["stages"]["extraction"]["completion_tokens"] == 10
+
+
+def test_reports_are_written_as_json_or_prometheus(tmp_path):
+    metrics = PipelineMetrics()
+    with metrics.stage("save"):
+        metrics.increment("extraction.fallbacks", 2)
+    report = metrics.report({"cache": {"hits": 3, "misses": 1}})
+
+    json_path = PipelineMetrics.write_report(report, str(tmp_path / "run.json"))
+    with open(json_path, encoding="utf-8") as f:
+        assert json.load(f)["counters"] == {"extraction.fallbacks": 2}
+
+    prom_path = PipelineMetrics.write_report(report, str(tmp_path / "run.prom"))
+    with open(prom_path, encoding="utf-8") as f:
+        text = f.read()
+    assert 'kg_stage_count_total{stage="save"} 1' in text
+    assert 'kg_events_total{event="extraction.fallbacks"} 2' in text
+    assert 'kg_cache_lookups_total{result="hit"} 3' in text
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["run.json", "run.prom"]
@@ -0,0 +1,137 @@
+"""Provider scheduler: quotas, rate-limit failover, cooldowns and backend specs"""
+import pytest
+
+from pipeline_metrics import PipelineMetrics
+from provider_scheduler import (
+    AllProvidersBusyError, ProviderBackend, ProviderScheduler, TokenBucket, build_backends, is_throttling_error,
+    parse_backend_spec
+)
+
+
+class RateLimitError(Exception):
+    status_code = 429
+
+
+class FakeProvider:
+    """Answers with its name, or raises the queued errors first"""
+
+    def __init__(self, name, errors=(), stream_pieces=1):
+        self.name = name
+        self.errors = list(errors)
+        self.stream_pieces = stream_pieces
+        self.calls = 0
+
+    def generate_content(self, prompt, *args, **kwargs):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return self.name
+
+    def generate_content_stream(self, prompt, *args, **kwargs):
+        answer = self.generate_content(prompt)
+        for index in range(self.stream_pieces):
+            if index and self.errors:
+                raise self.errors.pop(0)
+            yield answer
+
+    def get_provider_info(self):
+        return {"provider": "fake", "content_model": self.name, "search_model": self.name}
+
+
+def test_throttling_errors_are_recognized():
+    assert is_throttling_error(RateLimitError("slow down"))
+    assert is_throttling_error(RuntimeError("429 RESOURCE_EXHAUSTED: Quota exceeded"))
+    assert is_throttling_error(RuntimeError("The model is overloaded"))
+    assert not is_throttling_error(ValueError("invalid JSON in request"))
+
+
+def test_token_bucket_waits_for_the_missing_units():
+    bucket = TokenBucket(per_minute=60, burst_seconds=5)
+    bucket._updated = 0.0
+    assert bucket.capacity == 5 and bucket.wait_seconds(5, 0.0) == 0.0
+    bucket.take(7, 0.0)
+    assert bucket.wait_seconds(1, 0.0) == pytest.approx(3.0)
+    # Larger than the bucket: waits for a full bucket instead of forever
+    assert bucket.wait_seconds(100, 1.0) == pytest.approx(6.0)
+    bucket.drain(10.0)
+    assert bucket.level == 0.0
+
+
+def test_backend_specs():
+    assert parse_backend_spec("gemini:rpm=15:tpm=1000000:weight=2:name=free") == {
+        "provider": "gemini", "requests_per_minute": 15.0, "tokens_per_minute": 1000000.0, "weight": 2.0,
+        "name": "free"}
+    with pytest.raises(ValueError):
+        parse_backend_spec("gemini:rps=3")
+
+    adapter = FakeProvider("direct")
+    backends = build_backends(["fake:rpm=60", {"provider": "fake", "weight": 0.5}, adapter],
+                              lambda provider: FakeProvider(provider))
+    assert [backend.name for backend in backends] == ["fake", "fake_2", "fake_3"]
+    assert backends[0].requests.rate == 1.0 and backends[1].weight == 0.5 and backends[2].adapter is adapter
+
+
+def test_calls_spill_over_when_a_backend_runs_out_of_quota():
+    # 6 requests per minute with a 10s burst: one call, then the backend has to wait
+    fast, slow = FakeProvider("fast"), FakeProvider("slow")
+    backends = [ProviderBackend(fast, "fast", requests_per_minute=6), ProviderBackend(slow, "slow")]
+    backends[0].latency, backends[1].latency = 0.1, 1.0
+    scheduler = ProviderScheduler(backends)
+    assert [scheduler.generate_content("prompt") for _ in range(3)] == ["fast", "slow", "slow"]
+
+
+def test_rate_limited_call_fails_over_and_cools_the_backend_down():
+    metrics = PipelineMetrics()
+    first, second = FakeProvider("first", [RateLimitError("quota")]), FakeProvider("second")
+    backends = [ProviderBackend(first, "first", requests_per_minute=600, weight=10), ProviderBackend(second, "second")]
+    scheduler = ProviderScheduler(backends, metrics=metrics, cooldown_seconds=60)
+
+    assert scheduler.generate_content("prompt") == "second"
+    assert backends[0].throttled == 1 and backends[0].requests.level <= 0
+    assert scheduler.stats()["first"]["cooling_down"]
+    # Still cooling down, so the preferred backend is skipped
+    assert scheduler.generate_content("prompt") == "second" and first.calls == 1
+    assert metrics.counters["scheduler.failovers"] == 1
+    assert metrics.counters["scheduler.throttled.first"] == 1
+
+
+def test_other_errors_are_raised_without_failover():
+    failing = FakeProvider("failing", [ValueError("bad request")])
+    scheduler = ProviderScheduler([ProviderBackend(failing, "failing", weight=10),
+                                   ProviderBackend(FakeProvider("other"), "other")])
+    with pytest.raises(ValueError):
+        scheduler.generate_content("prompt")
+    assert scheduler.backends[0].error_rate > 0 and scheduler.backends[0].in_flight == 0
+
+
+def test_every_backend_gets_one_chance_before_a_rate_limit_is_raised():
+    providers = [FakeProvider(name, [RateLimitError("429")]) for name in ("a", "b")]
+    scheduler = ProviderScheduler([ProviderBackend(provider, provider.name) for provider in providers])
+    with pytest.raises(RateLimitError):
+        scheduler.generate_content("prompt")
+    assert [provider.calls for provider in providers] == [1, 1]
+
+
+def test_busy_error_when_no_quota_comes_back_in_time():
+    scheduler = ProviderScheduler([ProviderBackend(FakeProvider("only"), "only", requests_per_minute=1)],
+                                  max_wait_seconds=0.5)
+    scheduler.generate_content("prompt")
+    with pytest.raises(AllProvidersBusyError):
+        scheduler.generate_content("prompt")
+
+
+def test_streams_fail_over_only_before_the_first_piece():
+    first = FakeProvider("first", [RateLimitError("quota")])
+    scheduler = ProviderScheduler([ProviderBackend(first, "first", weight=10),
+                                   ProviderBackend(FakeProvider("second"), "second")])
+    assert list(scheduler.generate_content_stream("prompt")) == ["second"]
+
+    broken = FakeProvider("broken", stream_pieces=2)
+    scheduler = ProviderScheduler([ProviderBackend(broken, "broken", weight=10),
+                                   ProviderBackend(FakeProvider("spare"), "spare")])
+    stream = scheduler.generate_content_stream("prompt")
+    assert next(stream) == "broken"
+    broken.errors.append(RateLimitError("quota"))
+    with pytest.raises(RateLimitError):
+        next(stream)
+    assert scheduler.backends[1].calls == 0
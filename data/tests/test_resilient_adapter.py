@@ -0,0 +1,89 @@
+"""Retries, timeouts, hedging and the circuit breaker of ResilientAdapter"""
+import threading
+import time
+
+import pytest
+
+from resilient_adapter import CircuitBreaker, CircuitOpenError, ModelCallTimeout, ResilientAdapter
+
+
+class ScriptedAdapter:
+    """Answers with the next scripted outcome: a string, an exception, or a (delay, outcome) pair"""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt, *args, **kwargs):
+        with self._lock:
+            outcome = self.outcomes[min(self.calls, len(self.outcomes) - 1)]
+            self.calls += 1
+        if isinstance(outcome, tuple):
+            delay, outcome = outcome
+            time.sleep(delay)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+def resilient(adapter, **options):
+    options.setdefault("backoff_base", 0.0)
+    return ResilientAdapter(adapter, **options)
+
+
+def test_retries_until_an_attempt_succeeds():
+    adapter = ScriptedAdapter(RuntimeError("1"), RuntimeError("2"), "ok")
+    wrapped = resilient(adapter, max_retries=2)
+    assert wrapped.generate_content("p") == "ok"
+    assert adapter.calls == 3
+    assert wrapped.breaker.consecutive_failures == 0
+
+
+def test_breaker_counts_each_failed_call_once():
+    adapter = ScriptedAdapter(RuntimeError("down"))
+    wrapped = resilient(adapter, max_retries=2, breaker=CircuitBreaker(failure_threshold=2, reset_seconds=60))
+
+    with pytest.raises(RuntimeError):
+        wrapped.generate_content("p")
+    assert adapter.calls == 3
+    assert wrapped.breaker.stats() == {"state": "closed", "consecutive_failures": 1, "times_opened": 0}
+
+    with pytest.raises(RuntimeError):
+        wrapped.generate_content("p")
+    assert wrapped.breaker.state == "open"
+
+    with pytest.raises(CircuitOpenError):
+        wrapped.generate_content("p")
+    assert adapter.calls == 6
+
+
+def test_half_open_trial_call_closes_the_circuit():
+    adapter = ScriptedAdapter(RuntimeError("down"), "ok")
+    wrapped = resilient(adapter, max_retries=0, breaker=CircuitBreaker(failure_threshold=1, reset_seconds=0.05))
+    with pytest.raises(RuntimeError):
+        wrapped.generate_content("p")
+    with pytest.raises(CircuitOpenError):
+        wrapped.generate_content("p")
+    time.sleep(0.06)
+    assert wrapped.generate_content("p") == "ok"
+    assert wrapped.breaker.state == "closed"
+
+
+def test_slow_attempts_time_out():
+    wrapped = resilient(ScriptedAdapter((0.5, "late")), timeout=0.05, max_retries=0)
+    with pytest.raises(ModelCallTimeout):
+        wrapped.generate_content("p")
+
+
+def test_hedge_answers_when_the_primary_is_slow():
+    adapter = ScriptedAdapter((1.0, "slow"), (0.0, "hedge"))
+    wrapped = resilient(adapter, hedge_percentile=0.5, hedge_min_samples=1)
+    wrapped.latencies.add(0.01)
+    assert wrapped.generate_content("p") == "hedge"
+    assert adapter.calls == 2
+
+
+def test_stream_without_native_streaming_yields_the_answer():
+    wrapped = resilient(ScriptedAdapter(RuntimeError("once"), "whole answer"), max_retries=1)
+    assert "".join(wrapped.generate_content_stream("p")) == "whole answer"
@@ -0,0 +1,94 @@
+"""ResponseCache keys, expiry and LRU eviction; CachedAIAdapter hits and misses"""
+import os
+import time
+
+from response_cache import CachedAIAdapter, ResponseCache
+
+
+class CountingAdapter:
+    def __init__(self, answer="answer"):
+        self.answer = answer
+        self.calls = 0
+
+    def generate_content(self, prompt, *args, **kwargs):
+        self.calls += 1
+        return self.answer
+
+    def get_provider_info(self):
+        return {"provider": "test", "content_model": "model-a"}
+
+
+def entry_files(cache_dir):
+    return sorted(name for _, _, files in os.walk(cache_dir) for name in files)
+
+
+def test_keys_separate_every_part():
+    assert ResponseCache.make_key("ab", "c", "p") != ResponseCache.make_key("a", "bc", "p")
+    assert ResponseCache.make_key("p", "m", "x") == ResponseCache.make_key("p", "m", "x")
+
+
+def test_round_trip_and_counters(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    assert cache.get("ab" * 32) is None
+    cache.set("ab" * 32, "réponse", {"provider": "test"})
+    assert cache.get("ab" * 32) == "réponse"
+    assert cache.stats() == {"hits": 1, "misses": 1, "writes": 1, "evictions": 0, "hit_rate": 0.5}
+
+
+def test_expired_entries_are_misses(tmp_path):
+    cache = ResponseCache(str(tmp_path), max_age_seconds=0.05)
+    cache.set("cd" * 32, "old")
+    time.sleep(0.1)
+    assert cache.get("cd" * 32) is None
+    assert entry_files(tmp_path) == []
+
+
+def test_eviction_removes_least_recently_used_first(tmp_path):
+    cache = ResponseCache(str(tmp_path), max_bytes=10 ** 6)
+    keys = [f"{i:02x}" * 32 for i in range(3)]
+    for age, key in zip((30, 20, 10), keys):
+        cache.set(key, "x" * 1000)
+        path = cache._entry_path(key)
+        os.utime(path, (time.time() - age, time.time() - age))
+    # Reading the oldest entry makes it the most recently used
+    assert cache.get(keys[0]) is not None
+
+    cache.max_bytes = sum(os.path.getsize(cache._entry_path(key)) for key in (keys[0], keys[2]))
+    assert cache.evict() == 1
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) is not None and cache.get(keys[2]) is not None
+
+
+def test_size_scan_runs_every_interval(tmp_path):
+    cache = ResponseCache(str(tmp_path), max_bytes=0)
+    cache.EVICTION_SCAN_INTERVAL = 3
+    for i in range(3):
+        cache.set(f"{i:02x}" * 32, "value")
+    assert entry_files(tmp_path) == []
+    assert cache.evictions == 3
+
+
+def test_adapter_serves_repeated_prompts_from_the_cache(tmp_path):
+    adapter = CountingAdapter()
+    cached = CachedAIAdapter(adapter, ResponseCache(str(tmp_path)))
+    assert cached.generate_content("prompt") == "answer"
+    assert cached.generate_content("prompt") == "answer"
+    assert cached.generate_content("prompt", temperature=0.5) == "answer"
+    assert "".join(cached.generate_content_stream("prompt")) == "answer"
+    assert adapter.calls == 2
+
+
+def test_models_do_not_share_entries(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    CachedAIAdapter(CountingAdapter("a"), cache).generate_content("prompt")
+    other = CountingAdapter("b")
+    other.get_provider_info = lambda: {"provider": "test", "content_model": "model-b"}
+    assert CachedAIAdapter(other, cache).generate_content("prompt") == "b"
+
+
+def test_empty_answers_are_not_cached(tmp_path):
+    adapter = CountingAdapter("  ")
+    cached = CachedAIAdapter(adapter, ResponseCache(str(tmp_path)))
+    cached.generate_content("prompt")
+    cached.generate_content("prompt")
+    assert adapter.calls == 2
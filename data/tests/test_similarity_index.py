@@ -0,0 +1,94 @@
+"""Entity similarity index: exact and LSH queries, graph replacement, type votes and persistence"""
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from similarity_index import SimilarityIndex, hash_vectors  # noqa: E402
+
+LORE = [
+    {"id": "e1", "name": "Knox Ironlaw", "type": "person", "description": "Leader of the Iron Council"},
+    {"id": "e2", "name": "Maritime Law", "type": "knowledge"},
+    {"id": "e3", "name": "Harbor District", "type": "location"},
+]
+GUILDS = [
+    {"id": "e1", "name": "Glass Guild", "type": "organization"},
+    {"id": "e2", "name": "Knox Iron-Law", "type": "person"},
+]
+
+
+def make_index(**options):
+    index = SimilarityIndex(**options)
+    index.add_graph({"entities": LORE}, "lore")
+    index.add_graph({"entities": GUILDS}, "guilds")
+    return index
+
+
+def test_vectors_are_normalized_and_insensitive_to_case_and_punctuation():
+    vectors = hash_vectors([("Knox Ironlaw", ""), ("knox  ironlaw!", ""), ("Glass Guild", "")])
+    assert np.allclose(np.linalg.norm(vectors, axis=1), 1.0)
+    assert vectors[0] @ vectors[1] == pytest.approx(1.0)
+    assert vectors[0] @ vectors[2] < 0.5
+
+
+def test_query_ranks_spelling_variants_first_and_filters():
+    index = make_index()
+    results = index.query("Knox Ironlaw", k=2)
+    assert [(result["graph"], result["id"]) for result in results] == [("lore", "e1"), ("guilds", "e2")]
+    # The description words count a little, so the exact name is not a perfect match
+    assert 0.95 < results[0]["score"] < 1.0 and results[1]["score"] < results[0]["score"]
+
+    assert [result["id"] for result in index.query("Knox Ironlaw", k=5, exclude_graph="lore")][0] == "e2"
+    assert {result["type"] for result in index.query("Knox Ironlaw", k=5, types=["location"])} == {"location"}
+    assert index.query("Knox Ironlaw", types=["unknown_type"]) == []
+
+
+def test_add_graph_replaces_the_previous_version():
+    index = make_index()
+    index.add_graph({"entities": [{"id": "x", "name": "Port Aster", "type": "location"}]}, "lore")
+    assert len(index) == 3
+    assert {result["graph"] for result in index.query("Port Aster", k=10)} == {"lore", "guilds"}
+    assert index.query("Port Aster", k=1)[0]["id"] == "x"
+    assert index.remove_graph("lore") == 1 and index.remove_graph("missing") == 0
+    assert index.ids == ["e1", "e2"]
+
+
+def test_lsh_search_finds_indexed_entities_among_many():
+    rng = np.random.default_rng(1)
+    index = SimilarityIndex(ann_threshold=0)
+    syllables = ["ka", "ro", "mi", "tel", "vor", "zan", "quo", "ith", "lu", "bex"]
+    for graph in range(6):
+        index.add_entities([{"id": f"g{graph}e{item}",
+                             "name": " ".join("".join(rng.choice(syllables, 3)) for _ in range(2))}
+                            for item in range(500)], f"g{graph}")
+    assert len(index) == 3000 and len(index._vectors) >= 3000
+
+    for row in rng.choice(len(index), 20, replace=False).tolist():
+        name = index.names[row]
+        approximate = index.query(name, k=1, exact=False)[0]
+        assert approximate["name"] == name and approximate["score"] == pytest.approx(1.0)
+        assert approximate["score"] == index.query(name, k=1, exact=True)[0]["score"]
+
+
+def test_type_vote_needs_close_and_agreeing_neighbors():
+    index = SimilarityIndex()
+    index.add_entities([{"id": "a", "name": "Python programming", "type": "skill"},
+                        {"id": "b", "name": "Python programmer", "type": "skill"},
+                        {"id": "c", "name": "Python programming club", "type": "organization"}], "g")
+    assert index.vote_type({"name": "Python programming"}, ["skill", "organization"]) == "skill"
+    assert index.vote_type({"name": "Python programming"}, ["skill", "organization"], min_share=0.9) is None
+    assert index.vote_type({"name": "Harbor District"}, ["skill", "organization"]) is None
+
+
+def test_save_and_load_round_trip(tmp_path):
+    index = make_index(ann_threshold=3, seed=7)
+    path = str(tmp_path / "index.npz")
+    assert index.dirty
+    index.save(path)
+    assert not index.dirty
+
+    loaded = SimilarityIndex.open(path)
+    assert (loaded.ids, loaded.graph_names, loaded.seed, loaded.ann_threshold) == (index.ids, index.graph_names, 7, 3)
+    assert loaded.query("Glass Guild", k=3) == index.query("Glass Guild", k=3)
+    loaded.add_graph({"entities": [{"id": "y", "name": "Glass Guild Hall", "type": "location"}]}, "extra")
+    assert loaded.dirty and loaded.query("Glass Guild Hall", k=1)[0]["id"] == "y"
+    assert len(SimilarityIndex.open(str(tmp_path / "missing.npz"))) == 0
@@ -0,0 +1,71 @@
+"""IncrementalGraphParser on responses split at every possible point"""
+import json
+import random
+import time
+
+import pytest
+
+from stream_parser import IncrementalGraphParser
+
+GRAPH = {
+    "entities": [
+        {"id": "a", "name": "Quote \" and brace } inside", "type": "person"},
+        {"id": "b", "name": "Back\\slash [x]", "type": "skill", "extra": {"nested": [1, {"k": "v"}]}},
+    ],
+    "summary": "entities: not an array",
+    "relationships": [{"source": "a", "target": "b", "type": "has_skill"}],
+}
+RESPONSE = "```json\n" + json.dumps(GRAPH, indent=1) + "\n```\ntrailing {chatter}"
+
+
+def feed_all(pieces):
+    parser = IncrementalGraphParser()
+    events = []
+    for piece in pieces:
+        events.extend(parser.feed(piece))
+    return events, parser.result()
+
+
+def expected_events():
+    return [("entity", item) for item in GRAPH["entities"]] + \
+           [("relationship", item) for item in GRAPH["relationships"]]
+
+
+@pytest.mark.parametrize("split", range(0, len(RESPONSE), 7))
+def test_any_split_point_gives_the_same_events(split):
+    events, result = feed_all([RESPONSE[:split], RESPONSE[split:]])
+    assert events == expected_events()
+    assert result == GRAPH
+
+
+def test_one_character_at_a_time():
+    events, result = feed_all(list(RESPONSE))
+    assert events == expected_events()
+    assert result == GRAPH
+
+
+def test_random_pieces():
+    rng = random.Random(3)
+    cuts = sorted(rng.sample(range(1, len(RESPONSE)), 25))
+    events, result = feed_all([RESPONSE[i:j] for i, j in zip([0] + cuts, cuts + [len(RESPONSE)])])
+    assert events == expected_events()
+    assert result == GRAPH
+
+
+def test_truncated_stream_still_yields_completed_items():
+    cut = RESPONSE.index('"relationships"')
+    events, result = feed_all([RESPONSE[:cut]])
+    assert [kind for kind, _ in events] == ["entity", "entity"]
+    assert result is None
+
+
+def test_many_small_pieces_parse_in_linear_time():
+    graph = {"entities": [{"id": str(i), "name": f"Entity {i}", "type": "concept"} for i in range(20000)],
+             "relationships": []}
+    text = json.dumps(graph)
+    pieces = [text[i:i + 4] for i in range(0, len(text), 4)]
+    started = time.perf_counter()
+    events, result = feed_all(pieces)
+    assert len(events) == 20000
+    assert result == graph
+    assert time.perf_counter() - started < 5
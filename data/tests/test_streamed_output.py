@@ -0,0 +1,55 @@
+"""Streamed page and data output: chunked serialization matches the one-piece encoding"""
+import gzip
+import io
+
+import pytest
+
+from visualization_template import (
+    STREAM_CHUNK_ITEMS, VIEWER_JS, VIEWER_LARGE_JS, iter_script_json, render_inline_page, script_json,
+    write_inline_page
+)
+
+
+@pytest.mark.parametrize("value", [
+    [], {}, [1], list(range(7)), {f"k{index}": [index, "</script>"] for index in range(7)},
+    "plain string", None, 3.5, [{"name": "Ünïcode </b>"}] * 5
+])
+def test_chunks_join_to_the_one_piece_encoding(value):
+    chunks = list(iter_script_json(value, chunk_items=3))
+    assert "".join(chunks) == script_json(value)
+    if isinstance(value, (list, dict)) and len(value) > 3:
+        assert len(chunks) > 1
+
+
+class RecordingStream(io.StringIO):
+    def __init__(self):
+        super().__init__()
+        self.largest_write = 0
+
+    def write(self, text):
+        self.largest_write = max(self.largest_write, len(text))
+        return super().write(text)
+
+
+def test_inline_page_is_written_in_bounded_pieces():
+    count = 5 * STREAM_CHUNK_ITEMS
+    entities = [{"id": f"e{index}", "name": f"Entity {index}", "type": "skill"} for index in range(count)]
+    relationships = [{"source": "e0", "target": f"e{index}", "type": "uses"} for index in range(1, count)]
+    stream = RecordingStream()
+    write_inline_page(stream, entities, relationships, "summary", {})
+    assert stream.getvalue() == render_inline_page(entities, relationships, "summary", {})
+    # No single write holds the serialized entities, only the static viewer parts are written whole
+    assert stream.largest_write < len(script_json(entities)) / 2
+    assert stream.largest_write <= max(len(VIEWER_JS), len(VIEWER_LARGE_JS)) + 64
+
+
+def test_generator_streams_gzipped_pages(tmp_path):
+    from knowledge_graph_generator import KnowledgeGraphGenerator
+    from local_adapter import LocalFakeAdapter
+
+    generator = KnowledgeGraphGenerator(ai_provider=LocalFakeAdapter(), verbose=False, precompute_layout=False)
+    graph = {"entities": [{"id": "a", "name": "A", "type": "person"}], "relationships": [], "summary": "s"}
+    page = generator.generate_interactive_visualization(graph, str(tmp_path / "g.html.gz"))
+    with open(page, "rb") as f:
+        html = gzip.decompress(f.read()).decode("utf-8")
+    assert html == render_inline_page(graph["entities"], [], "s", {})
@@ -0,0 +1,59 @@
+"""Chunking of long inputs and the chunked map-reduce extraction"""
+from knowledge_graph_generator import KnowledgeGraphGenerator
+from local_adapter import LocalFakeAdapter
+from text_chunking import split_into_blocks, split_into_sections, split_text_into_chunks
+
+
+def lore(sections: int, paragraph_chars: int = 400) -> str:
+    parts = []
+    for index in range(sections):
+        sentence = f"Captain Orin Vale{index} sailed from Port Aster. "
+        body = (sentence * (paragraph_chars // len(sentence) + 1))[:paragraph_chars]
+        parts.append(f"## Chapter {index}\n\n{body}\n\n{body}")
+    return "\n\n".join(parts)
+
+
+def test_headings_start_blocks():
+    assert split_into_blocks("intro\n# Title\ntext\n\n1. Step one\nmore") == ["intro", "# Title\ntext", "1. Step one\nmore"]
+
+
+def test_chunks_respect_the_limit_and_keep_all_text():
+    text = lore(12)
+    chunks = split_text_into_chunks(text, 1000)
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 1000 for chunk in chunks)
+    assert "".join(chunks).replace("\n", "").replace(" ", "") == \
+        "".join(split_into_blocks(text)).replace("\n", "").replace(" ", "")
+
+
+def test_sections_start_chunks_once_half_full():
+    chunks = split_text_into_chunks(lore(6, paragraph_chars=200), 1000)
+    assert all(chunk.startswith("## Chapter") for chunk in chunks)
+
+
+def test_oversized_paragraphs_split_on_sentences_then_hard():
+    sentence = "A" * 30 + ". "
+    chunks = split_text_into_chunks(sentence * 10 + "B" * 250, 100)
+    assert all(len(chunk) <= 100 for chunk in chunks)
+    assert chunks[0].startswith("A" * 30 + ".")
+    assert "".join(chunks).count("B") == 250
+
+
+def test_sections_only_depend_on_markdown_headings():
+    text = "Preamble\n\n# One\nfirst\n\n1. not a heading here\n\n## Two\nsecond\n"
+    assert split_into_sections(text) == ["Preamble", "# One\nfirst\n\n1. not a heading here", "## Two\nsecond"]
+    edited = text.replace("first", "first, edited")
+    assert split_into_sections(edited)[2] == split_into_sections(text)[2]
+
+
+def test_chunked_extraction_merges_entities_seen_in_several_chunks():
+    generator = KnowledgeGraphGenerator(ai_provider=LocalFakeAdapter(), verbose=False, max_retries=0,
+                                        chunk_size_chars=1000)
+    text = "\n\n".join(f"## Part {i}\n\nKnox Ironlaw met Mira Vale{i} in the Harbor District." for i in range(40))
+    graph = generator.extract_knowledge_graph_chunked(text)
+    names = [entity["name"] for entity in graph["entities"]]
+    assert not graph.get("fallback")
+    assert names.count("Knox Ironlaw") == 1
+    assert len([name for name in names if name.startswith("Mira Vale")]) == 40
+    ids = {entity["id"] for entity in graph["entities"]}
+    assert all(r["source"] in ids and r["target"] in ids for r in graph["relationships"])
@@ -0,0 +1,80 @@
+"""Input compaction: markup cleaning, repeated lines and extractive compaction to a token budget"""
+from pipeline_metrics import estimate_tokens
+from text_compaction import clean_text, compact_text, compact_to_budget
+
+MARKDOWN = """# Knox Ironlaw
+
+
+**Leader** of the   *Iron Council*, see [the charter](https://example.com/charter).
+
+---
+
+| Skill | Level |
+|-------|:-----:|
+| Maritime Law | Expert |
+| Navigation | Novice | Fleet |
+
+- <b>Harbor</b> District
+> Quoted `Old Docks` note
+"""
+
+
+def test_clean_text_strips_markup_but_keeps_the_words():
+    assert clean_text(MARKDOWN).splitlines() == [
+        "# Knox Ironlaw",
+        "",
+        "Leader of the Iron Council, see the charter.",
+        "",
+        "Skill: Level",
+        "Maritime Law: Expert",
+        "Navigation; Novice; Fleet",
+        "",
+        "Harbor District",
+        "Quoted Old Docks note",
+    ]
+
+
+def test_repeated_long_lines_are_dropped_across_chunks():
+    header = "Harbor Council Annual Report 2024 - page header"
+    seen = set()
+    first = clean_text(f"{header}\nKnox Ironlaw leads.\n{header}\nSkills\nSkills", seen)
+    second = clean_text(f"{header}\nMira Vale founded the Glass Guild.", seen)
+    assert first.splitlines() == [header, "Knox Ironlaw leads.", "Skills", "Skills"]
+    assert second == "Mira Vale founded the Glass Guild."
+
+
+def test_compaction_keeps_headings_and_entity_dense_sentences_in_order():
+    filler = "It was a quiet day and nothing much happened at all around here. " * 6
+    text = "\n".join([
+        "# Harbor Lore",
+        filler.strip(),
+        "Knox Ironlaw met Mira Vale at the Glass Guild in Port Aster.",
+        filler.strip(),
+        "The Iron Council signed the Treaty of 1842 with Knox Ironlaw.",
+    ])
+    compacted = compact_to_budget(text, 60)
+    lines = compacted.splitlines()
+    assert estimate_tokens(compacted) <= 60
+    assert lines[0] == "# Harbor Lore"
+    # Leftover budget goes to filler sentences, but only after the entity-dense ones are in
+    assert lines.index("Knox Ironlaw met Mira Vale at the Glass Guild in Port Aster.") < \
+        lines.index("The Iron Council signed the Treaty of 1842 with Knox Ironlaw.")
+    assert compacted.count("quiet day") < text.count("quiet day")
+    assert compact_to_budget(text, 10_000) == text
+
+
+def test_long_lines_are_compacted_sentence_by_sentence():
+    line = " ".join(["Nothing happened on that long and uneventful afternoon by the sea."] * 5 +
+                    ["Knox Ironlaw founded the Iron Council."])
+    compacted = compact_to_budget(line, 12)
+    assert compacted == "Knox Ironlaw founded the Iron Council."
+
+
+def test_compact_text_reports_token_figures():
+    text, stats = compact_text(MARKDOWN)
+    assert not stats["compacted"]
+    assert stats["tokens_after"] == stats["tokens_cleaned"] < stats["tokens_before"]
+    assert stats["tokens_saved"] == stats["tokens_before"] - stats["tokens_after"]
+
+    _, stats = compact_text(MARKDOWN, token_budget=10)
+    assert stats["compacted"] and stats["tokens_after"] <= stats["tokens_cleaned"]
@@ -0,0 +1,64 @@
+"""Viewer pages and data files: escaping, split-mode data, atomic writes"""
+import gzip
+import json
+import os
+import re
+import stat
+
+import pytest
+
+from visualization_template import (
+    VIEWER_JS_FILE, encode_graph_payload, open_output, render_inline_page, render_split_page,
+    write_graph_payload, write_viewer_assets
+)
+
+ENTITIES = [{"id": "a", "name": "</script><b>A</b>", "type": "person"}, {"id": "b", "name": "B", "type": "skill"}]
+RELATIONSHIPS = [{"source": "a", "target": "b", "type": "has_skill"}]
+
+
+def test_split_page_embeds_data_file_as_a_js_string():
+    page = render_split_page('my "graph"</script>.graph.json', 2, 1, "<summary>")
+    url = re.search(r'fetch\((".*?")\)', page).group(1)
+    assert json.loads(url) == "my%20%22graph%22%3C/script%3E.graph.json"
+    assert page.count("</script>") == len(re.findall(r"<script[ >]", page))
+    assert VIEWER_JS_FILE in page
+    assert "&lt;summary&gt;" in page
+
+
+def test_inline_page_cannot_close_its_script():
+    page = render_inline_page(ENTITIES, RELATIONSHIPS, "summary", {})
+    assert page.count("</script>") == len(re.findall(r"<script[ >]", page))
+    assert "<\\/script><b>A<\\/b>" in page
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_graph_payload_round_trip(tmp_path, compress):
+    path = tmp_path / "g.graph.json"
+    payload = encode_graph_payload(ENTITIES, RELATIONSHIPS, "summary", {"a": [0.0, 1.0]})
+    write_graph_payload(str(path), payload, compress)
+    raw = path.read_bytes()
+    decoded = json.loads(gzip.decompress(raw) if compress else raw)
+    assert decoded == payload
+    assert [decoded["types"][entity["t"]] for entity in decoded["entities"]] == ["person", "skill"]
+
+
+def test_open_output_leaves_the_file_alone_when_writing_fails(tmp_path):
+    path = tmp_path / "page.html"
+    path.write_text("previous", encoding="utf-8")
+    os.chmod(path, 0o640)
+    with pytest.raises(RuntimeError):
+        with open_output(str(path)) as stream:
+            stream.write("partial")
+            raise RuntimeError("boom")
+    assert path.read_text(encoding="utf-8") == "previous"
+    assert os.listdir(tmp_path) == ["page.html"]
+
+    with open_output(str(path)) as stream:
+        stream.write("new")
+    assert path.read_text(encoding="utf-8") == "new"
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o640
+
+
+def test_viewer_assets_are_world_readable(tmp_path):
+    write_viewer_assets(str(tmp_path))
+    assert stat.S_IMODE(os.stat(tmp_path / VIEWER_JS_FILE).st_mode) == 0o644
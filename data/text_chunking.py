@@ -0,0 +1,100 @@
+import re
+from typing import List
+
+# Markdown headings and numbered section titles such as "1. Background" start a new block
+_HEADING_PATTERN = re.compile(r'^\s{0,3}(#{1,6}\s|\d+[.)]\s+\S)')
+_MARKDOWN_HEADING_PATTERN = re.compile(r'^\s{0,3}#{1,6}\s+\S')
+_SENTENCE_END_PATTERN = re.compile(r'(?<=[.!?。！？])\s*')
+
+
+def split_into_blocks(text: str) -> List[str]:
+    """Split text into paragraph blocks, treating every heading line as the start of a new block"""
+    blocks = []
+    current_lines = []
+
+    for line in text.splitlines():
+        if not line.strip():
+            if current_lines:
+                blocks.append("\n".join(current_lines))
+                current_lines = []
+            continue
+        if _HEADING_PATTERN.match(line) and current_lines:
+            blocks.append("\n".join(current_lines))
+            current_lines = []
+        current_lines.append(line.rstrip())
+
+    if current_lines:
+        blocks.append("\n".join(current_lines))
+    return blocks
+
+
+def _split_oversized_block(block: str, max_chars: int) -> List[str]:
+    """Break a single block that is larger than max_chars on sentence boundaries, then hard-split"""
+    pieces = []
+    current = ""
+    for sentence in _SENTENCE_END_PATTERN.split(block):
+        if not sentence:
+            continue
+        while len(sentence) > max_chars:
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(sentence[:max_chars])
+            sentence = sentence[max_chars:]
+        if current and len(current) + len(sentence) + 1 > max_chars:
+            pieces.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def split_text_into_chunks(text: str, max_chars: int = 6000) -> List[str]:
+    """
+    Pack paragraph/heading blocks into chunks of at most max_chars characters
+
+    A heading starts a new chunk once the current one is at least half full, so
+    sections tend to stay together instead of being cut at an arbitrary paragraph.
+    """
+    chunks = []
+    current_blocks = []
+    current_chars = 0
+
+    for block in split_into_blocks(text):
+        pieces = [block] if len(block) <= max_chars else _split_oversized_block(block, max_chars)
+        for piece in pieces:
+            starts_section = bool(_HEADING_PATTERN.match(piece))
+            too_big = current_chars + len(piece) + 2 > max_chars
+            section_break = starts_section and current_chars >= max_chars // 2
+            if current_blocks and (too_big or section_break):
+                chunks.append("\n\n".join(current_blocks))
+                current_blocks = []
+                current_chars = 0
+            current_blocks.append(piece)
+            current_chars += len(piece) + 2
+
+    if current_blocks:
+        chunks.append("\n\n".join(current_blocks))
+    return chunks
+
+
+def split_into_sections(text: str) -> List[str]:
+    """Split Markdown text at heading lines; each section is a heading plus everything up to the next one
+
+    Text before the first heading forms its own section. Unlike chunking, section
+    boundaries only depend on the headings, so editing one section never moves another.
+    """
+    sections = []
+    current_lines = []
+
+    for line in text.splitlines():
+        if _MARKDOWN_HEADING_PATTERN.match(line) and any(l.strip() for l in current_lines):
+            sections.append("\n".join(current_lines).strip())
+            current_lines = []
+        current_lines.append(line.rstrip())
+
+    if any(l.strip() for l in current_lines):
+        sections.append("\n".join(current_lines).strip())
+    return sections
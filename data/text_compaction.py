@@ -0,0 +1,195 @@
+"""Input compaction before extraction prompts are built
+
+Every character sent to the model costs tokens and prefill time. clean_text removes
+what carries no information for extraction, without changing the wording:
+
+- whitespace runs, trailing spaces and runs of blank lines;
+- Markdown noise: horizontal rules, table separator rows and cell pipes (a two-column
+  row becomes "key: value"), emphasis and code markers, bullets, blockquote markers,
+  link targets and HTML tags (headings are kept, chunking splits on them);
+- repeated lines such as page headers and copied boilerplate (the first copy stays).
+
+When a token budget is set and the cleaned text is still over it, compact_to_budget
+keeps the sentences with the most entity-like terms (capitalized phrases, acronyms,
+terms with digits, quoted or bracketed names, English glosses in CJK text), weighted
+by how often a term recurs in the document, and drops the rest, preserving order.
+Tokens are estimated locally with pipeline_metrics.estimate_tokens.
+"""
+import math
+import re
+from typing import Dict, List, Any, Optional, Set, Tuple
+
+from pipeline_metrics import estimate_tokens
+from text_chunking import _MARKDOWN_HEADING_PATTERN, _SENTENCE_END_PATTERN
+
+# Shorter lines ("Skills", "- Python") legitimately repeat; only longer repeats are dropped
+MIN_DUPLICATE_CHARS = 24
+# Lines longer than this are split into sentences for extractive compaction
+MAX_UNIT_CHARS = 240
+
+_SPACE_PATTERN = re.compile(r'[ \t 　]+')
+_RULE_PATTERN = re.compile(r'^\s{0,3}([-*_])(\s*\1){2,}\s*$')
+_TABLE_SEPARATOR_PATTERN = re.compile(r'^\s*\|?\s*:?-{2,}:?\s*(\|\s*:?-{2,}:?\s*)*\|?\s*$')
+_BULLET_PATTERN = re.compile(r'^\s*(?:[-*+•]|>+)\s+')
+_LINK_PATTERN = re.compile(r'!?\[([^\]]*)\]\([^)]*\)')
+_EMPHASIS_PATTERN = re.compile(r'(\*\*|__|`+)(.+?)\1')
+_ITALIC_PATTERN = re.compile(r'(?<![\w*])\*(?!\s)([^*\n]+?)(?<!\s)\*(?![\w*])')
+_HTML_TAG_PATTERN = re.compile(r'</?[A-Za-z][^>]*>')
+
+_ENTITY_TERM_PATTERNS = (
+    re.compile(r"\b[A-Z][\w'’&.+#-]*(?:\s+(?:of\s+|the\s+|de\s+)?[A-Z][\w'’&.+#-]*)*"),
+    re.compile(r"\b\w*\d\w*\b"),
+    re.compile(r"[《「『“\"]([^》」』”\"\n]{1,20})[》」』”\"]"),
+    re.compile(r"[（(]([A-Za-z][^）)\n]{0,40})[）)]"),
+)
+# Capitalized only because they start a sentence
+_TERM_STOP_WORDS = frozenset({"the", "a", "an", "this", "that", "these", "those", "it", "in", "on", "at", "for",
+                              "and", "but", "or", "as", "if", "when", "with", "he", "she", "they", "we", "i",
+                              "his", "her", "their", "our", "my", "to", "of", "by", "from", "after", "before"})
+
+
+def _clean_line(line: str) -> Optional[str]:
+    """Cleaned line; empty for a paragraph break, None for a line that is dropped altogether"""
+    line = _SPACE_PATTERN.sub(' ', line).strip()
+    if _TABLE_SEPARATOR_PATTERN.match(line):
+        return None
+    if not line or _RULE_PATTERN.match(line):
+        return ""
+    if line.startswith('|') or line.endswith('|'):
+        cells = [cell.strip() for cell in line.strip('|').split('|')]
+        cells = [cell for cell in cells if cell]
+        line = ": ".join(cells) if len(cells) == 2 else "; ".join(cells)
+    line = _BULLET_PATTERN.sub('', line)
+    line = _LINK_PATTERN.sub(r'\1', line)
+    line = _EMPHASIS_PATTERN.sub(r'\2', line)
+    line = _ITALIC_PATTERN.sub(r'\1', line)
+    line = _HTML_TAG_PATTERN.sub('', line)
+    return line.strip()
+
+
+def clean_text(text: str, seen_lines: Optional[Set[str]] = None) -> str:
+    """
+    Normalize whitespace, strip Markdown/HTML markup noise and drop repeated lines
+
+    Args:
+        text: Raw document text (or one chunk of it)
+        seen_lines: Keys of lines already emitted; pass the same set for all chunks of a
+            document so repeats across chunks (page headers and footers) are dropped too
+    """
+    seen = set() if seen_lines is None else seen_lines
+    lines = []
+    for raw_line in text.splitlines():
+        line = _clean_line(raw_line)
+        if line is None:
+            continue
+        if not line:
+            if lines and lines[-1]:
+                lines.append("")
+            continue
+        key = line.lower()
+        if len(key) >= MIN_DUPLICATE_CHARS and not _MARKDOWN_HEADING_PATTERN.match(line):
+            if key in seen:
+                continue
+            seen.add(key)
+        lines.append(line)
+    while lines and not lines[-1]:
+        lines.pop()
+    return "\n".join(lines)
+
+
+def _entity_terms(text: str) -> Set[str]:
+    terms = set()
+    for pattern in _ENTITY_TERM_PATTERNS:
+        for match in pattern.finditer(text):
+            term = (match.group(1) if pattern.groups else match.group(0)).strip().lower()
+            if term and term not in _TERM_STOP_WORDS:
+                terms.add(term)
+    return terms
+
+
+def _split_units(lines: List[str]) -> List[Tuple[int, str]]:
+    """(line index, text) of every sentence-sized unit; long lines are split on sentence ends"""
+    units = []
+    for index, line in enumerate(lines):
+        if not line:
+            continue
+        if len(line) <= MAX_UNIT_CHARS:
+            units.append((index, line))
+        else:
+            units.extend((index, sentence.strip()) for sentence in _SENTENCE_END_PATTERN.split(line)
+                         if sentence.strip())
+    return units
+
+
+def compact_to_budget(text: str, max_tokens: int) -> str:
+    """
+    Extractive compaction: keep the most entity-dense sentences that fit into max_tokens
+
+    Headings are always kept. Sentences are ranked by the document frequency weighted
+    count of their entity-like terms per square root of their token count, taken greedily
+    while they fit, and emitted in their original order.
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    lines = text.splitlines()
+    units = _split_units(lines)
+    unit_terms = [_entity_terms(unit) for _, unit in units]
+    document_frequency = {}
+    for terms in unit_terms:
+        for term in terms:
+            document_frequency[term] = document_frequency.get(term, 0) + 1
+
+    keep = set()
+    used_tokens = 0
+    candidates = []
+    for position, ((_, unit), terms) in enumerate(zip(units, unit_terms)):
+        tokens = estimate_tokens(unit) + 1
+        if _MARKDOWN_HEADING_PATTERN.match(unit):
+            keep.add(position)
+            used_tokens += tokens
+            continue
+        # Sentences without entity-like terms come last, but still fill whatever budget is left
+        score = sum(1.0 + math.log(document_frequency[term]) for term in terms)
+        candidates.append((score / math.sqrt(tokens), position, tokens))
+
+    for _, position, tokens in sorted(candidates, key=lambda candidate: (-candidate[0], candidate[1])):
+        if used_tokens + tokens <= max_tokens:
+            keep.add(position)
+            used_tokens += tokens
+
+    kept_lines = {}
+    for position in sorted(keep):
+        index, unit = units[position]
+        kept_lines.setdefault(index, []).append(unit)
+    output = []
+    for index, line in enumerate(lines):
+        if index in kept_lines:
+            output.append(" ".join(kept_lines[index]))
+        elif not line and output and output[-1]:
+            output.append("")
+    while output and not output[-1]:
+        output.pop()
+    return "\n".join(output)
+
+
+def compact_text(text: str, token_budget: Optional[int] = None,
+                 seen_lines: Optional[Set[str]] = None) -> Tuple[str, Dict[str, Any]]:
+    """
+    clean_text, then compact_to_budget when a budget is given; returns the text and token figures
+
+    Returns:
+        (text, {"tokens_before", "tokens_cleaned", "tokens_after", "tokens_saved", "compacted"})
+    """
+    tokens_before = estimate_tokens(text)
+    cleaned = clean_text(text, seen_lines)
+    tokens_cleaned = estimate_tokens(cleaned)
+    compacted = token_budget is not None and tokens_cleaned > token_budget
+    result = compact_to_budget(cleaned, token_budget) if compacted else cleaned
+    tokens_after = estimate_tokens(result)
+    return result, {
+        "tokens_before": tokens_before,
+        "tokens_cleaned": tokens_cleaned,
+        "tokens_after": tokens_after,
+        "tokens_saved": tokens_before - tokens_after,
+        "compacted": compacted
+    }
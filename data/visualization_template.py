@@ -0,0 +1,1932 @@
+"""HTML viewer for knowledge graph visualizations
+
+The page is split into a static viewer (VIEWER_CSS / VIEWER_JS), a small HTML shell
+and the graph data. The shell is compiled once per process; per graph only a handful
+of placeholders are filled in. The viewer reads its input from the globals
+entities, relationships, colorMap, layout and graphSummary, which are either inlined
+into the page or, in split mode, loaded from a compact data file next to a shared,
+content-versioned copy of the viewer assets that browsers can cache across graphs.
+Split pages fetch their data file, which browsers refuse for pages opened from file://,
+so they have to be served over HTTP (e.g. python -m http.server in the output directory).
+Graphs of LARGE_GRAPH_THRESHOLD entities or more get VIEWER_LARGE_JS, a canvas viewer
+that draws clusters as aggregate nodes until they are clicked or zoomed into.
+
+Pages and data files are streamed to disk: the static parts are written as they are and
+the graph is serialized STREAM_CHUNK_ITEMS entities or relationships at a time, so
+memory use does not grow with the size of the output.
+"""
+import gzip
+import hashlib
+import html
+import io
+import json
+import os
+import re
+import tempfile
+import urllib.parse
+from contextlib import contextmanager
+from itertools import islice
+from typing import Dict, List, Any, Optional, Iterable, Iterator, TextIO
+
+# Updated LinkedIn-style color mapping (matching HTML and prompt_templates.py)
+COLOR_MAP = {
+    'person': '#0A66C2',      # LinkedIn Blue
+    'skill': '#057642',       # Green for skills
+    'knowledge': '#FF8C00',   # Orange for knowledge domains
+    'tool': '#6441A4',        # Purple for tools and software
+    'qualification': '#1B6EC8',# Blue for qualifications and education
+    'role': '#8B5A3C',       # Brown for roles
+    'workplace': '#2D3748',   # Dark gray for workplaces and companies
+    'methodology': '#9B59B6', # Purple for methodologies
+    'other': '#5A6C7D',       # Gray for any remaining unclassified (should be rare now)
+    'default': '#5A6C7D'      # Default gray for unknown types
+}
+
+# Bump when the layout of the split-mode data file changes
+PAYLOAD_VERSION = 1
+
+# Entities, relationships or layout entries serialized per write when streaming
+STREAM_CHUNK_ITEMS = 500
+
+VIEWER_CSS = """
+        * {
+            margin: 0;
+            padding: 0;
+            box-sizing: border-box;
+        }
+        
+        body {
+            font-family: 'Segoe UI', 'Helvetica Neue', Arial, sans-serif;
+            background: #F4F2EE;
+            color: #000000;
+            line-height: 1.6;
+            overflow-x: auto;
+        }
+        
+        .linkedin-header {
+            background: #FFFFFF;
+            border-bottom: 1px solid #E6E6E6;
+            padding: 15px 0;
+            box-shadow: 0 2px 4px rgba(0,0,0,0.08);
+        }
+        
+        .container {
+            max-width: 1600px; /* Increased from 1200px to 1600px */
+            margin: 0 auto;
+            padding: 0 20px;
+        }
+        
+        .header-content {
+            display: flex;
+            align-items: center;
+            justify-content: space-between;
+        }
+        
+        .logo-section {
+            display: flex;
+            align-items: center;
+            gap: 15px;
+        }
+        
+        .linkedin-logo {
+            width: 40px;
+            height: 40px;
+            background: #0A66C2;
+            border-radius: 8px;
+            display: flex;
+            align-items: center;
+            justify-content: center;
+            color: white;
+            font-weight: bold;
+            font-size: 18px;
+        }
+        
+        .title {
+            font-size: 24px;
+            font-weight: 600;
+            color: #000000;
+        }
+        
+        .subtitle {
+            color: #666666;
+            font-size: 14px;
+            margin-top: 4px;
+        }
+        
+        .main-content {
+            background: #FFFFFF;
+            margin: 20px auto;
+            border-radius: 12px;
+            box-shadow: 0 2px 8px rgba(0,0,0,0.1);
+            overflow: hidden;
+        }
+        
+        .content-header {
+            padding: 16px 24px; /* Reduced vertical padding from 24px to 16px */
+            border-bottom: 1px solid #E6E6E6;
+            background: #FAFAFA;
+        }
+        
+        .summary {
+            font-size: 16px;
+            color: #333333;
+            margin-bottom: 20px;
+        }
+        
+        .controls {
+            display: flex;
+            gap: 12px;
+            flex-wrap: wrap;
+        }
+        
+                 .linkedin-btn {
+             background: #0A66C2;
+             color: white;
+             border: none;
+             padding: 8px 16px;
+             border-radius: 4px;
+             font-size: 14px;
+             font-weight: 500;
+             cursor: pointer;
+             transition: all 0.2s ease;
+             text-transform: none;
+             letter-spacing: 0;
+         }
+        
+        .linkedin-btn:hover {
+            background: #084A8A;
+            transform: translateY(-1px);
+        }
+        
+        .linkedin-btn.secondary {
+            background: #FFFFFF;
+            color: #0A66C2;
+            border: 1px solid #0A66C2;
+        }
+        
+        .linkedin-btn.secondary:hover {
+            background: #F1F5F9;
+        }
+        
+        .legend {
+            display: grid;
+            grid-template-columns: repeat(auto-fit, minmax(140px, 1fr));
+            gap: 12px;
+            margin-top: 20px;
+        }
+        
+                 .legend-item {
+             display: flex;
+             align-items: center;
+             gap: 8px;
+             padding: 8px 12px;
+             background: #FFFFFF;
+             border: 1px solid #E6E6E6;
+             border-radius: 6px;
+             font-size: 13px;
+             font-weight: 500;
+             cursor: pointer;
+             transition: all 0.2s ease;
+             user-select: none;
+         }
+         
+         .legend-item:hover {
+             background: #F8F9FA;
+             border-color: #0A66C2;
+             transform: translateY(-1px);
+         }
+         
+         .legend-item.active {
+             background: #E7F3FF;
+             border-color: #0A66C2;
+             color: #0A66C2;
+             font-weight: 600;
+         }
+         
+         .legend-item.inactive {
+             background: #F5F5F5;
+             border-color: #CCCCCC;
+             color: #999999;
+             opacity: 0.6;
+         }
+        
+        .legend-color {
+            width: 12px;
+            height: 12px;
+            border-radius: 50%;
+            flex-shrink: 0;
+        }
+        
+                          .graph-container {
+             position: relative;
+             padding: 10px; /* Reduced from 20px to 10px */
+             display: flex;
+             justify-content: center;
+             align-items: center;
+             min-height: 850px; /* Added minimum height */
+             width: 100%;
+             overflow: hidden;
+         }
+         
+         #graph {
+             background: #FFFFFF;
+             display: block;
+             border: 1px solid #E6E6E6;
+             border-radius: 8px;
+             margin: 0 auto;
+         }
+        
+        .info-panel {
+            position: fixed;
+            top: 50%;
+            right: 20px;
+            transform: translateY(-50%);
+            background: #FFFFFF;
+            border: 1px solid #E6E6E6;
+            border-radius: 12px;
+            padding: 20px;
+            max-width: 320px;
+            min-width: 280px;
+            box-shadow: 0 8px 24px rgba(0,0,0,0.15);
+            display: none;
+            z-index: 1000;
+            max-height: 70vh;
+            overflow-y: auto;
+        }
+        
+        .info-panel h3 {
+            color: #0A66C2;
+            font-size: 18px;
+            font-weight: 600;
+            margin-bottom: 12px;
+            padding-bottom: 8px;
+            border-bottom: 2px solid #E6E6E6;
+        }
+        
+        .info-item {
+            margin-bottom: 12px;
+        }
+        
+        .info-label {
+            font-weight: 600;
+            color: #333333;
+            font-size: 13px;
+            text-transform: uppercase;
+            letter-spacing: 0.5px;
+            margin-bottom: 4px;
+        }
+        
+        .info-value {
+            color: #666666;
+            font-size: 14px;
+            line-height: 1.4;
+        }
+        
+        .close-btn {
+            position: absolute;
+            top: 12px;
+            right: 12px;
+            background: none;
+            border: none;
+            font-size: 20px;
+            cursor: pointer;
+            color: #666666;
+            width: 24px;
+            height: 24px;
+            display: flex;
+            align-items: center;
+            justify-content: center;
+            border-radius: 50%;
+        }
+        
+        .close-btn:hover {
+            background: #F1F5F9;
+            color: #333333;
+        }
+        
+        .node-tooltip {
+            position: absolute;
+            background: #333333;
+            color: white;
+            padding: 8px 12px;
+            border-radius: 6px;
+            font-size: 12px;
+            pointer-events: none;
+            z-index: 1000;
+            max-width: 200px;
+            word-wrap: break-word;
+        }
+        
+        .stats-panel {
+            padding: 12px 24px; /* Reduced vertical padding from 16px to 12px */
+            background: #F8F9FA;
+            border-bottom: 1px solid #E6E6E6;
+            display: flex;
+            justify-content: space-around;
+            text-align: center;
+        }
+        
+        .stat-item {
+            flex: 1;
+        }
+        
+        .stat-number {
+            font-size: 24px;
+            font-weight: 700;
+            color: #0A66C2;
+            display: block;
+        }
+        
+                 .stat-label {
+             font-size: 12px;
+             color: #666666;
+             font-weight: 500;
+             text-transform: uppercase;
+             letter-spacing: 0.5px;
+         }
+         
+         kbd {
+             background: #F1F5F9;
+             border: 1px solid #C4CDD5;
+             border-radius: 3px;
+             padding: 2px 6px;
+             font-size: 12px;
+             font-family: monospace;
+             color: #333333;
+         }
+        
+        @media (max-width: 768px) {
+            .header-content {
+                flex-direction: column;
+                align-items: flex-start;
+                gap: 15px;
+            }
+            
+            .controls {
+                width: 100%;
+            }
+            
+            .legend {
+                grid-template-columns: repeat(auto-fit, minmax(120px, 1fr));
+            }
+            
+            .info-panel {
+                position: fixed;
+                top: 20px;
+                left: 20px;
+                right: 20px;
+                transform: none;
+                max-width: none;
+                max-height: 60vh;
+            }
+        }
+    """
+
+VIEWER_JS = """        const hasLayout = Object.keys(layout).length > 0;
+        // Graphs above this size start frozen at their precomputed positions
+        const freezeLayoutAbove = 1000;
+        
+        // Filter state management
+        let activeFilters = new Set(['person', 'skill', 'tool', 'knowledge', 'qualification', 'role', 'workplace', 'methodology', 'other']);
+        let isMultiSelect = false;
+        
+        // Graph setup
+        const containerWidth = document.querySelector('.graph-container').offsetWidth;
+        const width = Math.min(containerWidth * 0.98, 1400); // Increased from 1100 to 1400
+        const height = 800; // Increased from 600 to 800
+        
+        const svg = d3.select("#graph")
+            .attr("width", width)
+            .attr("height", height)
+            .attr("viewBox", `0 0 ${width} ${height}`)
+            .style("max-width", "100%")
+            .style("height", "auto");
+        
+        // Add zoom behavior
+        const zoom = d3.zoom()
+            .scaleExtent([0.3, 3]) // Allow zoom from 30% to 300%
+            .on("zoom", (event) => {
+                const {transform} = event;
+                g.attr("transform", transform);
+            });
+        
+        svg.call(zoom);
+        
+        // Create a group for all graph elements (this will be transformed by zoom)
+        const g = svg.append("g");
+        
+        // Create graph data structure
+        const centerX = width / 2;
+        const centerY = height / 2;
+        
+        const nodes = entities.map(e => ({
+            id: e.id,
+            name: e.name,
+            type: e.type,
+            importance: e.importance,
+            description: e.description,
+            attributes: e.attributes || {},
+            x: layout[e.id] ? centerX + layout[e.id][0] : centerX + (Math.random() - 0.5) * 150,
+            y: layout[e.id] ? centerY + layout[e.id][1] : centerY + (Math.random() - 0.5) * 150
+        }));
+        
+        const links = relationships.map(r => ({
+            source: r.source,
+            target: r.target,
+            type: r.type,
+            strength: r.strength,
+            description: r.description
+        }));
+        
+        // Update skill count
+        const skillCount = nodes.filter(n => n.type === 'skill').length;
+        document.getElementById('skillCount').textContent = skillCount;
+        
+        // Create simulation
+        const simulation = d3.forceSimulation(nodes)
+            .force("link", d3.forceLink(links).id(d => d.id).distance(d => 80 + (10 - d.strength) * 15))
+            .force("charge", d3.forceManyBody().strength(-300))
+            .force("center", d3.forceCenter(centerX, centerY))
+            .force("collision", d3.forceCollide().radius(d => Math.sqrt(d.importance) * 4 + 15)) // Original collision radius
+            .force("x", d3.forceX(centerX).strength(0.15))
+            .force("y", d3.forceY(centerY).strength(0.15));
+        
+        if (hasLayout) {
+            // Positions were settled at generation time: small graphs only get a short polish
+            simulation.alpha(nodes.length > freezeLayoutAbove ? 0 : 0.05);
+        }
+        
+        // Create link elements
+        const link = g.append("g")
+            .selectAll("line")
+            .data(links)
+            .enter().append("line")
+            .attr("stroke", "#C4CDD5")
+            .attr("stroke-opacity", d => 0.3 + (d.strength / 10) * 0.7)
+            .attr("stroke-width", d => 1 + Math.sqrt(d.strength))
+            .on("mouseover", function(event, d) {
+                showTooltip(event, `${d.type}: ${d.description}<br>Strength: ${d.strength}/10`);
+            })
+            .on("mouseout", hideTooltip);
+        
+        // Create node elements
+        const node = g.append("g")
+            .selectAll("circle")
+            .data(nodes)
+            .enter().append("circle")
+            .attr("r", d => Math.sqrt(d.importance) * 4 + 10) // Original node radius
+            .attr("fill", d => colorMap[d.type] || colorMap.default)
+            .attr("stroke", "#FFFFFF")
+            .attr("stroke-width", 2)
+            .style("cursor", "pointer")
+            .style("filter", "drop-shadow(0 2px 4px rgba(0,0,0,0.15))")
+            .on("mouseover", function(event, d) {
+                d3.select(this).transition().duration(200)
+                    .attr("r", Math.sqrt(d.importance) * 5 + 14)
+                    .style("filter", "drop-shadow(0 4px 12px rgba(0,0,0,0.25))");
+                showTooltip(event, `<strong>${d.name}</strong><br>${d.type} • Importance: ${d.importance}/10`);
+            })
+            .on("mouseout", function(event, d) {
+                d3.select(this).transition().duration(200)
+                    .attr("r", Math.sqrt(d.importance) * 4 + 10)
+                    .style("filter", "drop-shadow(0 2px 4px rgba(0,0,0,0.15))");
+                hideTooltip();
+            })
+            .on("click", function(event, d) {
+                showNodeDetails(d);
+            })
+            .call(d3.drag()
+                .on("start", dragstarted)
+                .on("drag", dragged)
+                .on("end", dragended));
+        
+        // Create labels
+        const labels = g.append("g")
+            .selectAll("text")
+            .data(nodes)
+            .enter().append("text")
+            .text(d => d.name.length > 15 ? d.name.substring(0, 15) + '...' : d.name)
+            .attr("font-size", d => Math.max(10, Math.sqrt(d.importance) * 1.5 + 8))
+            .attr("fill", "#333333")
+            .attr("text-anchor", "middle")
+            .attr("dominant-baseline", "central")
+            .attr("dy", "0")
+            .style("font-weight", "500")
+            .style("pointer-events", "none")
+            .style("text-shadow", "1px 1px 2px rgba(255,255,255,0.8)")
+            .style("user-select", "none");
+        
+        // Update positions on simulation tick
+        simulation.on("tick", () => {
+            link
+                .attr("x1", d => d.source.x)
+                .attr("y1", d => d.source.y)
+                .attr("x2", d => d.target.x)
+                .attr("y2", d => d.target.y);
+            
+            node
+                .attr("cx", d => d.x)
+                .attr("cy", d => d.y);
+            
+            labels
+                .attr("x", d => d.x)
+                .attr("y", d => d.y);
+        });
+        
+        // Filter toggle function
+        function toggleFilter(type, event) {
+            isMultiSelect = event.ctrlKey || event.metaKey;
+            
+            if (!isMultiSelect) {
+                // Single select mode - clear all filters and select only this type
+                activeFilters.clear();
+                activeFilters.add(type);
+                
+                // Update legend visual state
+                document.querySelectorAll('.legend-item').forEach(item => {
+                    if (item.dataset.type === type) {
+                        item.classList.add('active');
+                        item.classList.remove('inactive');
+                    } else {
+                        item.classList.remove('active');
+                        item.classList.add('inactive');
+                    }
+                });
+            } else {
+                // Multi-select mode - toggle this type
+                const legendItem = document.querySelector(`.legend-item[data-type="${type}"]`);
+                
+                if (activeFilters.has(type)) {
+                    activeFilters.delete(type);
+                    legendItem.classList.remove('active');
+                    legendItem.classList.add('inactive');
+                } else {
+                    activeFilters.add(type);
+                    legendItem.classList.add('active');
+                    legendItem.classList.remove('inactive');
+                }
+                
+                // If no filters are active, activate all
+                if (activeFilters.size === 0) {
+                    activeFilters = new Set(['person', 'skill', 'tool', 'knowledge', 'qualification', 'role', 'workplace', 'methodology', 'other']);
+                    document.querySelectorAll('.legend-item').forEach(item => {
+                        item.classList.add('active');
+                        item.classList.remove('inactive');
+                    });
+                }
+            }
+            
+            updateGraph();
+        }
+        
+        // Update graph based on active filters
+        function updateGraph() {
+            // Filter nodes
+            node.style("opacity", d => activeFilters.has(d.type) ? 1 : 0.1)
+                .style("pointer-events", d => activeFilters.has(d.type) ? "all" : "none");
+            
+            // Filter labels
+            labels.style("opacity", d => activeFilters.has(d.type) ? 1 : 0.1);
+            
+            // Filter links - show only if both source and target are visible
+            link.style("opacity", d => {
+                const sourceNode = nodes.find(n => n.id === d.source.id || n.id === d.source);
+                const targetNode = nodes.find(n => n.id === d.target.id || n.id === d.target);
+                return (activeFilters.has(sourceNode.type) && activeFilters.has(targetNode.type)) ? 
+                    (0.3 + (d.strength / 10) * 0.7) : 0.05;
+            })
+            .style("pointer-events", d => {
+                const sourceNode = nodes.find(n => n.id === d.source.id || n.id === d.source);
+                const targetNode = nodes.find(n => n.id === d.target.id || n.id === d.target);
+                return (activeFilters.has(sourceNode.type) && activeFilters.has(targetNode.type)) ? "all" : "none";
+            });
+            
+            // Update statistics
+            const visibleNodes = nodes.filter(n => activeFilters.has(n.type));
+            const visibleSkills = visibleNodes.filter(n => n.type === 'skill');
+            const visibleLinks = relationships.filter(r => {
+                const sourceNode = nodes.find(n => n.id === r.source);
+                const targetNode = nodes.find(n => n.id === r.target);
+                return activeFilters.has(sourceNode.type) && activeFilters.has(targetNode.type);
+            });
+            
+            document.getElementById('nodeCount').textContent = visibleNodes.length;
+            document.getElementById('linkCount').textContent = visibleLinks.length;
+            document.getElementById('skillCount').textContent = visibleSkills.length;
+        }
+        
+        // Show node details in side panel
+        function showNodeDetails(node) {
+            const panel = document.getElementById('infoPanel');
+            const title = document.getElementById('infoTitle');
+            const details = document.getElementById('nodeDetails');
+            
+            title.textContent = node.name;
+            
+            let detailsHTML = `
+                <div class="info-item">
+                    <div class="info-label">Type</div>
+                    <div class="info-value">${node.type.charAt(0).toUpperCase() + node.type.slice(1)}</div>
+                </div>
+                <div class="info-item">
+                    <div class="info-label">Importance</div>
+                    <div class="info-value">${node.importance}/10</div>
+                </div>
+                <div class="info-item">
+                    <div class="info-label">Description</div>
+                    <div class="info-value">${node.description}</div>
+                </div>
+            `;
+            
+            // Add attributes if they exist
+            if (node.attributes && Object.keys(node.attributes).length > 0) {
+                Object.entries(node.attributes).forEach(([key, value]) => {
+                    detailsHTML += `
+                        <div class="info-item">
+                            <div class="info-label">${key.replace(/_/g, ' ').replace(/\\b\\w/g, l => l.toUpperCase())}</div>
+                            <div class="info-value">${value}</div>
+                        </div>
+                    `;
+                });
+            }
+            
+            // Add related connections
+            const relatedConnections = relationships.filter(r => r.source === node.id || r.target === node.id);
+            if (relatedConnections.length > 0) {
+                detailsHTML += `
+                    <div class="info-item">
+                        <div class="info-label">Connections</div>
+                        <div class="info-value">
+                `;
+                relatedConnections.forEach(conn => {
+                    const connectedNode = conn.source === node.id ? 
+                        entities.find(e => e.id === conn.target) : 
+                        entities.find(e => e.id === conn.source);
+                    if (connectedNode) {
+                        detailsHTML += `• ${connectedNode.name} (${conn.type})<br>`;
+                    }
+                });
+                detailsHTML += `</div></div>`;
+            }
+            
+            details.innerHTML = detailsHTML;
+            panel.style.display = 'block';
+        }
+        
+        function closeInfoPanel() {
+            document.getElementById('infoPanel').style.display = 'none';
+        }
+        
+        // Tooltip functions
+        function showTooltip(event, content) {
+            const tooltip = document.getElementById("tooltip");
+            tooltip.innerHTML = content;
+            tooltip.style.display = "block";
+            tooltip.style.left = (event.pageX + 10) + "px";
+            tooltip.style.top = (event.pageY + 10) + "px";
+        }
+        
+        function hideTooltip() {
+            document.getElementById("tooltip").style.display = "none";
+        }
+        
+        // Control functions
+        function restartSimulation() {
+            // Only restart the physics simulation without affecting filters
+            simulation.alpha(1).restart();
+            
+            // Ensure the current filter state is maintained
+            setTimeout(() => {
+                updateGraph();
+            }, 100);
+        }
+        
+        function centerGraph() {
+            // Reset any fixed positions
+            nodes.forEach(node => {
+                node.fx = null;
+                node.fy = null;
+            });
+            
+            // Temporarily fix nodes near center
+            nodes.forEach(node => {
+                node.fx = centerX + (Math.random() - 0.5) * 150;
+                node.fy = centerY + (Math.random() - 0.5) * 150;
+            });
+            
+            // Restart simulation with higher alpha for faster convergence
+            simulation.alpha(0.8).alphaTarget(0).restart();
+            
+            // Release fixed positions after animation
+            setTimeout(() => {
+                nodes.forEach(node => {
+                    node.fx = null;
+                    node.fy = null;
+                });
+                simulation.alphaTarget(0);
+                
+                // Maintain current filter state after centering
+                updateGraph();
+            }, 1000);
+        }
+        
+        let labelsVisible = true;
+        function toggleLabels() {
+            labelsVisible = !labelsVisible;
+            if (labelsVisible) {
+                labels.style("opacity", d => activeFilters.has(d.type) ? 1 : 0.1);
+            } else {
+                labels.style("opacity", 0);
+            }
+        }
+        
+        function showAllTypes() {
+            // Reset all filters to active
+            activeFilters = new Set(['person', 'skill', 'tool', 'knowledge', 'qualification', 'role', 'workplace', 'methodology', 'other']);
+            
+            // Update legend visual state
+            document.querySelectorAll('.legend-item').forEach(item => {
+                item.classList.add('active');
+                item.classList.remove('inactive');
+            });
+            
+            // Update graph
+            updateGraph();
+        }
+        
+        // Zoom control functions
+        function zoomIn() {
+            svg.transition().duration(300).call(
+                zoom.scaleBy, 1.5
+            );
+        }
+        
+        function zoomOut() {
+            svg.transition().duration(300).call(
+                zoom.scaleBy, 1 / 1.5
+            );
+        }
+        
+        function resetZoom() {
+            svg.transition().duration(500).call(
+                zoom.transform,
+                d3.zoomIdentity
+            );
+        }
+        
+        function exportGraph() {
+            const graphData = {
+                nodes: nodes,
+                links: links,
+                metadata: {
+                    summary: graphSummary,
+                    exportTime: new Date().toISOString(),
+                    nodeCount: nodes.length,
+                    linkCount: links.length,
+                    skillCount: skillCount
+                }
+            };
+            
+            const dataStr = "data:text/json;charset=utf-8," + encodeURIComponent(JSON.stringify(graphData, null, 2));
+            const downloadElement = document.createElement('a');
+            downloadElement.setAttribute("href", dataStr);
+            downloadElement.setAttribute("download", "professional_knowledge_graph.json");
+            downloadElement.click();
+        }
+        
+        // Drag functions
+        function dragstarted(event, d) {
+            if (!event.active) simulation.alphaTarget(0.3).restart();
+            d.fx = d.x;
+            d.fy = d.y;
+        }
+        
+        function dragged(event, d) {
+            d.fx = event.x;
+            d.fy = event.y;
+        }
+        
+        function dragended(event, d) {
+            if (!event.active) simulation.alphaTarget(0);
+            d.fx = null;
+            d.fy = null;
+        }
+        
+        // Close info panel when clicking outside
+        document.addEventListener('click', function(event) {
+            const panel = document.getElementById('infoPanel');
+            const isClickInsidePanel = panel.contains(event.target);
+            const isClickOnNode = event.target.tagName === 'circle';
+            
+            if (!isClickInsidePanel && !isClickOnNode && panel.style.display === 'block') {
+                closeInfoPanel();
+            }
+        });
+        
+        // Handle window resize
+        function handleResize() {
+            const newContainerWidth = document.querySelector('.graph-container').offsetWidth;
+            const newWidth = Math.min(newContainerWidth * 0.98, 1400); // Updated to match initial settings
+            
+            if (Math.abs(newWidth - width) > 50) {
+                // Update SVG dimensions
+                svg.attr("width", newWidth)
+                   .attr("viewBox", `0 0 ${newWidth} ${height}`);
+                
+                // Update center coordinates
+                const newCenterX = newWidth / 2;
+                
+                // Update forces
+                simulation.force("center", d3.forceCenter(newCenterX, centerY))
+                         .force("x", d3.forceX(newCenterX).strength(0.15))
+                         .alpha(0.3).restart();
+            }
+        }
+        
+        // Add resize listener
+        window.addEventListener('resize', handleResize);
+        
+        // Fit the precomputed layout into the viewport
+        function fitToLayout() {
+            const [minX, maxX] = d3.extent(nodes, n => n.x);
+            const [minY, maxY] = d3.extent(nodes, n => n.y);
+            const scale = Math.max(0.3, Math.min(1, 0.9 / Math.max((maxX - minX + 60) / width, (maxY - minY + 60) / height)));
+            svg.call(zoom.transform, d3.zoomIdentity
+                .translate(width / 2, height / 2)
+                .scale(scale)
+                .translate(-(minX + maxX) / 2, -(minY + maxY) / 2));
+        }
+        
+        if (hasLayout) {
+            fitToLayout();
+        } else {
+            // Initial center after a short delay to ensure proper layout
+            setTimeout(() => {
+                // Only center the graph without affecting the initial filter state
+                const centerX_temp = width / 2;
+                const centerY_temp = height / 2;
+            
+                nodes.forEach(node => {
+                    node.fx = centerX_temp + (Math.random() - 0.5) * 150;
+                    node.fy = centerY_temp + (Math.random() - 0.5) * 150;
+                });
+            
+                simulation.alpha(0.5).restart();
+            
+                setTimeout(() => {
+                    nodes.forEach(node => {
+                        node.fx = null;
+                        node.fy = null;
+                    });
+                }, 800);
+            }, 500);
+        }
+        
+        console.log("Professional Knowledge Graph loaded successfully!");
+        console.log(`Nodes: ${nodes.length}, Links: ${links.length}, Skills: ${skillCount}`);
+        console.log("Filter Features:");
+        console.log("  • Click category badges to filter by type");
+        console.log("  • Hold Ctrl/Cmd for multi-select");
+        console.log("  • Use 'Show All' to reset filters");
+    """
+
+# Graphs with at least this many entities get the canvas viewer below instead of the SVG one
+LARGE_GRAPH_THRESHOLD = 1500
+
+# Canvas viewer with level of detail for large graphs: communities (or entity types) are drawn as
+# aggregate nodes that open on click or zoom, labels are culled by on-screen size, and only what is
+# inside the viewport is drawn. It defines the same global functions the page controls call.
+VIEWER_LARGE_JS = """        const hasLayout = Object.keys(layout).length > 0;
+        // Level of detail: communities (or types) are drawn as aggregate nodes until they are clicked,
+        // or zoomed in far enough for their members to be told apart; labels are culled by zoom
+        const minClusterSize = 3;
+        const expandRadius = 8;     // on-screen radius of its members at which a cluster opens on zoom
+        const expandSpacing = 14;   // ... provided they are at least this many pixels apart
+        const labelBudget = 250;    // labels drawn per frame at most
+        const labelMinRadius = 5;   // nodes smaller than this on screen get no label
+        const allTypes = ['person', 'skill', 'tool', 'knowledge', 'qualification', 'role', 'workplace', 'methodology', 'other'];
+        
+        // Filter state management
+        let activeFilters = new Set(allTypes);
+        let isMultiSelect = false;
+        let labelsVisible = true;
+        let clusterBy = entities.some(e => e.attributes && e.attributes.community !== undefined) ? 'community' : 'type';
+        const expandedClusters = new Set();
+        const collapsedClusters = new Set();
+        let autoExpanded = new Set();
+        
+        // Graph setup
+        const containerWidth = document.querySelector('.graph-container').offsetWidth;
+        const width = Math.min(containerWidth * 0.98, 1400);
+        const height = 800;
+        
+        // The page shell holds the SVG of the small-graph viewer; this viewer draws on a canvas instead
+        const canvas = document.createElement('canvas');
+        canvas.id = 'graph';
+        document.getElementById('graph').replaceWith(canvas);
+        canvas.width = Math.round(width * (window.devicePixelRatio || 1));
+        canvas.height = Math.round(height * (window.devicePixelRatio || 1));
+        canvas.style.width = width + 'px';
+        canvas.style.maxWidth = '100%';
+        canvas.style.height = 'auto';
+        const context = canvas.getContext('2d');
+        
+        const radius = d => Math.sqrt(Math.max(0, d.importance)) * 4 + 10;
+        const colorOf = type => colorMap[type] || colorMap.default;
+        const spread = Math.sqrt(entities.length) * 40;
+        
+        const nodes = entities.map((e, index) => ({
+            index: index,
+            uid: 'n' + index,
+            id: e.id,
+            name: String(e.name || e.id),
+            type: e.type,
+            importance: +e.importance || 0,
+            description: e.description,
+            attributes: e.attributes || {},
+            x: layout[e.id] ? layout[e.id][0] : (Math.random() - 0.5) * spread,
+            y: layout[e.id] ? layout[e.id][1] : (Math.random() - 0.5) * spread
+        }));
+        nodes.forEach(n => { n.radius = radius(n); n.homeX = n.x; n.homeY = n.y; });
+        const nodeById = new Map(nodes.map(n => [n.id, n]));
+        
+        const links = [];
+        const linksOf = new Map(nodes.map(n => [n, []]));
+        relationships.forEach(r => {
+            const source = nodeById.get(r.source);
+            const target = nodeById.get(r.target);
+            if (!source || !target) return;
+            const l = {source: source, target: target, type: r.type, strength: +r.strength || 5, description: r.description};
+            links.push(l);
+            linksOf.get(source).push(l);
+            linksOf.get(target).push(l);
+        });
+        
+        const skillCount = nodes.filter(n => n.type === 'skill').length;
+        document.getElementById('skillCount').textContent = skillCount;
+        
+        // ---- clusters
+        const clusters = [];
+        const clusterOf = new Array(nodes.length).fill(null);
+        
+        function buildClusters() {
+            const groups = new Map();
+            nodes.forEach(n => {
+                const key = clusterBy === 'community' ? n.attributes.community : n.type;
+                if (key === undefined || key === null) return;
+                if (!groups.has(key)) groups.set(key, []);
+                groups.get(key).push(n);
+            });
+            clusters.length = 0;
+            clusterOf.fill(null);
+            expandedClusters.clear();
+            collapsedClusters.clear();
+            autoExpanded = new Set();
+            groups.forEach((members, key) => {
+                if (members.length < minClusterSize) return;
+                const cluster = {uid: 'c' + clusters.length, key: key, members: members, aggregate: true};
+                members.forEach(n => { clusterOf[n.index] = cluster; });
+                
+                const typeCounts = new Map();
+                members.forEach(n => typeCounts.set(n.type, (typeCounts.get(n.type) || 0) + 1));
+                cluster.type = [...typeCounts.entries()].sort((a, b) => b[1] - a[1])[0][0];
+                const top = members.reduce((best, n) => n.importance > best.importance ? n : best, members[0]);
+                cluster.name = clusterBy === 'type' ?
+                    `${key.charAt(0).toUpperCase() + key.slice(1)} (${members.length})` :
+                    `${top.name} +${members.length - 1}`;
+                cluster.baseRadius = Math.sqrt(members.length) * 5 + 14;
+                cluster.memberRadius = d3.mean(members, n => n.radius);
+                clusters.push(cluster);
+            });
+            placeClusters();
+        }
+        
+        function placeClusters() {
+            clusters.forEach(cluster => {
+                let sumX = 0, sumY = 0, minX = Infinity, minY = Infinity, maxX = -Infinity, maxY = -Infinity;
+                cluster.members.forEach(n => {
+                    sumX += n.x; sumY += n.y;
+                    minX = Math.min(minX, n.x); maxX = Math.max(maxX, n.x);
+                    minY = Math.min(minY, n.y); maxY = Math.max(maxY, n.y);
+                });
+                cluster.x = sumX / cluster.members.length;
+                cluster.y = sumY / cluster.members.length;
+                cluster.extent = [minX, minY, maxX, maxY];
+                // Average distance between neighbouring members, used to open the cluster on zoom
+                cluster.spacing = Math.sqrt(Math.max((maxX - minX) * (maxY - minY), 1) / cluster.members.length);
+            });
+            // Aggregates grow with the room each cluster has in the layout, so they stay visible when fitted
+            const [minX, maxX] = d3.extent(nodes, n => n.x);
+            const [minY, maxY] = d3.extent(nodes, n => n.y);
+            const room = Math.sqrt((maxX - minX) * (maxY - minY) / Math.max(1, clusters.length));
+            const growth = Math.max(1, 0.25 * room / (d3.mean(clusters, c => c.baseRadius) || 1));
+            clusters.forEach(cluster => { cluster.radius = cluster.baseRadius * growth; });
+            if (clusterBy === 'type') {
+                // Types are scattered over the whole layout, so their aggregates go on a ring instead
+                const ring = Math.max(200, (maxX - minX) * 0.3);
+                clusters.forEach((cluster, position) => {
+                    const angle = 2 * Math.PI * position / clusters.length;
+                    cluster.x = ring * Math.cos(angle);
+                    cluster.y = ring * Math.sin(angle);
+                });
+            }
+        }
+        
+        // ---- what is drawn: nodes on their own, members of open clusters and closed cluster aggregates
+        let items = [];
+        let itemEdges = [];
+        const itemOf = new Array(nodes.length);
+        let quadtree = null;
+        let maxItemRadius = 0;
+        
+        const isActive = n => activeFilters.has(n.type);
+        
+        function rebuildItems() {
+            clusters.forEach(cluster => {
+                cluster.expanded = !collapsedClusters.has(cluster.key) &&
+                    (expandedClusters.has(cluster.key) || autoExpanded.has(cluster.key));
+                cluster.activeCount = cluster.members.reduce((count, n) => count + (isActive(n) ? 1 : 0), 0);
+                cluster.active = cluster.activeCount > 0;
+            });
+            items = [];
+            nodes.forEach(n => {
+                const cluster = clusterOf[n.index];
+                n.active = isActive(n);
+                itemOf[n.index] = cluster && !cluster.expanded ? cluster : n;
+                if (itemOf[n.index] === n) items.push(n);
+            });
+            clusters.forEach(cluster => { if (!cluster.expanded) items.push(cluster); });
+            
+            // Relationships between aggregates are merged into one edge per pair
+            const merged = new Map();
+            itemEdges = [];
+            links.forEach(l => {
+                const a = itemOf[l.source.index];
+                const b = itemOf[l.target.index];
+                if (a === b || !a.active || !b.active || !(l.source.active && l.target.active)) return;
+                if (!a.aggregate && !b.aggregate) {
+                    itemEdges.push({a: a, b: b, weight: 1});
+                    return;
+                }
+                const key = a.uid < b.uid ? a.uid + '|' + b.uid : b.uid + '|' + a.uid;
+                const edge = merged.get(key);
+                if (edge) edge.weight += 1;
+                else {
+                    const created = {a: a, b: b, weight: 1};
+                    merged.set(key, created);
+                    itemEdges.push(created);
+                }
+            });
+            maxItemRadius = d3.max(items, d => d.radius) || 0;
+            quadtree = null;
+        }
+        
+        function updateAutoExpansion() {
+            const k = transform.k;
+            const [x0, y0] = transform.invert([0, 0]);
+            const [x1, y1] = transform.invert([canvas.clientWidth, canvas.clientHeight]);
+            const next = new Set();
+            clusters.forEach(cluster => {
+                const [minX, minY, maxX, maxY] = cluster.extent;
+                if (cluster.memberRadius * k >= expandRadius && cluster.spacing * k >= expandSpacing &&
+                    maxX >= x0 && minX <= x1 && maxY >= y0 && minY <= y1) {
+                    next.add(cluster.key);
+                }
+            });
+            if (next.size !== autoExpanded.size || [...next].some(key => !autoExpanded.has(key))) {
+                autoExpanded = next;
+                rebuildItems();
+            }
+        }
+        
+        // ---- drawing, only when something changed
+        let transform = d3.zoomIdentity;
+        let drawPending = false;
+        
+        function scheduleDraw() {
+            if (!drawPending) {
+                drawPending = true;
+                requestAnimationFrame(draw);
+            }
+        }
+        
+        function draw() {
+            drawPending = false;
+            const cssWidth = canvas.clientWidth;
+            const cssHeight = canvas.clientHeight;
+            const pixels = canvas.width / cssWidth;
+            const k = transform.k;
+            context.setTransform(1, 0, 0, 1, 0, 0);
+            context.clearRect(0, 0, canvas.width, canvas.height);
+            context.setTransform(pixels * k, 0, 0, pixels * k, pixels * transform.x, pixels * transform.y);
+            
+            // Viewport culling
+            const [x0, y0] = transform.invert([0, 0]);
+            const [x1, y1] = transform.invert([cssWidth, cssHeight]);
+            const visible = d => d.x + d.radius >= x0 && d.x - d.radius <= x1 && d.y + d.radius >= y0 && d.y - d.radius <= y1;
+            const onScreen = items.filter(visible);
+            
+            // Edges, in a few width bands so each band is a single path
+            context.strokeStyle = "#C4CDD5";
+            context.globalAlpha = 0.6;
+            const bands = [[], [], [], []];
+            itemEdges.forEach(e => {
+                if (!visible(e.a) && !visible(e.b)) return;
+                bands[Math.min(3, Math.floor(Math.log2(e.weight) / 2))].push(e);
+            });
+            bands.forEach((band, level) => {
+                if (!band.length) return;
+                context.lineWidth = (1 + 1.5 * level) / k;
+                context.beginPath();
+                band.forEach(e => { context.moveTo(e.a.x, e.a.y); context.lineTo(e.b.x, e.b.y); });
+                context.stroke();
+            });
+            
+            // Nodes, one path per color
+            const groups = new Map();
+            onScreen.forEach(d => {
+                const key = (d.active ? '' : '~') + colorOf(d.type);
+                if (!groups.has(key)) groups.set(key, []);
+                groups.get(key).push(d);
+            });
+            groups.forEach((group, key) => {
+                context.globalAlpha = key.startsWith('~') ? 0.1 : 1;
+                context.fillStyle = key.replace('~', '');
+                context.beginPath();
+                group.forEach(d => { context.moveTo(d.x + d.radius, d.y); context.arc(d.x, d.y, d.radius, 0, 2 * Math.PI); });
+                context.fill();
+            });
+            
+            // Aggregates get a ring and their member count
+            context.globalAlpha = 1;
+            context.strokeStyle = "#FFFFFF";
+            context.lineWidth = 3 / k;
+            context.beginPath();
+            onScreen.forEach(d => {
+                if (d.aggregate) { context.moveTo(d.x + d.radius - 4, d.y); context.arc(d.x, d.y, d.radius - 4, 0, 2 * Math.PI); }
+            });
+            context.stroke();
+            
+            context.setTransform(pixels, 0, 0, pixels, 0, 0);
+            if (labelsVisible) drawLabels(onScreen);
+        }
+        
+        function drawLabels(onScreen) {
+            const k = transform.k;
+            const candidates = onScreen.filter(d => d.active && (d.aggregate || d.radius * k >= labelMinRadius));
+            candidates.sort((a, b) => (b.aggregate ? 1e6 + b.members.length : b.importance) -
+                                      (a.aggregate ? 1e6 + a.members.length : a.importance));
+            // Coarse screen grid of occupied cells keeps labels from overlapping
+            const cell = 12;
+            const occupied = new Set();
+            let drawn = 0;
+            context.textAlign = "center";
+            context.textBaseline = "middle";
+            context.lineWidth = 3;
+            context.strokeStyle = "rgba(255,255,255,0.8)";
+            context.fillStyle = "#333333";
+            for (const d of candidates) {
+                if (drawn >= labelBudget) break;
+                const [sx, sy] = transform.apply([d.x, d.y]);
+                const text = d.name.length > 18 ? d.name.substring(0, 18) + '...' : d.name;
+                const size = d.aggregate ? 13 : Math.max(10, Math.min(14, Math.sqrt(d.importance) * 1.5 + 8));
+                const halfWidth = text.length * size * 0.3;
+                const cells = [];
+                for (let cx = Math.floor((sx - halfWidth) / cell); cx <= Math.floor((sx + halfWidth) / cell); cx++) {
+                    for (let cy = Math.floor((sy - size / 2) / cell); cy <= Math.floor((sy + size / 2) / cell); cy++) {
+                        cells.push(cx + ',' + cy);
+                    }
+                }
+                if (cells.some(c => occupied.has(c))) continue;
+                cells.forEach(c => occupied.add(c));
+                context.font = `${d.aggregate ? 600 : 500} ${size}px 'Segoe UI', 'Helvetica Neue', Arial, sans-serif`;
+                context.strokeText(text, sx, sy);
+                context.fillText(text, sx, sy);
+                drawn++;
+            }
+        }
+        
+        // ---- pointer interaction
+        let hovered = null;
+        
+        function itemAt(event) {
+            if (!quadtree) quadtree = d3.quadtree(items, d => d.x, d => d.y);
+            const [px, py] = d3.pointer(event, canvas);
+            const [x, y] = transform.invert([px, py]);
+            let found = null;
+            let best = Infinity;
+            const reach = maxItemRadius;
+            quadtree.visit((quad, qx0, qy0, qx1, qy1) => {
+                if (!quad.length) {
+                    let leaf = quad;
+                    do {
+                        const d = leaf.data;
+                        const distance = Math.hypot(d.x - x, d.y - y);
+                        if (distance <= d.radius && distance < best) { best = distance; found = d; }
+                    } while ((leaf = leaf.next));
+                }
+                return qx0 > x + reach || qx1 < x - reach || qy0 > y + reach || qy1 < y - reach;
+            });
+            return found;
+        }
+        
+        function tooltipFor(d) {
+            if (d.aggregate) {
+                return `<strong>${d.name}</strong><br>${d.members.length} entities • click to expand`;
+            }
+            return `<strong>${d.name}</strong><br>${d.type} • Importance: ${d.importance}/10`;
+        }
+        
+        canvas.addEventListener('mousemove', event => {
+            const d = itemAt(event);
+            canvas.style.cursor = d ? 'pointer' : 'default';
+            hovered = d;
+            if (d) showTooltip(event, tooltipFor(d));
+            else hideTooltip();
+        });
+        canvas.addEventListener('mouseleave', () => { hovered = null; hideTooltip(); });
+        canvas.addEventListener('click', event => {
+            const d = itemAt(event);
+            if (!d) return;
+            if (d.aggregate) {
+                collapsedClusters.delete(d.key);
+                expandedClusters.add(d.key);
+                hideTooltip();
+                rebuildItems();
+                scheduleDraw();
+            } else if (event.shiftKey && clusterOf[d.index]) {
+                // Shift+click folds an open cluster back into its aggregate
+                const cluster = clusterOf[d.index];
+                expandedClusters.delete(cluster.key);
+                collapsedClusters.add(cluster.key);
+                rebuildItems();
+                scheduleDraw();
+            } else {
+                showNodeDetails(d);
+            }
+        });
+        
+        const zoom = d3.zoom()
+            .scaleExtent([0.02, 8])
+            .on("zoom", (event) => {
+                transform = event.transform;
+                updateAutoExpansion();
+                scheduleDraw();
+            });
+        const canvasSelection = d3.select(canvas).call(zoom);
+        
+        // Without precomputed positions the layout is simulated here, redrawing as it settles
+        let simulation = null;
+        function startSimulation(alpha) {
+            if (simulation) simulation.stop();
+            simulation = d3.forceSimulation(nodes)
+                .force("link", d3.forceLink(links).distance(d => 80 + (10 - d.strength) * 15))
+                .force("charge", d3.forceManyBody().strength(-300))
+                .force("collision", d3.forceCollide().radius(d => d.radius + 5))
+                .force("x", d3.forceX(0).strength(0.15))
+                .force("y", d3.forceY(0).strength(0.15))
+                .alpha(alpha)
+                .on("tick", () => { placeClusters(); quadtree = null; scheduleDraw(); })
+                .on("end", () => { fitToLayout(); updateAutoExpansion(); });
+        }
+        
+        // Filter toggle function
+        function toggleFilter(type, event) {
+            isMultiSelect = event.ctrlKey || event.metaKey;
+            
+            if (!isMultiSelect) {
+                // Single select mode - clear all filters and select only this type
+                activeFilters.clear();
+                activeFilters.add(type);
+                
+                document.querySelectorAll('.legend-item').forEach(item => {
+                    const selected = item.dataset.type === type;
+                    item.classList.toggle('active', selected);
+                    item.classList.toggle('inactive', !selected);
+                });
+            } else {
+                // Multi-select mode - toggle this type
+                const legendItem = document.querySelector(`.legend-item[data-type="${type}"]`);
+                if (activeFilters.has(type)) activeFilters.delete(type);
+                else activeFilters.add(type);
+                legendItem.classList.toggle('active', activeFilters.has(type));
+                legendItem.classList.toggle('inactive', !activeFilters.has(type));
+                
+                // If no filters are active, activate all
+                if (activeFilters.size === 0) {
+                    showAllTypes();
+                    return;
+                }
+            }
+            
+            updateGraph();
+        }
+        
+        // Update graph based on active filters
+        function updateGraph() {
+            rebuildItems();
+            scheduleDraw();
+            
+            const visibleNodes = nodes.filter(n => n.active);
+            document.getElementById('nodeCount').textContent = visibleNodes.length;
+            document.getElementById('linkCount').textContent = links.filter(l => l.source.active && l.target.active).length;
+            document.getElementById('skillCount').textContent = visibleNodes.filter(n => n.type === 'skill').length;
+        }
+        
+        // Show node details in side panel
+        function showNodeDetails(node) {
+            const panel = document.getElementById('infoPanel');
+            document.getElementById('infoTitle').textContent = node.name;
+            
+            let detailsHTML = `
+                <div class="info-item">
+                    <div class="info-label">Type</div>
+                    <div class="info-value">${node.type.charAt(0).toUpperCase() + node.type.slice(1)}</div>
+                </div>
+                <div class="info-item">
+                    <div class="info-label">Importance</div>
+                    <div class="info-value">${node.importance}/10</div>
+                </div>
+                <div class="info-item">
+                    <div class="info-label">Description</div>
+                    <div class="info-value">${node.description}</div>
+                </div>
+            `;
+            Object.entries(node.attributes).forEach(([key, value]) => {
+                const label = key.split('_').map(word => word.charAt(0).toUpperCase() + word.slice(1)).join(' ');
+                detailsHTML += `
+                    <div class="info-item">
+                        <div class="info-label">${label}</div>
+                        <div class="info-value">${value}</div>
+                    </div>
+                `;
+            });
+            
+            const connections = linksOf.get(node);
+            if (connections.length > 0) {
+                detailsHTML += `<div class="info-item"><div class="info-label">Connections</div><div class="info-value">`;
+                connections.slice(0, 100).forEach(conn => {
+                    const other = conn.source === node ? conn.target : conn.source;
+                    detailsHTML += `• ${other.name} (${conn.type})<br>`;
+                });
+                if (connections.length > 100) detailsHTML += `… and ${connections.length - 100} more`;
+                detailsHTML += `</div></div>`;
+            }
+            
+            document.getElementById('nodeDetails').innerHTML = detailsHTML;
+            panel.style.display = 'block';
+        }
+        
+        function closeInfoPanel() {
+            document.getElementById('infoPanel').style.display = 'none';
+        }
+        
+        // Tooltip functions
+        function showTooltip(event, content) {
+            const tooltip = document.getElementById("tooltip");
+            tooltip.innerHTML = content;
+            tooltip.style.display = "block";
+            tooltip.style.left = (event.pageX + 10) + "px";
+            tooltip.style.top = (event.pageY + 10) + "px";
+        }
+        
+        function hideTooltip() {
+            document.getElementById("tooltip").style.display = "none";
+        }
+        
+        // Control functions
+        function restartSimulation() {
+            // Back to the initial positions with every cluster closed
+            nodes.forEach(n => { n.x = n.homeX; n.y = n.homeY; });
+            buildClusters();
+            rebuildItems();
+            if (hasLayout) {
+                fitToLayout();
+            } else {
+                startSimulation(1);
+            }
+            scheduleDraw();
+        }
+        
+        function centerGraph() {
+            canvasSelection.transition().duration(500).call(zoom.transform, fitTransform());
+        }
+        
+        function toggleLabels() {
+            labelsVisible = !labelsVisible;
+            scheduleDraw();
+        }
+        
+        function toggleClusterMode() {
+            clusterBy = clusterBy === 'community' ? 'type' : 'community';
+            document.getElementById('clusterModeButton').textContent =
+                clusterBy === 'community' ? 'Group by Type' : 'Group by Community';
+            buildClusters();
+            rebuildItems();
+            updateAutoExpansion();
+            scheduleDraw();
+        }
+        
+        function showAllTypes() {
+            activeFilters = new Set(allTypes);
+            document.querySelectorAll('.legend-item').forEach(item => {
+                item.classList.add('active');
+                item.classList.remove('inactive');
+            });
+            updateGraph();
+        }
+        
+        // Zoom control functions
+        function zoomIn() {
+            canvasSelection.transition().duration(300).call(zoom.scaleBy, 1.5);
+        }
+        
+        function zoomOut() {
+            canvasSelection.transition().duration(300).call(zoom.scaleBy, 1 / 1.5);
+        }
+        
+        function resetZoom() {
+            canvasSelection.transition().duration(500).call(zoom.transform, fitTransform());
+        }
+        
+        function exportGraph() {
+            const graphData = {
+                nodes: nodes.map(n => ({id: n.id, name: n.name, type: n.type, importance: n.importance,
+                                        description: n.description, attributes: n.attributes, x: n.x, y: n.y})),
+                links: links.map(l => ({source: l.source.id, target: l.target.id, type: l.type,
+                                        strength: l.strength, description: l.description})),
+                metadata: {
+                    summary: graphSummary,
+                    exportTime: new Date().toISOString(),
+                    nodeCount: nodes.length,
+                    linkCount: links.length,
+                    skillCount: skillCount
+                }
+            };
+            
+            const blob = new Blob([JSON.stringify(graphData, null, 2)], {type: "application/json"});
+            const downloadElement = document.createElement('a');
+            downloadElement.setAttribute("href", URL.createObjectURL(blob));
+            downloadElement.setAttribute("download", "professional_knowledge_graph.json");
+            downloadElement.click();
+        }
+        
+        // Close info panel when clicking outside
+        document.addEventListener('click', function(event) {
+            const panel = document.getElementById('infoPanel');
+            const isClickInsidePanel = panel.contains(event.target);
+            const isClickOnNode = event.target === canvas && hovered && !hovered.aggregate;
+            
+            if (!isClickInsidePanel && !isClickOnNode && panel.style.display === 'block') {
+                closeInfoPanel();
+            }
+        });
+        
+        window.addEventListener('resize', scheduleDraw);
+        
+        // Fit the whole layout into the viewport
+        function fitTransform() {
+            const [minX, maxX] = d3.extent(nodes, n => n.x);
+            const [minY, maxY] = d3.extent(nodes, n => n.y);
+            const viewWidth = canvas.clientWidth || width;
+            const viewHeight = canvas.clientHeight || height;
+            const scale = Math.max(0.02, Math.min(1, 0.9 / Math.max((maxX - minX + 60) / viewWidth, (maxY - minY + 60) / viewHeight)));
+            return d3.zoomIdentity
+                .translate(viewWidth / 2, viewHeight / 2)
+                .scale(scale)
+                .translate(-(minX + maxX) / 2, -(minY + maxY) / 2);
+        }
+        
+        function fitToLayout() {
+            canvasSelection.call(zoom.transform, fitTransform());
+        }
+        
+        // Large-graph controls and hint next to the regular ones
+        const clusterButton = document.createElement('button');
+        clusterButton.id = 'clusterModeButton';
+        clusterButton.className = 'linkedin-btn secondary';
+        clusterButton.textContent = clusterBy === 'community' ? 'Group by Type' : 'Group by Community';
+        clusterButton.setAttribute('onclick', 'toggleClusterMode()');
+        document.querySelector('.controls').appendChild(clusterButton);
+        const hint = document.createElement('div');
+        hint.style.cssText = 'margin-top: 12px; font-size: 13px; color: #666666;';
+        hint.textContent = `Large graph (${nodes.length} entities): related entities are grouped into clusters. ` +
+            'Click a cluster or zoom in to expand it; Shift+click an entity to fold its cluster again.';
+        document.querySelector('.controls').after(hint);
+        
+        buildClusters();
+        rebuildItems();
+        if (hasLayout) {
+            fitToLayout();
+        } else {
+            fitToLayout();
+            startSimulation(1);
+        }
+        updateGraph();
+        
+        console.log("Professional Knowledge Graph loaded successfully (canvas level-of-detail viewer)!");
+        console.log(`Nodes: ${nodes.length}, Links: ${links.length}, Clusters: ${clusters.length} by ${clusterBy}`);
+    """
+
+# Content hash in the asset names: a changed viewer gets a new URL, an unchanged one stays cached
+VIEWER_VERSION = hashlib.sha256((VIEWER_CSS + VIEWER_JS + VIEWER_LARGE_JS).encode('utf-8')).hexdigest()[:10]
+VIEWER_CSS_FILE = f"kg-viewer.{VIEWER_VERSION}.css"
+VIEWER_JS_FILE = f"kg-viewer.{VIEWER_VERSION}.js"
+VIEWER_LARGE_JS_FILE = f"kg-viewer-large.{VIEWER_VERSION}.js"
+
+_PAGE_HTML = """
+
+<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Professional Knowledge Graph</title>
+    <script src="https://d3js.org/d3.v7.min.js"></script>
+    {{styles}}
+</head>
+</head>
+<body>
+    <div class="linkedin-header">
+        <div class="container">
+            <div class="header-content">
+                <div class="logo-section">
+                    <div class="linkedin-logo">in</div>
+                    <div>
+                        <div class="title">Professional Knowledge Graph</div>
+                        <div class="subtitle">Skills & Competencies Visualization</div>
+                    </div>
+                </div>
+            </div>
+        </div>
+    </div>
+
+    <div class="container">
+        <div class="main-content">
+            <div class="stats-panel">
+                <div class="stat-item">
+                    <span class="stat-number" id="nodeCount">{{node_count}}</span>
+                    <span class="stat-label">Skills & Entities</span>
+                </div>
+                <div class="stat-item">
+                    <span class="stat-number" id="linkCount">{{link_count}}</span>
+                    <span class="stat-label">Connections</span>
+                </div>
+                <div class="stat-item">
+                    <span class="stat-number" id="skillCount">-</span>
+                    <span class="stat-label">Core Skills</span>
+                </div>
+            </div>
+            
+                         <div class="content-header">
+                 <div class="summary">{{summary}}</div>
+                 
+                 <div style="background: #E7F3FF; padding: 12px; border-radius: 8px; margin: 15px 0; font-size: 14px; color: #0A66C2;">
+                     <strong>Interactive Controls:</strong> Click category badges below to filter by type. Hold <kbd>Ctrl</kbd> (or <kbd>Cmd</kbd> on Mac) for multi-select. Use mouse wheel to zoom in/out and drag to pan.
+                 </div>
+                 
+                                  <div class="controls">
+                     <button class="linkedin-btn" onclick="restartSimulation()">
+                         Reset Layout
+                     </button>
+                     <button class="linkedin-btn secondary" onclick="centerGraph()">
+                         Center View
+                     </button>
+                     <button class="linkedin-btn secondary" onclick="zoomIn()">
+                         Zoom In
+                     </button>
+                     <button class="linkedin-btn secondary" onclick="zoomOut()">
+                         Zoom Out
+                     </button>
+                     <button class="linkedin-btn secondary" onclick="resetZoom()">
+                         Reset Zoom
+                     </button>
+                     <button class="linkedin-btn secondary" onclick="toggleLabels()">
+                         Toggle Labels
+                     </button>
+                     <button class="linkedin-btn secondary" onclick="showAllTypes()">
+                         Show All
+                     </button>
+                     <button class="linkedin-btn secondary" onclick="exportGraph()">
+                         Export Data
+                     </button>
+                 </div>
+                
+                                 <div class="legend">
+                     <div class="legend-item active" data-type="person" onclick="toggleFilter('person', event)">
+                         <div class="legend-color" style="background-color: {{color_person}};"></div>
+                         <span>Person</span>
+                     </div>
+                     <div class="legend-item active" data-type="skill" onclick="toggleFilter('skill', event)">
+                         <div class="legend-color" style="background-color: {{color_skill}};"></div>
+                         <span>Skills</span>
+                     </div>
+                     <div class="legend-item active" data-type="tool" onclick="toggleFilter('tool', event)">
+                         <div class="legend-color" style="background-color: {{color_tool}};"></div>
+                         <span>Tools</span>
+                     </div>
+                     <div class="legend-item active" data-type="knowledge" onclick="toggleFilter('knowledge', event)">
+                         <div class="legend-color" style="background-color: {{color_knowledge}};"></div>
+                         <span>Knowledge</span>
+                     </div>
+                     <div class="legend-item active" data-type="qualification" onclick="toggleFilter('qualification', event)">
+                         <div class="legend-color" style="background-color: {{color_qualification}};"></div>
+                         <span>Qualifications</span>
+                     </div>
+                     <div class="legend-item active" data-type="role" onclick="toggleFilter('role', event)">
+                         <div class="legend-color" style="background-color: {{color_role}};"></div>
+                         <span>Roles</span>
+                     </div>
+                     <div class="legend-item active" data-type="workplace" onclick="toggleFilter('workplace', event)">
+                         <div class="legend-color" style="background-color: {{color_workplace}};"></div>
+                         <span>Workplace</span>
+                     </div>
+                     <div class="legend-item active" data-type="methodology" onclick="toggleFilter('methodology', event)">
+                         <div class="legend-color" style="background-color: {{color_methodology}};"></div>
+                         <span>Methodology</span>
+                     </div>
+                     <div class="legend-item active" data-type="other" onclick="toggleFilter('other', event)">
+                         <div class="legend-color" style="background-color: {{color_other}};"></div>
+                         <span>Other</span>
+                     </div>
+                 </div>
+            </div>
+            
+            <div class="graph-container">
+                <svg id="graph"></svg>
+            </div>
+        </div>
+    </div>
+    
+    <div class="info-panel" id="infoPanel">
+        <button class="close-btn" onclick="closeInfoPanel()">×</button>
+        <h3 id="infoTitle">Node Information</h3>
+        <div id="nodeDetails"></div>
+    </div>
+    
+    <div class="node-tooltip" id="tooltip"></div>
+
+{{data}}
+{{viewer}}
+</body>
+</html>
+        """
+
+_SPLIT_LOADER_JS = """
+        // Graph data lives in a separate compact file so the viewer script can be shared and cached
+        (async function loadGraph() {
+            let response;
+            try {
+                response = await fetch({{data_file}});
+                if (!response.ok) throw new Error(`HTTP ${response.status}`);
+            } catch (error) {
+                // Chromium and others block fetch() of sibling files for pages opened from disk
+                const hint = location.protocol === 'file:'
+                    ? ' Split-mode pages must be served over HTTP, e.g. run "python -m http.server" in this directory.'
+                    : '';
+                const message = document.createElement('p');
+                message.className = 'load-error';
+                message.textContent = `Could not load the graph data (${error.message}).${hint}`;
+                document.body.prepend(message);
+                return;
+            }
+            let bytes = new Uint8Array(await response.arrayBuffer());
+            // Gzipped data files are inflated here unless the server already did it
+            if (bytes[0] === 0x1f && bytes[1] === 0x8b) {
+                const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream('gzip'));
+                bytes = new Uint8Array(await new Response(stream).arrayBuffer());
+            }
+            const payload = JSON.parse(new TextDecoder().decode(bytes));
+            const expand = item => {
+                const {t, ...rest} = item;
+                if (t !== undefined) rest.type = payload.types[t];
+                return rest;
+            };
+            window.entities = payload.entities.map(expand);
+            window.relationships = payload.relationships.map(expand);
+            window.colorMap = payload.colorMap;
+            window.layout = payload.layout || {};
+            window.graphSummary = payload.summary;
+            const viewer = document.createElement('script');
+            viewer.src = "{{viewer_js}}";
+            document.body.appendChild(viewer);
+        })();
+"""
+
+_PLACEHOLDER_PATTERN = re.compile(r'\{\{(\w+)\}\}')
+
+
+class CompiledTemplate:
+    """Template split once into literal text and {{name}} placeholders"""
+
+    def __init__(self, text: str, **static_values: str):
+        parts = _PLACEHOLDER_PATTERN.split(text)
+        # Placeholders known at compile time are folded into the literal text right away
+        merged = [parts[0]]
+        for index in range(1, len(parts), 2):
+            name, literal = parts[index], parts[index + 1]
+            if name in static_values:
+                merged[-1] += static_values[name] + literal
+            else:
+                merged.extend([name, literal])
+        self.parts = merged
+
+    def render(self, **values: str) -> str:
+        output = []
+        for index, part in enumerate(self.parts):
+            output.append(values[part] if index % 2 else part)
+        return "".join(output)
+
+    def render_to(self, stream: TextIO, **values: Any) -> None:
+        """Write the template to stream; a value is a string or an iterable of string chunks"""
+        for index, part in enumerate(self.parts):
+            value = values[part] if index % 2 else part
+            if isinstance(value, str):
+                stream.write(value)
+            else:
+                for chunk in value:
+                    stream.write(chunk)
+
+
+PAGE_TEMPLATE = CompiledTemplate(_PAGE_HTML, **{f"color_{entity_type}": color for entity_type, color in COLOR_MAP.items()})
+SPLIT_LOADER_TEMPLATE = CompiledTemplate(_SPLIT_LOADER_JS)
+
+
+def script_json(value: Any) -> str:
+    """Compact JSON that is safe to embed inside a <script> element"""
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':')).replace('</', '<\\/')
+
+
+def iter_script_json(value: Any, chunk_items: int = STREAM_CHUNK_ITEMS) -> Iterator[str]:
+    """script_json of a list or dict in chunks of chunk_items elements; other values in one piece"""
+    if isinstance(value, dict):
+        opening, closing = "{", "}"
+        items = (f"{script_json(str(key))}:{script_json(item)}" for key, item in value.items())
+    elif isinstance(value, (list, tuple)):
+        opening, closing = "[", "]"
+        items = (script_json(item) for item in value)
+    else:
+        yield script_json(value)
+        return
+    separator = ""
+    while True:
+        chunk = list(islice(items, chunk_items))
+        if not chunk:
+            break
+        yield opening + separator + ",".join(chunk)
+        opening, separator = "", ","
+    yield opening + closing
+
+
+def uses_large_viewer(node_count: int) -> bool:
+    """Whether a graph of node_count entities is rendered with the canvas level-of-detail viewer"""
+    return node_count >= LARGE_GRAPH_THRESHOLD
+
+
+def _page_fields(node_count: int, link_count: int, summary: str) -> Dict[str, str]:
+    return {"node_count": str(node_count), "link_count": str(link_count), "summary": html.escape(str(summary))}
+
+
+def _inline_data(entities: List[Dict[str, Any]], relationships: List[Dict[str, Any]],
+                 summary: str, layout: Dict[str, List[float]]) -> Iterator[str]:
+    yield "    <script>\n        // Data from Python\n"
+    for name, value in (("entities", entities), ("relationships", relationships), ("colorMap", COLOR_MAP),
+                        ("layout", layout), ("graphSummary", summary)):
+        yield f"        const {name} = "
+        yield from iter_script_json(value)
+        yield ";\n"
+    yield "    </script>"
+
+
+def write_inline_page(stream: TextIO, entities: List[Dict[str, Any]], relationships: List[Dict[str, Any]],
+                      summary: str, layout: Dict[str, List[float]]) -> None:
+    """Stream the self-contained page, with the viewer and the graph data inlined, to a text stream"""
+    PAGE_TEMPLATE.render_to(
+        stream,
+        styles=f"    <style>{VIEWER_CSS}</style>",
+        data=_inline_data(entities, relationships, summary, layout),
+        viewer=f"    <script>\n{VIEWER_LARGE_JS if uses_large_viewer(len(entities)) else VIEWER_JS}</script>",
+        **_page_fields(len(entities), len(relationships), summary)
+    )
+
+
+def render_inline_page(entities: List[Dict[str, Any]], relationships: List[Dict[str, Any]],
+                       summary: str, layout: Dict[str, List[float]]) -> str:
+    """Self-contained page with the viewer and the graph data inlined"""
+    page = io.StringIO()
+    write_inline_page(page, entities, relationships, summary, layout)
+    return page.getvalue()
+
+
+def render_split_page(data_file: str, node_count: int, link_count: int, summary: str) -> str:
+    """Page shell referencing a separate data file and the shared viewer assets
+
+    The page must be served over HTTP; opened from file:// it shows how to do that instead of the graph.
+    """
+    viewer_js = VIEWER_LARGE_JS_FILE if uses_large_viewer(node_count) else VIEWER_JS_FILE
+    # A percent-encoded URL as a JS string literal: no quotes, backslashes or "</script>" can reach the page
+    data_url = json.dumps(urllib.parse.quote(data_file))
+    return PAGE_TEMPLATE.render(
+        styles=f'    <link rel="stylesheet" href="{VIEWER_CSS_FILE}">',
+        data=f"    <script>{SPLIT_LOADER_TEMPLATE.render(data_file=data_url, viewer_js=viewer_js)}    </script>",
+        viewer="",
+        **_page_fields(node_count, link_count, summary)
+    )
+
+
+def encode_graph_payload(entities: List[Dict[str, Any]], relationships: List[Dict[str, Any]],
+                         summary: str, layout: Dict[str, List[float]]) -> Dict[str, Any]:
+    """Split-mode data: entity and relationship type strings are interned into one table"""
+    types = []
+    type_index = {}
+
+    def intern(item: Dict[str, Any]) -> Dict[str, Any]:
+        if 'type' not in item:
+            return item
+        compact = {key: value for key, value in item.items() if key != 'type'}
+        item_type = str(item['type'])
+        if item_type not in type_index:
+            type_index[item_type] = len(types)
+            types.append(item_type)
+        compact['t'] = type_index[item_type]
+        return compact
+
+    return {
+        "version": PAYLOAD_VERSION,
+        "entities": [intern(entity) for entity in entities],
+        "relationships": [intern(relationship) for relationship in relationships],
+        "types": types,
+        "colorMap": COLOR_MAP,
+        "layout": layout,
+        "summary": summary
+    }
+
+
+def create_temp_file(path: str) -> tuple:
+    """(fd, path) of a new uniquely named file beside path, so concurrent writers never share one"""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.tmp')
+    # mkstemp creates the file readable by the owner only. Keep the mode of the file being replaced,
+    # or make new pages and assets world-readable (reading the umask would mean changing it process-wide)
+    try:
+        mode = os.stat(path).st_mode & 0o777
+    except FileNotFoundError:
+        mode = 0o644
+    os.chmod(tmp_path, mode)
+    return fd, tmp_path
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    fd, tmp_path = create_temp_file(path)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+@contextmanager
+def open_output(path: str, compress: bool = False) -> Iterator[TextIO]:
+    """
+    Text stream to a temporary file that replaces path once the block completes
+
+    Args:
+        path: Final file path; left untouched if the block raises
+        compress: Gzip the stream (deterministic output, no timestamp in the header)
+    """
+    fd, tmp_path = create_temp_file(path)
+    raw = os.fdopen(fd, 'wb')
+    try:
+        binary = gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=6, mtime=0) if compress else raw
+        with io.TextIOWrapper(binary, encoding='utf-8', newline='') as stream:
+            yield stream
+        raw.close()
+        os.replace(tmp_path, path)
+    except BaseException:
+        raw.close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def write_viewer_assets(output_dir: str) -> None:
+    """Write the versioned viewer CSS/JS into output_dir unless this version is already there"""
+    for name, content in ((VIEWER_CSS_FILE, VIEWER_CSS), (VIEWER_JS_FILE, VIEWER_JS),
+                          (VIEWER_LARGE_JS_FILE, VIEWER_LARGE_JS)):
+        path = os.path.join(output_dir, name)
+        if not os.path.exists(path):
+            _write_atomic(path, content.encode('utf-8'))
+
+
+def write_graph_payload(path: str, payload: Dict[str, Any], compress: bool = False) -> None:
+    """Stream minified graph data to path, gzipped when compress is set"""
+    with open_output(path, compress) as stream:
+        separator = "{"
+        for key, value in payload.items():
+            stream.write(f"{separator}{script_json(key)}:")
+            for chunk in iter_script_json(value):
+                stream.write(chunk)
+            separator = ","
+        stream.write("}")